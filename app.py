@@ -40,7 +40,7 @@ def create_app(config_name=None):
     resources={r"/api/*": {"origins": "*"}}, 
     methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],  
-    expose_headers=[], 
+    expose_headers=["Server-Timing", "X-DB-Queries"], 
     supports_credentials=False 
 )
 
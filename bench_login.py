@@ -0,0 +1,113 @@
+"""
+Benchmark de login: logins por segundo contra la base de datos configurada
+
+Simula la ola de inicios de sesión de los lunes: varios hilos hacen
+``POST /api/auth/login`` con el cliente de pruebas de Flask (sin red, pero
+con MySQL, el hash de la contraseña y la emisión de tokens reales) y se
+reporta el rendimiento, la latencia y las consultas SQL por login (cabecera
+``X-DB-Queries``).
+
+Usar un usuario de prueba (ver create_test_user.py). Con ``--fallidos`` se
+mide el camino de contraseña incorrecta, que bloquea al usuario: al terminar
+se le restablecen los intentos.
+
+Uso:
+    python bench_login.py --documento 12345008 --password Admin123!
+    python bench_login.py --documento 12345008 --password Admin123! --hilos 8 --segundos 20
+    python bench_login.py --documento 12345008 --password x --fallidos
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from app import create_app
+from database import execute_query
+
+
+def trabajador(app, cuerpo, fin, resultados, lock):
+    cliente = app.test_client()
+    latencias, consultas, codigos = [], [], {}
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        respuesta = cliente.post('/api/auth/login', json=cuerpo)
+        latencias.append(time.perf_counter() - inicio)
+        codigos[respuesta.status_code] = codigos.get(respuesta.status_code, 0) + 1
+        if respuesta.headers.get('X-DB-Queries'):
+            consultas.append(int(respuesta.headers['X-DB-Queries']))
+    with lock:
+        resultados['latencias'].extend(latencias)
+        resultados['consultas'].extend(consultas)
+        for codigo, total in codigos.items():
+            resultados['codigos'][codigo] = resultados['codigos'].get(codigo, 0) + total
+
+
+def percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de POST /api/auth/login')
+    parser.add_argument('--tipo', default='1', help='IdTipoDocumento del usuario de prueba')
+    parser.add_argument('--documento', required=True, help='Número de documento del usuario de prueba')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--hilos', type=int, default=4)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--fallidos', action='store_true', help='Medir logins con contraseña incorrecta')
+    args = parser.parse_args()
+
+    app = create_app()
+    cuerpo = {
+        'document_type': args.tipo,
+        'document_number': args.documento,
+        'password': args.password + ('-incorrecta' if args.fallidos else ''),
+    }
+
+    # Calentamiento: conexiones del pool y primera carga de cachés
+    respuesta = app.test_client().post('/api/auth/login', json=cuerpo)
+    if not args.fallidos and respuesta.status_code != 200:
+        print(f"❌ El login de prueba falló ({respuesta.status_code}): {respuesta.get_json()}")
+        sys.exit(1)
+
+    resultados = {'latencias': [], 'consultas': [], 'codigos': {}}
+    lock = threading.Lock()
+    fin = time.perf_counter() + args.segundos
+    hilos = [
+        threading.Thread(target=trabajador, args=(app, cuerpo, fin, resultados, lock))
+        for _ in range(args.hilos)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias = sorted(resultados['latencias'])
+    total = len(latencias)
+    print(f"Logins: {total} en {duracion:.1f} s con {args.hilos} hilos "
+          f"({'contraseña incorrecta' if args.fallidos else 'exitosos'})")
+    print(f"Rendimiento: {total / duracion:.1f} logins/s")
+    if latencias:
+        print(f"Latencia: media {statistics.mean(latencias) * 1000:.1f} ms · "
+              f"p50 {percentil(latencias, 0.5) * 1000:.1f} ms · "
+              f"p95 {percentil(latencias, 0.95) * 1000:.1f} ms · "
+              f"p99 {percentil(latencias, 0.99) * 1000:.1f} ms")
+    if resultados['consultas']:
+        print(f"Consultas SQL por login: {statistics.mean(resultados['consultas']):.2f}")
+    print(f"Códigos HTTP: {dict(sorted(resultados['codigos'].items()))}")
+
+    if args.fallidos:
+        with app.app_context():
+            execute_query("""
+                UPDATE usuario u
+                JOIN habitantes h ON h.IdHabitante = u.IdHabitante
+                SET u.login_attempts = 0, u.locked_until = NULL
+                WHERE h.NumeroDocumento = %s AND h.IdTipoDocumento = %s
+            """, (args.documento, args.tipo))
+        print("Intentos del usuario de prueba restablecidos")
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,81 @@ class Config:
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD')
     MYSQL_DB = os.environ.get('MYSQL_DB')
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT') or 3306)
+
+    # Pool de conexiones MySQL
+    DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 1))
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))  # segundos esperando conexión libre
+    DB_POOL_MAX_IDLE_SECONDS = int(os.environ.get('DB_POOL_MAX_IDLE_SECONDS', 300))
+    DB_POOL_MAX_LIFETIME_SECONDS = int(os.environ.get('DB_POOL_MAX_LIFETIME_SECONDS', 3600))
+    DB_POOL_PING = os.environ.get('DB_POOL_PING', 'true').lower() in ('1', 'true', 'yes')
+    DB_STREAM_FETCH_SIZE = int(os.environ.get('DB_STREAM_FETCH_SIZE', 500))  # filas por lectura en streaming
+
+    # Consultas concurrentes de dashboards (run_parallel)
+    DB_PARALLEL_WORKERS = int(os.environ.get('DB_PARALLEL_WORKERS', 4))  # se limita a DB_POOL_MAX_SIZE - 1
+    DB_PARALLEL_TIMEOUT = float(os.environ.get('DB_PARALLEL_TIMEOUT', 10))  # segundos por consulta
+    DB_BATCH_POOL_MAX_SIZE = int(os.environ.get('DB_BATCH_POOL_MAX_SIZE', 2))  # conexiones multi-sentencia (batch_select)
+
+    # Instrumentación de consultas
+    DB_SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 200))  # umbral del log de consultas lentas
+    DB_QUERY_STATS_MAX_FINGERPRINTS = int(os.environ.get('DB_QUERY_STATS_MAX_FINGERPRINTS', 500))
+
+    # Caché de resultados (execute_query/batch_select con tags=...)
+    DB_CACHE_ENABLED = os.environ.get('DB_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    DB_CACHE_MAX_ENTRIES = int(os.environ.get('DB_CACHE_MAX_ENTRIES', 1000))
+    DB_CACHE_DEFAULT_TTL = float(os.environ.get('DB_CACHE_DEFAULT_TTL', 60))  # segundos
+
+    # Paginación por clave de los listados (utils.paginar)
+    PAGINATION_DEFAULT_PAGE_SIZE = int(os.environ.get('PAGINATION_DEFAULT_PAGE_SIZE', 50))
+    PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 200))
+    PAGINATION_TOTAL_TTL = float(os.environ.get('PAGINATION_TOTAL_TTL', 60))  # segundos del total aproximado en caché
+
+    # Índice en memoria para búsquedas de habitantes (services.habitante_index)
+    SEARCH_INDEX_ENABLED = os.environ.get('SEARCH_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SEARCH_INDEX_REFRESH_SECONDS = int(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', 300))  # reconstrucción completa
+    SEARCH_MIN_SIMILARITY = float(os.environ.get('SEARCH_MIN_SIMILARITY', 0.7))  # umbral de coincidencias aproximadas
+
+    # Autocompletado de grupos familiares, jefes y padres (services.autocomplete_index)
+    AUTOCOMPLETE_ENABLED = os.environ.get('AUTOCOMPLETE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    AUTOCOMPLETE_REFRESH_SECONDS = int(os.environ.get('AUTOCOMPLETE_REFRESH_SECONDS', 300))  # reconstrucción completa
+    AUTOCOMPLETE_MAX_K = int(os.environ.get('AUTOCOMPLETE_MAX_K', 20))  # máximo de sugerencias por consulta
+
+    # Bitmaps de habitantes por sacramento, sector y sexo (services.sacramento_index)
+    SACRAMENTO_INDEX_ENABLED = os.environ.get('SACRAMENTO_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SACRAMENTO_INDEX_REFRESH_SECONDS = int(os.environ.get('SACRAMENTO_INDEX_REFRESH_SECONDS', 300))  # reconstrucción completa
+    SACRAMENTO_INDEX_WAIT_SECONDS = float(os.environ.get('SACRAMENTO_INDEX_WAIT_SECONDS', 5))  # espera de la primera carga
+
+    # Snapshots del dashboard global /api/estadisticas/resumen/ (services.dashboard_snapshots)
+    DASHBOARD_SNAPSHOT_ENABLED = os.environ.get('DASHBOARD_SNAPSHOT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    DASHBOARD_SNAPSHOT_SOFT_TTL = float(os.environ.get('DASHBOARD_SNAPSHOT_SOFT_TTL', 60))  # después se refresca en segundo plano
+    DASHBOARD_SNAPSHOT_HARD_TTL = float(os.environ.get('DASHBOARD_SNAPSHOT_HARD_TTL', 900))  # después el request espera el cálculo
+    DASHBOARD_SNAPSHOT_MAX_ENTRIES = int(os.environ.get('DASHBOARD_SNAPSHOT_MAX_ENTRIES', 100))  # juegos de filtros por worker
+
+    # Columnas de habitantes en NumPy para estadísticas demográficas (services.demografia)
+    DEMOGRAFIA_ENABLED = os.environ.get('DEMOGRAFIA_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    DEMOGRAFIA_REFRESH_SECONDS = int(os.environ.get('DEMOGRAFIA_REFRESH_SECONDS', 600))  # reconstrucción completa
+    DEMOGRAFIA_WAIT_SECONDS = float(os.environ.get('DEMOGRAFIA_WAIT_SECONDS', 0))  # 0 = usar SQL mientras carga
+
+    # Reportes en segundo plano /api/estadisticas/jobs/ (services.reporte_jobs)
+    REPORT_JOBS_FOLDER = os.environ.get('REPORT_JOBS_FOLDER') or os.path.join(os.environ.get('UPLOAD_FOLDER') or 'uploads', 'reportes')
+    REPORT_JOBS_WORKERS = int(os.environ.get('REPORT_JOBS_WORKERS', 2))  # hilos por proceso
+    REPORT_JOBS_MAX_PENDING = int(os.environ.get('REPORT_JOBS_MAX_PENDING', 20))  # en cola por proceso, después 503
+    REPORT_JOBS_TTL_SECONDS = int(os.environ.get('REPORT_JOBS_TTL_SECONDS', 3600))  # reutilización del archivo
+    REPORT_JOBS_TIMEOUT_SECONDS = int(os.environ.get('REPORT_JOBS_TIMEOUT_SECONDS', 1800))  # sin terminar = error
+
+    # Permisos efectivos por usuario en memoria (utils.resolver_permisos)
+    PERMISOS_CACHE_TTL = float(os.environ.get('PERMISOS_CACHE_TTL', 300))  # otros workers ven cambios en este plazo
+    PERMISOS_CACHE_MAX_USERS = int(os.environ.get('PERMISOS_CACHE_MAX_USERS', 1000))
+    PERMISOS_VERSION_TTL = float(os.environ.get('PERMISOS_VERSION_TTL', 30))  # relectura de permisos_version (tokens viejos)
+
+    # Hash de contraseñas (PBKDF2) en procesos aparte (utils.password_hasher)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # procesos por worker; 0 = en el hilo del request
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))  # en cola por worker, después 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # espera máxima del request
+
+    # Detector de N+1: misma consulta repetida más de N veces en un request (0 = desactivado)
+    DB_N_PLUS_ONE_THRESHOLD = int(os.environ.get('DB_N_PLUS_ONE_THRESHOLD', 5))
+    DB_N_PLUS_ONE_RAISE = False  # True = el request falla con NPlusOneError
     
     # Configuración de JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'fallback-secret-key')
@@ -62,6 +137,7 @@ class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
     DEBUG = True
     TESTING = False
+    DB_N_PLUS_ONE_RAISE = os.environ.get('DB_N_PLUS_ONE_RAISE', 'false').lower() in ('1', 'true', 'yes')
 
 class ProductionConfig(Config):
     """Configuración para producción"""
@@ -73,6 +149,7 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     MYSQL_DB = 'test_gestion_eclesial'
+    DB_N_PLUS_ONE_RAISE = True
 
 # Diccionario de configuraciones
 config = {
@@ -2,5 +2,21 @@
 Inicialización del módulo de base de datos
 """
 from .db_mysql import *
+from .instrumentation import (
+    fingerprint, get_request_query_stats, get_query_stats, reset_query_stats,
+    NPlusOneError, allow_repeated_queries
+)
+from .parallel import run_parallel, QueryTimeoutError
+from .cache import invalidate_tags, tables_written, table_generation, get_cache_stats, clear_query_cache
 
-__all__ = ['init_db', 'get_db_connection', 'close_db_connection', 'execute_query']
+__all__ = [
+    'init_db', 'get_db_connection', 'close_db_connection', 'execute_query',
+    'execute_many', 'bulk_insert', 'batch_select', 'QuerySpec',
+    'iter_query', 'StreamingResult',
+    'transaction', 'in_transaction',
+    'ConnectionPool', 'PoolTimeoutError', 'get_pool', 'get_pool_metrics',
+    'fingerprint', 'get_request_query_stats', 'get_query_stats', 'reset_query_stats',
+    'NPlusOneError', 'allow_repeated_queries',
+    'run_parallel', 'QueryTimeoutError',
+    'invalidate_tags', 'tables_written', 'table_generation', 'get_cache_stats', 'clear_query_cache'
+]
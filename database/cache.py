@@ -0,0 +1,253 @@
+"""
+Caché en memoria de resultados de consultas
+Cada entrada declara las tablas (tags) de las que depende; toda escritura
+que pasa por ``execute_query``/``execute_many`` invalida las entradas de las
+tablas que modifica. La caché es por proceso: con varios workers, el TTL
+acota cuánto puede tardar otro worker en ver un cambio.
+"""
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, has_app_context
+
+# Tablas que modifica una escritura: INSERT/REPLACE INTO t, DELETE FROM t, UPDATE t [JOIN u]
+_RE_ESCRITURA = re.compile(
+    r'^\s*(?:(?:INSERT|REPLACE)\s+(?:IGNORE\s+)?(?:INTO\s+)?(?P<ins>[`\w.]+)'
+    r'|DELETE\s+(?:\w+\s+)?FROM\s+(?P<del>[`\w.]+)'
+    r'|UPDATE\s+(?:IGNORE\s+)?(?P<upd>.+?)\s+SET\b)',
+    re.I | re.S
+)
+_RE_TABLAS_UPDATE = re.compile(r'(?:^|,|\bJOIN)\s*([`\w.]+)', re.I)
+
+
+def _normalizar_tabla(nombre):
+    return nombre.replace('`', '').split('.')[-1].lower()
+
+
+def tables_written(sql):
+    """
+    Retorna las tablas que modifica una sentencia de escritura
+
+    Args:
+        sql (str): Sentencia INSERT/REPLACE/UPDATE/DELETE
+
+    Returns:
+        set[str]: Nombres de tabla en minúsculas (vacío si no es escritura)
+    """
+    m = _RE_ESCRITURA.match(sql)
+    if not m:
+        return set()
+    if m['ins'] or m['del']:
+        return {_normalizar_tabla(m['ins'] or m['del'])}
+    return {_normalizar_tabla(t) for t in _RE_TABLAS_UPDATE.findall(m['upd'])}
+
+
+class QueryCache:
+    """Caché LRU con TTL por entrada e índice de tags para invalidar"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()      # clave -> (valor, expira_en, tags)
+        self._por_tag = {}              # tag -> set(claves)
+        self._generacion = {}           # tag -> número de invalidaciones
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _quitar(self, clave):
+        _, _, tags = self._data.pop(clave)
+        for tag in tags:
+            claves = self._por_tag.get(tag)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_tag[tag]
+
+    def get(self, clave):
+        """Retorna ``(True, valor)`` si la clave está vigente, si no ``(False, None)``"""
+        with self._lock:
+            entrada = self._data.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return False, None
+            if entrada[1] <= time.monotonic():
+                self._quitar(clave)
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(clave)
+            self.hits += 1
+            valor = entrada[0]
+        return True, copy.deepcopy(valor)
+
+    def generation(self, tags):
+        """Huella de invalidaciones de ``tags``, para detectar escrituras durante una carga"""
+        with self._lock:
+            return tuple(self._generacion.get(t.lower(), 0) for t in tags)
+
+    def set(self, clave, valor, tags, ttl, generacion=None):
+        """Guarda ``valor``; no lo hace si los tags se invalidaron desde ``generacion``"""
+        valor = copy.deepcopy(valor)
+        with self._lock:
+            if generacion is not None and generacion != tuple(self._generacion.get(t.lower(), 0) for t in tags):
+                return
+            tags = frozenset(t.lower() for t in tags)
+            if clave in self._data:
+                self._quitar(clave)
+            while len(self._data) >= self.max_entries:
+                self._quitar(next(iter(self._data)))
+                self.evictions += 1
+            self._data[clave] = (valor, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._por_tag.setdefault(tag, set()).add(clave)
+
+    def invalidate(self, tags):
+        """Elimina las entradas que dependen de alguno de los ``tags``"""
+        with self._lock:
+            claves = set()
+            for tag in tags:
+                tag = tag.lower()
+                self._generacion[tag] = self._generacion.get(tag, 0) + 1
+                claves |= self._por_tag.get(tag, set())
+            for clave in claves:
+                self._quitar(clave)
+            self.invalidations += len(claves)
+            return len(claves)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._por_tag.clear()
+
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'tags': len(self._por_tag),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / consultas, 4) if consultas else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+_cache = QueryCache()
+
+
+def cache_enabled():
+    return has_app_context() and current_app.config.get('DB_CACHE_ENABLED', True)
+
+
+def _congelar(valor):
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def cache_key(*partes):
+    """Clave hashable a partir de la consulta y sus parámetros (None si no se puede)"""
+    clave = _congelar(partes)
+    try:
+        hash(clave)
+    except TypeError:
+        return None
+    return clave
+
+
+def cached(clave, tags, ttl, cargar):
+    """
+    Retorna el valor en caché o lo calcula con ``cargar()`` y lo guarda
+
+    Args:
+        clave (tuple): Clave de la entrada (ver ``cache_key``)
+        tags (list[str]): Tablas de las que depende el resultado
+        ttl (float): Segundos de vigencia (por defecto ``DB_CACHE_DEFAULT_TTL``)
+        cargar (callable): Función que obtiene el valor de la base de datos
+
+    Returns:
+        El valor en caché o el recién cargado
+    """
+    if clave is None or not cache_enabled():
+        return cargar()
+
+    _cache.max_entries = current_app.config.get('DB_CACHE_MAX_ENTRIES', _cache.max_entries)
+    encontrado, valor = _cache.get(clave)
+    if encontrado:
+        g.db_cache_hits = g.get('db_cache_hits', 0) + 1
+        return valor
+
+    # Si otra escritura invalida los tags mientras se carga, el valor no se guarda
+    generacion = _cache.generation(tags)
+    valor = cargar()
+    # Dentro de una transacción el resultado puede incluir escrituras sin confirmar
+    if not g.get('db_tx_depth', 0):
+        ttl = ttl or current_app.config.get('DB_CACHE_DEFAULT_TTL', 60)
+        _cache.set(clave, valor, tags, ttl, generacion)
+    return valor
+
+
+def invalidate_tags(tags):
+    """
+    Invalida las entradas de las tablas indicadas
+
+    Dentro de ``transaction()`` se repite al confirmar, para descartar lo que
+    otro request haya cacheado entre la escritura y el COMMIT.
+
+    Args:
+        tags (iterable[str]): Tablas modificadas
+
+    Returns:
+        int: Entradas eliminadas
+    """
+    tags = set(tags)
+    if not tags:
+        return 0
+    if has_app_context() and g.get('db_tx_depth', 0):
+        g.setdefault('db_tx_tags', set()).update(tags)
+    return _cache.invalidate(tags)
+
+
+def invalidate_written(sql):
+    """Invalida las tablas que modifica la sentencia ``sql``"""
+    return invalidate_tags(tables_written(sql))
+
+
+def flush_transaction_tags(commit):
+    """Llamada al cerrar la transacción exterior: reinvalida si hubo COMMIT"""
+    tags = g.pop('db_tx_tags', None)
+    if commit and tags:
+        _cache.invalidate(tags)
+
+
+def table_generation(tags):
+    """
+    Contador de escrituras de las tablas indicadas
+
+    Cambia cada vez que una escritura (en este proceso) invalida alguna de
+    ellas, aunque la caché esté desactivada; sirve como número de versión
+    para cachés propias que dependen de esas tablas.
+
+    Args:
+        tags (iterable[str]): Tablas
+
+    Returns:
+        tuple: Huella comparable con ``==``
+    """
+    return _cache.generation(tags)
+
+
+def get_cache_stats():
+    """Retorna los contadores de la caché de consultas"""
+    return _cache.stats()
+
+
+def clear_query_cache():
+    """Vacía la caché de consultas"""
+    _cache.clear()
@@ -2,100 +2,766 @@
 Configuración y manejo de conexiones a MySQL
 Utiliza PyMySQL para la conexión a la base de datos
 """
+import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
 import pymysql
+from pymysql.constants import CLIENT, SERVER_STATUS
 from flask import current_app, g
 import logging
 
+from .instrumentation import add_timing_headers, check_repeated_query, record_connection_wait, record_query
+from .cache import cache_key, cached, flush_transaction_tags, invalidate_written
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera"""
+
+
+QuerySpec = namedtuple('QuerySpec', ['sql', 'params', 'fetch_one', 'timeout'])
+QuerySpec.__new__.__defaults__ = (None, False, None)
+QuerySpec.__doc__ = """
+Consulta con nombre para ``run_parallel`` y ``batch_select``
+
+    sql (str): SELECT a ejecutar
+    params (tuple): Parámetros para la consulta
+    fetch_one (bool): Si debe retornar solo un registro
+    timeout (float): Segundos máximos (solo ``run_parallel``)
+"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones PyMySQL seguro para hilos.
+
+    Mantiene entre ``min_size`` y ``max_size`` conexiones abiertas, verifica
+    cada conexión con un ping al entregarla, cierra las conexiones inactivas
+    por encima del mínimo y recicla las que superan su tiempo de vida.
+    Las conexiones se abren bajo demanda; ``min_size`` es el número de
+    conexiones que se conservan aunque estén inactivas.
+    """
+
+    METRICS_WINDOW = 60
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, timeout=5.0,
+                 max_idle=300, max_lifetime=3600, ping_on_checkout=True):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size), self.min_size)
+        self.timeout = float(timeout)
+        self.max_idle = float(max_idle)
+        self.max_lifetime = float(max_lifetime)
+        self.ping_on_checkout = ping_on_checkout
+
+        self._cond = threading.Condition()
+        self._idle = deque()        # (conexion, creada_en, liberada_en)
+        self._in_use = {}           # id(conexion) -> creada_en
+        self._pid = os.getpid()
+
+        # Métricas
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_checkouts = deque()
+        self._started_at = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Ciclo de vida de conexiones
+    # ------------------------------------------------------------
+    def _connect(self):
+        return pymysql.connect(**self.connect_kwargs)
+
+    def _reconnect(self, conn):
+        """Reabre una conexión caída conservando su cupo en el pool"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        try:
+            conn.connect()
+        except Exception:
+            self.release(conn, discard=True)
+            raise
+        with self._cond:
+            self._created += 1
+            self._in_use[id(conn)] = time.monotonic()
+
+    def _close_quietly(self, conn):
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _check_fork(self):
+        """Después de un fork (gunicorn --preload) no se comparten sockets"""
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._in_use.clear()
+            self._pid = os.getpid()
+
+    def _reap_locked(self, now):
+        """Cierra conexiones inactivas o vencidas manteniendo el mínimo"""
+        total = len(self._idle) + len(self._in_use)
+        kept = deque()
+        while self._idle:
+            conn, created_at, released_at = self._idle.popleft()
+            expired = now - created_at > self.max_lifetime
+            too_idle = now - released_at > self.max_idle and total > self.min_size
+            if expired or too_idle:
+                self._close_quietly(conn)
+                total -= 1
+            else:
+                kept.append((conn, created_at, released_at))
+        self._idle = kept
+
+    def reap(self):
+        """Aplica las políticas de inactividad y tiempo de vida"""
+        with self._cond:
+            self._reap_locked(time.monotonic())
+
+    def acquire(self):
+        """
+        Entrega una conexión del pool, creando una nueva si hay capacidad
+
+        Raises:
+            PoolTimeoutError: Si no se libera ninguna conexión a tiempo
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            self._check_fork()
+            while True:
+                now = time.monotonic()
+                self._reap_locked(now)
+
+                if self._idle:
+                    conn, created_at, _ = self._idle.pop()
+                    self._in_use[id(conn)] = created_at
+                    break
+
+                if len(self._in_use) < self.max_size:
+                    # Reservar el cupo antes de conectar fuera del candado
+                    placeholder = object()
+                    self._in_use[id(placeholder)] = now
+                    self._cond.release()
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._cond.acquire()
+                        self._in_use.pop(id(placeholder), None)
+                        self._cond.notify()
+                        raise
+                    self._cond.acquire()
+                    self._in_use.pop(id(placeholder), None)
+                    self._in_use[id(conn)] = time.monotonic()
+                    self._created += 1
+                    break
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Sin conexiones disponibles tras {self.timeout:.1f}s "
+                        f"({len(self._in_use)}/{self.max_size} en uso)"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._record_checkout(started, waited)
+
+        if self.ping_on_checkout:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                logging.warning("Conexión del pool inválida, se reconecta")
+                self._reconnect(conn)
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            conn: Conexión entregada por ``acquire``
+            discard (bool): Si debe cerrarse en lugar de reutilizarse
+        """
+        if not discard:
+            try:
+                # No reutilizar transacciones abiertas (ni su snapshot de lectura)
+                if conn.open and conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            now = time.monotonic()
+            if (discard or created_at is None or not conn.open
+                    or now - created_at > self.max_lifetime):
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra todas las conexiones inactivas"""
+        with self._cond:
+            while self._idle:
+                conn, _, _ = self._idle.popleft()
+                self._close_quietly(conn)
+
+    # ------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------
+    def _trim_recent(self, now, window):
+        while self._recent_checkouts and now - self._recent_checkouts[0] > window:
+            self._recent_checkouts.popleft()
+
+    def _record_checkout(self, started, waited):
+        now = time.monotonic()
+        self._checkouts += 1
+        self._recent_checkouts.append(now)
+        self._trim_recent(now, self.METRICS_WINDOW)
+        if waited:
+            elapsed = now - started
+            self._waits += 1
+            self._wait_total += elapsed
+            self._wait_max = max(self._wait_max, elapsed)
+
+    def metrics(self, window=None):
+        """
+        Retorna el estado actual del pool
+
+        Args:
+            window (int): Ventana en segundos para calcular entregas por segundo
+                (como máximo ``METRICS_WINDOW``)
+
+        Returns:
+            dict: Conexiones en uso, inactivas, tiempos de espera y tasa de entregas
+        """
+        with self._cond:
+            now = time.monotonic()
+            window = min(window or self.METRICS_WINDOW, self.METRICS_WINDOW)
+            self._trim_recent(now, self.METRICS_WINDOW)
+            recent = sum(1 for t in self._recent_checkouts if now - t <= window)
+            span = min(window, max(now - self._started_at, 1e-9))
+            return {
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'created': self._created,
+                'discarded': self._discarded,
+                'checkouts': self._checkouts,
+                'checkouts_per_second': round(recent / span, 3),
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_avg_ms': round(self._wait_total / self._waits * 1000, 3) if self._waits else 0.0,
+                'wait_time_max_ms': round(self._wait_max * 1000, 3),
+            }
+
+
+def _build_connect_kwargs(app_config):
+    return {
+        'host': app_config['MYSQL_HOST'],
+        'user': app_config['MYSQL_USER'],
+        'password': app_config['MYSQL_PASSWORD'],
+        'database': app_config['MYSQL_DB'],
+        'port': app_config['MYSQL_PORT'],
+        'charset': 'utf8mb4',
+        'cursorclass': pymysql.cursors.DictCursor,
+        'autocommit': False,
+    }
+
+
 def init_db(app):
     """
     Inicializa la configuración de la base de datos
-    
+
     Args:
         app (Flask): Instancia de la aplicación Flask
     """
+    app.extensions['db_pool'] = ConnectionPool(
+        _build_connect_kwargs(app.config),
+        min_size=app.config.get('DB_POOL_MIN_SIZE', 1),
+        max_size=app.config.get('DB_POOL_MAX_SIZE', 10),
+        timeout=app.config.get('DB_POOL_TIMEOUT', 5),
+        max_idle=app.config.get('DB_POOL_MAX_IDLE_SECONDS', 300),
+        max_lifetime=app.config.get('DB_POOL_MAX_LIFETIME_SECONDS', 3600),
+        ping_on_checkout=app.config.get('DB_POOL_PING', True),
+    )
+    # Pool aparte para batch_select: solo estas conexiones aceptan varias
+    # sentencias por viaje, el resto del código no puede apilar consultas
+    app.extensions['db_batch_pool'] = ConnectionPool(
+        dict(_build_connect_kwargs(app.config), client_flag=CLIENT.MULTI_STATEMENTS),
+        min_size=0,
+        max_size=app.config.get('DB_BATCH_POOL_MAX_SIZE', 2),
+        timeout=app.config.get('DB_POOL_TIMEOUT', 5),
+        max_idle=app.config.get('DB_POOL_MAX_IDLE_SECONDS', 300),
+        max_lifetime=app.config.get('DB_POOL_MAX_LIFETIME_SECONDS', 3600),
+        ping_on_checkout=app.config.get('DB_POOL_PING', True),
+    )
+    app.after_request(add_timing_headers)
     app.teardown_appcontext(close_db_connection)
 
+
+def get_pool():
+    """
+    Retorna el pool de conexiones de la aplicación actual
+
+    Returns:
+        ConnectionPool: Pool registrado por ``init_db``
+    """
+    return current_app.extensions['db_pool']
+
+
+def get_pool_metrics():
+    """
+    Retorna las métricas del pool de conexiones
+
+    Returns:
+        dict: Métricas de ``ConnectionPool.metrics``
+    """
+    return get_pool().metrics()
+
+
 def get_db_connection():
     """
     Obtiene una conexión a la base de datos MySQL
     Utiliza el contexto de aplicación de Flask para reutilizar conexiones
-    
+
     Returns:
         pymysql.Connection: Conexión a la base de datos
     """
     if 'db_connection' not in g:
         try:
-            g.db_connection = pymysql.connect(
-                host=current_app.config['MYSQL_HOST'],
-                user=current_app.config['MYSQL_USER'],
-                password=current_app.config['MYSQL_PASSWORD'],
-                database=current_app.config['MYSQL_DB'],
-                port=current_app.config['MYSQL_PORT'],
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=False
-            )
-            logging.info("Conexión a base de datos establecida exitosamente")
+            inicio = time.perf_counter()
+            g.db_connection = get_pool().acquire()
+            record_connection_wait(time.perf_counter() - inicio)
         except Exception as e:
             logging.error(f"Error al conectar con la base de datos: {str(e)}")
             raise
-    
+
     return g.db_connection
 
 def close_db_connection(error):
     """
-    Cierra la conexión a la base de datos
-    
+    Devuelve la conexión al pool
+
     Args:
         error: Error si existe
     """
     db_connection = g.pop('db_connection', None)
-    
+
     if db_connection is not None:
         try:
-            db_connection.close()
-            logging.info("Conexión a base de datos cerrada")
+            get_pool().release(db_connection)
         except Exception as e:
-            logging.error(f"Error al cerrar conexión: {str(e)}")
+            logging.error(f"Error al liberar conexión: {str(e)}")
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=True):
+def in_transaction():
+    """
+    Indica si hay una transacción abierta con ``transaction()`` en el contexto actual
+
+    Returns:
+        bool: True si las escrituras deben esperar al COMMIT final
+    """
+    return g.get('db_tx_depth', 0) > 0
+
+@contextmanager
+def transaction():
+    """
+    Agrupa varias escrituras en una sola transacción (unidad de trabajo)
+
+    Dentro del bloque ``execute_query`` no confirma cada INSERT/UPDATE/DELETE;
+    se hace un único COMMIT al salir sin errores y un ROLLBACK si ocurre una
+    excepción. Los bloques anidados se unen a la transacción exterior.
+    También puede usarse como decorador (``@transaction()``); en ese caso solo
+    se revierte si la vista propaga la excepción, así que las vistas que
+    capturan sus errores y hacen varias escrituras deben usar el bloque ``with``.
+
+    Yields:
+        pymysql.Connection: Conexión de la transacción
+    """
+    connection = get_db_connection()
+    depth = g.get('db_tx_depth', 0)
+    g.db_tx_depth = depth + 1
+    try:
+        yield connection
+    except Exception:
+        g.db_tx_depth = depth
+        if depth == 0:
+            connection.rollback()
+            flush_transaction_tags(commit=False)
+        raise
+    g.db_tx_depth = depth
+    if depth == 0:
+        try:
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            flush_transaction_tags(commit=False)
+            logging.error(f"Error confirmando transacción: {str(e)}")
+            raise
+        flush_transaction_tags(commit=True)
+
+def execute_query(query, params=None, fetch_one=False, fetch_all=True, tags=None, ttl=None):
     """
     Ejecuta una consulta SQL de manera segura
-    
+
+    Las escrituras se confirman de inmediato salvo que se ejecuten dentro de
+    ``transaction()``, en cuyo caso se confirman al cerrar la transacción.
+    Toda escritura invalida en la caché las entradas de las tablas que toca.
+
     Args:
         query (str): Consulta SQL a ejecutar
         params (tuple): Parámetros para la consulta
         fetch_one (bool): Si debe retornar solo un registro
         fetch_all (bool): Si debe retornar todos los registros
-        
+        tags (list[str]): Tablas de las que depende un SELECT; si se indican,
+            el resultado se guarda en la caché de consultas
+        ttl (float): Segundos de vigencia en caché (por defecto ``DB_CACHE_DEFAULT_TTL``)
+
     Returns:
         dict/list: Resultado de la consulta
     """
+    if tags:
+        return cached(
+            cache_key('query', query, params, fetch_one, fetch_all), tags, ttl,
+            lambda: execute_query(query, params, fetch_one, fetch_all)
+        )
+
+    check_repeated_query(query)
     connection = get_db_connection()
     cursor = connection.cursor()
-    
+    inicio = time.perf_counter()
+
     try:
         cursor.execute(query, params or ())
-        
+
+        autocommit = not in_transaction()
+
         if query.strip().upper().startswith('INSERT'):
-            connection.commit()
+            if autocommit:
+                connection.commit()
+            invalidate_written(query)
+            record_query(query, time.perf_counter() - inicio, cursor.rowcount)
             return cursor.lastrowid  # devuelve el ID autoincremental generado
 
         elif query.strip().upper().startswith(('UPDATE', 'DELETE')):
-            connection.commit()
+            if autocommit:
+                connection.commit()
+            invalidate_written(query)
+            record_query(query, time.perf_counter() - inicio, cursor.rowcount)
             return cursor.rowcount
 
-        
+
         if fetch_one:
-            return cursor.fetchone()
+            result = cursor.fetchone()
         elif fetch_all:
-            return cursor.fetchall()
-        
-        return None
-        
+            result = cursor.fetchall()
+        else:
+            result = None
+
+        record_query(query, time.perf_counter() - inicio, cursor.rowcount)
+        return result
+
     except Exception as e:
-        connection.rollback()
+        # Dentro de transaction() el ROLLBACK lo decide quien abrió la transacción
+        if not in_transaction():
+            connection.rollback()
         logging.error(f"Error ejecutando consulta: {str(e)}")
         raise
     finally:
         cursor.close()
+
+_IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _quote_identifier(nombre):
+    if not _IDENTIFICADOR.match(nombre or ''):
+        raise ValueError(f"Identificador SQL no válido: {nombre!r}")
+    return f"`{nombre}`"
+
+class _CursorMasivo(pymysql.cursors.Cursor):
+    """Cursor que cuenta las sentencias que ``executemany`` envía al servidor"""
+
+    sentencias = 0
+
+    def execute(self, query, args=None):
+        self.sentencias += 1
+        return super().execute(query, args)
+
+def execute_many(query, params_seq):
+    """
+    Ejecuta una sentencia para muchas filas en un solo viaje a la base de datos
+
+    Para ``INSERT ... VALUES (...)`` PyMySQL reescribe la sentencia como un
+    único INSERT de varias filas, por lo que MySQL asigna IDs consecutivos a
+    partir del primero. Si las filas superan ``Cursor.max_stmt_length`` bytes
+    PyMySQL las parte en varios INSERT, y si la sentencia no tiene esa forma
+    las envía una a una: en esos casos los IDs no son deducibles y se
+    devuelve un rango vacío. Respeta ``transaction()`` igual que
+    ``execute_query``.
+
+    Args:
+        query (str): Sentencia SQL con marcadores ``%s``
+        params_seq (list[tuple]): Parámetros de cada fila
+
+    Returns:
+        range/int: IDs generados para INSERT (vacío si la tabla no tiene
+            AUTO_INCREMENT o se envió más de una sentencia); filas afectadas
+            para UPDATE/DELETE
+    """
+    params_seq = list(params_seq)
+    es_insert = query.strip().upper().startswith('INSERT')
+    if not params_seq:
+        return range(0) if es_insert else 0
+
+    check_repeated_query(query)
+    connection = get_db_connection()
+    cursor = connection.cursor(_CursorMasivo)
+    inicio = time.perf_counter()
+
+    try:
+        cursor.executemany(query, params_seq)
+
+        if not in_transaction():
+            connection.commit()
+        invalidate_written(query)
+        record_query(query, time.perf_counter() - inicio, cursor.rowcount)
+
+        if es_insert:
+            # Con varias sentencias lastrowid es el primer ID de la última
+            primer_id = cursor.lastrowid or 0
+            if not primer_id or cursor.sentencias != 1:
+                return range(0)
+            return range(primer_id, primer_id + cursor.rowcount)
+        return cursor.rowcount
+
+    except Exception as e:
+        if not in_transaction():
+            connection.rollback()
+        logging.error(f"Error ejecutando consulta masiva: {str(e)}")
+        raise
+    finally:
+        cursor.close()
+
+def bulk_insert(table, columns, rows, chunk_size=500):
+    """
+    Inserta muchas filas con INSERT de varias filas, por bloques
+
+    Args:
+        table (str): Tabla destino
+        columns (list[str]): Columnas a insertar
+        rows (list[tuple]): Valores de cada fila, en el orden de ``columns``
+        chunk_size (int): Filas por sentencia
+
+    Returns:
+        list[range]: IDs generados por cada bloque (vacíos si la tabla no
+            tiene AUTO_INCREMENT o el bloque no cupo en una sentencia; ver
+            ``execute_many``)
+    """
+    columnas = ', '.join(_quote_identifier(c) for c in columns)
+    marcadores = ', '.join(['%s'] * len(columns))
+    query = f"INSERT INTO {_quote_identifier(table)} ({columnas}) VALUES ({marcadores})"
+
+    rows = list(rows)
+    chunk_size = max(1, int(chunk_size))
+    rangos = []
+    with transaction():
+        for inicio in range(0, len(rows), chunk_size):
+            rangos.append(execute_many(query, rows[inicio:inicio + chunk_size]))
+    return rangos
+
+_RE_LECTURA = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+
+def batch_select(queries, tags=None, ttl=None):
+    """
+    Ejecuta varios SELECT independientes en un solo viaje a la base de datos
+
+    Cada sentencia se interpola con el escape de PyMySQL (``mogrify``) y se
+    envían todas juntas por una conexión con ``CLIENT.MULTI_STATEMENTS``;
+    los resultados se leen en orden con ``cursor.nextset()``. Usa su propia
+    conexión, así que no ve escrituras sin confirmar de ``transaction()``.
+
+    Args:
+        queries (dict): Nombre -> ``QuerySpec``, tupla ``(sql, params)`` o
+            SQL sin parámetros
+        tags (list[str]): Tablas de las que dependen; si se indican, el lote
+            completo se guarda en la caché de consultas
+        ttl (float): Segundos de vigencia en caché
+
+    Returns:
+        dict: Nombre -> resultado (un registro o lista de registros)
+
+    Raises:
+        ValueError: Si alguna sentencia no es un SELECT
+    """
+    specs = {}
+    for nombre, consulta in queries.items():
+        consulta = QuerySpec(consulta) if isinstance(consulta, str) else QuerySpec(*consulta)
+        sql = consulta.sql.strip().rstrip(';')
+        if not _RE_LECTURA.match(sql):
+            raise ValueError(f"batch_select solo admite SELECT: '{nombre}'")
+        specs[nombre] = consulta._replace(sql=sql)
+
+    if not specs:
+        return {}
+
+    if tags:
+        clave = cache_key('batch', *((n, c.sql, c.params, c.fetch_one) for n, c in specs.items()))
+        return cached(clave, tags, ttl, lambda: batch_select(specs))
+
+    check_repeated_query(';\n'.join(c.sql for c in specs.values()))
+    pool = current_app.extensions['db_batch_pool']
+    inicio = time.perf_counter()
+    connection = pool.acquire()
+    record_connection_wait(time.perf_counter() - inicio)
+    cursor = connection.cursor()
+    discard = False
+
+    try:
+        lote = ';\n'.join(cursor.mogrify(c.sql, c.params or ()) for c in specs.values())
+        inicio = time.perf_counter()
+        cursor.execute(lote)
+
+        resultados = {}
+        filas = 0
+        for i, (nombre, consulta) in enumerate(specs.items()):
+            if i:
+                cursor.nextset()
+            rows = cursor.fetchall()
+            filas += len(rows)
+            resultados[nombre] = (rows[0] if rows else None) if consulta.fetch_one else list(rows)
+
+        record_query(';\n'.join(c.sql for c in specs.values()), time.perf_counter() - inicio, filas)
+        return resultados
+
+    except Exception as e:
+        # Puede haber resultados sin leer: la conexión no se reutiliza
+        discard = True
+        logging.error(f"Error ejecutando lote de consultas: {str(e)}")
+        raise
+    finally:
+        cursor.close()
+        pool.release(connection, discard=discard)
+
+
+class StreamingResult:
+    """
+    Iterador sobre un cursor del lado del servidor (SSCursor)
+
+    Las filas se leen de ``fetch_size`` en ``fetch_size`` y la conexión vuelve
+    al pool al agotarse el resultado o al llamar ``close()``. Si se cierra
+    antes de tiempo la conexión se descarta en lugar de leer lo que falta.
+    """
+
+    def __init__(self, pool, connection, cursor, fetch_size):
+        self._pool = pool
+        self._connection = connection
+        self._cursor = cursor
+        self.fetch_size = fetch_size
+        # Nombres de las columnas, disponibles aunque el resultado venga vacío
+        self.columnas = [d[0] for d in cursor.description or ()]
+        self._buffer = []
+        self._pos = 0
+        self._exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pos >= len(self._buffer):
+            if self._cursor is None:
+                raise StopIteration
+            try:
+                self._buffer = self._cursor.fetchmany(self.fetch_size)
+            except Exception:
+                self._finish(discard=True)
+                raise
+            self._pos = 0
+            if not self._buffer:
+                self._exhausted = True
+                self._finish(discard=False)
+                raise StopIteration
+        fila = self._buffer[self._pos]
+        self._pos += 1
+        return fila
+
+    def _finish(self, discard):
+        cursor, self._cursor = self._cursor, None
+        if cursor is None:
+            return
+        if not discard:
+            try:
+                cursor.close()
+            except Exception:
+                discard = True
+        self._pool.release(self._connection, discard=discard)
+
+    def close(self):
+        """Libera la conexión aunque no se haya leído todo el resultado"""
+        self._finish(discard=not self._exhausted)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def iter_query(query, params=None, fetch_size=None, as_dict=True):
+    """
+    Ejecuta un SELECT y devuelve sus filas en streaming, sin cargarlas en memoria
+
+    Usa una conexión propia del pool (no la del contexto) con ``SSDictCursor``
+    o ``SSCursor``, de modo que puede consumirse desde una respuesta en
+    streaming después de que la vista retorne. La consulta se ejecuta de
+    inmediato para que los errores se lancen dentro de la vista.
+
+    Args:
+        query (str): Consulta SQL a ejecutar
+        params (tuple): Parámetros para la consulta
+        fetch_size (int): Filas por lectura (por defecto ``DB_STREAM_FETCH_SIZE``)
+        as_dict (bool): Si las filas deben ser diccionarios o tuplas
+
+    Returns:
+        StreamingResult: Iterador de filas; debe agotarse o cerrarse
+    """
+    check_repeated_query(query)
+    pool = get_pool()
+    fetch_size = int(fetch_size or current_app.config.get('DB_STREAM_FETCH_SIZE', 500))
+    inicio = time.perf_counter()
+    connection = pool.acquire()
+    record_connection_wait(time.perf_counter() - inicio)
+    cursor_class = pymysql.cursors.SSDictCursor if as_dict else pymysql.cursors.SSCursor
+
+    try:
+        cursor = connection.cursor(cursor_class)
+        inicio = time.perf_counter()
+        cursor.execute(query, params or ())
+        # Solo se mide hasta la primera respuesta; las filas llegan en streaming
+        record_query(query, time.perf_counter() - inicio)
+    except Exception as e:
+        pool.release(connection, discard=True)
+        logging.error(f"Error ejecutando consulta en streaming: {str(e)}")
+        raise
+
+    return StreamingResult(pool, connection, cursor, fetch_size)
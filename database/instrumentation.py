@@ -0,0 +1,250 @@
+"""
+Instrumentación de consultas SQL
+Registra la huella (fingerprint), duración, filas y endpoint de cada consulta
+"""
+import logging
+import os
+import re
+import threading
+import traceback
+from contextlib import contextmanager
+from functools import lru_cache
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+# Logger configurado por utils/logger.py (archivo slow_queries.log)
+SLOW_QUERY_LOGGER = 'slow_query'
+
+_RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DIR_DATABASE = os.path.dirname(os.path.abspath(__file__))
+
+
+class NPlusOneError(Exception):
+    """Se lanza cuando una misma consulta se repite demasiado en un request"""
+
+
+_RE_COMENTARIOS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_RE_CADENAS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_LISTA_IN = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_RE_ESPACIOS = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Normaliza una consulta para agrupar las que solo cambian en sus valores
+
+    Args:
+        sql (str): Consulta SQL
+
+    Returns:
+        str: Consulta sin comentarios, con literales y marcadores como ``?``
+    """
+    sql = _RE_COMENTARIOS.sub(' ', sql)
+    sql = _RE_CADENAS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _RE_NUMEROS.sub('?', sql)
+    sql = _RE_LISTA_IN.sub('IN (?+)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """Agregado en memoria por huella: cantidad, tiempo total/máximo y filas"""
+
+    def __init__(self, max_fingerprints=500):
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def add(self, fp, ms, rows, endpoint):
+        with self._lock:
+            entry = self._data.get(fp)
+            if entry is None:
+                if len(self._data) >= self.max_fingerprints:
+                    # Descartar la huella con menos tiempo acumulado
+                    menor = min(self._data, key=lambda k: self._data[k]['total_ms'])
+                    del self._data[menor]
+                entry = self._data[fp] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'endpoints': {}
+                }
+            entry['count'] += 1
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+            entry['rows'] += rows if rows and rows > 0 else 0
+            if endpoint:
+                entry['endpoints'][endpoint] = entry['endpoints'].get(endpoint, 0) + 1
+
+    def top(self, n=20):
+        """Retorna las ``n`` huellas con más tiempo total acumulado"""
+        with self._lock:
+            items = sorted(self._data.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)[:n]
+            return [
+                {
+                    'fingerprint': fp,
+                    'count': e['count'],
+                    'total_ms': round(e['total_ms'], 3),
+                    'avg_ms': round(e['total_ms'] / e['count'], 3),
+                    'max_ms': round(e['max_ms'], 3),
+                    'rows': e['rows'],
+                    'endpoints': dict(e['endpoints']),
+                }
+                for fp, e in items
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+_stats = QueryStats()
+
+
+def record_connection_wait(seconds):
+    """Acumula en el request actual el tiempo esperando una conexión del pool"""
+    if has_app_context():
+        g.db_connect_ms = g.get('db_connect_ms', 0.0) + seconds * 1000
+
+
+def record_query(sql, seconds, rows=None):
+    """
+    Registra una consulta ejecutada
+
+    Args:
+        sql (str): Consulta SQL ejecutada
+        seconds (float): Duración en segundos
+        rows (int): Filas retornadas o afectadas, si se conocen
+    """
+    fp = fingerprint(sql)
+    ms = seconds * 1000
+    endpoint = request.endpoint if has_request_context() else None
+
+    if has_app_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_ms = g.get('db_query_ms', 0.0) + ms
+        config = current_app.config
+        _stats.max_fingerprints = config.get('DB_QUERY_STATS_MAX_FINGERPRINTS', _stats.max_fingerprints)
+        threshold = config.get('DB_SLOW_QUERY_MS')
+    else:
+        threshold = None
+
+    _stats.add(fp, ms, rows, endpoint)
+
+    if threshold is not None and ms >= threshold:
+        logging.getLogger(SLOW_QUERY_LOGGER).warning(
+            f"Consulta lenta {ms:.1f} ms | filas={rows} | endpoint={endpoint} | {fp}"
+        )
+
+    return fp
+
+
+def check_repeated_query(sql):
+    """
+    Cuenta una consulta en el detector de N+1 antes de enviarla
+
+    Se llama antes de ejecutar (y de confirmar) para que, con
+    ``DB_N_PLUS_ONE_RAISE``, el request falle sin que la escritura que
+    excede el umbral llegue a la base de datos.
+
+    Args:
+        sql (str): Consulta SQL que se va a ejecutar
+
+    Raises:
+        NPlusOneError: Si se superó el umbral y ``DB_N_PLUS_ONE_RAISE`` está activo
+    """
+    if has_app_context():
+        _check_n_plus_one(fingerprint(sql), request.endpoint if has_request_context() else None)
+
+
+def _stack_del_bucle():
+    """Frames del proyecto (fuera de database/) que llevaron a la consulta"""
+    frames = [
+        f for f in traceback.extract_stack()[:-3]
+        if f.filename.startswith(_RAIZ_PROYECTO) and not f.filename.startswith(_DIR_DATABASE)
+    ]
+    return ''.join(traceback.format_list(frames[-6:]))
+
+
+def _check_n_plus_one(fp, endpoint):
+    """
+    Detecta la misma huella ejecutada más de ``DB_N_PLUS_ONE_THRESHOLD`` veces
+    en un request. Se reporta una vez por huella; con ``DB_N_PLUS_ONE_RAISE``
+    además se lanza ``NPlusOneError`` para que el request falle.
+    """
+    threshold = current_app.config.get('DB_N_PLUS_ONE_THRESHOLD', 0)
+    if not threshold or g.get('db_n_plus_one_allowed', 0):
+        return
+
+    conteo = g.setdefault('db_fingerprint_counts', {})
+    conteo[fp] = conteo.get(fp, 0) + 1
+    if conteo[fp] <= threshold:
+        return
+
+    reportadas = g.setdefault('db_n_plus_one_reported', set())
+    if fp in reportadas:
+        return
+    reportadas.add(fp)
+
+    mensaje = (
+        f"Posible N+1 en endpoint={endpoint}: la consulta se ejecutó más de "
+        f"{threshold} veces en el mismo request | {fp}"
+    )
+    logging.getLogger(SLOW_QUERY_LOGGER).warning(f"{mensaje}\n{_stack_del_bucle()}")
+    if current_app.config.get('DB_N_PLUS_ONE_RAISE'):
+        raise NPlusOneError(mensaje)
+
+
+@contextmanager
+def allow_repeated_queries():
+    """
+    Desactiva el detector de N+1 dentro del bloque, para bucles acotados
+    que se revisaron y se aceptan conscientemente.
+    """
+    g.db_n_plus_one_allowed = g.get('db_n_plus_one_allowed', 0) + 1
+    try:
+        yield
+    finally:
+        g.db_n_plus_one_allowed -= 1
+
+
+def get_request_query_stats():
+    """
+    Retorna las métricas de base de datos del request actual
+
+    Returns:
+        dict: Número de consultas, tiempo en consultas y esperando conexión
+    """
+    return {
+        'queries': g.get('db_query_count', 0),
+        'db_ms': round(g.get('db_query_ms', 0.0), 3),
+        'connect_ms': round(g.get('db_connect_ms', 0.0), 3),
+    }
+
+
+def get_query_stats(top=20):
+    """Retorna las ``top`` huellas con más tiempo total"""
+    return _stats.top(top)
+
+
+def reset_query_stats():
+    """Reinicia el agregado de huellas (útil para medir antes/después)"""
+    _stats.reset()
+
+
+def add_timing_headers(response):
+    """
+    Agrega ``Server-Timing`` y ``X-DB-Queries`` a la respuesta
+
+    Args:
+        response (Response): Respuesta de Flask
+
+    Returns:
+        Response: La misma respuesta con los encabezados
+    """
+    stats = get_request_query_stats()
+    response.headers['X-DB-Queries'] = str(stats['queries'])
+    timing = f'db;dur={stats["db_ms"]};desc="{stats["queries"]} queries"'
+    if stats['connect_ms']:
+        timing += f', db-conn;dur={stats["connect_ms"]}'
+    response.headers.add('Server-Timing', timing)
+    return response
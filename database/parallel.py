@@ -0,0 +1,163 @@
+"""
+Ejecución concurrente de consultas de solo lectura
+Cada consulta corre en un hilo con su propia conexión del pool, de modo que
+un dashboard tarda lo que su consulta más lenta y no la suma de todas
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pymysql
+from flask import current_app
+
+from .instrumentation import check_repeated_query, record_connection_wait, record_query
+from .db_mysql import QuerySpec, get_pool
+
+# Código de MySQL cuando se supera MAX_EXECUTION_TIME
+ER_QUERY_TIMEOUT = 3024
+
+# Margen del lado del cliente sobre el límite que aplica el servidor
+_MARGEN_TIMEOUT = 0.5
+
+
+class QueryTimeoutError(Exception):
+    """Se lanza cuando una consulta de ``run_parallel`` supera su tiempo límite"""
+
+
+_RE_SELECT = re.compile(r'^\s*SELECT\b', re.I)
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app, pool):
+    """
+    Retorna el pool de hilos de la aplicación, creándolo la primera vez
+
+    El número de hilos se limita a ``max_size - 1`` del pool de conexiones
+    para dejar siempre una conexión libre a la vista que los espera.
+    """
+    pid = os.getpid()
+    actual = app.extensions.get('db_parallel_executor')
+    if actual and actual[0] == pid:
+        return actual[1]
+
+    with _executor_lock:
+        actual = app.extensions.get('db_parallel_executor')
+        if actual and actual[0] == pid:
+            return actual[1]
+        workers = max(1, min(app.config.get('DB_PARALLEL_WORKERS', 4), pool.max_size - 1))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-parallel')
+        app.extensions['db_parallel_executor'] = (pid, executor)
+        return executor
+
+
+def _con_limite(sql, timeout):
+    """Agrega el hint MAX_EXECUTION_TIME para que el servidor aborte el SELECT"""
+    ms = int(timeout * 1000)
+    return _RE_SELECT.sub(lambda m: f'{m.group(0)} /*+ MAX_EXECUTION_TIME({ms}) */', sql, count=1)
+
+
+def _ejecutar(pool, nombre, consulta, timeout, arranques):
+    """
+    Corre en un hilo del executor: no tiene contexto de aplicación
+
+    Anota en ``arranques`` el momento en que la consulta se envía, del que
+    se mide su tiempo límite.
+    """
+    inicio = time.perf_counter()
+    connection = pool.acquire()
+    espera = time.perf_counter() - inicio
+    discard = False
+    cursor = connection.cursor()
+
+    try:
+        arranques[nombre] = time.monotonic()
+        inicio = time.perf_counter()
+        cursor.execute(_con_limite(consulta.sql, timeout), consulta.params or ())
+        result = cursor.fetchone() if consulta.fetch_one else cursor.fetchall()
+        return result, time.perf_counter() - inicio, cursor.rowcount, espera
+    except pymysql.err.OperationalError as e:
+        if e.args and e.args[0] == ER_QUERY_TIMEOUT:
+            raise QueryTimeoutError(f"La consulta '{nombre}' superó {timeout} s") from e
+        discard = True
+        raise
+    finally:
+        cursor.close()
+        pool.release(connection, discard=discard)
+
+
+def _esperar(futuro, nombre, limite, arranques):
+    """
+    Espera el resultado de una consulta hasta ``limite`` segundos desde que se
+    envió. Mientras sigue en la cola del executor (hay más consultas que
+    hilos) la espera no consume su tiempo límite.
+    """
+    while True:
+        arranque = arranques.get(nombre)
+        if arranque is not None:
+            restante = arranque + limite + _MARGEN_TIMEOUT - time.monotonic()
+            return futuro.result(timeout=max(restante, 0))
+        try:
+            return futuro.result(timeout=_MARGEN_TIMEOUT)
+        except FutureTimeoutError:
+            # Aún en cola o esperando conexión; el pool tiene su propio límite
+            continue
+
+
+def run_parallel(queries, timeout=None):
+    """
+    Ejecuta varias consultas SELECT independientes de forma concurrente
+
+    Cada consulta usa su propia conexión del pool, por lo que no ve escrituras
+    sin confirmar de ``transaction()`` y cada una lee su propio snapshot.
+    Solo debe usarse para lecturas que no dependen entre sí.
+
+    Args:
+        queries (dict): Nombre -> ``QuerySpec`` o SQL sin parámetros
+        timeout (float): Segundos máximos por consulta, contados desde que
+            se envía al servidor, si la consulta no define el suyo (por
+            defecto ``DB_PARALLEL_TIMEOUT``)
+
+    Returns:
+        dict: Nombre -> resultado (``fetchone`` o ``fetchall``)
+
+    Raises:
+        QueryTimeoutError: Si alguna consulta supera su tiempo límite
+    """
+    app = current_app._get_current_object()
+    pool = get_pool()
+    executor = _get_executor(app, pool)
+    timeout_defecto = timeout or app.config.get('DB_PARALLEL_TIMEOUT', 10)
+
+    queries = {
+        nombre: QuerySpec(consulta) if isinstance(consulta, str) else consulta
+        for nombre, consulta in queries.items()
+    }
+    for consulta in queries.values():
+        check_repeated_query(consulta.sql)
+
+    arranques = {}
+    futuros = {}
+    for nombre, consulta in queries.items():
+        limite = consulta.timeout or timeout_defecto
+        futuro = executor.submit(_ejecutar, pool, nombre, consulta, limite, arranques)
+        futuros[nombre] = (consulta, limite, futuro)
+
+    resultados = {}
+    try:
+        for nombre, (consulta, limite, futuro) in futuros.items():
+            try:
+                result, segundos, filas, espera = _esperar(futuro, nombre, limite, arranques)
+            except FutureTimeoutError:
+                # El hilo devuelve la conexión al pool cuando el servidor aborte la consulta
+                raise QueryTimeoutError(f"La consulta '{nombre}' superó {limite} s")
+            # Las métricas se registran aquí porque los hilos no tienen contexto de request
+            record_connection_wait(espera)
+            record_query(consulta.sql, segundos, filas)
+            resultados[nombre] = result
+    finally:
+        for _, _, futuro in futuros.values():
+            futuro.cancel()
+
+    return resultados
@@ -0,0 +1,266 @@
+"""
+Asesor de índices: ejecuta EXPLAIN sobre cada SELECT escrito en routes/
+
+Extrae las cadenas SQL de los archivos .py (incluidas las f-strings, con
+los fragmentos dinámicos reemplazados por su forma más común), sustituye
+los marcadores ``%s`` por valores de ejemplo y reporta los planes con
+escaneo completo, filesort o tabla temporal, sugiriendo un índice compuesto.
+
+Uso:
+    python index_advisor.py                  # analiza routes/ y models/
+    python index_advisor.py routes/citas.py  # solo los archivos indicados
+    python index_advisor.py --min-rows 500   # umbral de filas para "full scan"
+    python index_advisor.py --listar         # solo lista el SQL, sin conectarse
+"""
+import ast
+import os
+import re
+import sys
+
+import pymysql
+from config import config
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CARPETAS = ['routes', 'models']
+
+_RE_SELECT = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+_RE_IDENTIFICADOR = re.compile(r'`?(\w+)`?(?:\.`?(\w+)`?)?')
+_PALABRAS_SQL = {
+    'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'IS', 'NULL', 'LIKE', 'WHERE', 'ON',
+    'SELECT', 'SET', 'VALUES', 'LIMIT', 'OFFSET', 'CASE', 'WHEN', 'THEN', 'ELSE',
+    'DATE', 'YEAR', 'MONTH', 'CONCAT', 'LOWER', 'UPPER', 'INTERVAL', 'HAVING',
+}
+_RE_TABLAS = re.compile(
+    r'\b(?:FROM|JOIN)\s+`?(\w+)`?'
+    r'(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|RIGHT|INNER|CROSS|GROUP|ORDER|LIMIT|USING|SET)\b)(\w+))?',
+    re.I
+)
+
+
+# ==========================================
+# EXTRACCIÓN DE SQL
+# ==========================================
+
+def _fragmento_dinamico(nodo):
+    """Reemplazo para un ``{...}`` de una f-string según el nombre de la variable"""
+    nombre = ast.unparse(nodo.value).lower()
+    if nombre.startswith('where'):
+        return 'WHERE 1 = 1'
+    return ''
+
+
+def extraer_consultas(ruta):
+    """
+    Retorna los SELECT de un archivo .py
+
+    Returns:
+        list[tuple]: (línea, sql, dinámica)
+    """
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read(), filename=ruta)
+
+    partes_fstring = set()
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.JoinedStr):
+            partes_fstring.update(id(v) for v in nodo.values)
+
+    consultas = []
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str) and id(nodo) not in partes_fstring:
+            sql, dinamica = nodo.value, False
+        elif isinstance(nodo, ast.JoinedStr):
+            sql = ''.join(
+                v.value if isinstance(v, ast.Constant) else _fragmento_dinamico(v)
+                for v in nodo.values
+            )
+            dinamica = True
+        else:
+            continue
+        if _RE_SELECT.match(sql):
+            consultas.append((nodo.lineno, sql, dinamica))
+    return sorted(consultas)
+
+
+def _valor_ejemplo(anterior):
+    """Valor de ejemplo para un ``%s`` según la columna que lo precede"""
+    for a, b in reversed(_RE_IDENTIFICADOR.findall(anterior[-80:])):
+        columna = b or a
+        if columna.upper() in _PALABRAS_SQL or columna.isdigit():
+            continue
+        # Fechas con literal de fecha; el resto como cadena para no anular
+        # índices de columnas VARCHAR (una cadena sí usa índices numéricos)
+        return "'2000-01-01'" if 'fecha' in columna.lower() else "'1'"
+    return "'1'"
+
+
+def preparar(sql):
+    """Sustituye los marcadores de PyMySQL para poder ejecutar EXPLAIN"""
+    partes = sql.replace('%%', '\0').split('%s')
+    salida = partes[0]
+    for parte in partes[1:]:
+        salida += _valor_ejemplo(salida) + parte
+    return salida.replace('\0', '%').strip().rstrip(';')
+
+
+# ==========================================
+# ANÁLISIS DEL PLAN
+# ==========================================
+
+def alias_tablas(sql):
+    """Retorna {alias: tabla} de las cláusulas FROM/JOIN"""
+    alias = {}
+    for tabla, nombre in _RE_TABLAS.findall(sql):
+        alias[nombre or tabla] = tabla
+    return alias
+
+
+def sugerir_indice(sql, alias, tabla):
+    """Columnas sugeridas: igualdades, luego un rango y luego el ORDER BY"""
+    unica = len(set(alias_tablas(sql).values())) == 1
+    prefijo = rf'(?:\b{re.escape(alias)}\.)' + ('?' if unica else '')
+
+    def columnas(patron):
+        return [c for c in re.findall(prefijo + r'`?(\w+)`?\s*' + patron, sql, re.I)
+                if c.upper() not in _PALABRAS_SQL and not c.isdigit()]
+
+    igualdad = columnas(r'(?:=|\bIN\b|\bIS\b)')
+    rango = columnas(r'(?:\bBETWEEN\b|>=|<=|>|<)')
+
+    orden = []
+    m = re.search(r'\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|$)', sql, re.I | re.S)
+    if m:
+        orden = re.findall(prefijo + r'`?(\w+)`?', m.group(1))
+
+    sugeridas = []
+    for columna in igualdad + rango[:1] + orden:
+        if columna not in sugeridas and columna.upper() not in ('ASC', 'DESC'):
+            sugeridas.append(columna)
+    if not sugeridas:
+        return None
+    sugeridas = sugeridas[:4]
+    nombre = f"idx_{tabla}_{'_'.join(c.lower() for c in sugeridas)}"[:64]
+    return f"CREATE INDEX {nombre} ON {tabla} ({', '.join(sugeridas)});"
+
+
+def analizar(cursor, sql, min_rows):
+    """
+    Ejecuta EXPLAIN y retorna los problemas encontrados
+
+    Returns:
+        list[tuple]: (alias de tabla, problema, filas estimadas)
+    """
+    cursor.execute(f"EXPLAIN {sql}")
+    problemas = []
+    for fila in cursor.fetchall():
+        tabla = fila.get('table') or ''
+        filas = fila.get('rows') or 0
+        extra = fila.get('Extra') or ''
+        if tabla.startswith('<'):  # tablas derivadas / uniones
+            continue
+        if fila.get('type') == 'ALL' and filas >= min_rows:
+            problemas.append((tabla, 'escaneo completo', filas))
+        elif fila.get('type') == 'index' and filas >= min_rows:
+            problemas.append((tabla, 'escaneo completo del índice', filas))
+        if 'Using filesort' in extra:
+            problemas.append((tabla, 'filesort', filas))
+        if 'Using temporary' in extra:
+            problemas.append((tabla, 'tabla temporal', filas))
+    return problemas
+
+
+# ==========================================
+# PROGRAMA
+# ==========================================
+
+def archivos_a_analizar(argumentos):
+    if argumentos:
+        return argumentos
+    rutas = []
+    for carpeta in CARPETAS:
+        base = os.path.join(RAIZ, carpeta)
+        for archivo in sorted(os.listdir(base)):
+            if archivo.endswith('.py'):
+                rutas.append(os.path.join(base, archivo))
+    return rutas
+
+
+def conectar():
+    """Conecta con la configuración del entorno actual (FLASK_ENV)"""
+    db_config = config[os.environ.get('FLASK_ENV', 'default')]
+    return pymysql.connect(
+        host=db_config.MYSQL_HOST,
+        user=db_config.MYSQL_USER,
+        password=db_config.MYSQL_PASSWORD,
+        database=db_config.MYSQL_DB,
+        port=db_config.MYSQL_PORT,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def main():
+    argumentos = sys.argv[1:]
+    solo_listar = '--listar' in argumentos
+    min_rows = 1000
+    if '--min-rows' in argumentos:
+        i = argumentos.index('--min-rows')
+        min_rows = int(argumentos[i + 1])
+        del argumentos[i:i + 2]
+    argumentos = [a for a in argumentos if not a.startswith('--')]
+
+    consultas = []
+    for ruta in archivos_a_analizar(argumentos):
+        for linea, sql, dinamica in extraer_consultas(ruta):
+            consultas.append((os.path.relpath(ruta, RAIZ), linea, preparar(sql), dinamica))
+
+    if solo_listar:
+        for ruta, linea, sql, dinamica in consultas:
+            marca = ' (dinámica)' if dinamica else ''
+            print(f"-- {ruta}:{linea}{marca}\n{sql};\n")
+        print(f"{len(consultas)} consultas encontradas")
+        return
+
+    sugerencias = {}
+    errores = 0
+    try:
+        connection = conectar()
+        cursor = connection.cursor()
+
+        for ruta, linea, sql, dinamica in consultas:
+            try:
+                problemas = analizar(cursor, sql, min_rows)
+            except pymysql.MySQLError as e:
+                errores += 1
+                print(f"⚠️  {ruta}:{linea} no se pudo analizar: {e.args[-1]}")
+                continue
+            if not problemas:
+                continue
+
+            alias = alias_tablas(sql)
+            marca = ' (dinámica: se analizó la forma sin filtros opcionales)' if dinamica else ''
+            print(f"\n❗ {ruta}:{linea}{marca}")
+            for nombre, problema, filas in problemas:
+                print(f"   - {nombre}: {problema} (~{filas} filas)")
+                tabla = alias.get(nombre, nombre)
+                indice = sugerir_indice(sql, nombre, tabla)
+                if indice:
+                    sugerencias.setdefault(indice, []).append(f"{ruta}:{linea}")
+                    print(f"     sugerencia: {indice}")
+
+    except Exception as e:
+        print(f"❌ Error analizando consultas: {e}")
+        sys.exit(1)
+
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+    print(f"\n{len(consultas)} consultas analizadas, {errores} sin analizar")
+    if sugerencias:
+        print("\nÍndices sugeridos (revisar antes de agregarlos a migrations/):")
+        for indice, origenes in sorted(sugerencias.items(), key=lambda x: -len(x[1])):
+            print(f"  {indice}  -- {len(origenes)} consulta(s)")
+
+
+if __name__ == '__main__':
+    main()
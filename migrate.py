@@ -0,0 +1,141 @@
+"""
+Aplica las migraciones versionadas de la carpeta migrations/
+
+Cada archivo ``NNNN_descripcion.sql`` se ejecuta una sola vez y queda
+registrado en la tabla ``schema_migrations``.
+
+Uso:
+    python migrate.py            # aplica las migraciones pendientes
+    python migrate.py --status   # muestra aplicadas y pendientes
+"""
+import hashlib
+import os
+import re
+import sys
+
+import pymysql
+from config import config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Errores que indican que el cambio ya existe (índice o columna creados a mano)
+ER_DUP_KEYNAME = 1061
+ER_DUP_FIELDNAME = 1060
+
+_RE_ARCHIVO = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def conectar():
+    """Conecta con la configuración del entorno actual (FLASK_ENV)"""
+    db_config = config[os.environ.get('FLASK_ENV', 'default')]
+    return pymysql.connect(
+        host=db_config.MYSQL_HOST,
+        user=db_config.MYSQL_USER,
+        password=db_config.MYSQL_PASSWORD,
+        database=db_config.MYSQL_DB,
+        port=db_config.MYSQL_PORT,
+        charset='utf8mb4'
+    )
+
+
+def listar_migraciones():
+    """Retorna [(version, nombre, ruta)] ordenadas por versión"""
+    migraciones = []
+    for archivo in os.listdir(MIGRATIONS_DIR):
+        m = _RE_ARCHIVO.match(archivo)
+        if m:
+            migraciones.append((m.group(1), m.group(2), os.path.join(MIGRATIONS_DIR, archivo)))
+    return sorted(migraciones, key=lambda x: int(x[0]))
+
+
+def dividir_sentencias(sql):
+    """Separa un archivo .sql en sentencias (sin comentarios de línea)"""
+    sin_comentarios = '\n'.join(
+        linea for linea in sql.splitlines() if not linea.strip().startswith('--')
+    )
+    return [s.strip() for s in sin_comentarios.split(';') if s.strip()]
+
+
+def asegurar_tabla(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(32) NOT NULL PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def migraciones_aplicadas(cursor):
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {version: checksum for version, checksum in cursor.fetchall()}
+
+
+def aplicar(connection, version, nombre, ruta):
+    """Ejecuta una migración y la registra"""
+    with open(ruta, encoding='utf-8') as f:
+        contenido = f.read()
+    checksum = hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    cursor = connection.cursor()
+    for sentencia in dividir_sentencias(contenido):
+        try:
+            cursor.execute(sentencia)
+        except pymysql.err.OperationalError as e:
+            # El DDL de MySQL no es transaccional: si ya existe, se continúa
+            if e.args[0] in (ER_DUP_KEYNAME, ER_DUP_FIELDNAME):
+                print(f"   ⚠️  Ya existe, se omite: {e.args[1]}")
+                continue
+            raise
+
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, nombre, checksum) VALUES (%s, %s, %s)",
+        (version, nombre, checksum)
+    )
+    connection.commit()
+    cursor.close()
+
+
+def main():
+    solo_estado = '--status' in sys.argv[1:]
+
+    try:
+        connection = conectar()
+        cursor = connection.cursor()
+        asegurar_tabla(cursor)
+        aplicadas = migraciones_aplicadas(cursor)
+        cursor.close()
+
+        pendientes = 0
+        for version, nombre, ruta in listar_migraciones():
+            if version in aplicadas:
+                with open(ruta, encoding='utf-8') as f:
+                    checksum = hashlib.sha256(f.read().encode('utf-8')).hexdigest()
+                aviso = '' if checksum == aplicadas[version] else '  (⚠️  el archivo cambió después de aplicarse)'
+                print(f"✅ {version} {nombre}{aviso}")
+                continue
+
+            pendientes += 1
+            if solo_estado:
+                print(f"⏳ {version} {nombre} (pendiente)")
+                continue
+
+            print(f"▶️  Aplicando {version} {nombre}...")
+            aplicar(connection, version, nombre, ruta)
+            print(f"✅ {version} {nombre}")
+
+        if not pendientes:
+            print("No hay migraciones pendientes")
+
+    except Exception as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        sys.exit(1)
+
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
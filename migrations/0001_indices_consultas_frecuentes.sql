@@ -0,0 +1,39 @@
+-- 0001: índices compuestos para los predicados más frecuentes
+-- Login, KPIs y dashboards de estadísticas filtran por estas columnas.
+-- Orden de columnas: igualdad primero, luego rango y después orden/cobertura.
+
+-- HABITANTES --------------------------------------------------------------
+-- Conteos por período: WHERE Activo = 1 AND FechaRegistro BETWEEN ...
+CREATE INDEX idx_habitantes_activo_fecha ON habitantes (Activo, FechaRegistro);
+
+-- Distribución por sector en un período
+CREATE INDEX idx_habitantes_sector_activo_fecha ON habitantes (IdSector, Activo, FechaRegistro);
+
+-- Login y validación de duplicados: NumeroDocumento + IdTipoDocumento
+CREATE INDEX idx_habitantes_documento ON habitantes (NumeroDocumento, IdTipoDocumento);
+
+-- USUARIO -----------------------------------------------------------------
+-- JOIN del login: usuario.IdHabitante = habitantes.IdHabitante
+CREATE INDEX idx_usuario_habitante ON usuario (IdHabitante);
+
+-- HABITANTE_SACRAMENTO ----------------------------------------------------
+-- EXISTS / JOIN por habitante y conteos por sacramento
+CREATE INDEX idx_hs_habitante_sacramento ON habitante_sacramento (IdHabitante, IdSacramento);
+CREATE INDEX idx_hs_sacramento_habitante ON habitante_sacramento (IdSacramento, IdHabitante, FechaSacramento);
+
+-- ASIGNACIONCITA ----------------------------------------------------------
+-- Listado y próximas citas: WHERE Activo = 1 ... ORDER BY Fecha, Hora
+CREATE INDEX idx_citas_activo_fecha ON asignacioncita (Activo, Fecha, Hora);
+CREATE INDEX idx_citas_padre_fecha ON asignacioncita (IdPadre, Fecha);
+CREATE INDEX idx_citas_estado_fecha ON asignacioncita (IdEstadoCita, Fecha);
+
+-- MOVIMIENTOS_CAJA --------------------------------------------------------
+-- Totales y serie mensual por período (índice de cobertura)
+CREATE INDEX idx_mov_activo_fecha_tipo ON movimientos_caja (Activo, FechaMovimiento, IdTipoMovimiento, Valor);
+
+-- Mayor ingreso / egreso: WHERE IdTipoMovimiento = ? AND Activo = 1 ORDER BY Valor DESC LIMIT 1
+CREATE INDEX idx_mov_tipo_activo_valor ON movimientos_caja (IdTipoMovimiento, Activo, Valor);
+
+-- ASIGNACIONTAREA ---------------------------------------------------------
+CREATE INDEX idx_tareas_grupo_activo ON asignaciontarea (IdGrupoVoluntario, Activo);
+CREATE INDEX idx_tareas_activo_fecha ON asignaciontarea (Activo, FechaAsignacion);
@@ -0,0 +1,31 @@
+-- 0002: tablas de agregados diarios de habitantes (rollups)
+-- Las mantienen las rutas que escriben en habitantes y habitante_sacramento
+-- (services/RollupServices.py) y se reconstruyen con rebuild_rollups.py.
+-- Solo cuentan habitantes activos. Dia = DATE(FechaRegistro); los registros
+-- sin fecha quedan en '1000-01-01' para que sumen en los totales generales
+-- pero no en ningún período. Las dimensiones nulas se guardan como 0.
+
+-- Habitantes por día, sector, sexo, estado civil, grupo de edad y si tienen
+-- algún sacramento. GrupoEdad: 0 = 0-12, 1 = 13-29, 2 = 30-59, 3 = 60+,
+-- 9 = sin fecha de nacimiento (calculado el día en que se escribió la fila).
+CREATE TABLE IF NOT EXISTS rollup_habitantes_dia (
+    Dia DATE NOT NULL,
+    IdSector INT NOT NULL DEFAULT 0,
+    IdSexo INT NOT NULL DEFAULT 0,
+    IdEstadoCivil INT NOT NULL DEFAULT 0,
+    GrupoEdad TINYINT NOT NULL,
+    ConSacramento TINYINT NOT NULL,
+    Total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Dia, IdSector, IdSexo, IdEstadoCivil, GrupoEdad, ConSacramento),
+    KEY idx_rollup_habitantes_sector (IdSector, Dia)
+);
+
+-- Habitantes con cada sacramento por día de registro y sector
+CREATE TABLE IF NOT EXISTS rollup_sacramentos_dia (
+    Dia DATE NOT NULL,
+    IdSector INT NOT NULL DEFAULT 0,
+    IdSacramento INT NOT NULL,
+    Total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Dia, IdSector, IdSacramento),
+    KEY idx_rollup_sacramentos_sacramento (IdSacramento, Dia)
+);
@@ -0,0 +1,21 @@
+-- 0003: trabajos de reportes en segundo plano (services/ReporteJobServices.py)
+-- Cada fila es un reporte encolado con POST /api/estadisticas/jobs/. Hash
+-- identifica el reporte (tipo, formato, filtros y día) para reutilizar el
+-- archivo de un trabajo idéntico; Archivo es el nombre dentro de
+-- REPORT_JOBS_FOLDER.
+CREATE TABLE IF NOT EXISTS reporte_jobs (
+    IdJob INT AUTO_INCREMENT PRIMARY KEY,
+    Tipo VARCHAR(50) NOT NULL,
+    Formato VARCHAR(10) NOT NULL,
+    Filtros TEXT NOT NULL,
+    Hash CHAR(64) NOT NULL,
+    Estado ENUM('pendiente', 'en_proceso', 'completado', 'error') NOT NULL DEFAULT 'pendiente',
+    Archivo VARCHAR(255) NULL,
+    Bytes BIGINT NULL,
+    Error TEXT NULL,
+    IdUsuario INT NULL,
+    FechaCreacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FechaInicio DATETIME NULL,
+    FechaFin DATETIME NULL,
+    KEY idx_reporte_jobs_hash (Hash, Estado, FechaCreacion)
+);
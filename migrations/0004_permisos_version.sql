@@ -0,0 +1,11 @@
+-- 0004: versión global de roles y permisos (utils/auth_utils.PermisoResolver)
+-- Los tokens de acceso llevan los permisos del usuario como bits
+-- (bit = permisos.id_permiso) y la versión vigente al emitirlos. Cada cambio
+-- de roles o permisos incrementa Version; un token con una versión anterior
+-- deja de bastar y los permisos se leen de la base de datos.
+CREATE TABLE IF NOT EXISTS permisos_version (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    Version INT NOT NULL DEFAULT 1
+);
+
+INSERT IGNORE INTO permisos_version (Id, Version) VALUES (1, 1);
@@ -1,8 +1,7 @@
 from database.db_mysql import execute_query
-from utils import Security
+from utils import Security, HashingBusyError
 from datetime import datetime
 import logging
-from werkzeug.security import check_password_hash 
 
 class UserModel:
     @staticmethod
@@ -10,6 +9,9 @@ class UserModel:
         try:
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
+            # El hash va primero: si el pool está lleno no queda un habitante sin usuario
+            password_hash = Security.generate_password_hash(user_data.get('password'))
+
             # Inserta habitante con IdSexo (FK), no 'Sexo'
             habitante_query = """
                 INSERT INTO habitantes (
@@ -37,8 +39,6 @@ class UserModel:
             habitante_id = execute_query(habitante_query, habitante_params)
 
             if habitante_id:
-                password_hash = Security.generate_password_hash(user_data.get('password'))
-
                 user_query = """
                     INSERT INTO usuario (IdTipoUsuario, Contraseña, IdHabitante, Activo, FechaRegistro)
                     VALUES (%s, %s, %s, 1, %s)
@@ -55,54 +55,53 @@ class UserModel:
                     return {
                         'success': True,
                         'message': 'Usuario creado exitosamente',
-                        'user_id': user_id
+                        'user_id': user_id,
+                        'habitante_id': habitante_id
                     }
 
             return {'success': False, 'message': 'Error al crear usuario'}
 
+        except HashingBusyError:
+            raise
         except Exception as e:
             logging.error(f"Error creando usuario: {str(e)}")
             return {'success': False, 'message': f'Error: {str(e)}'}
 
     @staticmethod
-    def authenticate_user_by_document(document_type, document_number, password):
+    def get_login_user(document_type, document_number):
         """
-        Autentica usuario por documento y contraseña
+        Usuario, datos del token y estado de seguridad (intentos y bloqueo)
+        en una sola consulta, para el login. No verifica la contraseña.
+        ``lock_expired`` indica un bloqueo que ya venció según el reloj de MySQL.
         """
-        try:
-            query = """
-                SELECT 
-                    u.IdUsuario,
-                    u.IdTipoUsuario,
-                    u.Contraseña,
-                    u.Activo as ActivoUsuario,
-                    u.login_attempts,
-                    u.locked_until,
-                    h.IdHabitante,
-                    h.Nombre,
-                    h.Apellido,
-                    h.NumeroDocumento,
-                    h.IdTipoDocumento,
-                    h.Activo as ActivoHabitante,
-                    tu.Perfil as rol,
-                    td.Descripcion as tipo_documento_nombre
-                FROM usuario u
-                JOIN habitantes h ON u.IdHabitante = h.IdHabitante
-                JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
-                JOIN tipodocumento td ON h.IdTipoDocumento = td.IdTipoDocumento
-                WHERE h.NumeroDocumento = %s AND h.IdTipoDocumento = %s
-                LIMIT 1
-            """
-
-            user = execute_query(query, (document_number, document_type), fetch_one=True)
-
-            if user and check_password_hash(user['Contraseña'], password):
-                return user
-            return None
+        query = """
+            SELECT 
+                u.IdUsuario,
+                u.IdTipoUsuario,
+                u.Contraseña,
+                u.Activo as ActivoUsuario,
+                u.login_attempts,
+                u.locked_until,
+                u.locked_until IS NOT NULL AND u.locked_until <= NOW() as lock_expired,
+                h.IdHabitante,
+                h.Nombre,
+                h.Apellido,
+                h.NumeroDocumento,
+                h.IdTipoDocumento,
+                h.Activo as ActivoHabitante,
+                h.CorreoElectronico,
+                h.Telefono,
+                tu.Perfil as rol,
+                td.Descripcion as tipo_documento_nombre
+            FROM usuario u
+            JOIN habitantes h ON u.IdHabitante = h.IdHabitante
+            JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
+            JOIN tipodocumento td ON h.IdTipoDocumento = td.IdTipoDocumento
+            WHERE h.NumeroDocumento = %s AND h.IdTipoDocumento = %s
+            LIMIT 1
+        """
+        return execute_query(query, (document_number, document_type), fetch_one=True)
 
-        except Exception as e:
-            logging.error(f"Error en authenticate_user_by_document: {str(e)}")
-            return None
     @staticmethod
     def get_user_by_id(user_id):
         try:
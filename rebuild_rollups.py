@@ -0,0 +1,36 @@
+"""
+Reconstruye las tablas de agregados diarios de habitantes (rollups)
+
+Las rutas las mantienen al día, pero el grupo de edad de cada habitante se
+calcula al escribir: programar este script una vez al día (cron, después de
+medianoche) para mover a quienes cumplieron años y corregir cualquier
+desviación. También sirve para la carga inicial tras ``python migrate.py``.
+
+Uso:
+    python rebuild_rollups.py
+"""
+import sys
+import time
+
+from app import create_app
+from services import reconstruir_rollups
+
+
+def main():
+    app = create_app()
+    try:
+        with app.app_context():
+            inicio = time.perf_counter()
+            print("▶️  Reconstruyendo rollups de habitantes...")
+            resumen = reconstruir_rollups()
+            print(f"✅ rollup_habitantes_dia: {resumen['filas_habitantes']} filas "
+                  f"({resumen['habitantes']} habitantes activos)")
+            print(f"✅ rollup_sacramentos_dia: {resumen['filas_sacramentos']} filas")
+            print(f"Listo en {time.perf_counter() - inicio:.2f} s")
+    except Exception as e:
+        print(f"❌ Error reconstruyendo rollups: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
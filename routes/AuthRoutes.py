@@ -8,12 +8,12 @@ from flask_jwt_extended import (
     create_access_token, create_refresh_token
 )
 from datetime import datetime, timezone, timedelta
-from services import AuthService
+from services import AuthService, habitante_index, sacramento_index, demografia, contribucion_rollup, actualizar_rollups
 from models import UserModel
-from utils import Security
+from utils import Security, RETRY_AFTER_SEGUNDOS
 import logging
 from config import Config
-from database import execute_query
+from database import execute_query, transaction
 
 from flask import request
 
@@ -41,6 +41,8 @@ def login():
             return jsonify(result), 200
         else:
             # El servicio ya maneja los errores (bloqueos, credenciales, etc.)
+            if result.get('busy'):
+                return jsonify(result), 503, {'Retry-After': str(RETRY_AFTER_SEGUNDOS)}
             status_code = 401
             if result.get('locked'):
                 status_code = 423
@@ -89,7 +91,9 @@ def verify_echo():
 @jwt_required(refresh=True)
 def refresh_token():
     user_id = get_jwt_identity()
-    new_access = create_access_token(identity=user_id)
+    new_access = create_access_token(
+        identity=user_id, additional_claims=AuthService.permission_claims(user_id)
+    )
     return jsonify({"success": True, "access_token": new_access}), 200
 
 
@@ -156,6 +160,8 @@ def register():
         
         if result['success']:
             return jsonify(result), 201
+        elif result.get('busy'):
+            return jsonify(result), 503, {'Retry-After': str(RETRY_AFTER_SEGUNDOS)}
         else:
             return jsonify(result), 400
             
@@ -386,9 +392,15 @@ def update_profile():
         params.append(user['IdHabitante'])
         query = f"UPDATE habitantes SET {', '.join(set_parts)} WHERE IdHabitante = %s"
 
-        updated = execute_query(query, tuple(params))
+        with transaction():
+            antes = contribucion_rollup(user['IdHabitante'])
+            updated = execute_query(query, tuple(params))
+            actualizar_rollups(user['IdHabitante'], antes)
         if updated is None:
             return jsonify({'success': False, 'message': 'No se pudo actualizar'}), 500
+        habitante_index.refrescar(user['IdHabitante'])
+        sacramento_index.refrescar(user['IdHabitante'])
+        demografia.refrescar(user['IdHabitante'])
 
         # Devolver perfil fresco
         refreshed = UserModel.get_user_by_id(current_user_id)
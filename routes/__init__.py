@@ -15,6 +15,8 @@ from .cursos import cursos_bp
 from .grupofamiliar import grupofamiliar_bp
 from .padres import padres_bp
 from .citas import citas_bp
+from .autocomplete import autocomplete_bp
+from .estadisticas import estadisticas_bp
 
 def register_blueprints(app):
     """
@@ -59,4 +61,10 @@ def register_blueprints(app):
     # Citas
     app.register_blueprint(citas_bp, url_prefix='/api/citas')
 
+    # Autocompletado
+    app.register_blueprint(autocomplete_bp, url_prefix='/api/autocomplete')
+
+    # Estadísticas y reportes
+    app.register_blueprint(estadisticas_bp, url_prefix='/api/estadisticas')
+
     
\ No newline at end of file
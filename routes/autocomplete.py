@@ -0,0 +1,101 @@
+"""
+Rutas de autocompletado (grupos familiares, jefes de familia y padres)
+"""
+from flask import Blueprint, jsonify, request, current_app
+from flask_jwt_extended import jwt_required
+from database import execute_query
+from services import autocomplete_index
+from services.AutocompleteServices import TIPOS
+
+autocomplete_bp = Blueprint('autocomplete', __name__)
+
+
+_SQL_GRUPO_RESPALDO = """
+    SELECT {tipo} AS tipo, gf.IdGrupoFamiliar AS id, {texto} AS texto,
+           gf.IdGrupoFamiliar, gf.NombreGrupo, gf.Descripcion, gf.IdJefeFamilia,
+           CONCAT(COALESCE(h.Nombre,''), ' ', COALESCE(h.Apellido,'')) AS JefeFamilia,
+           (SELECT COUNT(*) FROM habitantes m
+             WHERE m.IdGrupoFamiliar = gf.IdGrupoFamiliar AND m.Activo = 1) AS Miembros
+    FROM grupofamiliar gf
+    {join} habitantes h ON h.IdHabitante = gf.IdJefeFamilia
+    WHERE gf.Activo = 1 AND {filtro}
+    ORDER BY Miembros DESC, texto
+    LIMIT %s
+"""
+
+
+def _sugerir_sql(q, tipos, k):
+    """
+    Respaldo mientras se construye el índice: prefijo con LIKE 'q%' (usa índices).
+    Devuelve los mismos campos que el índice (``_entradas_grupo`` / ``_entradas_padre``)
+    y el mismo orden: peso descendente y luego texto.
+    """
+    like = f"{q}%"
+    resultados = []
+    if 'grupo' in tipos:
+        resultados += execute_query(_SQL_GRUPO_RESPALDO.format(
+            tipo="'grupo'", texto='gf.NombreGrupo', join='LEFT JOIN',
+            filtro='gf.NombreGrupo LIKE %s'
+        ), (like, k)) or []
+    if 'jefe' in tipos:
+        resultados += execute_query(_SQL_GRUPO_RESPALDO.format(
+            tipo="'jefe'", texto="TRIM(CONCAT(COALESCE(h.Nombre,''), ' ', COALESCE(h.Apellido,'')))",
+            join='JOIN', filtro='(h.Nombre LIKE %s OR h.Apellido LIKE %s)'
+        ), (like, like, k)) or []
+    for fila in resultados:
+        fila['peso'] = fila['Miembros']
+    if 'padre' in tipos:
+        resultados += execute_query("""
+            SELECT 'padre' AS tipo, p.IdPadre AS id,
+                   TRIM(CONCAT(COALESCE(p.Nombre,''), ' ', COALESCE(p.Apellido,''))) AS texto,
+                   p.IdPadre, p.Nombre, p.Apellido,
+                   (SELECT COUNT(*) FROM asignacioncita ac WHERE ac.IdPadre = p.IdPadre) AS peso
+            FROM padre p
+            WHERE p.Activo = 1 AND (p.Nombre LIKE %s OR p.Apellido LIKE %s)
+            ORDER BY peso DESC, texto
+            LIMIT %s
+        """, (like, like, k)) or []
+    if len(tipos) > 1:
+        resultados.sort(key=lambda r: (-(r['peso'] or 0), r['texto'].lower()))
+    return resultados[:k]
+
+
+# =========================
+# AUTOCOMPLETADO
+# GET /api/autocomplete/?q=texto&tipo=grupo|jefe|padre|todos&k=10
+# =========================
+@autocomplete_bp.route('/', methods=['GET'])
+@jwt_required()
+def autocompletar():
+    """
+    Sugerencias por prefijo de palabra, ordenadas por cantidad de miembros
+    del grupo (grupo/jefe) o de citas asignadas (padre).
+    Cada resultado trae ``tipo``, ``id``, ``texto`` y los datos de la entidad.
+    """
+    try:
+        q = (request.args.get('q') or '').strip()
+        tipo = request.args.get('tipo', 'todos')
+        k = request.args.get('k', '10')
+
+        if tipo != 'todos' and tipo not in TIPOS:
+            return jsonify({
+                'success': False,
+                'message': f"tipo debe ser uno de: {', '.join(TIPOS + ('todos',))}"
+            }), 400
+        if not k.isdigit() or int(k) < 1:
+            return jsonify({'success': False, 'message': 'k debe ser un entero mayor que 0'}), 400
+
+        tipos = TIPOS if tipo == 'todos' else (tipo,)
+        k = min(int(k), current_app.config.get('AUTOCOMPLETE_MAX_K', 20))
+
+        if not q:
+            return jsonify({'success': True, 'tipo': tipo, 'resultados': []}), 200
+
+        resultados = autocomplete_index.sugerir(q, tipos, k)
+        if resultados is None:
+            resultados = _sugerir_sql(q, tipos, k)
+
+        return jsonify({'success': True, 'tipo': tipo, 'resultados': resultados}), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f"Error en autocompletado: {str(e)}"}), 500
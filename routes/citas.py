@@ -4,7 +4,7 @@ Rutas para gestión de CITAS (tabla: asignacioncita)
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from database import execute_query
-from utils import require_rol
+from utils import require_rol, paginar, PaginationError
 from datetime import datetime
 
 citas_bp = Blueprint('citas', __name__)
@@ -18,6 +18,7 @@ def listar_citas():
     """
     Lista citas con joins informativos.
     Filtros opcionales: ?estado=IdEstadoCita&tipo=IdTipoCita&desde=YYYY-MM-DD&hasta=YYYY-MM-DD&q=texto
+    Paginación: ?page_size=&cursor=&total=1 (ver utils.paginar)
     """
     try:
         estado = request.args.get('estado')
@@ -45,11 +46,8 @@ def listar_citas():
             filters.append('(ac.NombreSolicitante LIKE %s OR ac.Celular LIKE %s OR ac.Descripcion LIKE %s OR p.Nombre LIKE %s OR p.Apellido LIKE %s OR ac.NumeroDocumentoSolicitante LIKE %s)')
             params += [like, like, like, like, like, like]
 
-        where = ('WHERE ' + ' AND '.join(filters)) if filters else ''
-        
         # CONSULTA ACTUALIZADA con nuevos campos
-        query = f"""
-            SELECT
+        columnas = """
                 ac.IdAsignacionCita,
                 ac.NombreSolicitante,
                 ac.Celular,
@@ -66,17 +64,31 @@ def listar_citas():
                 tc.Descripcion AS TipoDescripcion,
                 ac.Descripcion,
                 ac.Activo,
-                ac.FechaRegistro
+                ac.FechaRegistro,
+                COALESCE(ac.Fecha, '0001-01-01') AS _FechaOrden,
+                COALESCE(ac.Hora, '00:00:00') AS _HoraOrden
+        """
+        desde_sql = """
             FROM asignacioncita ac
             LEFT JOIN padre p        ON ac.IdPadre = p.IdPadre
             LEFT JOIN estadocita ec  ON ec.IdEstadoCita = ac.IdEstadoCita
             LEFT JOIN tipocita  tc   ON tc.IdTipoCita  = ac.IdTipoCita
             LEFT JOIN tipodocumento td ON td.IdTipoDocumento = ac.IdTipoDocumentoSolicitante
-            {where}
-            ORDER BY ac.Fecha DESC, ac.Hora DESC;
         """
-        rows = execute_query(query, params, fetch_all=True)
-        return jsonify({'success': True, 'citas': rows})
+        # La hora completa (con segundos) es la clave del cursor; Hora se muestra HH:MM.
+        # Fecha y Hora admiten NULL: el cursor usa su versión sin NULL
+        rows, paginacion = paginar(
+            columnas, desde_sql, filters, params,
+            orden=[
+                ("COALESCE(ac.Fecha, '0001-01-01')", '_FechaOrden', 'DESC'),
+                ("COALESCE(ac.Hora, '00:00:00')", '_HoraOrden', 'DESC'),
+                ('ac.IdAsignacionCita', 'IdAsignacionCita', 'DESC'),
+            ],
+            tags=['asignacioncita', 'padre']
+        )
+        return jsonify({'success': True, 'citas': rows, 'paginacion': paginacion}), 200
+    except PaginationError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error listando citas: {str(e)}'}), 500
 
@@ -214,9 +226,9 @@ def editar_cita(id_cita):
 @jwt_required()
 def opciones_citas():
     try:
-        estados = execute_query("SELECT IdEstadoCita, Descripcion FROM estadocita ORDER BY IdEstadoCita ASC;", fetch_all=True)
-        tipos = execute_query("SELECT IdTipoCita, Descripcion, Valor FROM tipocita ORDER BY IdTipoCita ASC;", fetch_all=True)
-        tipos_documento = execute_query("SELECT IdTipoDocumento, Descripcion FROM tipodocumento ORDER BY IdTipoDocumento ASC;", fetch_all=True)
+        estados = execute_query("SELECT IdEstadoCita, Descripcion FROM estadocita ORDER BY IdEstadoCita ASC;", fetch_all=True, tags=['estadocita'], ttl=300)
+        tipos = execute_query("SELECT IdTipoCita, Descripcion, Valor FROM tipocita ORDER BY IdTipoCita ASC;", fetch_all=True, tags=['tipocita'], ttl=300)
+        tipos_documento = execute_query("SELECT IdTipoDocumento, Descripcion FROM tipodocumento ORDER BY IdTipoDocumento ASC;", fetch_all=True, tags=['tipodocumento'], ttl=300)
         
         return jsonify({
             'success': True, 
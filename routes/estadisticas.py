@@ -8,18 +8,25 @@ Endpoints:
 - /api/estadisticas/citas/        -> Detalle Citas
 - /api/estadisticas/grupos/       -> Detalle Grupos de Ayudantes / Tareas
 - /api/estadisticas/finanzas/     -> Detalle Finanzas (movimientos de caja)
+- /api/estadisticas/jobs/         -> Reportes en segundo plano
 """
 """
 Módulo de ESTADÍSTICAS Y REPORTES - GESTIÓN ECLESIAL
 Versión completa con todas las funcionalidades para estadísticas de habitantes
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from database import execute_query
-from utils import require_rol
+from flask import Blueprint, request, jsonify, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from database import execute_query, run_parallel, batch_select, iter_query, QuerySpec
+from utils import require_rol, SerieTemporal, GRANULARIDADES, stream_export, FORMATOS_EXPORTACION
+from services import (
+    PerfilSectores, sacramento_index, dashboard_snapshots, demografia, restar_anios,
+    reporte_jobs, ColaLlenaError
+)
+from services.RollupServices import GRUPOS_EDAD
 from datetime import datetime, timedelta, date
 import calendar
+import os
 
 estadisticas_bp = Blueprint('estadisticas', __name__)
 
@@ -61,6 +68,29 @@ def calcular_variacion(actual, anterior):
         return 0
     return ((actual - anterior) / anterior) * 100
 
+def _kpis_columnares(desde, hasta, desde_anterior, hasta_anterior, nombres_sectores):
+    """'totales', 'total_familias' y 'sectores' de los KPIs calculados con ``demografia``"""
+    actual = demografia.resumen(desde=desde, hasta=hasta)
+    grupos = demografia.contar_por_grupo_edad(desde=desde, hasta=hasta)
+    nombres = {s['IdSector']: s['Descripcion'] for s in nombres_sectores or []}
+    sectores = [
+        {'sector': nombres[id_sector], 'cantidad': cantidad}
+        for id_sector, cantidad in demografia.contar_por('sector', desde=desde, hasta=hasta).items()
+        if id_sector in nombres
+    ]
+    sectores.sort(key=lambda s: -s['cantidad'])
+    return {
+        'totales': {
+            'total': actual['total'],
+            'total_anterior': demografia.resumen(desde=desde_anterior, hasta=hasta_anterior)['total'],
+            'con_sacramento': actual['con_sacramento'],
+            'sin_sacramento': actual['sin_sacramento'],
+            **{nombre: grupos[grupo] for grupo, nombre in GRUPOS_EDAD.items()}
+        },
+        'total_familias': {'total': actual['familias']},
+        'sectores': sectores,
+    }
+
 # ====================================================
 # ENDPOINTS DE ESTADÍSTICAS DE HABITANTES
 # ====================================================
@@ -95,120 +125,86 @@ def get_kpis_habitantes():
         desde_anterior = desde - timedelta(days=dias_periodo)
         hasta_anterior = desde - timedelta(days=1)
         
-        # ========== TOTAL HABITANTES (PERIODO ACTUAL) ==========
-        total_actual = execute_query("""
-            SELECT COUNT(*) as total 
-            FROM habitantes 
-            WHERE Activo = 1 
-            AND FechaRegistro BETWEEN %s AND %s
-        """, (desde, hasta), fetch_one=True)
-        
-        # ========== TOTAL HABITANTES (PERIODO ANTERIOR) ==========
-        total_anterior = execute_query("""
-            SELECT COUNT(*) as total 
-            FROM habitantes 
-            WHERE Activo = 1 
-            AND FechaRegistro BETWEEN %s AND %s
-        """, (desde_anterior, hasta_anterior), fetch_one=True)
-        
-        total_actual_val = total_actual['total'] if total_actual else 0
-        total_anterior_val = total_anterior['total'] if total_anterior else 0
+        # Los sacramentos más comunes salen de los agregados diarios (rollup_sacramentos_dia)
+        specs = {
+            'sacramentos_comunes': QuerySpec("""
+                SELECT 
+                    ts.Descripcion as sacramento,
+                    CAST(SUM(r.Total) AS SIGNED) as total,
+                    COUNT(DISTINCT NULLIF(r.IdSector, 0)) as sectores_afectados
+                FROM rollup_sacramentos_dia r
+                INNER JOIN tiposacramentos ts ON r.IdSacramento = ts.IdSacramento
+                WHERE r.Dia BETWEEN %s AND %s
+                AND r.Total > 0
+                GROUP BY ts.IdSacramento, ts.Descripcion
+                ORDER BY total DESC
+                LIMIT 5
+            """, (desde, hasta)),
+        }
+        usar_motor = demografia.disponible()
+        if usar_motor:
+            specs['nombres_sectores'] = QuerySpec("SELECT IdSector, Descripcion FROM sector")
+        else:
+            # Los conteos salen de los agregados diarios (rollup_*_dia): se suman
+            # filas por día y dimensión en lugar de recorrer habitantes
+            specs.update({
+                # ========== TOTALES, SACRAMENTO Y EDADES (AMBOS PERÍODOS) ==========
+                'totales': QuerySpec("""
+                    SELECT
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s THEN Total END), 0) AS SIGNED) as total,
+                        CAST(COALESCE(SUM(CASE WHEN Dia < %s THEN Total END), 0) AS SIGNED) as total_anterior,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND ConSacramento = 1 THEN Total END), 0) AS SIGNED) as con_sacramento,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND ConSacramento = 0 THEN Total END), 0) AS SIGNED) as sin_sacramento,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND GrupoEdad = 0 THEN Total END), 0) AS SIGNED) as ninos,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND GrupoEdad = 1 THEN Total END), 0) AS SIGNED) as jovenes,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND GrupoEdad = 2 THEN Total END), 0) AS SIGNED) as adultos,
+                        CAST(COALESCE(SUM(CASE WHEN Dia >= %s AND GrupoEdad = 3 THEN Total END), 0) AS SIGNED) as adultos_mayores
+                    FROM rollup_habitantes_dia
+                    WHERE Dia BETWEEN %s AND %s
+                """, (desde,) * 8 + (desde_anterior, hasta), fetch_one=True),
+
+                # ========== TOTAL FAMILIAS ==========
+                'total_familias': QuerySpec("""
+                    SELECT COUNT(DISTINCT IdGrupoFamiliar) as total 
+                    FROM habitantes 
+                    WHERE Activo = 1 
+                    AND FechaRegistro >= %s AND FechaRegistro < %s
+                    AND IdGrupoFamiliar IS NOT NULL
+                """, (desde, hasta + timedelta(days=1)), fetch_one=True),
+
+                # ========== HABITANTES POR SECTOR (MAYOR Y MENOR) ==========
+                'sectores': QuerySpec("""
+                    SELECT 
+                        s.Descripcion as sector,
+                        CAST(SUM(r.Total) AS SIGNED) as cantidad
+                    FROM rollup_habitantes_dia r
+                    INNER JOIN sector s ON r.IdSector = s.IdSector
+                    WHERE r.Dia BETWEEN %s AND %s
+                    GROUP BY r.IdSector, s.Descripcion
+                    HAVING cantidad > 0
+                    ORDER BY cantidad DESC
+                """, (desde, hasta)),
+            })
+        r = batch_select(specs)
+        if usar_motor:
+            # Totales, edades (exactas a hoy), familias y sectores desde el motor columnar
+            r.update(_kpis_columnares(desde, hasta, desde_anterior, hasta_anterior, r.pop('nombres_sectores')))
+
+        totales = r['totales'] or {}
+        total_familias = r['total_familias']
+        sacramentos_comunes = r['sacramentos_comunes']
+
+        total_actual_val = totales.get('total', 0)
+        total_anterior_val = totales.get('total_anterior', 0)
         crecimiento = calcular_variacion(total_actual_val, total_anterior_val)
-        
-        # ========== TOTAL FAMILIAS ==========
-        total_familias = execute_query("""
-            SELECT COUNT(DISTINCT IdGrupoFamiliar) as total 
-            FROM habitantes 
-            WHERE Activo = 1 
-            AND FechaRegistro BETWEEN %s AND %s
-            AND IdGrupoFamiliar IS NOT NULL
-        """, (desde, hasta), fetch_one=True)
-        
-        # ========== CON SACRAMENTO ==========
-        con_sacramento = execute_query("""
-            SELECT COUNT(DISTINCT h.IdHabitante) as total
-            FROM habitantes h
-            INNER JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-        """, (desde, hasta), fetch_one=True)
-        
-        # ========== SIN SACRAMENTO ==========
-        sin_sacramento = execute_query("""
-            SELECT COUNT(*) as total
-            FROM habitantes h
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-            AND NOT EXISTS (
-                SELECT 1 FROM habitante_sacramento hs 
-                WHERE hs.IdHabitante = h.IdHabitante
-            )
-        """, (desde, hasta), fetch_one=True)
-        
-        # ========== SECTOR CON MÁS HABITANTES ==========
-        sector_mayor = execute_query("""
-            SELECT 
-                s.Descripcion as sector,
-                COUNT(h.IdHabitante) as cantidad,
-                ROUND((COUNT(h.IdHabitante) * 100.0 / (
-                    SELECT COUNT(*) FROM habitantes 
-                    WHERE Activo = 1 AND FechaRegistro BETWEEN %s AND %s
-                )), 2) as porcentaje
-            FROM habitantes h
-            INNER JOIN sector s ON h.IdSector = s.IdSector
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-            GROUP BY h.IdSector, s.Descripcion
-            ORDER BY cantidad DESC
-            LIMIT 1
-        """, (desde, hasta, desde, hasta), fetch_one=True)
-        
-        # ========== SECTOR CON MENOS HABITANTES ==========
-        sector_menor = execute_query("""
-            SELECT 
-                s.Descripcion as sector,
-                COUNT(h.IdHabitante) as cantidad,
-                ROUND((COUNT(h.IdHabitante) * 100.0 / (
-                    SELECT COUNT(*) FROM habitantes 
-                    WHERE Activo = 1 AND FechaRegistro BETWEEN %s AND %s
-                )), 2) as porcentaje
-            FROM habitantes h
-            INNER JOIN sector s ON h.IdSector = s.IdSector
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-            GROUP BY h.IdSector, s.Descripcion
-            HAVING COUNT(h.IdHabitante) > 0
-            ORDER BY cantidad ASC
-            LIMIT 1
-        """, (desde, hasta, desde, hasta), fetch_one=True)
-        
-        # ========== DISTRIBUCIÓN POR EDADES ==========
-        distribucion_edades = execute_query("""
-            SELECT 
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, FechaNacimiento, CURDATE()) BETWEEN 0 AND 12 THEN 1 ELSE 0 END) as ninos,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, FechaNacimiento, CURDATE()) BETWEEN 13 AND 29 THEN 1 ELSE 0 END) as jovenes,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, FechaNacimiento, CURDATE()) BETWEEN 30 AND 59 THEN 1 ELSE 0 END) as adultos,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, FechaNacimiento, CURDATE()) >= 60 THEN 1 ELSE 0 END) as adultos_mayores
-            FROM habitantes
-            WHERE Activo = 1 
-            AND FechaRegistro BETWEEN %s AND %s
-        """, (desde, hasta), fetch_one=True)
-        
-        # ========== SACRAMENTOS MÁS COMUNES ==========
-        sacramentos_comunes = execute_query("""
-            SELECT 
-                ts.Descripcion as sacramento,
-                COUNT(*) as total,
-                COUNT(DISTINCT h.IdSector) as sectores_afectados
-            FROM habitante_sacramento hs
-            INNER JOIN tiposacramentos ts ON hs.IdSacramento = ts.IdSacramento
-            INNER JOIN habitantes h ON hs.IdHabitante = h.IdHabitante
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-            GROUP BY ts.IdSacramento, ts.Descripcion
-            ORDER BY total DESC
-            LIMIT 5
-        """, (desde, hasta))
+
+        def resumen_sector(fila):
+            if not fila:
+                return {'sector': 'N/A', 'cantidad': 0, 'porcentaje': 0}
+            porcentaje = round(fila['cantidad'] * 100.0 / total_actual_val, 2) if total_actual_val else 0
+            return {'sector': fila['sector'], 'cantidad': fila['cantidad'], 'porcentaje': porcentaje}
+
+        sectores = r['sectores'] or []
         
         return jsonify({
             'success': True,
@@ -224,23 +220,12 @@ def get_kpis_habitantes():
                 'totalHabitantesAnterior': total_anterior_val,
                 'crecimiento': round(crecimiento, 2),
                 'totalFamilias': total_familias['total'] if total_familias else 0,
-                'conSacramento': con_sacramento['total'] if con_sacramento else 0,
-                'sinSacramento': sin_sacramento['total'] if sin_sacramento else 0,
-                'sectorMayor': {
-                    'sector': sector_mayor['sector'] if sector_mayor else 'N/A',
-                    'cantidad': sector_mayor['cantidad'] if sector_mayor else 0,
-                    'porcentaje': sector_mayor['porcentaje'] if sector_mayor else 0
-                },
-                'sectorMenor': {
-                    'sector': sector_menor['sector'] if sector_menor else 'N/A',
-                    'cantidad': sector_menor['cantidad'] if sector_menor else 0,
-                    'porcentaje': sector_menor['porcentaje'] if sector_menor else 0
-                },
+                'conSacramento': totales.get('con_sacramento', 0),
+                'sinSacramento': totales.get('sin_sacramento', 0),
+                'sectorMayor': resumen_sector(sectores[0] if sectores else None),
+                'sectorMenor': resumen_sector(sectores[-1] if sectores else None),
                 'distribucionEdades': {
-                    'ninos': distribucion_edades['ninos'] if distribucion_edades else 0,
-                    'jovenes': distribucion_edades['jovenes'] if distribucion_edades else 0,
-                    'adultos': distribucion_edades['adultos'] if distribucion_edades else 0,
-                    'adultos_mayores': distribucion_edades['adultos_mayores'] if distribucion_edades else 0
+                    grupo: totales.get(grupo, 0) for grupo in GRUPOS_EDAD.values()
                 },
                 'sacramentosComunes': sacramentos_comunes
             }
@@ -275,86 +260,23 @@ def get_habitantes_por_sector():
         desde_anterior = desde - timedelta(days=dias_periodo)
         hasta_anterior = desde - timedelta(days=1)
         
-        # ========== DISTRIBUCIÓN POR SECTOR (PERIODO ACTUAL) ==========
-        sectores_actual = execute_query("""
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                COUNT(h.IdHabitante) as cantidad,
-                ROUND((COUNT(h.IdHabitante) * 100.0 / (
-                    SELECT COUNT(*) 
-                    FROM habitantes 
-                    WHERE Activo = 1 
-                    AND FechaRegistro BETWEEN %s AND %s
-                )), 2) as porcentaje,
-                AVG(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_promedio,
-                COUNT(DISTINCT h.IdGrupoFamiliar) as familias,
-                SUM(CASE WHEN h.TieneImpedimentoSalud = 1 THEN 1 ELSE 0 END) as con_impedimento
-            FROM sector s
-            LEFT JOIN habitantes h ON s.IdSector = h.IdSector 
-                AND h.Activo = 1 
-                AND h.FechaRegistro BETWEEN %s AND %s
-            WHERE s.Activo = 1
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY cantidad DESC, s.Descripcion
-        """, (desde, hasta, desde, hasta))
-        
-        # ========== DISTRIBUCIÓN POR SECTOR (PERIODO ANTERIOR) ==========
-        sectores_anterior = execute_query("""
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                COUNT(h.IdHabitante) as cantidad_anterior
-            FROM sector s
-            LEFT JOIN habitantes h ON s.IdSector = h.IdSector 
-                AND h.Activo = 1 
-                AND h.FechaRegistro BETWEEN %s AND %s
-            WHERE s.Activo = 1
-            GROUP BY s.IdSector, s.Descripcion
-        """, (desde_anterior, hasta_anterior))
-        
-        # Crear diccionario para fácil acceso a datos anteriores
-        sectores_anterior_dict = {s['IdSector']: s['cantidad_anterior'] for s in sectores_anterior}
-        
-        # ========== COMBINAR DATOS Y CALCULAR VARIACIONES ==========
-        sectores_completos = []
-        total_habitantes_actual = sum(s['cantidad'] for s in sectores_actual)
-        
-        for sector in sectores_actual:
-            id_sector = sector['IdSector']
-            cantidad_actual = sector['cantidad']
-            cantidad_anterior = sectores_anterior_dict.get(id_sector, 0)
-            variacion = calcular_variacion(cantidad_actual, cantidad_anterior)
-            
-            # Sacramentos por sector
-            sacramentos_sector = execute_query("""
-                SELECT 
-                    COUNT(DISTINCT hs.IdHabitante) as con_sacramento,
-                    GROUP_CONCAT(DISTINCT ts.Descripcion ORDER BY ts.Descripcion SEPARATOR ', ') as lista_sacramentos
-                FROM habitantes h
-                LEFT JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante
-                LEFT JOIN tiposacramentos ts ON hs.IdSacramento = ts.IdSacramento
-                WHERE h.Activo = 1 
-                AND h.IdSector = %s
-                AND h.FechaRegistro BETWEEN %s AND %s
-            """, (id_sector, desde, hasta), fetch_one=True)
-            
-            sectores_completos.append({
-                'id': id_sector,
-                'sector': sector['sector'],
-                'cantidad': cantidad_actual,
-                'porcentaje': round((cantidad_actual / total_habitantes_actual * 100), 2) if total_habitantes_actual > 0 else 0,
-                'cantidad_anterior': cantidad_anterior,
-                'variacion': round(variacion, 2),
-                'edad_promedio': round(sector['edad_promedio'], 1) if sector['edad_promedio'] else 0,
-                'familias': sector['familias'],
-                'con_impedimento': sector['con_impedimento'],
-                'con_sacramento': sacramentos_sector['con_sacramento'] if sacramentos_sector else 0,
-                'lista_sacramentos': sacramentos_sector['lista_sacramentos'] if sacramentos_sector else 'Ninguno'
-            })
-        
-        # Ordenar por cantidad descendente
-        sectores_completos.sort(key=lambda x: x['cantidad'], reverse=True)
+        # Todos los sectores con ambos períodos y sus sacramentos en un viaje
+        perfiles = PerfilSectores(desde, hasta, desde_anterior, hasta_anterior).ejecutar()
+        total_habitantes_actual = sum(p['cantidad'] for p in perfiles)
+        
+        sectores_completos = [{
+            'id': p['id'],
+            'sector': p['sector'],
+            'cantidad': p['cantidad'],
+            'porcentaje': p['porcentaje'],
+            'cantidad_anterior': p['cantidad_anterior'],
+            'variacion': p['variacion'],
+            'edad_promedio': p['edad_promedio'],
+            'familias': p['familias'],
+            'con_impedimento': p['con_impedimento'],
+            'con_sacramento': p['con_sacramento'],
+            'lista_sacramentos': p['lista_sacramentos']
+        } for p in perfiles]
         
         return jsonify({
             'success': True,
@@ -443,18 +365,46 @@ def get_sacramentos_por_sector():
             ORDER BY s.Descripcion, ts.Descripcion
         """
         
-        sacramentos_detalle = execute_query(query, tuple(params))
+        # ========== SACRAMENTOS MÁS COMUNES ==========
+        query_comunes = """
+            SELECT 
+                ts.Descripcion as sacramento,
+                COUNT(*) as total,
+                COUNT(DISTINCT h.IdSector) as sectores,
+                ROUND(AVG(ts.Costo), 2) as costo_promedio
+            FROM habitante_sacramento hs
+            INNER JOIN tiposacramentos ts ON hs.IdSacramento = ts.IdSacramento
+            INNER JOIN habitantes h ON hs.IdHabitante = h.IdHabitante
+            WHERE h.Activo = 1 
+            AND h.FechaRegistro BETWEEN %s AND %s
+            GROUP BY ts.IdSacramento, ts.Descripcion
+            ORDER BY total DESC
+            LIMIT 10
+        """
+        
+        # Detalle, comunes y perfil de sectores en un solo viaje
+        perfil = PerfilSectores(desde, hasta)
+        r = batch_select({
+            'detalle': QuerySpec(query, tuple(params)),
+            'comunes': QuerySpec(query_comunes, (desde, hasta)),
+            **perfil.specs()
+        })
+        sacramentos_detalle = r['detalle']
+        sacramentos_comunes = r['comunes']
+        perfiles = {p['id']: p for p in perfil.completar(r)}
         
         # ========== RESUMEN POR SECTOR ==========
         resumen_por_sector = {}
         for item in sacramentos_detalle:
             sector_key = item['sector']
             if sector_key not in resumen_por_sector:
+                # Habitantes del sector y con algún sacramento (no solo los del detalle)
+                perfil_sector = perfiles.get(item['IdSector'], {})
                 resumen_por_sector[sector_key] = {
                     'sector': item['sector'],
-                    'total_habitantes': item['total_habitantes'],
+                    'total_habitantes': perfil_sector.get('cantidad', 0),
                     'total_sacramentos': 0,
-                    'total_con_sacramento': 0,
+                    'total_con_sacramento': perfil_sector.get('con_sacramento', 0),
                     'porcentaje_con_sacramento': 0,
                     'sacramentos_detalle': []
                 }
@@ -465,7 +415,6 @@ def get_sacramentos_por_sector():
                 variacion_mensual = calcular_variacion(item['este_mes'], item['mes_anterior'])
             
             resumen_por_sector[sector_key]['total_sacramentos'] += item['total_con_sacramento']
-            resumen_por_sector[sector_key]['total_con_sacramento'] = item['total_con_sacramento']
             
             resumen_por_sector[sector_key]['sacramentos_detalle'].append({
                 'sacramento': item['sacramento'],
@@ -486,26 +435,9 @@ def get_sacramentos_por_sector():
                     (sector['total_con_sacramento'] / sector['total_habitantes']) * 100, 2
                 )
         
-        # ========== SACRAMENTOS MÁS COMUNES ==========
-        sacramentos_comunes = execute_query("""
-            SELECT 
-                ts.Descripcion as sacramento,
-                COUNT(*) as total,
-                COUNT(DISTINCT h.IdSector) as sectores,
-                ROUND(AVG(ts.Costo), 2) as costo_promedio
-            FROM habitante_sacramento hs
-            INNER JOIN tiposacramentos ts ON hs.IdSacramento = ts.IdSacramento
-            INNER JOIN habitantes h ON hs.IdHabitante = h.IdHabitante
-            WHERE h.Activo = 1 
-            AND h.FechaRegistro BETWEEN %s AND %s
-            GROUP BY ts.IdSacramento, ts.Descripcion
-            ORDER BY total DESC
-            LIMIT 10
-        """, (desde, hasta))
-        
         # ========== RESUMEN GENERAL ==========
         total_sacramentos = sum(item['total_con_sacramento'] for item in sacramentos_detalle)
-        total_habitantes_con_sacramento = len(set(item['total_con_sacramento'] for item in sacramentos_detalle if item['total_con_sacramento'] > 0))
+        total_habitantes_con_sacramento = sum(s['total_con_sacramento'] for s in resumen_por_sector.values())
         
         return jsonify({
             'success': True,
@@ -533,132 +465,37 @@ def get_sacramentos_por_sector():
 def get_crecimiento_temporal():
     """
     Evolución del crecimiento de habitantes en el tiempo
-    Puede ser por año, trimestre o mes
+    Puede ser por año, trimestre, mes, semana o día (últimos ``cantidad``
+    períodos del calendario, en una sola consulta sobre los agregados diarios)
     """
     try:
         tipo_rango = request.args.get('tipo_rango', 'anio')
-        cantidad_periodos = int(request.args.get('cantidad', 12))
-        
-        hoy = datetime.now()
+        cantidad = request.args.get('cantidad', '12')
+        if not cantidad.isdigit() or int(cantidad) < 1:
+            return jsonify({'success': False, 'message': 'cantidad debe ser un entero mayor que 0'}), 400
+        cantidad_periodos = int(cantidad)
+
+        granularidad = tipo_rango if tipo_rango in GRANULARIDADES else 'anio'
+        serie = SerieTemporal(
+            'FROM rollup_habitantes_dia', 'Dia', granularidad,
+            valores={'total': 'CAST(SUM(Total) AS SIGNED)'},
+            cantidad=cantidad_periodos, crecimiento='total'
+        ).ejecutar()
+
         data = []
-        
-        if tipo_rango == 'mes':
-            # Últimos N meses
-            for i in range(cantidad_periodos - 1, -1, -1):
-                fecha = hoy - timedelta(days=30*i)
-                año = fecha.year
-                mes = fecha.month
-                
-                # Calcular primer y último día del mes
-                primer_dia = date(año, mes, 1)
-                ultimo_dia = date(año, mes, calendar.monthrange(año, mes)[1])
-                
-                total = execute_query("""
-                    SELECT COUNT(*) as total
-                    FROM habitantes
-                    WHERE Activo = 1
-                    AND FechaRegistro BETWEEN %s AND %s
-                """, (primer_dia, ultimo_dia), fetch_one=True)
-                
-                # Calcular crecimiento
-                mes_anterior = primer_dia - timedelta(days=1)
-                primer_dia_anterior = date(mes_anterior.year, mes_anterior.month, 1)
-                ultimo_dia_anterior = date(mes_anterior.year, mes_anterior.month, calendar.monthrange(mes_anterior.year, mes_anterior.month)[1])
-                
-                total_anterior = execute_query("""
-                    SELECT COUNT(*) as total
-                    FROM habitantes
-                    WHERE Activo = 1
-                    AND FechaRegistro BETWEEN %s AND %s
-                """, (primer_dia_anterior, ultimo_dia_anterior), fetch_one=True)
-                
-                crecimiento = calcular_variacion(
-                    total['total'] if total else 0,
-                    total_anterior['total'] if total_anterior else 0
-                )
-                
-                data.append({
-                    'periodo': f"{mes:02d}/{año}",
-                    'fecha_inicio': primer_dia.isoformat(),
-                    'fecha_fin': ultimo_dia.isoformat(),
-                    'total': total['total'] if total else 0,
-                    'total_anterior': total_anterior['total'] if total_anterior else 0,
-                    'crecimiento': round(crecimiento, 2),
-                    'tipo': 'mes'
-                })
-        
-        elif tipo_rango == 'trimestre':
-            # Últimos N trimestres
-            for i in range(cantidad_periodos - 1, -1, -1):
-                fecha_referencia = hoy - timedelta(days=90*i)
-                año = fecha_referencia.year
-                trimestre_num = ((fecha_referencia.month - 1) // 3) + 1
-                
-                # Calcular fechas del trimestre
-                mes_inicio = (trimestre_num - 1) * 3 + 1
-                primer_dia = date(año, mes_inicio, 1)
-                mes_fin = mes_inicio + 2
-                ultimo_dia = date(año, mes_fin, calendar.monthrange(año, mes_fin)[1])
-                
-                total = execute_query("""
-                    SELECT COUNT(*) as total
-                    FROM habitantes
-                    WHERE Activo = 1
-                    AND FechaRegistro BETWEEN %s AND %s
-                """, (primer_dia, ultimo_dia), fetch_one=True)
-                
-                data.append({
-                    'periodo': f"T{trimestre_num}-{año}",
-                    'fecha_inicio': primer_dia.isoformat(),
-                    'fecha_fin': ultimo_dia.isoformat(),
-                    'total': total['total'] if total else 0,
-                    'tipo': 'trimestre'
-                })
-        
-        else:  # año por defecto
-            # Últimos N años
-            for i in range(cantidad_periodos - 1, -1, -1):
-                año = hoy.year - i
-                primer_dia = date(año, 1, 1)
-                ultimo_dia = date(año, 12, 31)
-                
-                total = execute_query("""
-                    SELECT COUNT(*) as total
-                    FROM habitantes
-                    WHERE Activo = 1
-                    AND FechaRegistro BETWEEN %s AND %s
-                """, (primer_dia, ultimo_dia), fetch_one=True)
-                
-                # Calcular crecimiento anual
-                if i < cantidad_periodos - 1:
-                    año_anterior = año - 1
-                    primer_dia_anterior = date(año_anterior, 1, 1)
-                    ultimo_dia_anterior = date(año_anterior, 12, 31)
-                    
-                    total_anterior = execute_query("""
-                        SELECT COUNT(*) as total
-                        FROM habitantes
-                        WHERE Activo = 1
-                        AND FechaRegistro BETWEEN %s AND %s
-                    """, (primer_dia_anterior, ultimo_dia_anterior), fetch_one=True)
-                    
-                    crecimiento = calcular_variacion(
-                        total['total'] if total else 0,
-                        total_anterior['total'] if total_anterior else 0
-                    )
-                else:
-                    crecimiento = 0
-                    total_anterior = {'total': 0}
-                
-                data.append({
-                    'periodo': str(año),
-                    'fecha_inicio': primer_dia.isoformat(),
-                    'fecha_fin': ultimo_dia.isoformat(),
-                    'total': total['total'] if total else 0,
-                    'total_anterior': total_anterior['total'] if total_anterior else 0,
-                    'crecimiento': round(crecimiento, 2),
-                    'tipo': 'año'
-                })
+        for item in serie:
+            inicio = date.fromisoformat(item['fecha_inicio'])
+            if granularidad == 'mes':
+                periodo = f"{inicio.month:02d}/{inicio.year}"
+            elif granularidad == 'trimestre':
+                periodo = f"T{(inicio.month - 1) // 3 + 1}-{inicio.year}"
+            else:
+                periodo = item['periodo']
+            data.append({
+                **item,
+                'periodo': periodo,
+                'tipo': 'año' if granularidad == 'anio' else granularidad
+            })
         
         # Calcular tendencia
         if len(data) >= 2:
@@ -683,12 +520,138 @@ def get_crecimiento_temporal():
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error al obtener crecimiento temporal: {str(e)}'}), 500
 
+# Rangos de edad de /distribucion-edades/: límites inferiores y etiquetas
+_LIMITES_EDAD = [1, 6, 13, 18, 25, 35, 45, 55, 65, 75]
+_RANGOS_EDAD = ['Menos de 1 año', '1-5 años', '6-12 años', '13-17 años', '18-24 años', '25-34 años',
+                '35-44 años', '45-54 años', '55-64 años', '65-74 años', '75+ años']
+_LIMITES_CATEGORIAS = [18, 30, 45, 60, 75]
+_CATEGORIAS_EDAD = ['menores', 'jovenes', 'adultos_jovenes', 'adultos', 'adultos_mayores', 'tercera_edad']
+
+
+def _distribucion_edades_columnar(desde, hasta, id_sector):
+    """Rangos, total, categorías y estadísticas de edad calculados con ``demografia``"""
+    filtros = {'desde': desde, 'hasta': hasta, 'sector': id_sector}
+    rangos, sin_fecha = demografia.por_rango_edad(_LIMITES_EDAD, **filtros)
+    # Como el CASE de SQL: sin fecha de nacimiento cae en el ELSE (75+) sin afectar promedios
+    rangos[-1]['cantidad'] += sin_fecha
+    rangos_edades = [
+        {'rango_edad': etiqueta, **rango}
+        for etiqueta, rango in zip(_RANGOS_EDAD, rangos) if rango['cantidad']
+    ]
+    categorias, _ = demografia.por_rango_edad(_LIMITES_CATEGORIAS, **filtros)
+    generales = demografia.resumen(**filtros)
+    return (
+        rangos_edades,
+        generales['total'],
+        {nombre: c['cantidad'] for nombre, c in zip(_CATEGORIAS_EDAD, categorias)},
+        {k: generales[k] for k in ('edad_promedio', 'edad_minima', 'edad_maxima')}
+    )
+
+
+def _distribucion_edades_sql(desde, hasta, id_sector):
+    """Rangos, total, categorías y estadísticas de edad calculados en MySQL"""
+    # ========== CONSTRUIR CONDICIONES ==========
+    condiciones = ["h.Activo = 1", "h.FechaRegistro >= %s", "h.FechaRegistro < %s"]
+    params = [desde, hasta + timedelta(days=1)]
+    
+    if id_sector:
+        condiciones.append("h.IdSector = %s")
+        params.append(id_sector)
+    
+    where_clause = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    
+    # ========== RANGOS DE EDAD DETALLADOS (SIN PORCENTAJE EN LA MISMA CONSULTA) ==========
+    query = f"""
+        SELECT 
+            CASE
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) < 1 THEN 'Menos de 1 año'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 1 AND 5 THEN '1-5 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 6 AND 12 THEN '6-12 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 13 AND 17 THEN '13-17 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 18 AND 24 THEN '18-24 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 25 AND 34 THEN '25-34 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 35 AND 44 THEN '35-44 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 45 AND 54 THEN '45-54 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 55 AND 64 THEN '55-64 años'
+                WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 65 AND 74 THEN '65-74 años'
+                ELSE '75+ años'
+            END as rango_edad,
+            COUNT(*) as cantidad,
+            AVG(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_promedio,
+            MIN(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_minima,
+            MAX(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_maxima
+        FROM habitantes h
+        {where_clause}
+        GROUP BY rango_edad
+        ORDER BY 
+            CASE rango_edad
+                WHEN 'Menos de 1 año' THEN 1
+                WHEN '1-5 años' THEN 2
+                WHEN '6-12 años' THEN 3
+                WHEN '13-17 años' THEN 4
+                WHEN '18-24 años' THEN 5
+                WHEN '25-34 años' THEN 6
+                WHEN '35-44 años' THEN 7
+                WHEN '45-54 años' THEN 8
+                WHEN '55-64 años' THEN 9
+                WHEN '65-74 años' THEN 10
+                ELSE 11
+            END
+    """
+    
+    rangos_edades = execute_query(query, tuple(params))
+    
+    # ========== CALCULAR TOTAL PARA PORCENTAJES ==========
+    total_query = f"SELECT COUNT(*) as total FROM habitantes h {where_clause}"
+    total_result = execute_query(total_query, tuple(params), fetch_one=True)
+    total = total_result['total'] if total_result else 0
+    
+    # ========== RESUMEN POR CATEGORÍA AMPLIA ==========
+    resumen_query = f"""
+        SELECT 
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) < 18 THEN 1 ELSE 0 END) as menores,
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 18 AND 29 THEN 1 ELSE 0 END) as jovenes,
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 30 AND 44 THEN 1 ELSE 0 END) as adultos_jovenes,
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 45 AND 59 THEN 1 ELSE 0 END) as adultos,
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 60 AND 74 THEN 1 ELSE 0 END) as adultos_mayores,
+            SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) >= 75 THEN 1 ELSE 0 END) as tercera_edad
+        FROM habitantes h
+        {where_clause}
+    """
+    
+    resumen_categorias = execute_query(resumen_query, tuple(params), fetch_one=True)
+    
+    # ========== ESTADÍSTICAS GENERALES ==========
+    estadisticas_query = f"""
+        SELECT 
+            AVG(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_promedio_general,
+            MIN(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_minima_general,
+            MAX(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_maxima_general
+        FROM habitantes h
+        {where_clause}
+    """
+    
+    estadisticas_generales = execute_query(estadisticas_query, tuple(params), fetch_one=True)
+
+    return (
+        rangos_edades,
+        total,
+        {nombre: (resumen_categorias[nombre] or 0) if resumen_categorias else 0 for nombre in _CATEGORIAS_EDAD},
+        {
+            'edad_promedio': estadisticas_generales['edad_promedio_general'] if estadisticas_generales else None,
+            'edad_minima': estadisticas_generales['edad_minima_general'] if estadisticas_generales else None,
+            'edad_maxima': estadisticas_generales['edad_maxima_general'] if estadisticas_generales else None,
+        }
+    )
+
+
 @estadisticas_bp.route('/habitantes/distribucion-edades/', methods=['GET'])
 @jwt_required()
 @require_rol('Administrador')
 def get_distribucion_edades():
     """
     Distribución de habitantes por rangos de edad - Versión simplificada
+    Usa el motor columnar si está cargado; si no, SQL.
     """
     try:
         tipo_rango = request.args.get('tipo_rango', 'mes')
@@ -704,61 +667,12 @@ def get_distribucion_edades():
         
         desde, hasta = obtener_rango_fechas(filtros)
         
-        # ========== CONSTRUIR CONDICIONES ==========
-        condiciones = ["h.Activo = 1", "h.FechaRegistro BETWEEN %s AND %s"]
-        params = [desde, hasta]
-        
-        if id_sector:
-            condiciones.append("h.IdSector = %s")
-            params.append(id_sector)
-        
-        where_clause = "WHERE " + " AND ".join(condiciones) if condiciones else ""
-        
-        # ========== RANGOS DE EDAD DETALLADOS (SIN PORCENTAJE EN LA MISMA CONSULTA) ==========
-        query = f"""
-            SELECT 
-                CASE
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) < 1 THEN 'Menos de 1 año'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 1 AND 5 THEN '1-5 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 6 AND 12 THEN '6-12 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 13 AND 17 THEN '13-17 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 18 AND 24 THEN '18-24 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 25 AND 34 THEN '25-34 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 35 AND 44 THEN '35-44 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 45 AND 54 THEN '45-54 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 55 AND 64 THEN '55-64 años'
-                    WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 65 AND 74 THEN '65-74 años'
-                    ELSE '75+ años'
-                END as rango_edad,
-                COUNT(*) as cantidad,
-                AVG(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_promedio,
-                MIN(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_minima,
-                MAX(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_maxima
-            FROM habitantes h
-            {where_clause}
-            GROUP BY rango_edad
-            ORDER BY 
-                CASE rango_edad
-                    WHEN 'Menos de 1 año' THEN 1
-                    WHEN '1-5 años' THEN 2
-                    WHEN '6-12 años' THEN 3
-                    WHEN '13-17 años' THEN 4
-                    WHEN '18-24 años' THEN 5
-                    WHEN '25-34 años' THEN 6
-                    WHEN '35-44 años' THEN 7
-                    WHEN '45-54 años' THEN 8
-                    WHEN '55-64 años' THEN 9
-                    WHEN '65-74 años' THEN 10
-                    ELSE 11
-                END
-        """
-        
-        rangos_edades = execute_query(query, tuple(params))
-        
-        # ========== CALCULAR TOTAL PARA PORCENTAJES ==========
-        total_query = f"SELECT COUNT(*) as total FROM habitantes h {where_clause}"
-        total_result = execute_query(total_query, tuple(params), fetch_one=True)
-        total = total_result['total'] if total_result else 0
+        if demografia.disponible():
+            rangos_edades, total, resumen_categorias, estadisticas_generales = \
+                _distribucion_edades_columnar(desde, hasta, id_sector)
+        else:
+            rangos_edades, total, resumen_categorias, estadisticas_generales = \
+                _distribucion_edades_sql(desde, hasta, id_sector)
         
         # Agregar porcentajes a los resultados
         for rango in rangos_edades:
@@ -767,33 +681,7 @@ def get_distribucion_edades():
             else:
                 rango['porcentaje'] = 0
         
-        # ========== RESUMEN POR CATEGORÍA AMPLIA ==========
-        resumen_query = f"""
-            SELECT 
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) < 18 THEN 1 ELSE 0 END) as menores,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 18 AND 29 THEN 1 ELSE 0 END) as jovenes,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 30 AND 44 THEN 1 ELSE 0 END) as adultos_jovenes,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 45 AND 59 THEN 1 ELSE 0 END) as adultos,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) BETWEEN 60 AND 74 THEN 1 ELSE 0 END) as adultos_mayores,
-                SUM(CASE WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) >= 75 THEN 1 ELSE 0 END) as tercera_edad
-            FROM habitantes h
-            {where_clause}
-        """
-        
-        resumen_categorias = execute_query(resumen_query, tuple(params), fetch_one=True)
-        
-        # ========== ESTADÍSTICAS GENERALES ==========
-        estadisticas_query = f"""
-            SELECT 
-                AVG(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_promedio_general,
-                MIN(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_minima_general,
-                MAX(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())) as edad_maxima_general
-            FROM habitantes h
-            {where_clause}
-        """
-        
-        estadisticas_generales = execute_query(estadisticas_query, tuple(params), fetch_one=True)
-        
+        edad_promedio = estadisticas_generales['edad_promedio']
         return jsonify({
             'success': True,
             'filtros': {
@@ -802,18 +690,11 @@ def get_distribucion_edades():
             },
             'rangos_detallados': rangos_edades,
             'total_general': total,
-            'resumen_categorias': {
-                'menores': resumen_categorias['menores'] if resumen_categorias else 0,
-                'jovenes': resumen_categorias['jovenes'] if resumen_categorias else 0,
-                'adultos_jovenes': resumen_categorias['adultos_jovenes'] if resumen_categorias else 0,
-                'adultos': resumen_categorias['adultos'] if resumen_categorias else 0,
-                'adultos_mayores': resumen_categorias['adultos_mayores'] if resumen_categorias else 0,
-                'tercera_edad': resumen_categorias['tercera_edad'] if resumen_categorias else 0
-            },
+            'resumen_categorias': resumen_categorias,
             'estadisticas_generales': {
-                'edad_promedio': round(estadisticas_generales['edad_promedio_general'], 1) if estadisticas_generales else 0,
-                'edad_minima': estadisticas_generales['edad_minima_general'] if estadisticas_generales else 0,
-                'edad_maxima': estadisticas_generales['edad_maxima_general'] if estadisticas_generales else 0,
+                'edad_promedio': round(edad_promedio, 1) if edad_promedio is not None else 0,
+                'edad_minima': estadisticas_generales['edad_minima'] or 0,
+                'edad_maxima': estadisticas_generales['edad_maxima'] or 0,
                 'total': total
             }
         }), 200
@@ -826,6 +707,44 @@ def get_distribucion_edades():
 # NUEVOS ENDPOINTS PARA SACRAMENTOS PENDIENTES
 # ====================================================
 
+def _indice_en_construccion():
+    """Respuesta cuando el índice de sacramentos aún no está disponible"""
+    return jsonify({
+        'success': False,
+        'message': 'Índice de sacramentos en construcción, intente de nuevo en unos segundos'
+    }), 503
+
+
+def _formato_exportacion():
+    """
+    ``?format`` del request: None para JSON, el formato si es exportable
+    o False si no se reconoce
+    """
+    formato = (request.args.get('format') or '').lower()
+    if not formato or formato == 'json':
+        return None
+    return formato if formato in FORMATOS_EXPORTACION else False
+
+
+def _formato_invalido():
+    return jsonify({
+        'success': False,
+        'message': f"Formato no soportado. Use: json, {', '.join(FORMATOS_EXPORTACION)}"
+    }), 400
+
+
+def _sectores_y_sacramento(id_sacramento):
+    """Sectores activos y nombre del sacramento en un viaje"""
+    r = batch_select({
+        'sectores': QuerySpec("SELECT IdSector, Descripcion FROM sector WHERE Activo = 1 ORDER BY Descripcion"),
+        'sacramento': QuerySpec(
+            "SELECT Descripcion FROM tiposacramentos WHERE IdSacramento = %s", (id_sacramento,), fetch_one=True
+        ),
+    })
+    nombre = r['sacramento']['Descripcion'] if r['sacramento'] else f"Sacramento {id_sacramento}"
+    return r['sectores'] or [], nombre
+
+
 @estadisticas_bp.route('/habitantes/sacramentos-pendientes/', methods=['GET'])
 @jwt_required()
 @require_rol('Administrador')
@@ -833,74 +752,35 @@ def get_sacramentos_pendientes():
     """
     Retorna cantidad de habitantes que NO tienen cada sacramento
     Ejemplo: Bautismo: 320, Comunión: 210, etc.
+    Los conteos salen de los bitmaps de ``sacramento_index``.
     """
     try:
         # Obtener filtros básicos
         id_sector = request.args.get('id_sector', type=int)
         id_sacramento = request.args.get('id_sacramento', type=int)  # Para filtrar solo uno
         
-        # Construir condiciones base
-        condiciones_habitantes = ["h.Activo = 1"]
-        params = []
-        
-        if id_sector:
-            condiciones_habitantes.append("h.IdSector = %s")
-            params.append(id_sector)
-        
-        where_habitantes = "WHERE " + " AND ".join(condiciones_habitantes) if condiciones_habitantes else ""
-        
-        # 1. Total de habitantes activos (según filtros)
-        total_query = f"SELECT COUNT(*) as total FROM habitantes h {where_habitantes}"
-        total_result = execute_query(total_query, tuple(params) if params else None, fetch_one=True)
-        total_habitantes = total_result['total'] if total_result else 0
+        if not sacramento_index.disponible():
+            return _indice_en_construccion()
         
-        # 2. Sacramentos pendientes por tipo
         if id_sacramento:
-            # Solo un sacramento específico
-            sacramentos_query = """
-                SELECT 
-                    ts.IdSacramento as id,
-                    ts.Descripcion as nombre,
-                    COUNT(*) as cantidad
-                FROM tiposacramentos ts
-                CROSS JOIN habitantes h
-                WHERE h.Activo = 1
-                AND ts.IdSacramento = %s
-                AND NOT EXISTS (
-                    SELECT 1 FROM habitante_sacramento hs
-                    WHERE hs.IdSacramento = ts.IdSacramento
-                    AND hs.IdHabitante = h.IdHabitante
-                )
-                GROUP BY ts.IdSacramento, ts.Descripcion
-            """
-            sacramentos_params = [id_sacramento] + params
-            sacramentos_pendientes = execute_query(sacramentos_query, tuple(sacramentos_params))
+            catalogo = execute_query(
+                "SELECT IdSacramento, Descripcion FROM tiposacramentos WHERE IdSacramento = %s", (id_sacramento,)
+            ) or []
         else:
-            # Todos los sacramentos
-            sacramentos_query = f"""
-                SELECT 
-                    ts.IdSacramento as id,
-                    ts.Descripcion as nombre,
-                    COUNT(*) as cantidad
-                FROM tiposacramentos ts
-                CROSS JOIN habitantes h
-                {where_habitantes}
-                AND NOT EXISTS (
-                    SELECT 1 FROM habitante_sacramento hs
-                    WHERE hs.IdSacramento = ts.IdSacramento
-                    AND hs.IdHabitante = h.IdHabitante
-                )
-                GROUP BY ts.IdSacramento, ts.Descripcion
-                ORDER BY cantidad DESC
-            """
-            sacramentos_pendientes = execute_query(sacramentos_query, tuple(params) if params else None)
+            catalogo = execute_query("SELECT IdSacramento, Descripcion FROM tiposacramentos") or []
         
-        # Calcular porcentajes
-        for sacramento in sacramentos_pendientes:
-            if total_habitantes > 0:
-                sacramento['porcentaje'] = round((sacramento['cantidad'] / total_habitantes) * 100, 1)
-            else:
-                sacramento['porcentaje'] = 0
+        total_habitantes = sacramento_index.contar(sector=id_sector)
+        pendientes = sacramento_index.contar_por_sacramento(
+            [s['IdSacramento'] for s in catalogo], sector=id_sector, faltantes=True
+        )
+        
+        sacramentos_pendientes = [{
+            'id': s['IdSacramento'],
+            'nombre': s['Descripcion'],
+            'cantidad': pendientes[s['IdSacramento']],
+            'porcentaje': round(pendientes[s['IdSacramento']] / total_habitantes * 100, 1) if total_habitantes else 0
+        } for s in catalogo if pendientes[s['IdSacramento']]]
+        sacramentos_pendientes.sort(key=lambda s: -s['cantidad'])
         
         return jsonify({
             'success': True,
@@ -924,6 +804,7 @@ def get_lista_sin_sacramento():
     """
     Retorna lista de personas que NO tienen un sacramento específico
     Incluye datos de contacto para visitas
+    El total sale de los bitmaps; el detalle (máx. 1000) es un anti-join en SQL.
     """
     try:
         id_sacramento = request.args.get('id_sacramento', type=int)
@@ -932,9 +813,13 @@ def get_lista_sin_sacramento():
         if not id_sacramento:
             return jsonify({'success': False, 'message': 'Se requiere id_sacramento'}), 400
         
-        # Construir condiciones
+        if not sacramento_index.disponible():
+            return _indice_en_construccion()
+        
+        total_sin_sacramento = sacramento_index.contar(sin=(id_sacramento,), sector=id_sector)
+        
         condiciones = ["h.Activo = 1"]
-        params = [id_sacramento]
+        params = []
         
         if id_sector:
             condiciones.append("h.IdSector = %s")
@@ -947,37 +832,39 @@ def get_lista_sin_sacramento():
                 AND hs.IdSacramento = %s
             )
         """)
+        params.append(id_sacramento)
         
         where_clause = "WHERE " + " AND ".join(condiciones)
         
-        query = f"""
-            SELECT 
-                h.IdHabitante,
-                CONCAT(h.Nombre, ' ', h.Apellido) as nombre_completo,
-                td.Descripcion as tipo_documento,
-                h.NumeroDocumento,
-                TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) as edad,
-                s.Descripcion as sector,
-                h.Direccion,
-                h.Telefono,
-                h.CorreoElectronico,
-                h.FechaRegistro,
-                GROUP_CONCAT(DISTINCT ts2.Descripcion SEPARATOR ', ') as otros_sacramentos,
-                COUNT(DISTINCT hs2.IdSacramento) as total_sacramentos_actuales
-            FROM habitantes h
-            LEFT JOIN tipodocumento td ON h.IdTipoDocumento = td.IdTipoDocumento
-            LEFT JOIN sector s ON h.IdSector = s.IdSector
-            LEFT JOIN habitante_sacramento hs2 ON h.IdHabitante = hs2.IdHabitante
-            LEFT JOIN tiposacramentos ts2 ON hs2.IdSacramento = ts2.IdSacramento
-            {where_clause}
-            GROUP BY h.IdHabitante, h.Nombre, h.Apellido, td.Descripcion, h.NumeroDocumento,
-                     h.FechaNacimiento, s.Descripcion, h.Direccion, h.Telefono, 
-                     h.CorreoElectronico, h.FechaRegistro
-            ORDER BY h.Apellido, h.Nombre
-            LIMIT 1000
-        """
-        
-        personas = execute_query(query, tuple(params))
+        personas = []
+        if total_sin_sacramento:
+            query = f"""
+                SELECT 
+                    h.IdHabitante,
+                    CONCAT(h.Nombre, ' ', h.Apellido) as nombre_completo,
+                    td.Descripcion as tipo_documento,
+                    h.NumeroDocumento,
+                    TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) as edad,
+                    s.Descripcion as sector,
+                    h.Direccion,
+                    h.Telefono,
+                    h.CorreoElectronico,
+                    h.FechaRegistro,
+                    GROUP_CONCAT(DISTINCT ts2.Descripcion SEPARATOR ', ') as otros_sacramentos,
+                    COUNT(DISTINCT hs2.IdSacramento) as total_sacramentos_actuales
+                FROM habitantes h
+                LEFT JOIN tipodocumento td ON h.IdTipoDocumento = td.IdTipoDocumento
+                LEFT JOIN sector s ON h.IdSector = s.IdSector
+                LEFT JOIN habitante_sacramento hs2 ON h.IdHabitante = hs2.IdHabitante
+                LEFT JOIN tiposacramentos ts2 ON hs2.IdSacramento = ts2.IdSacramento
+                {where_clause}
+                GROUP BY h.IdHabitante, h.Nombre, h.Apellido, td.Descripcion, h.NumeroDocumento,
+                         h.FechaNacimiento, s.Descripcion, h.Direccion, h.Telefono, 
+                         h.CorreoElectronico, h.FechaRegistro
+                ORDER BY h.Apellido, h.Nombre
+                LIMIT 1000
+            """
+            personas = execute_query(query, tuple(params)) or []
         
         # Obtener nombre del sacramento
         sacramento_query = "SELECT Descripcion FROM tiposacramentos WHERE IdSacramento = %s"
@@ -991,6 +878,7 @@ def get_lista_sin_sacramento():
                 'nombre': nombre_sacramento
             },
             'total_personas': len(personas),
+            'total_sin_sacramento': total_sin_sacramento,
             'personas': personas,
             'filtros': {
                 'id_sector': id_sector
@@ -1016,39 +904,28 @@ def get_sectores_criticos():
         if not id_sacramento:
             return jsonify({'success': False, 'message': 'Se requiere id_sacramento'}), 400
         
-        query = """
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                COUNT(h.IdHabitante) as total_habitantes,
-                COUNT(DISTINCT CASE 
-                    WHEN hs.IdSacramento = %s THEN h.IdHabitante 
-                END) as con_sacramento,
-                COUNT(DISTINCT CASE 
-                    WHEN hs.IdSacramento IS NULL OR hs.IdSacramento != %s THEN h.IdHabitante 
-                END) as sin_sacramento,
-                CASE 
-                    WHEN COUNT(h.IdHabitante) > 0 THEN 
-                        ROUND((COUNT(DISTINCT CASE 
-                            WHEN hs.IdSacramento = %s THEN h.IdHabitante 
-                        END) * 100.0 / COUNT(h.IdHabitante)), 2)
-                    ELSE 0 
-                END as porcentaje_cobertura
-            FROM sector s
-            LEFT JOIN habitantes h ON s.IdSector = h.IdSector AND h.Activo = 1
-            LEFT JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante AND hs.IdSacramento = %s
-            WHERE s.Activo = 1
-            GROUP BY s.IdSector, s.Descripcion
-            HAVING porcentaje_cobertura < %s OR porcentaje_cobertura IS NULL
-            ORDER BY porcentaje_cobertura ASC
-        """
-        
-        sectores = execute_query(query, (id_sacramento, id_sacramento, id_sacramento, id_sacramento, umbral_porcentaje))
-        
-        # Obtener nombre del sacramento
-        sacramento_query = "SELECT Descripcion FROM tiposacramentos WHERE IdSacramento = %s"
-        sacramento_info = execute_query(sacramento_query, (id_sacramento,), fetch_one=True)
-        nombre_sacramento = sacramento_info['Descripcion'] if sacramento_info else f"Sacramento {id_sacramento}"
+        if not sacramento_index.disponible():
+            return _indice_en_construccion()
+        
+        activos, nombre_sacramento = _sectores_y_sacramento(id_sacramento)
+        totales = sacramento_index.contar_por_sector()
+        con = sacramento_index.contar_por_sector(con=(id_sacramento,))
+        
+        sectores = []
+        for s in activos:
+            total = totales.get(s['IdSector'], 0)
+            con_sacramento = con.get(s['IdSector'], 0)
+            cobertura = round(con_sacramento * 100.0 / total, 2) if total else 0
+            if cobertura < umbral_porcentaje:
+                sectores.append({
+                    'IdSector': s['IdSector'],
+                    'sector': s['Descripcion'],
+                    'total_habitantes': total,
+                    'con_sacramento': con_sacramento,
+                    'sin_sacramento': total - con_sacramento,
+                    'porcentaje_cobertura': cobertura
+                })
+        sectores.sort(key=lambda x: x['porcentaje_cobertura'])
         
         return jsonify({
             'success': True,
@@ -1079,90 +956,32 @@ def get_resumen_sacramento():
         if not id_sacramento:
             return jsonify({'success': False, 'message': 'Se requiere id_sacramento'}), 400
         
-        # 1. Totales generales
-        totales_query = """
-            SELECT 
-                COUNT(DISTINCT h.IdHabitante) as total_con_sacramento,
-                (SELECT COUNT(*) FROM habitantes WHERE Activo = 1) as total_habitantes
-            FROM habitantes h
-            INNER JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante
-            WHERE h.Activo = 1
-            AND hs.IdSacramento = %s
-        """
-        totales = execute_query(totales_query, (id_sacramento,), fetch_one=True)
+        if not sacramento_index.disponible():
+            return _indice_en_construccion()
         
-        total_con = totales['total_con_sacramento'] if totales else 0
-        total_habitantes = totales['total_habitantes'] if totales else 0
-        total_sin = total_habitantes - total_con if total_habitantes else 0
+        activos, nombre_sacramento = _sectores_y_sacramento(id_sacramento)
+        
+        # 1. Totales generales
+        total_habitantes = sacramento_index.contar()
+        total_con = sacramento_index.contar(con=(id_sacramento,))
+        total_sin = total_habitantes - total_con
         porcentaje_con = round((total_con / total_habitantes * 100), 2) if total_habitantes > 0 else 0
         
-        # 2. Sector con MÁS sacramentos
-        sector_mas_query = """
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                COUNT(DISTINCT h.IdHabitante) as cantidad,
-                ROUND((COUNT(DISTINCT h.IdHabitante) * 100.0 / (
-                    SELECT COUNT(*) FROM habitantes h2 
-                    WHERE h2.Activo = 1 AND h2.IdSector = s.IdSector
-                )), 2) as porcentaje_sector
-            FROM sector s
-            INNER JOIN habitantes h ON s.IdSector = h.IdSector AND h.Activo = 1
-            INNER JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante AND hs.IdSacramento = %s
-            WHERE s.Activo = 1
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY cantidad DESC
-            LIMIT 1
-        """
-        sector_mas = execute_query(sector_mas_query, (id_sacramento,), fetch_one=True)
-        
-        # 3. Sector con MENOS sacramentos (excluyendo cero)
-        sector_menos_query = """
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                COUNT(DISTINCT h.IdHabitante) as cantidad,
-                ROUND((COUNT(DISTINCT h.IdHabitante) * 100.0 / (
-                    SELECT COUNT(*) FROM habitantes h2 
-                    WHERE h2.Activo = 1 AND h2.IdSector = s.IdSector
-                )), 2) as porcentaje_sector
-            FROM sector s
-            LEFT JOIN habitantes h ON s.IdSector = h.IdSector AND h.Activo = 1
-            LEFT JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante AND hs.IdSacramento = %s
-            WHERE s.Activo = 1
-            AND EXISTS (SELECT 1 FROM habitantes h3 WHERE h3.IdSector = s.IdSector AND h3.Activo = 1)
-            GROUP BY s.IdSector, s.Descripcion
-            HAVING COUNT(DISTINCT h.IdHabitante) > 0
-            ORDER BY cantidad ASC
-            LIMIT 1
-        """
-        sector_menos = execute_query(sector_menos_query, (id_sacramento,), fetch_one=True)
-        
-        # 4. Sector con CERO sacramentos
-        sector_cero_query = """
-            SELECT 
-                s.IdSector,
-                s.Descripcion as sector,
-                0 as cantidad,
-                0 as porcentaje_sector
-            FROM sector s
-            WHERE s.Activo = 1
-            AND NOT EXISTS (
-                SELECT 1 FROM habitantes h
-                INNER JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante
-                WHERE h.IdSector = s.IdSector
-                AND h.Activo = 1
-                AND hs.IdSacramento = %s
-            )
-            AND EXISTS (SELECT 1 FROM habitantes h2 WHERE h2.IdSector = s.IdSector AND h2.Activo = 1)
-            ORDER BY s.Descripcion
-        """
-        sectores_cero = execute_query(sector_cero_query, (id_sacramento,))
-        
-        # 5. Obtener nombre del sacramento
-        sacramento_query = "SELECT Descripcion FROM tiposacramentos WHERE IdSacramento = %s"
-        sacramento_info = execute_query(sacramento_query, (id_sacramento,), fetch_one=True)
-        nombre_sacramento = sacramento_info['Descripcion'] if sacramento_info else f"Sacramento {id_sacramento}"
+        # 2. Cantidad por sector (solo sectores activos con habitantes)
+        totales = sacramento_index.contar_por_sector()
+        con = sacramento_index.contar_por_sector(con=(id_sacramento,))
+        por_sector = [{
+            'IdSector': s['IdSector'],
+            'sector': s['Descripcion'],
+            'cantidad': con.get(s['IdSector'], 0),
+            'porcentaje_sector': round(con.get(s['IdSector'], 0) * 100.0 / totales[s['IdSector']], 2)
+        } for s in activos if totales.get(s['IdSector'])]
+        
+        # 3. Sector con MÁS, con MENOS (excluyendo cero) y con CERO
+        con_alguno = [s for s in por_sector if s['cantidad'] > 0]
+        sector_mas = max(con_alguno, key=lambda s: s['cantidad'], default=None)
+        sector_menos = min(con_alguno, key=lambda s: s['cantidad'], default=None)
+        sectores_cero = [s for s in por_sector if s['cantidad'] == 0]
         
         return jsonify({
             'success': True,
@@ -1195,8 +1014,15 @@ def get_resumen_sacramento():
 def get_reporte_completo():
     """
     Reporte completo de habitantes con todos los filtros posibles
+    Con el motor columnar cargado, el resumen cubre a todos los habitantes
+    que cumplen los filtros y no solo a los 1000 listados.
+    Con ``?format=csv|xlsx`` descarga todos los habitantes filtrados, sin límite.
     """
     try:
+        formato = _formato_exportacion()
+        if formato is False:
+            return _formato_invalido()
+
         tipo_rango = request.args.get('tipo_rango', 'mes')
         fecha_inicio = request.args.get('fecha_inicio')
         fecha_fin = request.args.get('fecha_fin')
@@ -1220,8 +1046,8 @@ def get_reporte_completo():
         desde, hasta = obtener_rango_fechas(filtros)
         
         # ========== CONSTRUIR CONSULTA DINÁMICA ==========
-        condiciones = ["h.Activo = 1", "h.FechaRegistro BETWEEN %s AND %s"]
-        params = [desde, hasta]
+        condiciones = ["h.Activo = 1", "h.FechaRegistro >= %s", "h.FechaRegistro < %s"]
+        params = [desde, hasta + timedelta(days=1)]
         
         if id_sector:
             condiciones.append("h.IdSector = %s")
@@ -1236,14 +1062,16 @@ def get_reporte_completo():
         elif con_sacramento == 'no':
             condiciones.append("NOT EXISTS (SELECT 1 FROM habitante_sacramento hs WHERE hs.IdHabitante = h.IdHabitante)")
         
+        # Edad exacta: cumplió edad_min si nació a más tardar hoy hace edad_min años,
+        # y no pasa de edad_max si nació después de hoy hace edad_max + 1 años
         if edad_min is not None:
-            fecha_max_nacimiento = date.today() - timedelta(days=edad_min*365)
+            fecha_max_nacimiento = restar_anios(date.today(), edad_min)
             condiciones.append("h.FechaNacimiento <= %s")
             params.append(fecha_max_nacimiento)
         
         if edad_max is not None:
-            fecha_min_nacimiento = date.today() - timedelta(days=edad_max*365)
-            condiciones.append("h.FechaNacimiento >= %s")
+            fecha_min_nacimiento = restar_anios(date.today(), edad_max + 1)
+            condiciones.append("h.FechaNacimiento > %s")
             params.append(fecha_min_nacimiento)
         
         if id_estado_civil:
@@ -1303,15 +1131,36 @@ def get_reporte_completo():
                      h.Hijos, h.DiscapacidadParaAsistir, h.TieneImpedimentoSalud, 
                      h.MotivoImpedimentoSalud, h.FechaRegistro
             ORDER BY h.Apellido, h.Nombre, h.FechaRegistro DESC
-            LIMIT 1000
         """
         
-        habitantes = execute_query(query, tuple(params))
+        if formato:
+            return stream_export(
+                formato, iter_query(query, tuple(params)),
+                f"reporte_habitantes_{desde.isoformat()}_{hasta.isoformat()}"
+            )
+        
+        habitantes = execute_query(query + " LIMIT 1000", tuple(params))
         
         # ========== RESUMEN DEL REPORTE ==========
         total_registros = len(habitantes)
         
-        if total_registros > 0:
+        if demografia.disponible():
+            totales = demografia.resumen(
+                desde=desde, hasta=hasta, sector=id_sector, sacramento=id_sacramento,
+                con_sacramento={'si': True, 'no': False}.get(con_sacramento),
+                edad_min=edad_min, edad_max=edad_max, estado_civil=id_estado_civil,
+                sexo=id_sexo, religion=id_religion
+            )
+            total = totales['total']
+            resumen = {
+                'total_registros': total,
+                'edad_promedio': round(totales['edad_promedio'], 1) if totales['edad_promedio'] is not None else 0,
+                'con_sacramento': totales['con_sacramento'],
+                'sin_sacramento': totales['sin_sacramento'],
+                'con_impedimento': totales['con_impedimento'],
+                'hijos_promedio': round(totales['hijos'] / total, 1) if total else 0
+            }
+        elif total_registros > 0:
             # Estadísticas del reporte
             edad_promedio = round(sum(h['edad'] for h in habitantes) / total_registros, 1)
             con_sacramento_count = sum(1 for h in habitantes if h['total_sacramentos'] > 0)
@@ -1461,25 +1310,16 @@ def get_resumen_ejecutivo():
         inicio_mes_anterior = (inicio_mes - timedelta(days=1)).replace(day=1)
         fin_mes_anterior = inicio_mes - timedelta(days=1)
         
-        # ========== TOTAL HABITANTES ==========
-        total_actual = execute_query("""
-            SELECT COUNT(*) as total
-            FROM habitantes
-            WHERE Activo = 1
-            AND FechaRegistro BETWEEN %s AND %s
-        """, (inicio_mes, fin_mes), fetch_one=True)
-        
-        total_anterior = execute_query("""
-            SELECT COUNT(*) as total
-            FROM habitantes
-            WHERE Activo = 1
-            AND FechaRegistro BETWEEN %s AND %s
-        """, (inicio_mes_anterior, fin_mes_anterior), fetch_one=True)
+        # ========== TOTAL HABITANTES (AGREGADOS DIARIOS) ==========
+        totales = execute_query("""
+            SELECT
+                CAST(COALESCE(SUM(CASE WHEN Dia >= %s THEN Total END), 0) AS SIGNED) as total,
+                CAST(COALESCE(SUM(CASE WHEN Dia < %s THEN Total END), 0) AS SIGNED) as total_anterior
+            FROM rollup_habitantes_dia
+            WHERE Dia BETWEEN %s AND %s
+        """, (inicio_mes.date(), inicio_mes.date(), inicio_mes_anterior.date(), fin_mes.date()), fetch_one=True) or {}
         
-        crecimiento = calcular_variacion(
-            total_actual['total'] if total_actual else 0,
-            total_anterior['total'] if total_anterior else 0
-        )
+        crecimiento = calcular_variacion(totales.get('total', 0), totales.get('total_anterior', 0))
         
         # ========== SECTORES CON MÁS CRECIMIENTO ==========
         sectores_crecimiento = execute_query("""
@@ -1536,8 +1376,8 @@ def get_resumen_ejecutivo():
                 'anterior': {'desde': inicio_mes_anterior.isoformat(), 'hasta': fin_mes_anterior.isoformat()}
             },
             'resumen': {
-                'total_habitantes': total_actual['total'] if total_actual else 0,
-                'total_habitantes_anterior': total_anterior['total'] if total_anterior else 0,
+                'total_habitantes': totales.get('total', 0),
+                'total_habitantes_anterior': totales.get('total_anterior', 0),
                 'crecimiento': round(crecimiento, 2),
                 'estadisticas_rapidas': estadisticas_rapidas
             },
@@ -1566,15 +1406,17 @@ def _parse_date(value: str):
         return None
 
 
-def _get_date_range():
+def _get_date_range(args=None):
     """
     Maneja filtros de fecha:
     - rango = dia | semana | mes | anio
     - desde, hasta = YYYY-MM-DD
+    ``args`` reemplaza a ``request.args`` (fuera de un request).
     """
-    rango = (request.args.get("rango") or "").lower()
-    desde_str = request.args.get("desde")
-    hasta_str = request.args.get("hasta")
+    args = request.args if args is None else args
+    rango = (args.get("rango") or "").lower()
+    desde_str = args.get("desde")
+    hasta_str = args.get("hasta")
     today = date.today()
 
     if desde_str and hasta_str:
@@ -1605,17 +1447,19 @@ def _get_date_range():
     return (None, None)
 
 
-def _add_date_filter(filters, params, column_name: str):
+def _add_date_filter(filters, params, column_name: str, args=None):
     """
     Aplica el rango de fechas actual a una columna específica.
+    El rango se expresa como intervalo semiabierto sobre la columna sin
+    funciones, para que MySQL pueda usar los índices de fecha.
     """
-    desde, hasta = _get_date_range()
+    desde, hasta = _get_date_range(args)
     if desde:
         filters.append(f"{column_name} >= %s")
         params.append(desde.isoformat())
     if hasta:
-        filters.append(f"{column_name} <= %s")
-        params.append(hasta.isoformat())
+        filters.append(f"{column_name} < %s")
+        params.append((hasta + timedelta(days=1)).isoformat())
 
 
 # ==========================================
@@ -1623,115 +1467,97 @@ def _add_date_filter(filters, params, column_name: str):
 #    GET /api/estadisticas/resumen/
 # ==========================================
 
-@estadisticas_bp.route("/resumen/", methods=["GET"])
-@jwt_required()
-@require_rol("Administrador")
-def resumen_global():
-    """
-    Dashboard principal del módulo de estadísticas.
+_FILTROS_RESUMEN = ("rango", "desde", "hasta", "estado_cita", "padre", "tipo_cita", "tipo_mov")
 
-    Devuelve:
-    - habitantes: totales, familias, sacramentos, sectores, enfermos
-    - citas: próximas, estados, semana con más/menos, padre con más/menos
-    - grupos: total grupos, tareas por estado, grupos con más/menos tareas, más/menos integrantes
-    - finanzas: mayor ingreso/egreso, totales ingresos/egresos, serie mensual
+
+def _calcular_resumen(args):
     """
-    try:
+    Calcula todas las secciones del dashboard global.
+    ``args`` es un dict con los filtros de ``_FILTROS_RESUMEN``; no lee
+    ``request`` porque también corre en el hilo que refresca el snapshot.
+    """
+    # ======================
+    # FILTROS
+    # ======================
+    filtros_h = ["h.Activo = 1"]
+    params_h = []
+    _add_date_filter(filtros_h, params_h, "h.FechaRegistro", args)
+    where_h = "WHERE " + " AND ".join(filtros_h) if filtros_h else ""
+    params_h = tuple(params_h) if params_h else None
+
+    filtros_c = ["ac.Activo = 1"]
+    params_c = []
+    _add_date_filter(filtros_c, params_c, "ac.Fecha", args)
+
+    estado_cita = args.get("estado_cita")
+    padre = args.get("padre")
+    tipo_cita = args.get("tipo_cita")
+
+    if estado_cita and estado_cita.isdigit():
+        filtros_c.append("ac.IdEstadoCita = %s")
+        params_c.append(int(estado_cita))
+    if padre and padre.isdigit():
+        filtros_c.append("ac.IdPadre = %s")
+        params_c.append(int(padre))
+    if tipo_cita and tipo_cita.isdigit():
+        filtros_c.append("ac.IdTipoCita = %s")
+        params_c.append(int(tipo_cita))
+
+    where_c = "WHERE " + " AND ".join(filtros_c) if filtros_c else ""
+    params_c = tuple(params_c) if params_c else None
+
+    filtros_m = ["m.Activo = 1"]
+    params_m = []
+    _add_date_filter(filtros_m, params_m, "m.FechaMovimiento", args)
+
+    tipo_mov = args.get("tipo_mov")  # 1=Ingreso, 2=Egreso, etc.
+    if tipo_mov and tipo_mov.isdigit():
+        filtros_m.append("m.IdTipoMovimiento = %s")
+        params_m.append(int(tipo_mov))
+
+    where_m = "WHERE " + " AND ".join(filtros_m) if filtros_m else ""
+    params_m = tuple(params_m) if params_m else None
+
+    desde, hasta = _get_date_range(args)
+    perfil = PerfilSectores(desde, hasta)
+    serie_m = SerieTemporal(
+        "FROM movimientos_caja m", "m.FechaMovimiento", "mes", filtros_m, params_m or (),
+        valores={
+            "ingresos": "SUM(CASE WHEN m.IdTipoMovimiento = 1 THEN m.Valor ELSE 0 END)",
+            "egresos": "SUM(CASE WHEN m.IdTipoMovimiento = 2 THEN m.Valor ELSE 0 END)",
+        },
+        inicio=desde, fin=hasta
+    )
+
+    # Las consultas son independientes: se ejecutan en paralelo
+    r = run_parallel({
         # ======================
         # HÁBITANTES
         # ======================
-        filtros_h = ["h.Activo = 1"]
-        params_h = []
-        _add_date_filter(filtros_h, params_h, "DATE(h.FechaRegistro)")
-        where_h = "WHERE " + " AND ".join(filtros_h) if filtros_h else ""
-
-        row_total_h = execute_query(
+        "total_h": QuerySpec(
             f"SELECT COUNT(*) AS total FROM habitantes h {where_h};",
-            tuple(params_h) if params_h else None,
-            fetch_one=True
-        )
-        total_habitantes = row_total_h["total"] if row_total_h else 0
-
-        row_total_f = execute_query(
+            params_h, fetch_one=True
+        ),
+        "total_f": QuerySpec(
             "SELECT COUNT(*) AS total FROM grupofamiliar gf WHERE gf.Activo = 1;",
             fetch_one=True
-        )
-        total_familias = row_total_f["total"] if row_total_f else 0
-
-        total_con_sac = 0
-        if total_habitantes:
-            row_con = execute_query(
-                f"""
-                SELECT COUNT(DISTINCT h.IdHabitante) AS total_con
-                FROM habitantes h
-                JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
-                {where_h}
-                """,
-                tuple(params_h) if params_h else None,
-                fetch_one=True
-            )
-            total_con_sac = row_con["total_con"] if row_con else 0
-
-        total_sin_sac = total_habitantes - total_con_sac if total_habitantes else 0
-
-        sectores = execute_query(
+        ),
+        "con_sac": QuerySpec(
             f"""
-            SELECT 
-              s.IdSector,
-              s.Descripcion,
-              COUNT(*) AS total
-            FROM sector s
-            JOIN habitantes h ON h.IdSector = s.IdSector
+            SELECT COUNT(DISTINCT h.IdHabitante) AS total_con
+            FROM habitantes h
+            JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
             {where_h}
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY total DESC
             """,
-            tuple(params_h) if params_h else None
-        )
-        sector_mas = sectores[0] if sectores else None
-        sector_menos = sectores[-1] if sectores else None
-
-        filtros_enf = filtros_h + ["h.TieneImpedimentoSalud = 1"]
-        where_enf = "WHERE " + " AND ".join(filtros_enf)
-        sectores_enfermos = execute_query(
-            f"""
-            SELECT 
-              s.IdSector,
-              s.Descripcion,
-              COUNT(*) AS total_enfermos
-            FROM sector s
-            JOIN habitantes h ON h.IdSector = s.IdSector
-            {where_enf}
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY total_enfermos DESC
-            """,
-            tuple(params_h) if params_h else None
-        )
+            params_h, fetch_one=True
+        ),
+        # Sectores (habitantes e impedimentos de salud)
+        **perfil.specs(),
 
         # ======================
         # CITAS
         # ======================
-        filtros_c = ["ac.Activo = 1"]
-        params_c = []
-        _add_date_filter(filtros_c, params_c, "ac.Fecha")
-
-        estado_cita = request.args.get("estado_cita")
-        padre = request.args.get("padre")
-        tipo_cita = request.args.get("tipo_cita")
-
-        if estado_cita and estado_cita.isdigit():
-            filtros_c.append("ac.IdEstadoCita = %s")
-            params_c.append(int(estado_cita))
-        if padre and padre.isdigit():
-            filtros_c.append("ac.IdPadre = %s")
-            params_c.append(int(padre))
-        if tipo_cita and tipo_cita.isdigit():
-            filtros_c.append("ac.IdTipoCita = %s")
-            params_c.append(int(tipo_cita))
-
-        where_c = "WHERE " + " AND ".join(filtros_c) if filtros_c else ""
-
-        proximas = execute_query(
+        "proximas": QuerySpec(
             f"""
             SELECT 
               ac.IdAsignacionCita,
@@ -1753,10 +1579,9 @@ def resumen_global():
             ORDER BY ac.Fecha ASC, ac.Hora ASC
             LIMIT 5
             """,
-            tuple(params_c) if params_c else None
-        )
-
-        estados_citas = execute_query(
+            params_c
+        ),
+        "estados_citas": QuerySpec(
             f"""
             SELECT 
               ec.Descripcion AS Estado,
@@ -1766,10 +1591,9 @@ def resumen_global():
             {where_c}
             GROUP BY ec.Descripcion
             """,
-            tuple(params_c) if params_c else None
-        )
-
-        semanas = execute_query(
+            params_c
+        ),
+        "semanas": QuerySpec(
             f"""
             SELECT 
               YEARWEEK(ac.Fecha, 1) AS semana,
@@ -1781,12 +1605,9 @@ def resumen_global():
             GROUP BY YEARWEEK(ac.Fecha, 1)
             ORDER BY total DESC
             """,
-            tuple(params_c) if params_c else None
-        )
-        semana_mas = semanas[0] if semanas else None
-        semana_menos = semanas[-1] if semanas else None
-
-        padres_citas = execute_query(
+            params_c
+        ),
+        "padres_citas": QuerySpec(
             f"""
             SELECT 
               p.IdPadre,
@@ -1798,33 +1619,25 @@ def resumen_global():
             GROUP BY p.IdPadre, Padre
             ORDER BY total DESC
             """,
-            tuple(params_c) if params_c else None
-        )
-        padre_mas = padres_citas[0] if padres_citas else None
-        padre_menos = padres_citas[-1] if padres_citas else None
+            params_c
+        ),
 
         # ======================
         # GRUPOS / TAREAS
         # ======================
-        row_tg = execute_query(
+        "total_grupos": QuerySpec(
             "SELECT COUNT(*) AS total FROM grupoayudantes g WHERE g.Activo = 1;",
             fetch_one=True
-        )
-        total_grupos = row_tg["total"] if row_tg else 0
-
-        tareas_por_estado = execute_query(
-            """
+        ),
+        "tareas_por_estado": """
             SELECT 
               EstadoTarea,
               COUNT(*) AS total
             FROM asignaciontarea
             WHERE Activo = 1
             GROUP BY EstadoTarea
-            """
-        )
-
-        grupos_tareas = execute_query(
-            """
+        """,
+        "grupos_tareas": """
             SELECT 
               g.IdGrupoAyudantes,
               g.Nombre,
@@ -1836,13 +1649,8 @@ def resumen_global():
             WHERE g.Activo = 1
             GROUP BY g.IdGrupoAyudantes, g.Nombre
             ORDER BY total_tareas DESC
-            """
-        )
-        grupo_mas_tareas = grupos_tareas[0] if grupos_tareas else None
-        grupo_menos_tareas = grupos_tareas[-1] if grupos_tareas else None
-
-        grupos_integrantes = execute_query(
-            """
+        """,
+        "grupos_integrantes": """
             SELECT 
               g.IdGrupoAyudantes,
               g.Nombre,
@@ -1854,26 +1662,12 @@ def resumen_global():
             WHERE g.Activo = 1
             GROUP BY g.IdGrupoAyudantes, g.Nombre
             ORDER BY total_miembros DESC
-            """
-        )
-        grupo_mas_integrantes = grupos_integrantes[0] if grupos_integrantes else None
-        grupo_menos_integrantes = grupos_integrantes[-1] if grupos_integrantes else None
+        """,
 
         # ======================
         # FINANZAS
         # ======================
-        filtros_m = ["m.Activo = 1"]
-        params_m = []
-        _add_date_filter(filtros_m, params_m, "m.FechaMovimiento")
-
-        tipo_mov = request.args.get("tipo_mov")  # 1=Ingreso, 2=Egreso, etc.
-        if tipo_mov and tipo_mov.isdigit():
-            filtros_m.append("m.IdTipoMovimiento = %s")
-            params_m.append(int(tipo_mov))
-
-        where_m = "WHERE " + " AND ".join(filtros_m) if filtros_m else ""
-
-        mayor_ingreso = execute_query(
+        "mayor_ingreso": QuerySpec(
             f"""
             SELECT 
               m.IdMovimiento,
@@ -1887,11 +1681,9 @@ def resumen_global():
             ORDER BY m.Valor DESC
             LIMIT 1
             """,
-            tuple(params_m) if params_m else None,
-            fetch_one=True
-        )
-
-        mayor_egreso = execute_query(
+            params_m, fetch_one=True
+        ),
+        "mayor_egreso": QuerySpec(
             f"""
             SELECT 
               m.IdMovimiento,
@@ -1905,11 +1697,9 @@ def resumen_global():
             ORDER BY m.Valor DESC
             LIMIT 1
             """,
-            tuple(params_m) if params_m else None,
-            fetch_one=True
-        )
-
-        row_tot = execute_query(
+            params_m, fetch_one=True
+        ),
+        "totales_mov": QuerySpec(
             f"""
             SELECT
               SUM(CASE WHEN m.IdTipoMovimiento = 1 THEN m.Valor ELSE 0 END) AS total_ingresos,
@@ -1917,73 +1707,129 @@ def resumen_global():
             FROM movimientos_caja m
             {where_m}
             """,
-            tuple(params_m) if params_m else None,
-            fetch_one=True
-        )
-        tot_ingresos = float(row_tot["total_ingresos"] or 0) if row_tot else 0.0
-        tot_egresos = float(row_tot["total_egresos"] or 0) if row_tot else 0.0
+            params_m, fetch_one=True
+        ),
+        "serie_mensual": serie_m.spec,
+    })
+
+    total_habitantes = r["total_h"]["total"] if r["total_h"] else 0
+    total_familias = r["total_f"]["total"] if r["total_f"] else 0
+    total_con_sac = r["con_sac"]["total_con"] if total_habitantes and r["con_sac"] else 0
+    total_sin_sac = total_habitantes - total_con_sac if total_habitantes else 0
+
+    perfiles = perfil.completar(r)
+    sectores = [
+        {"IdSector": p["id"], "Descripcion": p["sector"], "total": p["cantidad"]}
+        for p in perfiles if p["cantidad"]
+    ]
+    sector_mas = sectores[0] if sectores else None
+    sector_menos = sectores[-1] if sectores else None
+    sectores_enfermos = sorted(
+        ({"IdSector": p["id"], "Descripcion": p["sector"], "total_enfermos": p["con_impedimento"]}
+         for p in perfiles if p["con_impedimento"]),
+        key=lambda x: -x["total_enfermos"]
+    )
+
+    proximas = r["proximas"]
+    estados_citas = r["estados_citas"]
+    semanas = r["semanas"]
+    semana_mas = semanas[0] if semanas else None
+    semana_menos = semanas[-1] if semanas else None
+    padres_citas = r["padres_citas"]
+    padre_mas = padres_citas[0] if padres_citas else None
+    padre_menos = padres_citas[-1] if padres_citas else None
+
+    total_grupos = r["total_grupos"]["total"] if r["total_grupos"] else 0
+    tareas_por_estado = r["tareas_por_estado"]
+    grupos_tareas = r["grupos_tareas"]
+    grupo_mas_tareas = grupos_tareas[0] if grupos_tareas else None
+    grupo_menos_tareas = grupos_tareas[-1] if grupos_tareas else None
+    grupos_integrantes = r["grupos_integrantes"]
+    grupo_mas_integrantes = grupos_integrantes[0] if grupos_integrantes else None
+    grupo_menos_integrantes = grupos_integrantes[-1] if grupos_integrantes else None
+
+    mayor_ingreso = r["mayor_ingreso"]
+    mayor_egreso = r["mayor_egreso"]
+    row_tot = r["totales_mov"]
+    tot_ingresos = float(row_tot["total_ingresos"] or 0) if row_tot else 0.0
+    tot_egresos = float(row_tot["total_egresos"] or 0) if row_tot else 0.0
+    serie_mensual = serie_m.completar(r["serie_mensual"])
+
+    return {
+        "habitantes": {
+            "total_habitantes": total_habitantes,
+            "total_familias": total_familias,
+            "con_sacramentos": total_con_sac,
+            "sin_sacramentos": total_sin_sac,
+            "sector_mas": sector_mas,
+            "sector_menos": sector_menos,
+            "sectores_enfermos": sectores_enfermos,
+        },
+        "citas": {
+            "proximas": proximas,
+            "estados": estados_citas,
+            "semana_mas": semana_mas,
+            "semana_menos": semana_menos,
+            "padre_mas": padre_mas,
+            "padre_menos": padre_menos,
+        },
+        "grupos": {
+            "total_grupos": total_grupos,
+            "tareas_por_estado": tareas_por_estado,
+            "grupo_mas_tareas": grupo_mas_tareas,
+            "grupo_menos_tareas": grupo_menos_tareas,
+            "grupo_mas_integrantes": grupo_mas_integrantes,
+            "grupo_menos_integrantes": grupo_menos_integrantes,
+        },
+        "finanzas": {
+            "mayor_ingreso": mayor_ingreso,
+            "mayor_egreso": mayor_egreso,
+            "totales": {
+                "ingresos": tot_ingresos,
+                "egresos": tot_egresos,
+            },
+            "serie_mensual": serie_mensual,
+        }
+    }
 
-        serie_mensual = execute_query(
-            f"""
-            SELECT
-              DATE_FORMAT(m.FechaMovimiento, '%%Y-%%m') AS periodo,
-              SUM(CASE WHEN m.IdTipoMovimiento = 1 THEN m.Valor ELSE 0 END) AS ingresos,
-              SUM(CASE WHEN m.IdTipoMovimiento = 2 THEN m.Valor ELSE 0 END) AS egresos
-            FROM movimientos_caja m
-            {where_m}
-            GROUP BY DATE_FORMAT(m.FechaMovimiento, '%%Y-%%m')
-            ORDER BY periodo ASC
-            """,
-            tuple(params_m) if params_m else None
-        )
 
-        desde, hasta = _get_date_range()
+@estadisticas_bp.route("/resumen/", methods=["GET"])
+@jwt_required()
+@require_rol("Administrador")
+def resumen_global():
+    """
+    Dashboard principal del módulo de estadísticas.
+
+    Devuelve:
+    - habitantes: totales, familias, sacramentos, sectores, enfermos
+    - citas: próximas, estados, semana con más/menos, padre con más/menos
+    - grupos: total grupos, tareas por estado, grupos con más/menos tareas, más/menos integrantes
+    - finanzas: mayor ingreso/egreso, totales ingresos/egresos, serie mensual
+
+    Sirve el último snapshot de los mismos filtros (``generated_at`` indica
+    cuándo se calculó) y lo recalcula en segundo plano cuando vence el TTL
+    blando; ver ``services.SnapshotServices``.
+    """
+    try:
+        args = {k: request.args.get(k) for k in _FILTROS_RESUMEN}
+        desde, hasta = _get_date_range(args)
+        # Clave con el rango ya resuelto: "rango=mes" y su desde/hasta comparten snapshot
+        clave = (desde, hasta, args["estado_cita"], args["padre"], args["tipo_cita"], args["tipo_mov"])
+        resumen, generado_en = dashboard_snapshots.obtener(clave, lambda: _calcular_resumen(args))
 
         return jsonify({
             "success": True,
+            "generated_at": generado_en.isoformat(),
             "filters": {
-                "rango": (request.args.get("rango") or None),
+                "rango": (args["rango"] or None),
                 "desde": desde.isoformat() if desde else None,
                 "hasta": hasta.isoformat() if hasta else None,
-                "estado_cita": estado_cita,
-                "padre": padre,
-                "tipo_cita": tipo_cita,
-                "tipo_mov": tipo_mov,
-            },
-            "habitantes": {
-                "total_habitantes": total_habitantes,
-                "total_familias": total_familias,
-                "con_sacramentos": total_con_sac,
-                "sin_sacramentos": total_sin_sac,
-                "sector_mas": sector_mas,
-                "sector_menos": sector_menos,
-                "sectores_enfermos": sectores_enfermos,
-            },
-            "citas": {
-                "proximas": proximas,
-                "estados": estados_citas,
-                "semana_mas": semana_mas,
-                "semana_menos": semana_menos,
-                "padre_mas": padre_mas,
-                "padre_menos": padre_menos,
-            },
-            "grupos": {
-                "total_grupos": total_grupos,
-                "tareas_por_estado": tareas_por_estado,
-                "grupo_mas_tareas": grupo_mas_tareas,
-                "grupo_menos_tareas": grupo_menos_tareas,
-                "grupo_mas_integrantes": grupo_mas_integrantes,
-                "grupo_menos_integrantes": grupo_menos_integrantes,
+                "estado_cita": args["estado_cita"],
+                "padre": args["padre"],
+                "tipo_cita": args["tipo_cita"],
+                "tipo_mov": args["tipo_mov"],
             },
-            "finanzas": {
-                "mayor_ingreso": mayor_ingreso,
-                "mayor_egreso": mayor_egreso,
-                "totales": {
-                    "ingresos": tot_ingresos,
-                    "egresos": tot_egresos,
-                },
-                "serie_mensual": serie_mensual,
-            }
+            **resumen
         }), 200
 
     except Exception as e:
@@ -1992,7 +1838,6 @@ def resumen_global():
             "message": f"Error generando resumen global: {str(e)}"
         }), 500
 
-
 # ==========================================
 # 2) DETALLE HABITANTES
 #    GET /api/estadisticas/habitantes/
@@ -2005,11 +1850,16 @@ def estadisticas_habitantes():
     """
     Estadísticas específicas de Habitantes.
     Filtros:
-    - rango / desde / hasta     -> DATE(h.FechaRegistro)
+    - rango / desde / hasta     -> h.FechaRegistro
     - sector (IdSector)
     - sacramento (IdSacramento)
+    Con ``?format=csv|xlsx`` descarga el reporte completo, sin límite.
     """
     try:
+        formato = _formato_exportacion()
+        if formato is False:
+            return _formato_invalido()
+
         sector = request.args.get("sector")
         sacramento = request.args.get("sacramento")
 
@@ -2026,115 +1876,114 @@ def estadisticas_habitantes():
             filtros.append("hs.IdSacramento = %s")
             params.append(int(sacramento))
 
-        _add_date_filter(filtros, params, "DATE(h.FechaRegistro)")
+        _add_date_filter(filtros, params, "h.FechaRegistro")
         where = "WHERE " + " AND ".join(filtros) if filtros else ""
+        params_q = tuple(params) if params else None
+
+        sql_reporte = f"""
+                SELECT
+                  h.IdHabitante,
+                  CONCAT(h.Nombre, ' ', h.Apellido) AS NombreCompleto,
+                  h.NumeroDocumento,
+                  s.Descripcion AS Sector,
+                  h.Telefono,
+                  h.CorreoElectronico,
+                  h.TieneImpedimentoSalud,
+                  h.FechaRegistro
+                FROM habitantes h
+                JOIN sector s ON s.IdSector = h.IdSector
+                {join_sac} {where}
+                ORDER BY h.FechaRegistro DESC
+                """
+        if formato:
+            return stream_export(formato, iter_query(sql_reporte, params_q), "estadisticas_habitantes")
 
-        row_total = execute_query(
-            f"SELECT COUNT(*) AS total FROM habitantes h {join_sac} {where}",
-            tuple(params) if params else None,
-            fetch_one=True
-        )
-        total = row_total["total"] if row_total else 0
+        filtros_enf = filtros + ["h.TieneImpedimentoSalud = 1"]
+        where_enf = "WHERE " + " AND ".join(filtros_enf)
 
-        total_con_sac = 0
-        if total:
-            row_con = execute_query(
+        r = run_parallel({
+            "total": QuerySpec(
+                f"SELECT COUNT(*) AS total FROM habitantes h {join_sac} {where}",
+                params_q, fetch_one=True
+            ),
+            "con_sac": QuerySpec(
                 f"""
                 SELECT COUNT(DISTINCT h.IdHabitante) AS total_con
                 FROM habitantes h
                 JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
                 {where}
                 """,
-                tuple(params) if params else None,
-                fetch_one=True
-            )
-            total_con_sac = row_con["total_con"] if row_con else 0
+                params_q, fetch_one=True
+            ),
+            "por_sector": QuerySpec(
+                f"""
+                SELECT 
+                  s.IdSector,
+                  s.Descripcion AS Sector,
+                  COUNT(*) AS TotalHabitantes
+                FROM sector s
+                JOIN habitantes h ON h.IdSector = s.IdSector
+                {join_sac} {where}
+                GROUP BY s.IdSector, s.Descripcion
+                ORDER BY TotalHabitantes DESC
+                """,
+                params_q
+            ),
+            "sacramentos_por_sector": QuerySpec(
+                f"""
+                SELECT 
+                  s.IdSector,
+                  s.Descripcion AS Sector,
+                  COUNT(DISTINCT hs.IdHabitante) AS TotalSacramentados
+                FROM sector s
+                JOIN habitantes h ON h.IdSector = s.IdSector
+                JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
+                {where}
+                GROUP BY s.IdSector, s.Descripcion
+                ORDER BY TotalSacramentados DESC
+                """,
+                params_q
+            ),
+            "enfermos_por_sector": QuerySpec(
+                f"""
+                SELECT 
+                  s.IdSector,
+                  s.Descripcion AS Sector,
+                  COUNT(*) AS TotalEnfermos
+                FROM sector s
+                JOIN habitantes h ON h.IdSector = s.IdSector
+                {join_sac} {where_enf}
+                GROUP BY s.IdSector, s.Descripcion
+                ORDER BY TotalEnfermos DESC
+                """,
+                params_q
+            ),
+            "crecimiento": QuerySpec(
+                f"""
+                SELECT 
+                  DATE(h.FechaRegistro) AS Fecha,
+                  COUNT(*) AS NuevosHabitantes
+                FROM habitantes h
+                {join_sac} {where}
+                GROUP BY DATE(h.FechaRegistro)
+                ORDER BY Fecha ASC
+                """,
+                params_q
+            ),
+            "reporte": QuerySpec(sql_reporte + "LIMIT 500", params_q),
+        })
 
+        total = r["total"]["total"] if r["total"] else 0
+        total_con_sac = r["con_sac"]["total_con"] if total and r["con_sac"] else 0
         total_sin_sac = total - total_con_sac if total else 0
 
-        habitantes_por_sector = execute_query(
-            f"""
-            SELECT 
-              s.IdSector,
-              s.Descripcion AS Sector,
-              COUNT(*) AS TotalHabitantes
-            FROM sector s
-            JOIN habitantes h ON h.IdSector = s.IdSector
-            {join_sac} {where}
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY TotalHabitantes DESC
-            """,
-            tuple(params) if params else None
-        )
+        habitantes_por_sector = r["por_sector"]
         sector_mas = habitantes_por_sector[0] if habitantes_por_sector else None
         sector_menos = habitantes_por_sector[-1] if habitantes_por_sector else None
-
-        sectores_sacramentos = execute_query(
-            f"""
-            SELECT 
-              s.IdSector,
-              s.Descripcion AS Sector,
-              COUNT(DISTINCT hs.IdHabitante) AS TotalSacramentados
-            FROM sector s
-            JOIN habitantes h ON h.IdSector = s.IdSector
-            JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
-            {where}
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY TotalSacramentados DESC
-            """,
-            tuple(params) if params else None
-        )
-
-        filtros_enf = filtros + ["h.TieneImpedimentoSalud = 1"]
-        where_enf = "WHERE " + " AND ".join(filtros_enf)
-        enfermos_por_sector = execute_query(
-            f"""
-            SELECT 
-              s.IdSector,
-              s.Descripcion AS Sector,
-              COUNT(*) AS TotalEnfermos
-            FROM sector s
-            JOIN habitantes h ON h.IdSector = s.IdSector
-            {join_sac} {where_enf}
-            GROUP BY s.IdSector, s.Descripcion
-            ORDER BY TotalEnfermos DESC
-            """,
-            tuple(params) if params else None
-        )
-
-        serie_crecimiento = execute_query(
-            f"""
-            SELECT 
-              DATE(h.FechaRegistro) AS Fecha,
-              COUNT(*) AS NuevosHabitantes
-            FROM habitantes h
-            {join_sac} {where}
-            GROUP BY DATE(h.FechaRegistro)
-            ORDER BY Fecha ASC
-            """,
-            tuple(params) if params else None
-        )
-
-        reporte = execute_query(
-            f"""
-            SELECT
-              h.IdHabitante,
-              CONCAT(h.Nombre, ' ', h.Apellido) AS NombreCompleto,
-              h.NumeroDocumento,
-              s.Descripcion AS Sector,
-              h.Telefono,
-              h.CorreoElectronico,
-              h.TieneImpedimentoSalud,
-              h.FechaRegistro
-            FROM habitantes h
-            JOIN sector s ON s.IdSector = h.IdSector
-            {join_sac} {where}
-            ORDER BY h.FechaRegistro DESC
-            LIMIT 500
-            """,
-            tuple(params) if params else None
-        )
-
+        sectores_sacramentos = r["sacramentos_por_sector"]
+        enfermos_por_sector = r["enfermos_por_sector"]
+        serie_crecimiento = r["crecimiento"]
+        reporte = r["reporte"]
         return jsonify({
             "success": True,
             "filters": {
@@ -2183,9 +2032,13 @@ def estadisticas_citas():
     - Semana con más / menos citas
     - Padre con más / menos citas
     - Serie por mes
-    - Reporte de citas
+    - Reporte de citas (con ``?format=csv|xlsx`` se descarga completo, sin límite)
     """
     try:
+        formato = _formato_exportacion()
+        if formato is False:
+            return _formato_invalido()
+
         filtros = ["ac.Activo = 1"]
         params = []
 
@@ -2207,112 +2060,110 @@ def estadisticas_citas():
 
         _add_date_filter(filtros, params, "ac.Fecha")
         where = "WHERE " + " AND ".join(filtros) if filtros else ""
+        params_q = tuple(params) if params else None
+
+        sql_reporte = f"""
+                SELECT
+                  ac.IdAsignacionCita,
+                  ac.Fecha,
+                  TIME_FORMAT(ac.Hora, '%%H:%%i') AS Hora,
+                  ac.NombreSolicitante,
+                  ac.CelularSolicitante,
+                  CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
+                  ec.Descripcion AS Estado,
+                  tc.Descripcion AS TipoCita
+                FROM asignacioncita ac
+                LEFT JOIN padre p ON p.IdPadre = ac.IdPadre
+                LEFT JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
+                LEFT JOIN tipocita tc ON tc.IdTipoCita = ac.IdTipoCita
+                {where}
+                ORDER BY ac.Fecha DESC, ac.Hora DESC
+                """
+        if formato:
+            return stream_export(formato, iter_query(sql_reporte, params_q), "estadisticas_citas")
 
-        proxima = execute_query(
-            f"""
-            SELECT 
-              ac.IdAsignacionCita,
-              ac.Fecha,
-              TIME_FORMAT(ac.Hora, '%%H:%%i') AS Hora,
-              ac.NombreSolicitante,
-              ac.CelularSolicitante,
-              CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
-              ec.Descripcion AS Estado,
-              tc.Descripcion AS TipoCita
-            FROM asignacioncita ac
-            LEFT JOIN padre p ON p.IdPadre = ac.IdPadre
-            LEFT JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
-            LEFT JOIN tipocita tc ON tc.IdTipoCita = ac.IdTipoCita
-            {where} AND ac.Fecha >= CURDATE()
-            ORDER BY ac.Fecha ASC, ac.Hora ASC
-            LIMIT 1
-            """,
-            tuple(params) if params else None,
-            fetch_one=True
-        )
-
-        totales_estado = execute_query(
-            f"""
-            SELECT 
-              ec.Descripcion AS Estado,
-              COUNT(*) AS total
-            FROM asignacioncita ac
-            JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
-            {where}
-            GROUP BY ec.Descripcion
-            """,
-            tuple(params) if params else None
+        desde, hasta = _get_date_range()
+        serie = SerieTemporal(
+            "FROM asignacioncita ac", "ac.Fecha", "mes", filtros, params,
+            valores={"TotalCitas": "COUNT(*)"}, inicio=desde, fin=hasta, clave_periodo="Periodo"
         )
 
-        semanas = execute_query(
-            f"""
-            SELECT 
-              YEARWEEK(ac.Fecha, 1) AS SemanaISO,
-              MIN(ac.Fecha) AS FechaInicio,
-              MAX(ac.Fecha) AS FechaFin,
-              COUNT(*) AS TotalCitas
-            FROM asignacioncita ac
-            {where}
-            GROUP BY YEARWEEK(ac.Fecha, 1)
-            ORDER BY TotalCitas DESC
-            """,
-            tuple(params) if params else None
-        )
+        r = run_parallel({
+            "proxima": QuerySpec(
+                f"""
+                SELECT 
+                  ac.IdAsignacionCita,
+                  ac.Fecha,
+                  TIME_FORMAT(ac.Hora, '%%H:%%i') AS Hora,
+                  ac.NombreSolicitante,
+                  ac.CelularSolicitante,
+                  CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
+                  ec.Descripcion AS Estado,
+                  tc.Descripcion AS TipoCita
+                FROM asignacioncita ac
+                LEFT JOIN padre p ON p.IdPadre = ac.IdPadre
+                LEFT JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
+                LEFT JOIN tipocita tc ON tc.IdTipoCita = ac.IdTipoCita
+                {where} AND ac.Fecha >= CURDATE()
+                ORDER BY ac.Fecha ASC, ac.Hora ASC
+                LIMIT 1
+                """,
+                params_q, fetch_one=True
+            ),
+            "por_estado": QuerySpec(
+                f"""
+                SELECT 
+                  ec.Descripcion AS Estado,
+                  COUNT(*) AS total
+                FROM asignacioncita ac
+                JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
+                {where}
+                GROUP BY ec.Descripcion
+                """,
+                params_q
+            ),
+            "semanas": QuerySpec(
+                f"""
+                SELECT 
+                  YEARWEEK(ac.Fecha, 1) AS SemanaISO,
+                  MIN(ac.Fecha) AS FechaInicio,
+                  MAX(ac.Fecha) AS FechaFin,
+                  COUNT(*) AS TotalCitas
+                FROM asignacioncita ac
+                {where}
+                GROUP BY YEARWEEK(ac.Fecha, 1)
+                ORDER BY TotalCitas DESC
+                """,
+                params_q
+            ),
+            "padres": QuerySpec(
+                f"""
+                SELECT 
+                  p.IdPadre,
+                  CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
+                  COUNT(*) AS TotalCitas
+                FROM asignacioncita ac
+                JOIN padre p ON p.IdPadre = ac.IdPadre
+                {where}
+                GROUP BY p.IdPadre, Padre
+                ORDER BY TotalCitas DESC
+                """,
+                params_q
+            ),
+            "serie_mensual": serie.spec,
+            "reporte": QuerySpec(sql_reporte + "LIMIT 500", params_q),
+        })
+
+        proxima = r["proxima"]
+        totales_estado = r["por_estado"]
+        semanas = r["semanas"]
         semana_mas = semanas[0] if semanas else None
         semana_menos = semanas[-1] if semanas else None
-
-        padres = execute_query(
-            f"""
-            SELECT 
-              p.IdPadre,
-              CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
-              COUNT(*) AS TotalCitas
-            FROM asignacioncita ac
-            JOIN padre p ON p.IdPadre = ac.IdPadre
-            {where}
-            GROUP BY p.IdPadre, Padre
-            ORDER BY TotalCitas DESC
-            """,
-            tuple(params) if params else None
-        )
+        padres = r["padres"]
         padre_mas_citas = padres[0] if padres else None
         padre_menos_citas = padres[-1] if padres else None
-
-        serie_mensual = execute_query(
-            f"""
-            SELECT 
-              DATE_FORMAT(ac.Fecha, '%%Y-%%m') AS Periodo,
-              COUNT(*) AS TotalCitas
-            FROM asignacioncita ac
-            {where}
-            GROUP BY DATE_FORMAT(ac.Fecha, '%%Y-%%m')
-            ORDER BY Periodo ASC
-            """,
-            tuple(params) if params else None
-        )
-
-        reporte = execute_query(
-            f"""
-            SELECT
-              ac.IdAsignacionCita,
-              ac.Fecha,
-              TIME_FORMAT(ac.Hora, '%%H:%%i') AS Hora,
-              ac.NombreSolicitante,
-              ac.CelularSolicitante,
-              CONCAT(p.Nombre, ' ', p.Apellido) AS Padre,
-              ec.Descripcion AS Estado,
-              tc.Descripcion AS TipoCita
-            FROM asignacioncita ac
-            LEFT JOIN padre p ON p.IdPadre = ac.IdPadre
-            LEFT JOIN estadocita ec ON ec.IdEstadoCita = ac.IdEstadoCita
-            LEFT JOIN tipocita tc ON tc.IdTipoCita = ac.IdTipoCita
-            {where}
-            ORDER BY ac.Fecha DESC, ac.Hora DESC
-            LIMIT 500
-            """,
-            tuple(params) if params else None
-        )
-
+        serie_mensual = serie.completar(r["serie_mensual"])
+        reporte = r["reporte"]
         return jsonify({
             "success": True,
             "filters": {
@@ -2370,100 +2221,93 @@ def estadisticas_grupos():
             filtros.append("at.EstadoTarea = %s")
             params.append(estado_tarea)
 
-        _add_date_filter(filtros, params, "DATE(at.FechaAsignacion)")
+        _add_date_filter(filtros, params, "at.FechaAsignacion")
         where = "WHERE " + " AND ".join(filtros) if filtros else ""
+        params_q = tuple(params) if params else None
 
-        row_total = execute_query(
-            f"""
-            SELECT COUNT(*) AS total
-            FROM asignaciontarea at
-            {where}
-            """,
-            tuple(params) if params else None,
-            fetch_one=True
+        desde, hasta = _get_date_range()
+        serie = SerieTemporal(
+            "FROM asignaciontarea at", "at.FechaAsignacion", "mes", filtros, params,
+            valores={"TotalTareas": "COUNT(*)"}, inicio=desde, fin=hasta, clave_periodo="Periodo"
         )
-        total_tareas = row_total["total"] if row_total else 0
 
-        tareas_por_estado = execute_query(
-            f"""
-            SELECT 
-              at.EstadoTarea,
-              COUNT(*) AS total
-            FROM asignaciontarea at
-            {where}
-            GROUP BY at.EstadoTarea
+        # Consultas independientes: un solo viaje a la base de datos
+        r = batch_select({
+            "total": QuerySpec(
+                f"""
+                SELECT COUNT(*) AS total
+                FROM asignaciontarea at
+                {where}
+                """,
+                params_q, fetch_one=True
+            ),
+            "por_estado": QuerySpec(
+                f"""
+                SELECT 
+                  at.EstadoTarea,
+                  COUNT(*) AS total
+                FROM asignaciontarea at
+                {where}
+                GROUP BY at.EstadoTarea
+                """,
+                params_q
+            ),
+            "grupos_tareas": """
+                SELECT 
+                  g.IdGrupoAyudantes,
+                  g.Nombre,
+                  COUNT(at.IdAsignacionTarea) AS TotalTareas
+                FROM grupoayudantes g
+                LEFT JOIN asignaciontarea at
+                  ON at.IdGrupoVoluntario = g.IdGrupoAyudantes
+                 AND at.Activo = 1
+                WHERE g.Activo = 1
+                GROUP BY g.IdGrupoAyudantes, g.Nombre
+                ORDER BY TotalTareas DESC
             """,
-            tuple(params) if params else None
-        )
-
-        grupos_tareas = execute_query(
-            f"""
-            SELECT 
-              g.IdGrupoAyudantes,
-              g.Nombre,
-              COUNT(at.IdAsignacionTarea) AS TotalTareas
-            FROM grupoayudantes g
-            LEFT JOIN asignaciontarea at
-              ON at.IdGrupoVoluntario = g.IdGrupoAyudantes
-             AND at.Activo = 1
-            WHERE g.Activo = 1
-            GROUP BY g.IdGrupoAyudantes, g.Nombre
-            ORDER BY TotalTareas DESC
+            "grupos_integrantes": """
+                SELECT 
+                  g.IdGrupoAyudantes,
+                  g.Nombre,
+                  COUNT(mga.id_miembro) AS TotalIntegrantes
+                FROM grupoayudantes g
+                LEFT JOIN miembro_grupo_ayudantes mga
+                  ON mga.id_grupo_ayudantes = g.IdGrupoAyudantes
+                 AND mga.Activo = 1
+                WHERE g.Activo = 1
+                GROUP BY g.IdGrupoAyudantes, g.Nombre
+                ORDER BY TotalIntegrantes DESC
             """,
-            None
-        )
+            "serie_mensual": serie.spec,
+            "reporte": QuerySpec(
+                f"""
+                SELECT
+                  at.IdAsignacionTarea,
+                  at.TituloTarea,
+                  at.DescripcionTarea,
+                  at.FechaAsignacion,
+                  at.EstadoTarea,
+                  g.Nombre AS Grupo
+                FROM asignaciontarea at
+                LEFT JOIN grupoayudantes g ON g.IdGrupoAyudantes = at.IdGrupoVoluntario
+                {where}
+                ORDER BY at.FechaAsignacion DESC
+                LIMIT 500
+                """,
+                params_q
+            ),
+        })
+
+        total_tareas = r["total"]["total"] if r["total"] else 0
+        tareas_por_estado = r["por_estado"]
+        grupos_tareas = r["grupos_tareas"]
         grupo_mas_tareas = grupos_tareas[0] if grupos_tareas else None
         grupo_menos_tareas = grupos_tareas[-1] if grupos_tareas else None
-
-        grupos_integrantes = execute_query(
-            """
-            SELECT 
-              g.IdGrupoAyudantes,
-              g.Nombre,
-              COUNT(mga.id_miembro) AS TotalIntegrantes
-            FROM grupoayudantes g
-            LEFT JOIN miembro_grupo_ayudantes mga
-              ON mga.id_grupo_ayudantes = g.IdGrupoAyudantes
-             AND mga.Activo = 1
-            WHERE g.Activo = 1
-            GROUP BY g.IdGrupoAyudantes, g.Nombre
-            ORDER BY TotalIntegrantes DESC
-            """
-        )
+        grupos_integrantes = r["grupos_integrantes"]
         grupo_mas_integrantes = grupos_integrantes[0] if grupos_integrantes else None
         grupo_menos_integrantes = grupos_integrantes[-1] if grupos_integrantes else None
-
-        serie_mensual = execute_query(
-            f"""
-            SELECT 
-              DATE_FORMAT(at.FechaAsignacion, '%%Y-%%m') AS Periodo,
-              COUNT(*) AS TotalTareas
-            FROM asignaciontarea at
-            {where}
-            GROUP BY DATE_FORMAT(at.FechaAsignacion, '%%Y-%%m')
-            ORDER BY Periodo ASC
-            """,
-            tuple(params) if params else None
-        )
-
-        reporte = execute_query(
-            f"""
-            SELECT
-              at.IdAsignacionTarea,
-              at.TituloTarea,
-              at.DescripcionTarea,
-              at.FechaAsignacion,
-              at.EstadoTarea,
-              g.Nombre AS Grupo
-            FROM asignaciontarea at
-            LEFT JOIN grupoayudantes g ON g.IdGrupoAyudantes = at.IdGrupoVoluntario
-            {where}
-            ORDER BY at.FechaAsignacion DESC
-            LIMIT 500
-            """,
-            tuple(params) if params else None
-        )
-
+        serie_mensual = serie.completar(r["serie_mensual"])
+        reporte = r["reporte"]
         return jsonify({
             "success": True,
             "filters": {
@@ -2579,19 +2423,15 @@ def estadisticas_finanzas():
         total_ingresos = float(row_tot["TotalIngresos"] or 0) if row_tot else 0.0
         total_egresos = float(row_tot["TotalEgresos"] or 0) if row_tot else 0.0
 
-        serie_mensual = execute_query(
-            f"""
-            SELECT
-              DATE_FORMAT(m.FechaMovimiento, '%%Y-%%m') AS Periodo,
-              SUM(CASE WHEN m.IdTipoMovimiento = 1 THEN m.Valor ELSE 0 END) AS Ingresos,
-              SUM(CASE WHEN m.IdTipoMovimiento = 2 THEN m.Valor ELSE 0 END) AS Egresos
-            FROM movimientos_caja m
-            {where}
-            GROUP BY DATE_FORMAT(m.FechaMovimiento, '%%Y-%%m')
-            ORDER BY Periodo ASC
-            """,
-            tuple(params) if params else None
-        )
+        desde, hasta = _get_date_range()
+        serie_mensual = SerieTemporal(
+            "FROM movimientos_caja m", "m.FechaMovimiento", "mes", filtros, params,
+            valores={
+                "Ingresos": "SUM(CASE WHEN m.IdTipoMovimiento = 1 THEN m.Valor ELSE 0 END)",
+                "Egresos": "SUM(CASE WHEN m.IdTipoMovimiento = 2 THEN m.Valor ELSE 0 END)",
+            },
+            inicio=desde, fin=hasta, clave_periodo="Periodo"
+        ).ejecutar()
 
         distribucion_concepto = execute_query(
             f"""
@@ -2655,3 +2495,135 @@ def estadisticas_finanzas():
             "success": False,
             "message": f"Error generando estadísticas de finanzas: {str(e)}"
         }), 500
+
+
+# ==========================================
+# 6) REPORTES EN SEGUNDO PLANO
+#    POST /api/estadisticas/jobs/
+#    GET  /api/estadisticas/jobs/<id>/
+#    GET  /api/estadisticas/jobs/<id>/descarga/
+# ==========================================
+
+reporte_jobs.registrar(
+    "reporte_completo", get_reporte_completo,
+    "/api/estadisticas/habitantes/reporte-completo/", ("json",) + FORMATOS_EXPORTACION
+)
+reporte_jobs.registrar(
+    "resumen_ejecutivo", get_resumen_ejecutivo, "/api/estadisticas/habitantes/resumen-ejecutivo/"
+)
+reporte_jobs.registrar(
+    "estadisticas_habitantes", estadisticas_habitantes,
+    "/api/estadisticas/habitantes/", ("json",) + FORMATOS_EXPORTACION
+)
+reporte_jobs.registrar(
+    "estadisticas_citas", estadisticas_citas,
+    "/api/estadisticas/citas/", ("json",) + FORMATOS_EXPORTACION
+)
+
+_MIMETYPES_JOB = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _job_respuesta(job):
+    """Job con el enlace de descarga cuando está listo"""
+    job = dict(job)
+    job.pop("archivo", None)
+    if job["estado"] == "completado":
+        job["descarga"] = url_for("estadisticas.descargar_job", id_job=job["id"])
+    return job
+
+
+@estadisticas_bp.route("/jobs/", methods=["POST"])
+@jwt_required()
+@require_rol("Administrador")
+def crear_job():
+    """
+    Encola un reporte para generarlo en segundo plano.
+    Body JSON:
+    - tipo: reporte_completo | resumen_ejecutivo | estadisticas_habitantes | estadisticas_citas
+    - formato: json | csv | xlsx (según el reporte)
+    - filtros: los mismos parámetros de query del endpoint del reporte
+    Un pedido idéntico (mismo tipo, formato y filtros en el día) reutiliza
+    el trabajo en curso o el archivo ya generado.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get("tipo"):
+            return jsonify({
+                "success": False,
+                "message": "El campo 'tipo' es requerido",
+                "reportes": reporte_jobs.tipos()
+            }), 400
+
+        identidad = get_jwt_identity()
+        id_usuario = int(identidad) if str(identidad).isdigit() else None
+        try:
+            job, reutilizado = reporte_jobs.encolar(
+                data["tipo"], data.get("formato"), data.get("filtros"), id_usuario
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e), "reportes": reporte_jobs.tipos()}), 400
+        except ColaLlenaError as e:
+            respuesta = jsonify({"success": False, "message": str(e)})
+            respuesta.headers["Retry-After"] = "60"
+            return respuesta, 503
+
+        respuesta = jsonify({"success": True, "reutilizado": reutilizado, "job": _job_respuesta(job)})
+        respuesta.headers["Location"] = url_for("estadisticas.obtener_job", id_job=job["id"])
+        return respuesta, 200 if job["estado"] == "completado" else 202
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error encolando el reporte: {str(e)}"}), 500
+
+
+@estadisticas_bp.route("/jobs/<int:id_job>/", methods=["GET"])
+@jwt_required()
+@require_rol("Administrador")
+def obtener_job(id_job):
+    """Estado de un reporte: pendiente | en_proceso | completado | error"""
+    try:
+        job = reporte_jobs.obtener(id_job)
+        if not job:
+            return jsonify({"success": False, "message": "Reporte no encontrado"}), 404
+        return jsonify({"success": True, "job": _job_respuesta(job)}), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error consultando el reporte: {str(e)}"}), 500
+
+
+@estadisticas_bp.route("/jobs/<int:id_job>/descarga/", methods=["GET"])
+@jwt_required()
+@require_rol("Administrador")
+def descargar_job(id_job):
+    """Descarga el archivo de un reporte completado"""
+    try:
+        job = reporte_jobs.obtener(id_job)
+        if not job:
+            return jsonify({"success": False, "message": "Reporte no encontrado"}), 404
+        if job["estado"] != "completado":
+            return jsonify({
+                "success": False,
+                "message": f"El reporte aún no está disponible (estado: {job['estado']})",
+                "job": _job_respuesta(job)
+            }), 409
+
+        ruta = reporte_jobs.ruta_archivo(job)
+        if not ruta:
+            return jsonify({
+                "success": False,
+                "message": "El archivo del reporte expiró, vuelva a solicitarlo"
+            }), 410
+
+        return send_file(
+            os.path.abspath(ruta),
+            mimetype=_MIMETYPES_JOB.get(job["formato"]),
+            as_attachment=True,
+            download_name=f"{job['tipo']}_{job['id']}.{job['formato']}",
+            max_age=0
+        )
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error descargando el reporte: {str(e)}"}), 500
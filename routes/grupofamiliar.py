@@ -3,8 +3,9 @@ Rutas para gestión de grupos familiares
 """
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from database import execute_query, get_db_connection
-from utils import require_rol
+from database import execute_query, transaction
+from utils import require_rol, paginar, PaginationError
+from services import habitante_index, autocomplete_index
 from datetime import datetime
 
 grupofamiliar_bp = Blueprint('grupofamiliar', __name__)
@@ -24,6 +25,18 @@ def buscar_grupos_dinamico():
         if len(q) < 1:
             return jsonify({'success': True, 'grupos': []}), 200
 
+        # Trie en memoria (por prefijo de palabra, los grupos con más miembros primero)
+        sugerencias = autocomplete_index.sugerir(q, ('grupo',), 10)
+        if sugerencias is not None:
+            grupos = [{
+                'IdGrupoFamiliar': s['IdGrupoFamiliar'],
+                'NombreGrupo': s['NombreGrupo'],
+                'Descripcion': s['Descripcion'],
+                'JefeFamilia': s['JefeFamilia'],
+                'IdJefeFamilia': s['IdJefeFamilia']
+            } for s in sugerencias]
+            return jsonify({'success': True, 'grupos': grupos}), 200
+
         query = """
             SELECT 
                 gf.IdGrupoFamiliar,
@@ -61,6 +74,23 @@ def buscar_habitantes_para_jefe():
         if len(q) < 1:
             return jsonify({'success': True, 'habitantes': []}), 200
 
+        # Índice en memoria; el grupo actual se completa por llave primaria
+        habitantes = habitante_index.buscar(q, limite=10)
+        if habitantes is not None:
+            if habitantes:
+                ids = [h['IdHabitante'] for h in habitantes]
+                marcadores = ', '.join(['%s'] * len(ids))
+                grupos = execute_query(f"""
+                    SELECT h.IdHabitante, COALESCE(gf.NombreGrupo, 'Sin grupo') AS GrupoActual
+                    FROM habitantes h
+                    LEFT JOIN grupofamiliar gf ON gf.IdGrupoFamiliar = h.IdGrupoFamiliar
+                    WHERE h.IdHabitante IN ({marcadores})
+                """, tuple(ids))
+                grupo_por_id = {g['IdHabitante']: g['GrupoActual'] for g in grupos}
+                for h in habitantes:
+                    h['GrupoActual'] = grupo_por_id.get(h['IdHabitante'], 'Sin grupo')
+            return jsonify({'success': True, 'habitantes': habitantes}), 200
+
         query = """
             SELECT 
                 h.IdHabitante,
@@ -110,29 +140,24 @@ def crear_grupo_con_jefe():
             if not habitante:
                 return jsonify({'success': False, 'message': 'El habitante seleccionado no existe'}), 400
 
-        # Crear grupo familiar
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO grupofamiliar (NombreGrupo, Descripcion, IdJefeFamilia, Activo)
-            VALUES (%s, %s, %s, 1)
-            """,
-            (nombre, descripcion, id_jefe)
-        )
-        conn.commit()
-        grupo_id = cur.lastrowid
-
-        # Si se asignó un jefe, actualizar su grupo familiar
-        if id_jefe:
-            cur.execute(
-                "UPDATE habitantes SET IdGrupoFamiliar = %s WHERE IdHabitante = %s",
-                (grupo_id, id_jefe)
+        with transaction():
+            # Crear grupo familiar
+            grupo_id = execute_query(
+                """
+                INSERT INTO grupofamiliar (NombreGrupo, Descripcion, IdJefeFamilia, Activo)
+                VALUES (%s, %s, %s, 1)
+                """,
+                (nombre, descripcion, id_jefe)
             )
-            conn.commit()
 
-        cur.close()
-        conn.close()
+            # Si se asignó un jefe, actualizar su grupo familiar
+            if id_jefe:
+                execute_query(
+                    "UPDATE habitantes SET IdGrupoFamiliar = %s WHERE IdHabitante = %s",
+                    (grupo_id, id_jefe)
+                )
+
+        autocomplete_index.refrescar_grupo(grupo_id)
 
         return jsonify({
             'success': True,
@@ -152,11 +177,11 @@ def crear_grupo_con_jefe():
 def listar_grupofamiliar():
     """
     Lista todos los grupos familiares activos con su jefe de familia.
+    Paginación opcional: ?page_size=&cursor=&total=1 (ver utils.paginar)
     """
     try:
         q = request.args.get('q', '')
-        query = """
-            SELECT 
+        columnas = """
                 gf.IdGrupoFamiliar,
                 gf.NombreGrupo,
                 gf.Descripcion,
@@ -165,13 +190,25 @@ def listar_grupofamiliar():
                 CONCAT(h.Nombre, ' ', h.Apellido) AS JefeFamilia,
                 h.NumeroDocumento AS DocumentoJefe,
                 h.Telefono AS TelefonoJefe
+        """
+        desde = """
             FROM grupofamiliar gf
             LEFT JOIN habitantes h ON h.IdHabitante = gf.IdJefeFamilia
-            WHERE gf.Activo = 1 AND gf.NombreGrupo LIKE %s
-            ORDER BY gf.IdGrupoFamiliar DESC
         """
-        grupos = execute_query(query, (f"%{q}%",))
-        return jsonify({'success': True, 'grupos': grupos}), 200
+        condiciones, params = ["gf.Activo = 1"], []
+        if q:
+            condiciones.append("gf.NombreGrupo LIKE %s")
+            params.append(f"%{q}%")
+
+        grupos, paginacion = paginar(
+            columnas, desde, condiciones, params,
+            orden=[("gf.IdGrupoFamiliar", "IdGrupoFamiliar", "DESC")],
+            tags=['grupofamiliar', 'habitantes'],
+            completo_por_defecto=True
+        )
+        return jsonify({'success': True, 'grupos': grupos, 'paginacion': paginacion}), 200
+    except PaginationError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f"Error al listar grupos familiares: {str(e)}"}), 500
 
@@ -183,6 +220,16 @@ def buscar_grupos_familiares():
         if len(q) < 2:
             return jsonify({'success': True, 'grupos': []}), 200
 
+        sugerencias = autocomplete_index.sugerir(q, ('grupo',), 10)
+        if sugerencias is not None:
+            grupos = [{
+                'IdGrupoFamiliar': s['IdGrupoFamiliar'],
+                'NombreGrupo': s['NombreGrupo'],
+                'Descripcion': s['Descripcion'],
+                'JefeFamilia': s['JefeFamilia']
+            } for s in sugerencias]
+            return jsonify({'success': True, 'grupos': grupos}), 200
+
         query = """
             SELECT 
                 gf.IdGrupoFamiliar,
@@ -271,6 +318,7 @@ def crear_grupo_simple():
             VALUES (%s, NULL, NULL, 1)
         """
         grupo_id = execute_query(insert_sql, (nombre,))
+        autocomplete_index.refrescar_grupo(grupo_id)
 
         return jsonify({
             'success': True,
@@ -299,6 +347,7 @@ def actualizar_grupo_familiar(id):
             id
         ))
         if updated:
+            autocomplete_index.refrescar_grupo(id)
             return jsonify({'success': True, 'message': 'Grupo familiar actualizado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Grupo familiar no encontrado o no actualizado'}), 404
     except Exception as e:
@@ -313,6 +362,7 @@ def desactivar_grupo_familiar(id):
             UPDATE grupofamiliar SET Activo = 0 WHERE IdGrupoFamiliar = %s
         """, (id,))
         if rows is not None:
+            autocomplete_index.refrescar_grupo(id)
             return jsonify({'success': True, 'message': 'Grupo familiar desactivado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Grupo no encontrado'}), 404
     except Exception as e:
@@ -327,6 +377,7 @@ def activar_grupo_familiar(id):
             UPDATE grupofamiliar SET Activo = 1 WHERE IdGrupoFamiliar = %s
         """, (id,))
         if rows is not None:
+            autocomplete_index.refrescar_grupo(id)
             return jsonify({'success': True, 'message': 'Grupo familiar activado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Grupo no encontrado'}), 404
     except Exception as e:
@@ -341,6 +392,7 @@ def asignar_jefe(id, id_habitante):
         "UPDATE grupofamiliar SET IdJefeFamilia=%s WHERE IdGrupoFamiliar=%s",(id_habitante, id)
         )
         if rows is not None:
+            autocomplete_index.refrescar_grupo(id)
             return jsonify({'success': True, 'message': 'Jefe de familia asignado'}), 200
         return jsonify({'success': False, 'message': 'Grupo no encontrado'}), 404
     except Exception as e:
@@ -355,6 +407,7 @@ def remover_jefe(id):
             "UPDATE grupofamiliar SET IdJefeFamilia=NULL WHERE IdGrupoFamiliar=%s",
             (id,)
         )
+        autocomplete_index.refrescar_grupo(id)
         return jsonify({'success': True, 'message': 'Jefe de familia removido'}), 200
     except Exception as e:
         return jsonify({'success': False, 'message': f"Error al remover jefe: {str(e)}"}), 500
\ No newline at end of file
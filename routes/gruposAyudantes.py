@@ -5,6 +5,7 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from database import execute_query
 from utils import require_rol
+from services import habitante_index
 from datetime import datetime
 
 grupos_bp = Blueprint('grupos', __name__)
@@ -621,6 +622,12 @@ def buscar_lider():
     q = request.args.get('q', '').strip()
     if not q:
         return jsonify({'success': True, 'habitantes': []}), 200
+
+    # Índice en memoria; mientras se construye se consulta MySQL
+    results = habitante_index.buscar(q, limite=100)
+    if results is not None:
+        return jsonify({'success': True, 'habitantes': results}), 200
+
     query = """
         SELECT IdHabitante, Nombre, Apellido, NumeroDocumento, Telefono
         FROM habitantes
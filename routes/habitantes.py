@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from datetime import datetime
-from utils import require_rol,ValidacionDatos
-from database import execute_query
+from utils import require_rol,ValidacionDatos, paginar, PaginationError
+from database import execute_query, transaction, bulk_insert
+from services import habitante_index, autocomplete_index, sacramento_index, demografia, contribucion_rollup, actualizar_rollups
 
 
 habitantes_bp = Blueprint('habitantes', __name__)
@@ -15,16 +16,48 @@ def _asignar_jefe_si_vacio(id_grupo, id_habitante):
           AND (IdJefeFamilia IS NULL OR IdJefeFamilia = 0)
     """, (id_habitante, id_grupo))
 
+def _grupo_de(id_habitante):
+    """IdGrupoFamiliar actual del habitante (None si no existe)"""
+    fila = execute_query(
+        "SELECT IdGrupoFamiliar FROM habitantes WHERE IdHabitante = %s",
+        (id_habitante,), fetch_one=True
+    )
+    return fila['IdGrupoFamiliar'] if fila else None
+
+def _refrescar_grupos(*ids_grupo):
+    """Actualiza en el autocompletado los grupos afectados (miembros y texto del jefe)"""
+    for id_grupo in {int(g) for g in ids_grupo if g}:
+        autocomplete_index.refrescar_grupo(id_grupo)
+
+def _filtrar_sacramentos_validos(ids):
+    """Devuelve los IdSacramento existentes, sin repetir y en el orden recibido"""
+    candidatos = []
+    for sid in ids:
+        try:
+            sid = int(sid)
+        except (TypeError, ValueError):
+            continue
+        if sid not in candidatos:
+            candidatos.append(sid)
+    if not candidatos:
+        return []
+
+    marcadores = ', '.join(['%s'] * len(candidatos))
+    existentes = execute_query(
+        f"SELECT IdSacramento FROM tiposacramentos WHERE IdSacramento IN ({marcadores})",
+        tuple(candidatos)
+    )
+    validos = {row['IdSacramento'] for row in existentes}
+    return [sid for sid in candidatos if sid in validos]
+
 
 # LISTAR TODOS LOS HABITANTES
-# LISTAR TODOS LOS HABITANTES
+# GET /api/habitantes/?page_size=&cursor=&total=1
 @habitantes_bp.route('/', methods=['GET'])
 @jwt_required()
 def listar_habitantes():
     try:
-        # En listar_habitantes() - Asegúrate que tenga este JOIN y columna:
-        query = """
-    SELECT 
+        columnas = """
         h.IdHabitante,
         h.Nombre,
         h.Apellido,
@@ -46,7 +79,7 @@ def listar_habitantes():
         h.TieneImpedimentoSalud,
         h.MotivoImpedimentoSalud,
         h.IdGrupoFamiliar,
-        COALESCE(gf.Descripcion, 'Sin familia') AS FamiliaDescripcion,  -- ← ESTA COLUMNA
+        COALESCE(gf.Descripcion, 'Sin familia') AS FamiliaDescripcion,
         h.IdSector,
         sec.Descripcion AS Sector,
         h.Direccion,
@@ -55,6 +88,8 @@ def listar_habitantes():
         h.Activo,
         h.FechaRegistro,
         COALESCE(GROUP_CONCAT(DISTINCT ts.Descripcion SEPARATOR ', '), 'Ninguno') AS TipoSacramento
+"""
+        desde = """
     FROM habitantes h
     LEFT JOIN tipodocumento td     ON h.IdTipoDocumento = td.IdTipoDocumento
     LEFT JOIN estados_civiles ec   ON h.IdEstadoCivil = ec.IdEstadoCivil
@@ -62,19 +97,23 @@ def listar_habitantes():
     LEFT JOIN religiones r         ON h.IdReligion = r.IdReligion
     LEFT JOIN tipopoblacion tp     ON h.IdTipoPoblacion = tp.IdTipoPoblacion
     LEFT JOIN sector sec           ON h.IdSector = sec.IdSector
-    LEFT JOIN grupofamiliar gf     ON h.IdGrupoFamiliar = gf.IdGrupoFamiliar  -- ← ESTE JOIN
+    LEFT JOIN grupofamiliar gf     ON h.IdGrupoFamiliar = gf.IdGrupoFamiliar
     LEFT JOIN habitante_sacramento hs ON h.IdHabitante = hs.IdHabitante
     LEFT JOIN tiposacramentos ts   ON hs.IdSacramento = ts.IdSacramento
-    WHERE h.Activo = 1
-    GROUP BY h.IdHabitante
-    ORDER BY h.IdHabitante DESC
-    LIMIT 1000
 """
-        habitantes = execute_query(query)
+        habitantes, paginacion = paginar(
+            columnas, desde, ["h.Activo = 1"], [],
+            orden=[("h.IdHabitante", "IdHabitante", "DESC")],
+            group_by="h.IdHabitante",
+            tags=["habitantes"]
+        )
         return jsonify({
             "success": True,
-            "habitantes": habitantes
+            "habitantes": habitantes,
+            "paginacion": paginacion
         }), 200
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -201,93 +240,85 @@ def crear_habitante():
                 'message': f'Faltan campos obligatorios: {", ".join(campos_faltantes)}'
             }), 400
 
-        # VERIFICAR O CREAR GRUPO FAMILIAR
-        grupo_id = None
+        with transaction():
+            # VERIFICAR O CREAR GRUPO FAMILIAR
+            grupo_id = None
         
-        if IdGrupoFamiliar:
-            grupo_query = "SELECT IdGrupoFamiliar FROM grupofamiliar WHERE IdGrupoFamiliar = %s AND Activo = 1"
-            grupo = execute_query(grupo_query, (IdGrupoFamiliar,), fetch_one=True)
-            if grupo:
-                grupo_id = IdGrupoFamiliar
-            else:
-                return jsonify({'success': False, 'message': 'El grupo familiar seleccionado no existe'}), 400
+            if IdGrupoFamiliar:
+                grupo_query = "SELECT IdGrupoFamiliar FROM grupofamiliar WHERE IdGrupoFamiliar = %s AND Activo = 1"
+                grupo = execute_query(grupo_query, (IdGrupoFamiliar,), fetch_one=True)
+                if grupo:
+                    grupo_id = IdGrupoFamiliar
+                else:
+                    return jsonify({'success': False, 'message': 'El grupo familiar seleccionado no existe'}), 400
                 
-        elif GrupoFamiliarNombre and GrupoFamiliarNombre.strip():
-            nombre_grupo = GrupoFamiliarNombre.strip()
+            elif GrupoFamiliarNombre and GrupoFamiliarNombre.strip():
+                nombre_grupo = GrupoFamiliarNombre.strip()
             
-            grupo_existente_query = "SELECT IdGrupoFamiliar FROM grupofamiliar WHERE NombreGrupo = %s AND Activo = 1"
-            grupo_existente = execute_query(grupo_existente_query, (nombre_grupo,), fetch_one=True)
+                grupo_existente_query = "SELECT IdGrupoFamiliar FROM grupofamiliar WHERE NombreGrupo = %s AND Activo = 1"
+                grupo_existente = execute_query(grupo_existente_query, (nombre_grupo,), fetch_one=True)
             
-            if grupo_existente:
-                grupo_id = grupo_existente['IdGrupoFamiliar']
+                if grupo_existente:
+                    grupo_id = grupo_existente['IdGrupoFamiliar']
+                else:
+                    insert_grupo_sql = """
+                        INSERT INTO grupofamiliar (NombreGrupo, Descripcion, IdJefeFamilia, Activo)
+                        VALUES (%s, NULL, NULL, 1)
+                    """
+                    grupo_id = execute_query(insert_grupo_sql, (nombre_grupo,))
             else:
-                insert_grupo_sql = """
-                    INSERT INTO grupofamiliar (NombreGrupo, Descripcion, IdJefeFamilia, Activo)
-                    VALUES (%s, NULL, NULL, 1)
-                """
-                grupo_id = execute_query(insert_grupo_sql, (nombre_grupo,))
-        else:
-            return jsonify({'success': False, 'message': 'Se requiere un grupo familiar (seleccionar existente o crear nuevo)'}), 400
-
-        # Insertar habitante
-        insert_sql = """
-            INSERT INTO habitantes
-            (Nombre, Apellido, IdTipoDocumento, NumeroDocumento, FechaNacimiento, Hijos,
-             DiscapacidadParaAsistir, IdTipoPoblacion, Direccion, Telefono, CorreoElectronico,
-             IdGrupoFamiliar, TieneImpedimentoSalud, MotivoImpedimentoSalud, Activo,
-             IdSexo, IdEstadoCivil, IdReligion, IdSector, FechaRegistro)
-            VALUES (%s,%s,%s,%s,%s,%s,
-                    %s,%s,%s,%s,%s,
-                    %s,%s,%s,%s,
-                    %s,%s,%s,%s, NOW())
-        """
-        habitante_id = execute_query(insert_sql, (
-            Nombre, Apellido, IdTipoDocumento, NumeroDocumento, FechaNacimiento, Hijos,
-            DiscapacidadParaAsistir, IdTipoPoblacion, Direccion, Telefono, CorreoElectronico,
-            grupo_id, TieneImpedimentoSalud, MotivoImpedimentoSalud, Activo,
-            IdSexo, IdEstadoCivil, IdReligion, IdSector
-        ))
-
-        # ASIGNAR AUTOMÁTICAMENTE COMO FAMILIAR ASOCIADO SI EL GRUPO NO TIENE UNO
-        try:
-            grupo_query = "SELECT IdJefeFamilia FROM grupofamiliar WHERE IdGrupoFamiliar = %s"
-            grupo = execute_query(grupo_query, (grupo_id,), fetch_one=True)
+                return jsonify({'success': False, 'message': 'Se requiere un grupo familiar (seleccionar existente o crear nuevo)'}), 400
+
+            # Insertar habitante
+            insert_sql = """
+                INSERT INTO habitantes
+                (Nombre, Apellido, IdTipoDocumento, NumeroDocumento, FechaNacimiento, Hijos,
+                 DiscapacidadParaAsistir, IdTipoPoblacion, Direccion, Telefono, CorreoElectronico,
+                 IdGrupoFamiliar, TieneImpedimentoSalud, MotivoImpedimentoSalud, Activo,
+                 IdSexo, IdEstadoCivil, IdReligion, IdSector, FechaRegistro)
+                VALUES (%s,%s,%s,%s,%s,%s,
+                        %s,%s,%s,%s,%s,
+                        %s,%s,%s,%s,
+                        %s,%s,%s,%s, NOW())
+            """
+            habitante_id = execute_query(insert_sql, (
+                Nombre, Apellido, IdTipoDocumento, NumeroDocumento, FechaNacimiento, Hijos,
+                DiscapacidadParaAsistir, IdTipoPoblacion, Direccion, Telefono, CorreoElectronico,
+                grupo_id, TieneImpedimentoSalud, MotivoImpedimentoSalud, Activo,
+                IdSexo, IdEstadoCivil, IdReligion, IdSector
+            ))
+
+            # ASIGNAR AUTOMÁTICAMENTE COMO FAMILIAR ASOCIADO SI EL GRUPO NO TIENE UNO
+            try:
+                grupo_query = "SELECT IdJefeFamilia FROM grupofamiliar WHERE IdGrupoFamiliar = %s"
+                grupo = execute_query(grupo_query, (grupo_id,), fetch_one=True)
             
-            if grupo and grupo.get('IdJefeFamilia') is None:
-                execute_query(
-                    "UPDATE grupofamiliar SET IdJefeFamilia = %s WHERE IdGrupoFamiliar = %s",
-                    (habitante_id, grupo_id)
-                )
+                if grupo and grupo.get('IdJefeFamilia') is None:
+                    descripcion_actualizada = f"{Apellido}"
+                    execute_query(
+                        "UPDATE grupofamiliar SET IdJefeFamilia = %s, Descripcion = %s WHERE IdGrupoFamiliar = %s",
+                        (habitante_id, descripcion_actualizada, grupo_id)
+                    )
                 
-                descripcion_actualizada = f"{Apellido}"
-                execute_query(
-                    "UPDATE grupofamiliar SET Descripcion = %s WHERE IdGrupoFamiliar = %s",
-                    (descripcion_actualizada, grupo_id)
+            except Exception as e:
+                pass
+
+            # Insertar sacramentos (un solo INSERT de varias filas)
+            sacramentos_validos = _filtrar_sacramentos_validos(Sacramentos)
+            if sacramentos_validos:
+                bulk_insert(
+                    'habitante_sacramento',
+                    ['IdHabitante', 'IdSacramento', 'FechaSacramento'],
+                    [(habitante_id, sid, None) for sid in sacramentos_validos]
                 )
-                
-        except Exception as e:
-            pass
-
-        # Insertar sacramentos
-        if Sacramentos:
-            for sacramento_id in Sacramentos:
-                try:
-                    sacramento_query = "SELECT IdSacramento FROM tiposacramentos WHERE IdSacramento = %s"
-                    sacramento = execute_query(sacramento_query, (sacramento_id,), fetch_one=True)
-                    
-                    if sacramento:
-                        existe_query = "SELECT 1 FROM habitante_sacramento WHERE IdHabitante = %s AND IdSacramento = %s"
-                        existe = execute_query(existe_query, (habitante_id, sacramento_id), fetch_one=True)
-                        
-                        if not existe:
-                            insert_sacramento_sql = """
-                                INSERT INTO habitante_sacramento (IdHabitante, IdSacramento, FechaSacramento)
-                                VALUES (%s, %s, NULL)
-                            """
-                            execute_query(insert_sacramento_sql, (habitante_id, sacramento_id))
-                            
-                except Exception as e:
-                    continue
+
+            actualizar_rollups(habitante_id)
+
+        habitante_index.refrescar(habitante_id)
+        sacramento_index.refrescar(habitante_id)
+        demografia.refrescar(habitante_id)
+        # Grupo nuevo o con un miembro más
+        autocomplete_index.refrescar_grupo(grupo_id)
 
         return jsonify({
             'success': True,
@@ -340,27 +371,37 @@ def actualizar_habitante(id):
         if not sets:
             return jsonify({'success': False, 'message': 'Nada para actualizar'}), 400
 
-        vals.append(id)
-        sql = f"UPDATE habitantes SET {', '.join(sets)} WHERE IdHabitante=%s"
-        updated = execute_query(sql, tuple(vals))
-
-        # Sacramentos
-        Sacramentos = data.get('Sacramentos', [])
-        if Sacramentos is not None:
-            execute_query("DELETE FROM habitante_sacramento WHERE IdHabitante=%s", (id,))
-            for sid in Sacramentos:
-                execute_query(
-                    "INSERT INTO habitante_sacramento (IdHabitante, IdSacramento) VALUES (%s,%s)",
-                    (id, int(sid))
+        with transaction():
+            antes = contribucion_rollup(id)
+            grupo_anterior = _grupo_de(id)
+            vals.append(id)
+            sql = f"UPDATE habitantes SET {', '.join(sets)} WHERE IdHabitante=%s"
+            updated = execute_query(sql, tuple(vals))
+
+            # Sacramentos
+            Sacramentos = data.get('Sacramentos', [])
+            if Sacramentos is not None:
+                execute_query("DELETE FROM habitante_sacramento WHERE IdHabitante=%s", (id,))
+                bulk_insert(
+                    'habitante_sacramento',
+                    ['IdHabitante', 'IdSacramento'],
+                    [(id, sid) for sid in dict.fromkeys(int(sid) for sid in Sacramentos)]
                 )
 
-        # Asignar jefe si se pide
-        AsignarComoJefe = data.get('AsignarComoJefe', False)
-        IdGrupoFamiliar = fields.get('IdGrupoFamiliar')
-        if AsignarComoJefe and IdGrupoFamiliar:
-            _asignar_jefe_si_vacio(IdGrupoFamiliar, id)
+            # Asignar jefe si se pide
+            AsignarComoJefe = data.get('AsignarComoJefe', False)
+            IdGrupoFamiliar = fields.get('IdGrupoFamiliar')
+            if AsignarComoJefe and IdGrupoFamiliar:
+                _asignar_jefe_si_vacio(IdGrupoFamiliar, id)
+
+            actualizar_rollups(id, antes)
 
         if updated:
+            habitante_index.refrescar(id)
+            sacramento_index.refrescar(id)
+            demografia.refrescar(id)
+            # Grupo anterior y nuevo: cambian sus miembros o el nombre del jefe
+            _refrescar_grupos(grupo_anterior, fields.get('IdGrupoFamiliar'))
             return jsonify({'success': True, 'message': 'Habitante actualizado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Habitante no encontrado o sin cambios'}), 404
 
@@ -375,8 +416,16 @@ def actualizar_habitante(id):
 def desactivar_habitante(id):
     try:
         query = "UPDATE habitantes SET Activo=0 WHERE IdHabitante=%s"
-        updated = execute_query(query, (id,))
+        with transaction():
+            antes = contribucion_rollup(id)
+            grupo = _grupo_de(id)
+            updated = execute_query(query, (id,))
+            actualizar_rollups(id, antes)
         if updated:
+            habitante_index.refrescar(id)
+            sacramento_index.refrescar(id)
+            demografia.refrescar(id)
+            _refrescar_grupos(grupo)
             return jsonify({'success': True, 'message': 'Habitante desactivado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Habitante no encontrado'}), 404
     except Exception as e:
@@ -388,6 +437,35 @@ def desactivar_habitante(id):
 @jwt_required()
 def buscar_grupo_por_miembro():
     q = request.args.get('q', '').strip()
+
+    # Índice en memoria (habitantes activos); los grupos se completan por llave
+    encontrados = habitante_index.buscar(q, limite=100) if q else None
+    if encontrados is not None:
+        result = []
+        if encontrados:
+            ids = [h['IdHabitante'] for h in encontrados]
+            marcadores = ', '.join(['%s'] * len(ids))
+            grupos = execute_query(f"""
+                SELECT m.id_habitante, g.Nombre AS Grupo
+                FROM miembro_grupo_ayudantes m
+                JOIN grupoayudantes g ON g.IdGrupoAyudantes = m.id_grupo_ayudantes
+                WHERE m.id_habitante IN ({marcadores})
+            """, tuple(ids))
+            grupos_por_id = {}
+            for fila in grupos:
+                grupos_por_id.setdefault(fila['id_habitante'], []).append(fila['Grupo'])
+            # Una fila por grupo, igual que el LEFT JOIN de la consulta SQL
+            for h in encontrados:
+                for grupo in grupos_por_id.get(h['IdHabitante'], [None]):
+                    result.append({
+                        'IdHabitante': h['IdHabitante'],
+                        'Nombre': h['Nombre'],
+                        'Apellido': h['Apellido'],
+                        'NumeroDocumento': h['NumeroDocumento'],
+                        'Grupo': grupo
+                    })
+        return jsonify({'success': True, 'resultados': result[:100]}), 200
+
     query = """
         SELECT h.IdHabitante, h.Nombre, h.Apellido, h.NumeroDocumento, g.Nombre AS Grupo
         FROM habitantes h
@@ -4,9 +4,16 @@ Rutas principales de la API
 Proporciona información general del sistema, estado de salud y listado de endpoints disponibles.
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from database.db_mysql import execute_query
+from database import (
+    execute_query, get_pool_metrics, get_query_stats, reset_query_stats,
+    get_cache_stats, clear_query_cache
+)
+from utils import require_rol, resolver_permisos, password_hasher
+from services import (
+    habitante_index, autocomplete_index, sacramento_index, dashboard_snapshots, demografia, reporte_jobs
+)
 from datetime import datetime
 import logging
 
@@ -40,7 +47,8 @@ def index():
                 'GET /api/': 'Información general de la API',
                 'GET /api/health': 'Verifica conexión con base de datos',
                 'GET /api/test-db': 'Prueba de integridad de tablas principales',
-                'GET /api/dashboard/stats': 'Estadísticas globales'
+                'GET /api/dashboard/stats': 'Estadísticas globales',
+                'GET /api/db/stats': 'Consultas SQL más costosas y estado del pool (Administrador)'
             },
             'Opciones / Catálogos': {
                 'GET /api/opciones': 'Listar valores de catálogos (documentos, sexos, religiones, etc.)'
@@ -110,6 +118,7 @@ def health_check():
             return jsonify({
                 'status': 'ok',
                 'database': 'connected',
+                'pool': get_pool_metrics(),
                 'timestamp': str(datetime.now())
             }), 200
         else:
@@ -178,3 +187,73 @@ def get_dashboard_stats():
     except Exception as e:
         logging.error(f"Error obteniendo estadísticas: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
+
+
+# ======================================
+# MÉTRICAS DE CONSULTAS SQL
+# ======================================
+@index_bp.route('/db/stats', methods=['GET'])
+@jwt_required()
+@require_rol('Administrador')
+def get_db_stats():
+    """
+    Retorna las huellas SQL con más tiempo acumulado en este worker,
+    el estado del pool de conexiones, los contadores de la caché de consultas
+    el estado de los índices en memoria (búsqueda, autocompletado, bitmaps
+    de sacramentos y columnas demográficas) y de los snapshots del dashboard.
+    Parámetro opcional: ?top=N (defecto 20).
+    """
+    try:
+        top = request.args.get('top', '20')
+        top = int(top) if top.isdigit() else 20
+
+        return jsonify({
+            'success': True,
+            'pool': get_pool_metrics(),
+            'cache': get_cache_stats(),
+            'indice_habitantes': habitante_index.stats(),
+            'autocompletado': autocomplete_index.stats(),
+            'sacramentos_bitmap': sacramento_index.stats(),
+            'snapshots_dashboard': dashboard_snapshots.stats(),
+            'demografia': demografia.stats(),
+            'reporte_jobs': reporte_jobs.stats(),
+            'permisos': resolver_permisos.stats(),
+            'hash_contrasenas': password_hasher.stats(),
+            'consultas': get_query_stats(top)
+        }), 200
+    except Exception as e:
+        logging.error(f"Error obteniendo métricas SQL: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@index_bp.route('/db/stats', methods=['DELETE'])
+@jwt_required()
+@require_rol('Administrador')
+def reset_db_stats():
+    """
+    Reinicia el agregado de consultas (para medir antes y después de un cambio).
+    Con ?cache=1 también vacía la caché de consultas.
+    """
+    reset_query_stats()
+    if request.args.get('cache') == '1':
+        clear_query_cache()
+    return jsonify({'success': True, 'message': 'Métricas de consultas reiniciadas'}), 200
+
+
+@index_bp.route('/db/demografia/verificar', methods=['GET'])
+@jwt_required()
+@require_rol('Administrador')
+def verificar_demografia():
+    """
+    Compara los agregados del motor columnar de demografía con MySQL
+    (total, suma de edades, impedimentos, hijos, familias, sacramentos y
+    habitantes por sector). 409 si hay diferencias.
+    """
+    try:
+        if not demografia.disponible():
+            return jsonify({'success': False, 'message': 'El motor de demografía no está cargado en este worker'}), 503
+        resultado = demografia.verificar()
+        return jsonify({'success': resultado['coincide'], **resultado}), 200 if resultado['coincide'] else 409
+    except Exception as e:
+        logging.error(f"Error verificando el motor de demografía: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -9,7 +9,7 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from database import execute_query
-from utils import require_rol
+from utils import require_rol, paginar, PaginationError
 from datetime import datetime
 
 movimientos_bp = Blueprint("movimientos", __name__)
@@ -41,7 +41,7 @@ def _obtener_concepto(id_concepto):
 
 # ============================================================
 # LISTAR MOVIMIENTOS
-# GET /api/movimientos/?tipo=&desde=&hasta=&q=
+# GET /api/movimientos/?tipo=&desde=&hasta=&q=&page_size=&cursor=&total=1
 # ============================================================
 
 @movimientos_bp.route("/", methods=["GET"])
@@ -55,6 +55,7 @@ def listar_movimientos():
       - hasta: FechaMovimiento <= hasta (YYYY-MM-DD)
       - q: texto en Motivo u Observaciones
     Solo se devuelven movimientos Activo = 1.
+    Paginado por (FechaMovimiento, IdMovimiento) DESC: ver utils.paginar.
     """
     try:
         tipo = request.args.get("tipo")
@@ -82,10 +83,7 @@ def listar_movimientos():
             condiciones.append("(m.Motivo LIKE %s OR m.Observaciones LIKE %s)")
             params.extend([like, like])
 
-        where_clause = "WHERE " + " AND ".join(condiciones) if condiciones else ""
-
-        query = f"""
-            SELECT 
+        columnas = """
                 m.IdMovimiento,
                 m.IdTipoMovimiento,
                 tm.Descripcion AS TipoMovimientoNombre,
@@ -96,22 +94,31 @@ def listar_movimientos():
                 m.FechaMovimiento,
                 m.Observaciones,
                 m.FechaRegistro,
-                m.Activo
+                m.Activo,
+                COALESCE(m.FechaMovimiento, '0001-01-01') AS _FechaOrden
+        """
+        desde_sql = """
             FROM movimientos_caja m
             LEFT JOIN tipomovimiento tm 
                 ON m.IdTipoMovimiento = tm.IdTipoMovimiento
             LEFT JOIN conceptotransaccion c
                 ON m.IdConceptoTransaccion = c.IdConceptoTransaccion
-            {where_clause}
-            ORDER BY 
-                m.FechaMovimiento DESC,
-                m.IdMovimiento DESC
         """
 
-        movimientos = execute_query(query, tuple(params) if params else None)
+        # FechaMovimiento admite NULL: el cursor usa su versión sin NULL
+        movimientos, paginacion = paginar(
+            columnas, desde_sql, condiciones, params,
+            orden=[
+                ("COALESCE(m.FechaMovimiento, '0001-01-01')", "_FechaOrden", "DESC"),
+                ("m.IdMovimiento", "IdMovimiento", "DESC"),
+            ],
+            tags=["movimientos_caja"]
+        )
         # Igual que otros módulos: success + payload plano
-        return jsonify({"success": True, "movimientos": movimientos}), 200
+        return jsonify({"success": True, "movimientos": movimientos, "paginacion": paginacion}), 200
 
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return (
             jsonify(
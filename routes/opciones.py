@@ -1,49 +1,45 @@
 from flask import Blueprint, jsonify
-from database import get_db_connection
+from database import batch_select
 
 opciones_bp = Blueprint("opciones", __name__)
 
+CATALOGOS = [
+    "tipodocumento", "sexos", "estados_civiles", "religiones",
+    "tiposacramentos", "sector", "tipopoblacion"
+]
+
 @opciones_bp.route("/", methods=["GET"])
 def get_opciones():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # tipodocumento: IdTipoDocumento, Descripcion
-    cursor.execute("SELECT IdTipoDocumento AS id, Descripcion FROM tipodocumento")
-    tipos_documento = cursor.fetchall()
-
-    # sexos: IdSexo, Nombre
-    cursor.execute("SELECT IdSexo AS id, Nombre FROM sexos")
-    sexos = cursor.fetchall()
+    # Los 7 catálogos se piden en un solo viaje y se guardan en caché
+    r = batch_select({
+        # tipodocumento: IdTipoDocumento, Descripcion
+        "tipos_documento": "SELECT IdTipoDocumento AS id, Descripcion FROM tipodocumento",
 
-    # estados_civiles: IdEstadoCivil, Nombre
-    cursor.execute("SELECT IdEstadoCivil AS id, Nombre FROM estados_civiles")
-    estados_civiles = cursor.fetchall()
+        # sexos: IdSexo, Nombre
+        "sexos": "SELECT IdSexo AS id, Nombre FROM sexos",
 
-    # religiones: IdReligion, Nombre
-    cursor.execute("SELECT IdReligion AS id, Nombre FROM religiones")
-    religiones = cursor.fetchall()
+        # estados_civiles: IdEstadoCivil, Nombre
+        "estados_civiles": "SELECT IdEstadoCivil AS id, Nombre FROM estados_civiles",
 
-    # tiposacramentos: IdSacramento, Costo, Descripcion
-    cursor.execute("SELECT IdSacramento AS id, Costo, Descripcion FROM tiposacramentos")
-    sacramentos = cursor.fetchall()
+        # religiones: IdReligion, Nombre
+        "religiones": "SELECT IdReligion AS id, Nombre FROM religiones",
 
-    # sector: IdSector, Nombre
-    cursor.execute("SELECT IdSector AS id, Descripcion FROM sector")
-    sectores = cursor.fetchall()
+        # tiposacramentos: IdSacramento, Costo, Descripcion
+        "sacramentos": "SELECT IdSacramento AS id, Costo, Descripcion FROM tiposacramentos",
 
-    # tipopoblacion: IdTipoPoblacion, Nombre, Descripcion
-    cursor.execute("SELECT IdTipoPoblacion AS id, Nombre, Descripcion FROM tipopoblacion")
-    poblaciones = cursor.fetchall()
+        # sector: IdSector, Nombre
+        "sectores": "SELECT IdSector AS id, Descripcion FROM sector",
 
-    conn.close()
+        # tipopoblacion: IdTipoPoblacion, Nombre, Descripcion
+        "poblaciones": "SELECT IdTipoPoblacion AS id, Nombre, Descripcion FROM tipopoblacion",
+    }, tags=CATALOGOS, ttl=300)
 
     return jsonify({
-        "tiposDocumento": tipos_documento,
-        "sexos": sexos,
-        "estadosCiviles": estados_civiles,
-        "religiones": religiones,
-        "sacramentos": sacramentos,
-        "sectores": sectores,
-        "poblaciones": poblaciones
+        "tiposDocumento": r["tipos_documento"],
+        "sexos": r["sexos"],
+        "estadosCiviles": r["estados_civiles"],
+        "religiones": r["religiones"],
+        "sacramentos": r["sacramentos"],
+        "sectores": r["sectores"],
+        "poblaciones": r["poblaciones"]
     })
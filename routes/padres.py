@@ -3,7 +3,7 @@ Rutas para búsqueda/listado de PADRES (tabla: padre)
 """
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from database import execute_query
+from utils import paginar, PaginationError
 
 padres_bp = Blueprint('padres', __name__)
 
@@ -11,20 +11,31 @@ padres_bp = Blueprint('padres', __name__)
 @jwt_required()
 def listar_padres():
     try:
-        query = """
-            SELECT 
+        columnas = """
                 IdPadre,
                 Nombre,
                 Apellido,
                 NumeroDocumento,
                 Telefono,
                 CorreoElectronico,
-                Activo
-            FROM padre
-            WHERE Activo = 1
-            ORDER BY Nombre, Apellido
+                Activo,
+                COALESCE(Nombre, '') AS _NombreOrden,
+                COALESCE(Apellido, '') AS _ApellidoOrden
         """
-        padres = execute_query(query, fetch_all=True)
-        return jsonify({"success": True, "padres": padres}), 200
+        # Nombre y Apellido admiten NULL: el cursor usa su versión sin NULL.
+        # Sin page_size ni cursor se devuelve la lista completa (desplegables)
+        padres, paginacion = paginar(
+            columnas, "FROM padre", ["Activo = 1"], [],
+            orden=[
+                ("COALESCE(Nombre, '')", "_NombreOrden", "ASC"),
+                ("COALESCE(Apellido, '')", "_ApellidoOrden", "ASC"),
+                ("IdPadre", "IdPadre", "ASC"),
+            ],
+            tags=['padre'],
+            completo_por_defecto=True
+        )
+        return jsonify({"success": True, "padres": padres, "paginacion": paginacion}), 200
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
\ No newline at end of file
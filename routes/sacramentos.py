@@ -3,9 +3,10 @@ Rutas para gestión de sacramentos de los habitantes
 """
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from database.db_mysql import execute_query
+from database.db_mysql import execute_query, transaction
 from datetime import datetime
 from utils import require_rol
+from services import contribucion_rollup, actualizar_rollups, sacramento_index, demografia
 
 sacramentos_bp = Blueprint('sacramentos', __name__)
 
@@ -61,11 +62,16 @@ def agregar_sacramento_habitante(id):
             INSERT INTO habitante_sacramento (IdHabitante, IdSacramento, FechaSacramento)
             VALUES (%s, %s, %s)
         """
-        execute_query(insert_query, (
-            id, 
-            data.get('id_sacramento'), 
-            data.get('fecha_sacramento')
-        ))
+        with transaction():
+            antes = contribucion_rollup(id)
+            execute_query(insert_query, (
+                id, 
+                data.get('id_sacramento'), 
+                data.get('fecha_sacramento')
+            ))
+            actualizar_rollups(id, antes)
+        sacramento_index.refrescar(id)
+        demografia.refrescar(id)
         
         return jsonify({'success': True, 'message': 'Sacramento agregado exitosamente'}), 201
         
@@ -103,9 +109,14 @@ def actualizar_sacramento_habitante(id_habitante, id_sacramento):
 def eliminar_sacramento_habitante(id_habitante, id_sacramento):
     try:
         query = "DELETE FROM habitante_sacramento WHERE IdHabitante = %s AND IdSacramento = %s"
-        deleted = execute_query(query, (id_habitante, id_sacramento))
+        with transaction():
+            antes = contribucion_rollup(id_habitante)
+            deleted = execute_query(query, (id_habitante, id_sacramento))
+            actualizar_rollups(id_habitante, antes)
         
         if deleted:
+            sacramento_index.refrescar(id_habitante)
+            demografia.refrescar(id_habitante)
             return jsonify({'success': True, 'message': 'Sacramento eliminado exitosamente'}), 200
         return jsonify({'success': False, 'message': 'Sacramento no encontrado'}), 404
         
@@ -119,7 +130,7 @@ def eliminar_sacramento_habitante(id_habitante, id_sacramento):
 def obtener_catalogo_sacramentos():
     try:
         query = "SELECT IdSacramento, Descripcion, Costo FROM tiposacramentos ORDER BY IdSacramento"
-        sacramentos = execute_query(query)
+        sacramentos = execute_query(query, tags=['tiposacramentos'], ttl=300)
         return jsonify({'success': True, 'sacramentos': sacramentos}), 200
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
@@ -5,7 +5,7 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from database import execute_query
-from utils import require_rol
+from utils import require_rol, paginar, PaginationError
 from datetime import datetime
 
 tareas_bp = Blueprint('tareas', __name__)
@@ -133,10 +133,10 @@ def activar_tipo_tarea(id):
 def listar_asignaciones():
     """
     Lista todas las tareas asignadas (asignaciontarea), activas.
+    Paginación: ?page_size=&cursor=&total=1 (ver utils.paginar)
     """
     try:
-        query = """
-            SELECT 
+        columnas = """
                 at.IdAsignacionTarea,
                 at.IdGrupoVoluntario,
                 at.IdTipoTarea,
@@ -144,17 +144,28 @@ def listar_asignaciones():
                 tt.Descripcion AS TipoTarea,
                 at.FechaAsignacion,
                 at.EstadoTarea,
-                at.Activo
+                at.Activo,
+                COALESCE(at.FechaAsignacion, '0001-01-01') AS _FechaOrden
+        """
+        desde = """
             FROM asignaciontarea at
             LEFT JOIN grupoayudantes g 
                 ON at.IdGrupoVoluntario = g.IdGrupoAyudantes
             JOIN tipotarea tt 
                 ON at.IdTipoTarea = tt.IdTipoTarea
-            WHERE at.Activo = 1
-            ORDER BY at.FechaAsignacion DESC, at.IdAsignacionTarea DESC;
         """
-        asignaciones = execute_query(query, fetch_all=True)
-        return jsonify({"success": True, "data": {"asignaciones": asignaciones}}), 200
+        # FechaAsignacion admite NULL: el cursor usa su versión sin NULL
+        asignaciones, paginacion = paginar(
+            columnas, desde, ["at.Activo = 1"], [],
+            orden=[
+                ("COALESCE(at.FechaAsignacion, '0001-01-01')", "_FechaOrden", "DESC"),
+                ("at.IdAsignacionTarea", "IdAsignacionTarea", "DESC"),
+            ],
+            tags=["asignaciontarea"]
+        )
+        return jsonify({"success": True, "data": {"asignaciones": asignaciones, "paginacion": paginacion}}), 200
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from utils import require_rol
+from utils import require_rol, paginar, PaginationError, resolver_permisos, HashingBusyError, RETRY_AFTER_SEGUNDOS
 from utils.Security import Security
 from database import execute_query
 from datetime import datetime
@@ -16,8 +16,7 @@ usuarios_bp = Blueprint('usuarios', __name__)
 @jwt_required()
 def listar_usuarios():
     try:
-        query = """
-            SELECT 
+        columnas = """
                 u.IdUsuario,
                 u.IdTipoUsuario,
                 tu.Perfil AS Rol,
@@ -28,15 +27,21 @@ def listar_usuarios():
                 h.Apellido,
                 h.NumeroDocumento,
                 td.Descripcion AS TipoDocumento
+        """
+        desde = """
             FROM usuario u
             LEFT JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
             LEFT JOIN habitantes h ON u.IdHabitante = h.IdHabitante
             LEFT JOIN tipodocumento td ON h.IdTipoDocumento = td.IdTipoDocumento
-            ORDER BY u.IdUsuario DESC
-            LIMIT 500;
         """
-        data = execute_query(query, fetch_all=True)
-        return jsonify({"success": True, "data": {"usuarios": data}}), 200
+        data, paginacion = paginar(
+            columnas, desde, [], [],
+            orden=[("u.IdUsuario", "IdUsuario", "DESC")],
+            tags=["usuario"]
+        )
+        return jsonify({"success": True, "data": {"usuarios": data, "paginacion": paginacion}}), 200
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -243,6 +248,8 @@ def crear_usuario():
             "message": f"Usuario creado exitosamente para {tipo_documento} {numero_documento}"
         }), 201
 
+    except HashingBusyError as e:
+        return jsonify({"success": False, "message": str(e)}), 503, {"Retry-After": str(RETRY_AFTER_SEGUNDOS)}
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -267,6 +274,10 @@ def actualizar_rol_usuario(id):
         if result == 0:
             return jsonify({"success": False, "message": "Usuario no encontrado o inactivo"}), 404
 
+        # Sus permisos por tipo de usuario cambian con el rol: los tokens
+        # emitidos antes dejan de bastar para decidir permisos
+        resolver_permisos.publicar_cambio()
+
         return jsonify({"success": True, "message": "Rol actualizado exitosamente"}), 200
 
     except Exception as e:
@@ -299,6 +310,8 @@ def cambiar_contraseña(id):
 
         return jsonify({"success": True, "message": "Contraseña actualizada correctamente"}), 200
 
+    except HashingBusyError as e:
+        return jsonify({"success": False, "message": str(e)}), 503, {"Retry-After": str(RETRY_AFTER_SEGUNDOS)}
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -4,14 +4,30 @@ Maneja JWT tokens y validación de roles
 """
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
 from models import UserModel
-from utils import Security
+from utils import Security, resolver_permisos, HashingBusyError
 from database import execute_query
+from .SearchServices import habitante_index
+from .BitmapServices import sacramento_index
+from .DemografiaServices import demografia
+from .RollupServices import actualizar_rollups
 import logging
-from werkzeug.security import check_password_hash
 
 class AuthService:
     """Servicio para manejo de autenticación"""
     
+    @staticmethod
+    def permission_claims(user_id):
+        """
+        Claims de permisos (``perms`` y ``perm_version``) para un token de acceso.
+        Si no se pueden calcular, el token sale sin ellos y los permisos se
+        resuelven con la base de datos.
+        """
+        try:
+            return resolver_permisos.claims_token(user_id)
+        except Exception as e:
+            logging.error(f"Error calculando permisos para el token: {str(e)}")
+            return {}
+
     @staticmethod
     def _create_login_response(user):
         """
@@ -29,7 +45,8 @@ class AuthService:
                     'nombre': user['Nombre'],
                     'apellido': user['Apellido'],
                     'documento': user['NumeroDocumento'],
-                    'tipo_documento': user['IdTipoDocumento']  # 👈 QUITA el .get()
+                    'tipo_documento': user['IdTipoDocumento'],  # 👈 QUITA el .get()
+                    **AuthService.permission_claims(user_id)
                 }
             )
             
@@ -117,9 +134,19 @@ class AuthService:
             
             if result['success']:
                 logging.info(f"Usuario registrado exitosamente: {user_data.get('nombre')} {user_data.get('apellido')}")
+                habitante_index.refrescar(result['habitante_id'])
+                sacramento_index.refrescar(result['habitante_id'])
+                demografia.refrescar(result['habitante_id'])
+                actualizar_rollups(result['habitante_id'])
             
             return result
             
+        except HashingBusyError as e:
+            return {
+                'success': False,
+                'busy': True,
+                'message': str(e)
+            }
         except Exception as e:
             logging.error(f"Error en registro: {str(e)}")
             return {
@@ -128,44 +155,6 @@ class AuthService:
             }
 
     @staticmethod
-    def get_user_by_document(document_type, document_number):
-        """
-        Obtiene el usuario según su documento y tipo de documento.
-        Incluye campos de seguridad para bloqueo.
-        """
-        try:
-            query = """
-                SELECT 
-                    u.IdUsuario AS id,
-                    u.login_attempts AS login_attempts,
-                    u.locked_until AS locked_until,
-                    u.Contraseña AS password_hash,
-                    u.IdHabitante AS id_habitante,
-                    u.Activo as ActivoUsuario,
-                    h.Nombre AS nombre,
-                    h.Apellido AS apellido,
-                    h.NumeroDocumento AS numero_documento,
-                    h.IdTipoDocumento AS tipo_documento,
-                    h.Activo as ActivoHabitante
-                FROM usuario u
-                JOIN habitantes h ON u.IdHabitante = h.IdHabitante
-                WHERE h.NumeroDocumento = %s AND h.IdTipoDocumento = %s
-                LIMIT 1
-            """
-            result = execute_query(query, (document_number, document_type), fetch_one=True)
-
-            # Debug: Ver qué datos se están recuperando
-            if result:
-                logging.info(f"Usuario encontrado: ID={result['id']}, Intentos={result.get('login_attempts', 0)}, Bloqueado hasta={result.get('locked_until')}")
-            else:
-                logging.warning(f"Usuario NO encontrado: {document_type}-{document_number}")
-
-            return result
-
-        except Exception as e:
-            logging.error(f"get_user_by_document error: {e}")
-            return None
-    @staticmethod
     def update_login_security_state(user_id, login_attempts, locked_until):
         try:
             query = """
@@ -180,11 +169,47 @@ class AuthService:
             logging.error(f"update_login_security_state error: {e}")
             return False
 
+    @staticmethod
+    def register_failed_login(user_id):
+        """
+        Suma un intento fallido y, al llegar a ``MAX_LOGIN_ATTEMPTS``, bloquea
+        con duración progresiva, todo en un UPDATE atómico: dos intentos
+        simultáneos no pueden leer el mismo contador y perder uno. Si el
+        bloqueo anterior ya venció, el conteo vuelve a empezar.
+
+        MySQL evalúa las asignaciones de izquierda a derecha, así que
+        ``locked_until`` ve el ``login_attempts`` ya incrementado.
+        """
+        from config import Config
+
+        query = """
+            UPDATE usuario
+            SET login_attempts = CASE
+                    WHEN locked_until IS NOT NULL AND locked_until <= NOW() THEN 1
+                    ELSE login_attempts + 1
+                END,
+                locked_until = CASE
+                    WHEN login_attempts >= %s THEN NOW() + INTERVAL
+                        LEAST(%s, FLOOR(%s * POW(%s, login_attempts - %s))) MINUTE
+                    ELSE NULL
+                END
+            WHERE IdUsuario = %s
+        """
+        execute_query(query, (
+            Config.MAX_LOGIN_ATTEMPTS, Config.MAX_LOCK_DURATION_MINUTES,
+            Config.BASE_LOCK_DURATION_MINUTES, Config.LOCK_MULTIPLIER,
+            Config.MAX_LOGIN_ATTEMPTS, user_id
+        ))
+
     @staticmethod
     def login_by_document(document_type, document_number, password):
         """
         Autentica un usuario por tipo y número de documento.
         Retorna tokens JWT si las credenciales son válidas.
+
+        Lee usuario y estado de seguridad en una consulta, verifica la
+        contraseña una vez y solo escribe en ``usuario`` cuando el estado
+        cambia: un login exitoso sin intentos previos no escribe nada.
         """
         try:
             # 🧩 Validar campos obligatorios
@@ -197,8 +222,8 @@ class AuthService:
             # Limpiar número de documento
             document_number = str(document_number).strip()
 
-            # 🔍 PRIMERO: Buscar usuario y verificar estado de bloqueo
-            user = AuthService.get_user_by_document(document_type, document_number)
+            # 🔍 Usuario y estado de bloqueo en una sola consulta
+            user = UserModel.get_login_user(document_type, document_number)
 
             if not user:
                 logging.warning(f"Usuario no encontrado → {document_type}-{document_number}")
@@ -209,9 +234,8 @@ class AuthService:
 
             # 🔒 VERIFICAR BLOQUEO ACTUAL
             locked_until = user.get('locked_until')
-            if locked_until:
+            if locked_until and not user.get('lock_expired'):
                 from datetime import datetime
-                now = datetime.now()
 
                 # Convertir string a datetime si es necesario
                 if isinstance(locked_until, str):
@@ -220,32 +244,27 @@ class AuthService:
                     except ValueError:
                         locked_until = datetime.strptime(locked_until, '%Y-%m-%d %H:%M:%S.%f')
 
-                if locked_until > now:
-                    remaining_minutes = int((locked_until - now).total_seconds() / 60)
-                    remaining_seconds = int((locked_until - now).total_seconds() % 60)
+                remaining = max((locked_until - datetime.now()).total_seconds(), 0)
+                remaining_minutes = int(remaining / 60)
+                remaining_seconds = int(remaining % 60)
 
-                    logging.warning(f"Usuario bloqueado → {document_type}-{document_number}. Tiempo restante: {remaining_minutes}m {remaining_seconds}s")
-                    return {
-                        'success': False,
-                        'locked': True,
-                        'message': f'Usuario bloqueado. Intente nuevamente en {remaining_minutes} minutos',
-                        'locked_until': locked_until.strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                else:
-                    # ⏰ Desbloquear usuario si el tiempo expiró
-                    logging.info(f"Desbloqueando usuario → {document_type}-{document_number}")
-                    AuthService.update_login_security_state(user['id'], 0, None)
-
-            # 🔐 INTENTAR AUTENTICACIÓN
-            authenticated_user = UserModel.authenticate_user_by_document(document_type, document_number, password)
+                logging.warning(f"Usuario bloqueado → {document_type}-{document_number}. Tiempo restante: {remaining_minutes}m {remaining_seconds}s")
+                return {
+                    'success': False,
+                    'locked': True,
+                    'message': f'Usuario bloqueado. Intente nuevamente en {remaining_minutes} minutos',
+                    'locked_until': locked_until.strftime('%Y-%m-%d %H:%M:%S')
+                }
 
-            if authenticated_user:
-                # ✅ LOGIN EXITOSO - Resetear intentos fallidos
-                AuthService.update_login_security_state(authenticated_user['IdUsuario'], 0, None)
+            # 🔐 INTENTAR AUTENTICACIÓN (una sola verificación del hash)
+            if Security.check_password_hash(user['Contraseña'], password):
+                # ✅ LOGIN EXITOSO - Resetear intentos solo si hay algo que resetear
+                if user.get('login_attempts') or locked_until:
+                    AuthService.update_login_security_state(user['IdUsuario'], 0, None)
 
                 # 🧱 Validar estado activo
-                activo_usuario = authenticated_user.get('ActivoUsuario', 1)
-                activo_habitante = authenticated_user.get('ActivoHabitante', 1)
+                activo_usuario = user.get('ActivoUsuario', 1)
+                activo_habitante = user.get('ActivoHabitante', 1)
 
                 if activo_usuario == 0 or activo_habitante == 0:
                     return {
@@ -253,47 +272,49 @@ class AuthService:
                         'message': 'Usuario inactivo. Contacte al administrador del sistema.'
                     }
 
-                logging.info(f"Login exitoso → {authenticated_user['Nombre']} {authenticated_user['Apellido']}")
-                return AuthService._create_login_response(authenticated_user)
+                logging.info(f"Login exitoso → {user['Nombre']} {user['Apellido']}")
+                return AuthService._create_login_response(user)
 
-            else:
-                # ❌ LOGIN FALLIDO - Incrementar intentos
-                current_attempts = user.get('login_attempts', 0) + 1
-                logging.warning(f"Intento fallido #{current_attempts} → {document_type}-{document_number}")
+            # ❌ LOGIN FALLIDO - Incrementar intentos en la base de datos
+            AuthService.register_failed_login(user['IdUsuario'])
 
-                # 🚨 VERIFICAR SI SUPERÓ EL LÍMITE
-                from config import Config
-                from datetime import datetime, timedelta
+            # El mensaje se calcula con el estado leído; el contador real lo lleva el UPDATE
+            from config import Config
+            from datetime import datetime, timedelta
 
-                locked_until = None
-                if current_attempts >= Config.MAX_LOGIN_ATTEMPTS:
-                    # Calcular bloqueo progresivo
-                    lock_count = current_attempts - Config.MAX_LOGIN_ATTEMPTS
-                    lock_duration_minutes = AuthService.calculate_lock_duration(lock_count)
-                    locked_until = datetime.now() + timedelta(minutes=lock_duration_minutes)
+            previous_attempts = 0 if user.get('lock_expired') else (user.get('login_attempts') or 0)
+            current_attempts = previous_attempts + 1
+            logging.warning(f"Intento fallido #{current_attempts} → {document_type}-{document_number}")
 
-                    logging.warning(f"Bloqueando usuario → {document_type}-{document_number} por {lock_duration_minutes} minutos")
+            if current_attempts >= Config.MAX_LOGIN_ATTEMPTS:
+                lock_count = current_attempts - Config.MAX_LOGIN_ATTEMPTS
+                lock_duration_minutes = AuthService.calculate_lock_duration(lock_count)
+                locked_until = datetime.now() + timedelta(minutes=lock_duration_minutes)
 
-                # 📝 ACTUALIZAR ESTADO DE SEGURIDAD
-                AuthService.update_login_security_state(user['id'], current_attempts, locked_until)
+                logging.warning(f"Bloqueando usuario → {document_type}-{document_number} por {lock_duration_minutes} minutos")
+                return {
+                    'success': False,
+                    'locked': True,
+                    'message': f'Demasiados intentos fallidos. Usuario bloqueado por {lock_duration_minutes} minutos',
+                    'locked_until': locked_until.strftime('%Y-%m-%d %H:%M:%S'),
+                    'attempts': current_attempts
+                }
 
-                if locked_until:
-                    return {
-                        'success': False,
-                        'locked': True,
-                        'message': f'Demasiados intentos fallidos. Usuario bloqueado por {lock_duration_minutes} minutos',
-                        'locked_until': locked_until.strftime('%Y-%m-%d %H:%M:%S'),
-                        'attempts': current_attempts
-                    }
-                else:
-                    attempts_remaining = Config.MAX_LOGIN_ATTEMPTS - current_attempts
-                    return {
-                        'success': False,
-                        'message': f'Credenciales incorrectas. Le quedan {attempts_remaining} intento(s)',
-                        'attempts': current_attempts,
-                        'attempts_remaining': attempts_remaining
-                    }
+            attempts_remaining = Config.MAX_LOGIN_ATTEMPTS - current_attempts
+            return {
+                'success': False,
+                'message': f'Credenciales incorrectas. Le quedan {attempts_remaining} intento(s)',
+                'attempts': current_attempts,
+                'attempts_remaining': attempts_remaining
+            }
 
+        except HashingBusyError as e:
+            logging.warning(f"Login rechazado, pool de hash lleno → {document_type}-{document_number}")
+            return {
+                'success': False,
+                'busy': True,
+                'message': str(e)
+            }
         except Exception as e:
             logging.error(f"Error en login por documento: {str(e)}", exc_info=True)
             return {
@@ -0,0 +1,283 @@
+"""
+Autocompletado de grupos familiares, jefes de familia y padres
+Cada tipo tiene un trie comprimido (radix) en memoria con los nombres
+normalizados; cada palabra del nombre es también un punto de entrada, de modo
+que "per" encuentra "Familia Pérez". Cada nodo guarda en caché los
+``AUTOCOMPLETE_MAX_K`` mejores resultados de su subárbol, así que una consulta
+solo recorre el prefijo.
+"""
+from flask import current_app
+
+from database import execute_query
+from .SearchServices import BackgroundIndex, normalizar
+
+TIPOS = ('grupo', 'jefe', 'padre')
+
+_SQL_GRUPOS = """
+    SELECT
+        gf.IdGrupoFamiliar,
+        gf.NombreGrupo,
+        gf.Descripcion,
+        gf.Activo,
+        gf.IdJefeFamilia,
+        CONCAT(COALESCE(h.Nombre,''), ' ', COALESCE(h.Apellido,'')) AS JefeFamilia,
+        (SELECT COUNT(*) FROM habitantes m
+          WHERE m.IdGrupoFamiliar = gf.IdGrupoFamiliar AND m.Activo = 1) AS Miembros
+    FROM grupofamiliar gf
+    LEFT JOIN habitantes h ON h.IdHabitante = gf.IdJefeFamilia
+"""
+
+_SQL_PADRES = """
+    SELECT
+        p.IdPadre,
+        p.Nombre,
+        p.Apellido,
+        p.Activo,
+        (SELECT COUNT(*) FROM asignacioncita ac WHERE ac.IdPadre = p.IdPadre) AS Citas
+    FROM padre p
+"""
+
+
+class _Nodo:
+    __slots__ = ('hijos', 'claves', 'top')
+
+    def __init__(self):
+        self.hijos = {}      # primer carácter -> (etiqueta, _Nodo)
+        self.claves = set()  # entradas cuyo texto termina aquí
+        self.top = None      # caché de las mejores claves del subárbol
+
+
+class PrefixTrie:
+    """
+    Trie comprimido: cada arista lleva una cadena y no solo un carácter
+
+    Args:
+        orden (callable): clave -> tupla de ordenamiento (menor = mejor)
+        k (int): Tamaño de la caché de mejores resultados por nodo
+    """
+
+    def __init__(self, orden, k):
+        self.raiz = _Nodo()
+        self.orden = orden
+        self.k = k
+
+    def insertar(self, texto, clave):
+        nodo = self.raiz
+        nodo.top = None
+        while texto:
+            arista = nodo.hijos.get(texto[0])
+            if arista is None:
+                hoja = _Nodo()
+                nodo.hijos[texto[0]] = (texto, hoja)
+                nodo = hoja
+                break
+            etiqueta, hijo = arista
+            comun = 0
+            while comun < min(len(etiqueta), len(texto)) and etiqueta[comun] == texto[comun]:
+                comun += 1
+            if comun < len(etiqueta):
+                # Se parte la arista: nodo -> intermedio -> hijo
+                intermedio = _Nodo()
+                intermedio.hijos[etiqueta[comun]] = (etiqueta[comun:], hijo)
+                nodo.hijos[texto[0]] = (etiqueta[:comun], intermedio)
+                hijo = intermedio
+            nodo = hijo
+            nodo.top = None
+            texto = texto[comun:]
+        nodo.top = None
+        nodo.claves.add(clave)
+
+    def quitar(self, texto, clave):
+        self._quitar(self.raiz, texto, clave)
+
+    def _quitar(self, nodo, texto, clave):
+        """Retorna True si ``nodo`` quedó vacío y puede eliminarse"""
+        nodo.top = None
+        if not texto:
+            nodo.claves.discard(clave)
+        else:
+            arista = nodo.hijos.get(texto[0])
+            if arista is None or not texto.startswith(arista[0]):
+                return False
+            etiqueta, hijo = arista
+            if self._quitar(hijo, texto[len(etiqueta):], clave):
+                del nodo.hijos[texto[0]]
+            elif not hijo.claves and len(hijo.hijos) == 1:
+                # Un nodo sin claves y con un solo hijo se une con él
+                sub_etiqueta, nieto = next(iter(hijo.hijos.values()))
+                nodo.hijos[texto[0]] = (etiqueta + sub_etiqueta, nieto)
+        return nodo is not self.raiz and not nodo.claves and not nodo.hijos
+
+    def _mejores(self, nodo):
+        if nodo.top is None:
+            candidatas = set(nodo.claves)
+            for _, hijo in nodo.hijos.values():
+                candidatas.update(self._mejores(hijo))
+            nodo.top = sorted(candidatas, key=self.orden)[:self.k]
+        return nodo.top
+
+    def buscar(self, prefijo):
+        """Retorna las mejores claves cuyo texto empieza por ``prefijo``"""
+        nodo = self.raiz
+        while prefijo:
+            arista = nodo.hijos.get(prefijo[0])
+            if arista is None:
+                return []
+            etiqueta, hijo = arista
+            if prefijo.startswith(etiqueta):
+                prefijo = prefijo[len(etiqueta):]
+            elif etiqueta.startswith(prefijo):
+                prefijo = ''
+            else:
+                return []
+            nodo = hijo
+        return self._mejores(nodo)
+
+
+def _textos_de(entrada):
+    """Textos indexados de una entrada: el nombre completo y desde cada palabra"""
+    textos = set()
+    for nombre in entrada['nombres']:
+        palabras = normalizar(nombre).split()
+        textos.update(' '.join(palabras[i:]) for i in range(len(palabras)))
+    return textos
+
+
+def _entrada(texto, nombres, peso, datos):
+    return {'texto': texto, 'orden': normalizar(texto), 'nombres': nombres, 'peso': peso, 'datos': datos}
+
+
+def _entradas_grupo(fila):
+    """Entrada del grupo y, si tiene jefe, la del jefe (ambas pesan por miembros)"""
+    datos = {
+        'IdGrupoFamiliar': fila['IdGrupoFamiliar'],
+        'NombreGrupo': fila['NombreGrupo'],
+        'Descripcion': fila['Descripcion'],
+        'JefeFamilia': fila['JefeFamilia'],
+        'IdJefeFamilia': fila['IdJefeFamilia'],
+        'Miembros': fila['Miembros'],
+    }
+    entradas = {('grupo', fila['IdGrupoFamiliar']): _entrada(
+        fila['NombreGrupo'], [fila['NombreGrupo'], fila['Descripcion']], fila['Miembros'], datos
+    )}
+    if fila['IdJefeFamilia'] and fila['JefeFamilia'].strip():
+        entradas[('jefe', fila['IdGrupoFamiliar'])] = _entrada(
+            fila['JefeFamilia'].strip(), [fila['JefeFamilia']], fila['Miembros'], datos
+        )
+    return entradas
+
+
+def _entradas_padre(fila):
+    nombre = f"{fila['Nombre'] or ''} {fila['Apellido'] or ''}".strip()
+    datos = {'IdPadre': fila['IdPadre'], 'Nombre': fila['Nombre'], 'Apellido': fila['Apellido']}
+    return {('padre', fila['IdPadre']): _entrada(nombre, [nombre], fila['Citas'], datos)}
+
+
+class AutocompleteIndex(BackgroundIndex):
+    """Tries de autocompletado por tipo, con sus entradas"""
+
+    nombre = 'autocompletado'
+    config_refresco = 'AUTOCOMPLETE_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self._vaciar()
+
+    def _orden(self, clave):
+        # Se evalúa al consultar, siempre sobre las entradas instaladas
+        entrada = self._entradas[clave]
+        return (-(entrada['peso'] or 0), entrada['orden'], clave)
+
+    def _cargar(self):
+        entradas = {}
+        for fila in execute_query(_SQL_GRUPOS + " WHERE gf.Activo = 1") or []:
+            entradas.update(_entradas_grupo(fila))
+        for fila in execute_query(_SQL_PADRES + " WHERE p.Activo = 1") or []:
+            entradas.update(_entradas_padre(fila))
+
+        k = current_app.config.get('AUTOCOMPLETE_MAX_K', 20)
+        tries = {tipo: PrefixTrie(self._orden, k) for tipo in TIPOS}
+        for clave, entrada in entradas.items():
+            for texto in _textos_de(entrada):
+                tries[clave[0]].insertar(texto, clave)
+        return entradas, tries
+
+    def _instalar(self, datos):
+        self._entradas, self._tries = datos
+
+    def _vaciar(self):
+        self._entradas = {}
+        self._tries = {tipo: PrefixTrie(self._orden, 0) for tipo in TIPOS}
+
+    def _aplicar(self, clave, entrada):
+        anterior = self._entradas.pop(clave, None)
+        if anterior:
+            for texto in _textos_de(anterior):
+                self._tries[clave[0]].quitar(texto, clave)
+        if entrada:
+            self._entradas[clave] = entrada
+            for texto in _textos_de(entrada):
+                self._tries[clave[0]].insertar(texto, clave)
+
+    def refrescar_grupo(self, id_grupo):
+        """
+        Vuelve a leer un grupo familiar (nombre, jefe, miembros, activo).
+        Llamar después de confirmar la escritura.
+        """
+        if not self._en_uso():
+            return
+        fila = execute_query(_SQL_GRUPOS + " WHERE gf.IdGrupoFamiliar = %s", (id_grupo,), fetch_one=True)
+        entradas = _entradas_grupo(fila) if fila and fila['Activo'] else {}
+        for tipo in ('grupo', 'jefe'):
+            self._registrar_cambio((tipo, id_grupo), entradas.get((tipo, id_grupo)))
+
+    def sugerir(self, q, tipos=TIPOS, k=10):
+        """
+        Retorna las ``k`` entradas de mayor peso cuyo nombre (o alguna de sus
+        palabras) empieza por ``q``.
+
+        Args:
+            q (str): Prefijo escrito por el usuario
+            tipos (tuple): Subconjunto de ``TIPOS``
+            k (int): Máximo de resultados (hasta ``AUTOCOMPLETE_MAX_K``)
+
+        Returns:
+            list[dict] | None: ``{tipo, id, texto, peso, ...datos}``, o None
+            si el índice aún se está construyendo (usar SQL)
+        """
+        if not current_app.config.get('AUTOCOMPLETE_ENABLED', True):
+            return None
+        self._asegurar_carga()
+
+        prefijo = normalizar(q)
+        with self._lock:
+            if not self._listo:
+                return None
+            if not prefijo:
+                return []
+            claves = []
+            for tipo in tipos:
+                claves.extend(self._tries[tipo].buscar(prefijo))
+            if len(tipos) > 1:
+                claves.sort(key=self._orden)
+            resultados = []
+            for clave in claves[:k]:
+                entrada = self._entradas[clave]
+                resultados.append({
+                    'tipo': clave[0],
+                    'id': clave[1],
+                    'texto': entrada['texto'],
+                    'peso': entrada['peso'],
+                    **entrada['datos'],
+                })
+            return resultados
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._estado(),
+                'entradas': len(self._entradas),
+            }
+
+
+autocomplete_index = AutocompleteIndex()
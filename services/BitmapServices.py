@@ -0,0 +1,254 @@
+"""
+Índice de bitmaps de habitantes por sacramento, sector y sexo
+Cada conjunto (activos, cada sacramento, cada sector, cada sexo) es un
+bitmap de IdHabitante al estilo roaring: los IDs se reparten en bloques de
+65536 según sus 16 bits altos y cada bloque es un entero de Python usado
+como arreglo de bits. Intersecciones, uniones, diferencias y conteos son
+operaciones de bits sobre esos enteros, en lugar de subconsultas
+``EXISTS``/``NOT EXISTS`` sobre ``habitante_sacramento``.
+"""
+from flask import current_app
+
+from database import execute_query
+from .SearchServices import BackgroundIndex
+
+_BITS_BLOQUE = 16
+_MASCARA = (1 << _BITS_BLOQUE) - 1
+
+if hasattr(int, 'bit_count'):
+    _contar_bits = int.bit_count
+else:
+    def _contar_bits(valor):
+        return bin(valor).count('1')
+
+
+class Bitmap:
+    """Conjunto de enteros no negativos: ``{bloque: bits}`` sin bloques vacíos"""
+
+    __slots__ = ('_bloques',)
+
+    def __init__(self, bloques=None):
+        self._bloques = bloques or {}
+
+    @classmethod
+    def desde(cls, ids):
+        """Construye el bitmap de una vez (más rápido que ``agregar`` por ID)"""
+        buffers = {}
+        for i in ids:
+            buffer = buffers.get(i >> _BITS_BLOQUE)
+            if buffer is None:
+                buffer = buffers[i >> _BITS_BLOQUE] = bytearray((_MASCARA + 1) // 8)
+            bajo = i & _MASCARA
+            buffer[bajo >> 3] |= 1 << (bajo & 7)
+        return cls({
+            bloque: bits for bloque, buffer in buffers.items()
+            if (bits := int.from_bytes(buffer, 'little'))
+        })
+
+    def agregar(self, i):
+        bloque = i >> _BITS_BLOQUE
+        self._bloques[bloque] = self._bloques.get(bloque, 0) | (1 << (i & _MASCARA))
+
+    def quitar(self, i):
+        bloque = i >> _BITS_BLOQUE
+        if bloque in self._bloques:
+            bits = self._bloques[bloque] & ~(1 << (i & _MASCARA))
+            if bits:
+                self._bloques[bloque] = bits
+            else:
+                del self._bloques[bloque]
+
+    def __contains__(self, i):
+        return bool((self._bloques.get(i >> _BITS_BLOQUE, 0) >> (i & _MASCARA)) & 1)
+
+    def __and__(self, otro):
+        if len(self._bloques) > len(otro._bloques):
+            self, otro = otro, self
+        return Bitmap({
+            bloque: bits for bloque, a in self._bloques.items()
+            if (bits := a & otro._bloques.get(bloque, 0))
+        })
+
+    def __or__(self, otro):
+        bloques = dict(self._bloques)
+        for bloque, bits in otro._bloques.items():
+            bloques[bloque] = bloques.get(bloque, 0) | bits
+        return Bitmap(bloques)
+
+    def __sub__(self, otro):
+        return Bitmap({
+            bloque: bits for bloque, a in self._bloques.items()
+            if (bits := a & ~otro._bloques.get(bloque, 0))
+        })
+
+    def __len__(self):
+        return sum(_contar_bits(bits) for bits in self._bloques.values())
+
+    def __iter__(self):
+        """IDs en orden ascendente"""
+        for bloque in sorted(self._bloques):
+            bits, base = self._bloques[bloque], bloque << _BITS_BLOQUE
+            while bits:
+                menor = bits & -bits
+                yield base + menor.bit_length() - 1
+                bits ^= menor
+
+
+_VACIO = Bitmap()
+
+
+class SacramentoBitmapIndex(BackgroundIndex):
+    """Bitmaps de habitantes activos, por sacramento, por sector y por sexo"""
+
+    nombre = 'sacramentos'
+    config_refresco = 'SACRAMENTO_INDEX_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self._vaciar()
+
+    # ---------- mantenimiento ----------
+
+    def _cargar(self):
+        habitantes = execute_query("SELECT IdHabitante, IdSector, IdSexo, Activo FROM habitantes") or []
+        sacramentos = execute_query("SELECT IdHabitante, IdSacramento FROM habitante_sacramento") or []
+
+        por_habitante = {}
+        for fila in sacramentos:
+            por_habitante.setdefault(fila['IdHabitante'], set()).add(fila['IdSacramento'])
+
+        estados, ids = {}, {'activo': [], 'sacramento': {}, 'sector': {}, 'sexo': {}}
+        for fila in habitantes:
+            id_habitante = fila['IdHabitante']
+            estado = (bool(fila['Activo']), fila['IdSector'], fila['IdSexo'],
+                      frozenset(por_habitante.get(id_habitante, ())))
+            estados[id_habitante] = estado
+            if estado[0]:
+                ids['activo'].append(id_habitante)
+            ids['sector'].setdefault(estado[1], []).append(id_habitante)
+            ids['sexo'].setdefault(estado[2], []).append(id_habitante)
+            for id_sacramento in estado[3]:
+                ids['sacramento'].setdefault(id_sacramento, []).append(id_habitante)
+
+        bitmaps = {
+            'activo': Bitmap.desde(ids['activo']),
+            **{tipo: {clave: Bitmap.desde(lista) for clave, lista in ids[tipo].items()}
+               for tipo in ('sacramento', 'sector', 'sexo')}
+        }
+        return estados, bitmaps
+
+    def _instalar(self, datos):
+        self._estados, self._bitmaps = datos
+
+    def _vaciar(self):
+        self._estados = {}
+        self._bitmaps = {'activo': Bitmap(), 'sacramento': {}, 'sector': {}, 'sexo': {}}
+
+    def _bitmaps_de(self, estado):
+        """Bitmaps por clave (sector, sexo, sacramentos) en los que está un habitante"""
+        activo, id_sector, id_sexo, sacramentos = estado
+        yield self._bitmaps['sector'], id_sector
+        yield self._bitmaps['sexo'], id_sexo
+        for id_sacramento in sacramentos:
+            yield self._bitmaps['sacramento'], id_sacramento
+
+    def _aplicar(self, id_habitante, estado):
+        anterior = self._estados.pop(id_habitante, None)
+        if anterior:
+            self._bitmaps['activo'].quitar(id_habitante)
+            for grupo, clave in self._bitmaps_de(anterior):
+                grupo[clave].quitar(id_habitante)
+        if estado:
+            self._estados[id_habitante] = estado
+            if estado[0]:
+                self._bitmaps['activo'].agregar(id_habitante)
+            for grupo, clave in self._bitmaps_de(estado):
+                grupo.setdefault(clave, Bitmap()).agregar(id_habitante)
+
+    def refrescar(self, id_habitante):
+        """
+        Vuelve a leer el sector, sexo, estado y sacramentos de un habitante.
+        Llamar después de confirmar la escritura.
+        """
+        if not self._en_uso():
+            return
+        fila = execute_query(
+            "SELECT IdSector, IdSexo, Activo FROM habitantes WHERE IdHabitante = %s",
+            (id_habitante,), fetch_one=True
+        )
+        estado = None
+        if fila:
+            sacramentos = execute_query(
+                "SELECT IdSacramento FROM habitante_sacramento WHERE IdHabitante = %s", (id_habitante,)
+            ) or []
+            estado = (bool(fila['Activo']), fila['IdSector'], fila['IdSexo'],
+                      frozenset(s['IdSacramento'] for s in sacramentos))
+        self._registrar_cambio(id_habitante, estado)
+
+    # ---------- consulta ----------
+
+    def disponible(self):
+        """
+        True si el índice está construido en este worker. La primera vez
+        espera la carga hasta ``SACRAMENTO_INDEX_WAIT_SECONDS``.
+        """
+        if not current_app.config.get('SACRAMENTO_INDEX_ENABLED', True):
+            return False
+        return self._esperar(current_app.config.get('SACRAMENTO_INDEX_WAIT_SECONDS', 5))
+
+    def _filtrar(self, con=(), sin=(), sector=None, sexo=None):
+        """Habitantes activos con todos los sacramentos ``con`` y ninguno de ``sin``"""
+        resultado = self._bitmaps['activo']
+        if sector is not None:
+            resultado = resultado & self._bitmaps['sector'].get(sector, _VACIO)
+        if sexo is not None:
+            resultado = resultado & self._bitmaps['sexo'].get(sexo, _VACIO)
+        for id_sacramento in con:
+            resultado = resultado & self._bitmaps['sacramento'].get(id_sacramento, _VACIO)
+        for id_sacramento in sin:
+            resultado = resultado - self._bitmaps['sacramento'].get(id_sacramento, _VACIO)
+        return resultado
+
+    def contar(self, con=(), sin=(), sector=None, sexo=None):
+        """
+        Cuenta habitantes activos que cumplen los filtros
+
+        Args:
+            con (iterable): IDs de sacramentos que deben tener todos
+            sin (iterable): IDs de sacramentos que no deben tener
+            sector (int): Solo este sector
+            sexo (int): Solo este sexo
+        """
+        with self._lock:
+            return len(self._filtrar(con, sin, sector, sexo))
+
+    def contar_por_sector(self, con=(), sin=(), sexo=None):
+        """``{IdSector: habitantes activos que cumplen los filtros}``"""
+        with self._lock:
+            base = self._filtrar(con, sin, None, sexo)
+            return {sector: len(base & bitmap) for sector, bitmap in self._bitmaps['sector'].items()}
+
+    def contar_por_sacramento(self, ids_sacramento, sector=None, sexo=None, faltantes=False):
+        """
+        ``{IdSacramento: habitantes activos que lo tienen}`` (o que no lo
+        tienen, con ``faltantes=True``)
+        """
+        with self._lock:
+            base = self._filtrar((), (), sector, sexo)
+            conteos = {}
+            for id_sacramento in ids_sacramento:
+                con = base & self._bitmaps['sacramento'].get(id_sacramento, _VACIO)
+                conteos[id_sacramento] = len(base) - len(con) if faltantes else len(con)
+            return conteos
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._estado(),
+                'habitantes': len(self._estados),
+                'activos': len(self._bitmaps['activo']),
+                'sacramentos': len(self._bitmaps['sacramento']),
+            }
+
+
+sacramento_index = SacramentoBitmapIndex()
@@ -0,0 +1,402 @@
+"""
+Motor columnar de demografía de habitantes (NumPy)
+Guarda en memoria (uno por worker) las columnas de ``habitantes`` que usan
+los endpoints demográficos, un arreglo de NumPy por columna, y resuelve
+filtros y conteos agrupados con máscaras vectorizadas en lugar de recorrer
+la tabla con ``TIMESTAMPDIFF`` en cada petición. La edad se calcula exacta
+(años cumplidos a la fecha, igual que ``TIMESTAMPDIFF(YEAR, ...)``).
+
+NumPy es opcional: sin él (o con ``DEMOGRAFIA_ENABLED = False``)
+``disponible()`` retorna False y las rutas usan SQL. ``verificar()``
+compara los agregados del motor con los de MySQL.
+"""
+from datetime import date
+
+from flask import current_app
+
+from database import execute_query
+from .SearchServices import BackgroundIndex
+
+try:
+    import numpy as np
+except ImportError:  # motor opcional: las rutas caen a SQL
+    np = None
+
+_SQL_COLUMNAS = """
+    SELECT IdHabitante, FechaNacimiento, FechaRegistro, IdSector, IdSexo, IdEstadoCivil,
+           IdReligion, IdGrupoFamiliar, TieneImpedimentoSalud, Hijos, Activo
+    FROM habitantes
+"""
+
+# Columna -> tipo de NumPy; los ID nulos se guardan como 0
+_TIPOS = {
+    'id': 'int64',
+    'anio_nac': 'int32',        # 0 = sin fecha de nacimiento
+    'mesdia_nac': 'int32',      # mes * 100 + día
+    'registro': 'int32',        # date.toordinal() de FechaRegistro (0 = sin fecha)
+    'sector': 'int32',
+    'sexo': 'int32',
+    'estado_civil': 'int32',
+    'religion': 'int32',
+    'grupo': 'int32',
+    'impedimento': 'bool',
+    'hijos': 'int32',
+    'activo': 'bool',
+    'con_sacramento': 'bool',
+}
+
+# Filtros de las consultas -> columna de igualdad
+_FILTROS_IGUALDAD = {
+    'sector': 'sector', 'sexo': 'sexo', 'estado_civil': 'estado_civil', 'religion': 'religion',
+}
+
+
+def restar_anios(fecha, anios):
+    """``fecha`` menos ``anios`` años (el 29 de febrero pasa al 28 si hace falta)"""
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def _fila_a_valores(fila, sacramentos):
+    """Valores de las columnas para una fila de ``habitantes``"""
+    nacimiento, registro = fila['FechaNacimiento'], fila['FechaRegistro']
+    return {
+        'id': fila['IdHabitante'],
+        'anio_nac': nacimiento.year if nacimiento else 0,
+        'mesdia_nac': nacimiento.month * 100 + nacimiento.day if nacimiento else 0,
+        'registro': registro.toordinal() if registro else 0,
+        'sector': fila['IdSector'] or 0,
+        'sexo': fila['IdSexo'] or 0,
+        'estado_civil': fila['IdEstadoCivil'] or 0,
+        'religion': fila['IdReligion'] or 0,
+        'grupo': fila['IdGrupoFamiliar'] or 0,
+        'impedimento': fila['TieneImpedimentoSalud'] == 1,
+        'hijos': fila['Hijos'] or 0,
+        'activo': bool(fila['Activo']),
+        'con_sacramento': bool(sacramentos),
+    }
+
+
+class DemografiaColumnar(BackgroundIndex):
+    """Columnas de habitantes en arreglos de NumPy con filtros vectorizados"""
+
+    nombre = 'demografia'
+    config_refresco = 'DEMOGRAFIA_REFRESH_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self._vaciar()
+
+    # ---------- mantenimiento ----------
+
+    def _cargar(self):
+        filas = execute_query(_SQL_COLUMNAS + " ORDER BY IdHabitante") or []
+        por_habitante = {}
+        for fila in execute_query("SELECT IdHabitante, IdSacramento FROM habitante_sacramento") or []:
+            por_habitante.setdefault(fila['IdHabitante'], set()).add(fila['IdSacramento'])
+
+        valores = [_fila_a_valores(f, por_habitante.get(f['IdHabitante'])) for f in filas]
+        columnas = {
+            nombre: np.fromiter((v[nombre] for v in valores), dtype=tipo, count=len(valores))
+            for nombre, tipo in _TIPOS.items()
+        }
+        ids_sacramento = {s for sacs in por_habitante.values() for s in sacs}
+        sacramentos = {s: np.zeros(len(valores), dtype=bool) for s in ids_sacramento}
+        posiciones = {id_habitante: i for i, id_habitante in enumerate(columnas['id'].tolist())}
+        for id_habitante, sacs in por_habitante.items():
+            i = posiciones.get(id_habitante)
+            if i is not None:
+                for s in sacs:
+                    sacramentos[s][i] = True
+        return columnas, sacramentos
+
+    def _instalar(self, datos):
+        self._columnas, self._sacramentos = datos
+
+    def _vaciar(self):
+        self._columnas = {}
+        self._sacramentos = {}
+
+    def _aplicar(self, id_habitante, cambio):
+        if not self._columnas:
+            return
+        ids = self._columnas['id']
+        i = int(np.searchsorted(ids, id_habitante))
+        existe = i < len(ids) and ids[i] == id_habitante
+        if cambio is None:
+            if existe:
+                self._columnas['activo'][i] = False
+            return
+
+        valores, sacramentos = cambio
+        if not existe:
+            # Fila nueva: se inserta en su posición para mantener ``id`` ordenado
+            self._columnas = {
+                nombre: np.insert(columna, i, valores[nombre]) for nombre, columna in self._columnas.items()
+            }
+            self._sacramentos = {s: np.insert(col, i, False) for s, col in self._sacramentos.items()}
+        else:
+            for nombre, columna in self._columnas.items():
+                columna[i] = valores[nombre]
+        for s, columna in self._sacramentos.items():
+            columna[i] = s in sacramentos
+        for s in sacramentos - self._sacramentos.keys():
+            columna = np.zeros(len(self._columnas['id']), dtype=bool)
+            columna[i] = True
+            self._sacramentos[s] = columna
+
+    def refrescar(self, id_habitante):
+        """
+        Vuelve a leer las columnas y los sacramentos de un habitante.
+        Llamar después de confirmar la escritura.
+        """
+        if np is None or not self._en_uso():
+            return
+        fila = execute_query(_SQL_COLUMNAS + " WHERE IdHabitante = %s", (id_habitante,), fetch_one=True)
+        cambio = None
+        if fila:
+            sacramentos = {
+                s['IdSacramento'] for s in execute_query(
+                    "SELECT IdSacramento FROM habitante_sacramento WHERE IdHabitante = %s", (id_habitante,)
+                ) or []
+            }
+            cambio = (_fila_a_valores(fila, sacramentos), sacramentos)
+        self._registrar_cambio(id_habitante, cambio)
+
+    # ---------- consulta ----------
+
+    def disponible(self):
+        """
+        True si NumPy está instalado y las columnas están cargadas en este
+        worker. Lanza la carga si hace falta y espera hasta
+        ``DEMOGRAFIA_WAIT_SECONDS`` (0 = no espera: la ruta usa SQL).
+        """
+        if np is None or not current_app.config.get('DEMOGRAFIA_ENABLED', True):
+            return False
+        return self._esperar(current_app.config.get('DEMOGRAFIA_WAIT_SECONDS', 0))
+
+    def _edades(self, hoy):
+        """Años cumplidos a ``hoy`` y máscara de quienes tienen fecha de nacimiento"""
+        c = self._columnas
+        cumplio = c['mesdia_nac'] <= hoy.month * 100 + hoy.day
+        return hoy.year - c['anio_nac'] - 1 + cumplio, c['anio_nac'] > 0
+
+    def _mascara(self, edades, con_fecha, desde=None, hasta=None, sacramento=None, con_sacramento=None,
+                 edad_min=None, edad_max=None, **iguales):
+        """Habitantes activos que cumplen los filtros (fechas de registro inclusivas)"""
+        c = self._columnas
+        mascara = c['activo'].copy()
+        if desde:
+            mascara &= c['registro'] >= desde.toordinal()
+        if hasta:
+            mascara &= c['registro'] <= hasta.toordinal()
+        for filtro, valor in iguales.items():
+            if valor:
+                mascara &= c[_FILTROS_IGUALDAD[filtro]] == valor
+        if sacramento:
+            columna = self._sacramentos.get(sacramento)
+            if columna is None:
+                return np.zeros_like(mascara)
+            mascara &= columna
+        if con_sacramento is not None:
+            mascara &= c['con_sacramento'] if con_sacramento else ~c['con_sacramento']
+        if edad_min is not None:
+            mascara &= con_fecha & (edades >= edad_min)
+        if edad_max is not None:
+            mascara &= con_fecha & (edades <= edad_max)
+        return mascara
+
+    @staticmethod
+    def _estadisticas_edad(edades):
+        if not len(edades):
+            return {'edad_promedio': None, 'edad_minima': None, 'edad_maxima': None}
+        return {
+            'edad_promedio': float(edades.mean()),
+            'edad_minima': int(edades.min()),
+            'edad_maxima': int(edades.max()),
+        }
+
+    def resumen(self, hoy=None, **filtros):
+        """
+        Totales de los habitantes activos que cumplen los filtros
+
+        Args:
+            hoy (date): Fecha para calcular edades (por defecto hoy).
+            **filtros: ``desde``, ``hasta`` (fecha de registro), ``sector``,
+                ``sexo``, ``estado_civil``, ``religion``, ``sacramento``,
+                ``con_sacramento`` (bool), ``edad_min``, ``edad_max``.
+
+        Returns:
+            dict: total, con/sin sacramento, con impedimento, familias,
+            suma de hijos y estadísticas de edad.
+        """
+        with self._lock:
+            c = self._columnas
+            edades, con_fecha = self._edades(hoy or date.today())
+            mascara = self._mascara(edades, con_fecha, **filtros)
+            total = int(mascara.sum())
+            con_sacramento = int((mascara & c['con_sacramento']).sum())
+            grupos = c['grupo'][mascara]
+            return {
+                'total': total,
+                'con_sacramento': con_sacramento,
+                'sin_sacramento': total - con_sacramento,
+                'con_impedimento': int((mascara & c['impedimento']).sum()),
+                'familias': int(len(np.unique(grupos[grupos > 0]))),
+                'hijos': int(c['hijos'][mascara].sum()),
+                **self._estadisticas_edad(edades[mascara & con_fecha]),
+            }
+
+    def por_rango_edad(self, limites, hoy=None, **filtros):
+        """
+        Distribución por rangos de edad
+
+        Args:
+            limites (list[int]): Edades de corte ascendentes; el rango ``i``
+                va de ``limites[i-1]`` a ``limites[i] - 1`` (el primero sin
+                mínimo y el último sin máximo).
+
+        Returns:
+            tuple: ``(rangos, sin_fecha)``; ``rangos`` tiene un dict por
+            rango (cantidad y estadísticas de edad) y ``sin_fecha`` cuenta
+            a quienes no tienen fecha de nacimiento.
+        """
+        with self._lock:
+            edades, con_fecha = self._edades(hoy or date.today())
+            mascara = self._mascara(edades, con_fecha, **filtros)
+            con_edad = edades[mascara & con_fecha]
+            indices = np.digitize(con_edad, limites)
+            rangos = [
+                {'cantidad': int((indices == i).sum()), **self._estadisticas_edad(con_edad[indices == i])}
+                for i in range(len(limites) + 1)
+            ]
+            return rangos, int((mascara & ~con_fecha).sum())
+
+    def contar_por(self, columna, hoy=None, **filtros):
+        """``{valor: habitantes}`` de una columna (sector, sexo, ...) con los filtros"""
+        with self._lock:
+            edades, con_fecha = self._edades(hoy or date.today())
+            mascara = self._mascara(edades, con_fecha, **filtros)
+            valores, cantidades = np.unique(self._columnas[columna][mascara], return_counts=True)
+            return dict(zip(valores.tolist(), cantidades.tolist()))
+
+    def contar_por_grupo_edad(self, hoy=None, **filtros):
+        """``{GrupoEdad: habitantes}`` con los grupos de los rollups (9 = sin fecha o futura)"""
+        rangos, sin_fecha = self.por_rango_edad([0, 13, 30, 60], hoy, **filtros)
+        conteos = {grupo: rangos[grupo + 1]['cantidad'] for grupo in range(4)}
+        conteos[9] = rangos[0]['cantidad'] + sin_fecha
+        return conteos
+
+    def perfil_por_sector(self, desde=None, hasta=None, desde_anterior=None, hasta_anterior=None, hoy=None):
+        """
+        Indicadores por IdSector (los mismos de ``PerfilSectores``)
+
+        Returns:
+            dict: IdSector -> cantidad, cantidad_anterior, edad_promedio,
+            familias, con_impedimento, con_sacramento y ``sacramentos``
+            (IdSacramento -> habitantes).
+        """
+        with self._lock:
+            c = self._columnas
+            edades, con_fecha = self._edades(hoy or date.today())
+            actual = self._mascara(edades, con_fecha, desde=desde, hasta=hasta)
+            sectores = c['sector']
+            largo = int(sectores.max()) + 1 if len(sectores) else 1
+
+            def contar(mascara):
+                return np.bincount(sectores[mascara], minlength=largo)
+
+            cantidad = contar(actual)
+            anterior = (contar(self._mascara(edades, con_fecha, desde=desde_anterior, hasta=hasta_anterior))
+                        if desde_anterior or hasta_anterior else np.zeros(largo, dtype=int))
+            con_edad = actual & con_fecha
+            suma_edades = np.bincount(sectores[con_edad], weights=edades[con_edad], minlength=largo)
+            cuantos_con_edad = contar(con_edad)
+            impedimento = contar(actual & c['impedimento'])
+            con_sacramento = contar(actual & c['con_sacramento'])
+            por_sacramento = {s: contar(actual & col) for s, col in self._sacramentos.items()}
+
+            # Familias distintas por sector: pares (sector, grupo) únicos
+            con_grupo = actual & (c['grupo'] > 0)
+            pares = np.unique(np.stack([sectores[con_grupo], c['grupo'][con_grupo]]), axis=1)
+            familias = np.bincount(pares[0], minlength=largo) if pares.size else np.zeros(largo, dtype=int)
+
+            return {
+                sector: {
+                    'cantidad': int(cantidad[sector]),
+                    'cantidad_anterior': int(anterior[sector]),
+                    'edad_promedio': (float(suma_edades[sector] / cuantos_con_edad[sector])
+                                      if cuantos_con_edad[sector] else None),
+                    'familias': int(familias[sector]),
+                    'con_impedimento': int(impedimento[sector]),
+                    'con_sacramento': int(con_sacramento[sector]),
+                    'sacramentos': {s: int(v[sector]) for s, v in por_sacramento.items() if v[sector]},
+                }
+                for sector in range(largo)
+            }
+
+    def verificar(self):
+        """
+        Compara los agregados de los habitantes activos con los de MySQL
+
+        Una escritura entre ambas lecturas puede dar una diferencia
+        transitoria; repetir antes de sospechar del motor.
+
+        Returns:
+            dict: ``coincide``, ``diferencias`` (campo -> [motor, sql]),
+            ``motor`` y ``sql``.
+        """
+        sql = execute_query("""
+            SELECT
+                COUNT(*) AS total,
+                CAST(COALESCE(SUM(TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE())), 0) AS SIGNED) AS suma_edades,
+                COUNT(h.FechaNacimiento) AS con_fecha,
+                CAST(COALESCE(SUM(h.TieneImpedimentoSalud = 1), 0) AS SIGNED) AS con_impedimento,
+                CAST(COALESCE(SUM(h.Hijos), 0) AS SIGNED) AS hijos,
+                COUNT(DISTINCT h.IdGrupoFamiliar) AS familias,
+                CAST(COALESCE(SUM(EXISTS(
+                    SELECT 1 FROM habitante_sacramento hs WHERE hs.IdHabitante = h.IdHabitante
+                )), 0) AS SIGNED) AS con_sacramento
+            FROM habitantes h
+            WHERE h.Activo = 1
+        """, fetch_one=True) or {}
+        sql['por_sector'] = {
+            str(f['IdSector'] or 0): f['total'] for f in execute_query(
+                "SELECT IdSector, COUNT(*) AS total FROM habitantes WHERE Activo = 1 GROUP BY IdSector"
+            ) or []
+        }
+
+        with self._lock:
+            c = self._columnas
+            edades, con_fecha = self._edades(date.today())
+            activos = c['activo']
+            grupos = c['grupo'][activos]
+            motor = {
+                'total': int(activos.sum()),
+                'suma_edades': int(edades[activos & con_fecha].sum()),
+                'con_fecha': int((activos & con_fecha).sum()),
+                'con_impedimento': int((activos & c['impedimento']).sum()),
+                'hijos': int(c['hijos'][activos].sum()),
+                'familias': int(len(np.unique(grupos[grupos > 0]))),
+                'con_sacramento': int((activos & c['con_sacramento']).sum()),
+            }
+            sectores, cantidades = np.unique(c['sector'][activos], return_counts=True)
+            motor['por_sector'] = {str(s): n for s, n in zip(sectores.tolist(), cantidades.tolist())}
+
+        diferencias = {k: [motor[k], sql.get(k)] for k in motor if motor[k] != sql.get(k)}
+        return {'coincide': not diferencias, 'diferencias': diferencias, 'motor': motor, 'sql': sql}
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._estado(),
+                'numpy': np is not None,
+                'filas': len(self._columnas.get('id', ())),
+                'sacramentos': len(self._sacramentos),
+                'bytes': sum(col.nbytes for col in [*self._columnas.values(), *self._sacramentos.values()]),
+            }
+
+
+demografia = DemografiaColumnar()
@@ -0,0 +1,309 @@
+"""
+Trabajos de reportes en segundo plano
+Los reportes pesados de estadísticas se encolan con
+``POST /api/estadisticas/jobs/`` y se generan en un pool acotado de hilos
+(``REPORT_JOBS_WORKERS`` por proceso), de modo que el worker que recibió el
+request queda libre de inmediato. El estado vive en la tabla ``reporte_jobs``
+(cualquier worker puede responder por un trabajo) y el resultado queda como
+archivo en ``REPORT_JOBS_FOLDER``, nombrado por el hash del reporte: un
+pedido idéntico dentro de ``REPORT_JOBS_TTL_SECONDS`` reutiliza el trabajo.
+
+Los reportes son las mismas vistas de ``routes/estadisticas.py``, que se
+registran con ``reporte_jobs.registrar`` y se ejecutan sin sus decoradores
+(el rol se valida al encolar) en un request de prueba con los filtros.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask import current_app
+
+from database import execute_query
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_ACTIVOS = ('pendiente', 'en_proceso')
+
+_COLUMNAS = """
+    IdJob, Tipo, Formato, Filtros, Hash, Estado, Archivo, Bytes, Error, IdUsuario,
+    FechaCreacion, FechaInicio, FechaFin,
+    TIMESTAMPDIFF(SECOND, FechaCreacion, NOW()) AS Edad
+"""
+
+
+class ColaLlenaError(Exception):
+    """Se lanza cuando el proceso ya tiene ``REPORT_JOBS_MAX_PENDING`` trabajos"""
+
+
+class ReporteJobs:
+    """Registro de reportes disponibles y cola de trabajos del proceso"""
+
+    def __init__(self):
+        self._reportes = {}         # tipo -> (vista sin decoradores, ruta, formatos)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pendientes = 0
+        self.encolados = 0
+        self.reutilizados = 0
+        self.completados = 0
+        self.errores = 0
+        self.rechazados = 0
+
+    # ---------- registro ----------
+
+    def registrar(self, tipo, vista, ruta, formatos=('json',)):
+        """
+        Registra una vista como reporte encolable
+
+        Args:
+            tipo (str): Nombre del reporte en ``POST /jobs/``.
+            vista (callable): Vista de Flask; se ejecuta sin sus decoradores.
+            ruta (str): Ruta de la vista (para ``request.path``).
+            formatos (tuple): Valores aceptados de ``formato``; los distintos
+                de 'json' se pasan a la vista como ``?format=``.
+        """
+        self._reportes[tipo] = (inspect.unwrap(vista), ruta, tuple(formatos))
+
+    def tipos(self):
+        """``{tipo: [formatos]}`` de los reportes registrados"""
+        return {tipo: list(formatos) for tipo, (_, _, formatos) in self._reportes.items()}
+
+    # ---------- encolado ----------
+
+    @staticmethod
+    def _normalizar(filtros):
+        """Filtros como ``{str: str}`` sin vacíos, que es lo que ve la vista en ``request.args``"""
+        if filtros is None:
+            return {}
+        if not isinstance(filtros, dict):
+            raise ValueError('Los filtros deben ser un objeto')
+        normalizados = {}
+        for clave, valor in filtros.items():
+            if clave == 'format' or valor is None or valor == '':
+                continue
+            if isinstance(valor, (dict, list)):
+                raise ValueError(f"El filtro '{clave}' debe ser un valor simple")
+            normalizados[str(clave)] = str(valor).lower() if isinstance(valor, bool) else str(valor)
+        return normalizados
+
+    @staticmethod
+    def _hash(tipo, formato, filtros):
+        # El día entra en el hash porque los rangos relativos ('mes', 'semana') dependen de él
+        material = json.dumps(
+            {'tipo': tipo, 'formato': formato, 'filtros': filtros, 'dia': date.today().isoformat()},
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _get_executor(self, app):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso nuevo (fork de un worker): los hilos del padre no existen aquí
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, app.config.get('REPORT_JOBS_WORKERS', 2)),
+                    thread_name_prefix='reporte-job'
+                )
+                self._pendientes = 0
+            return self._executor
+
+    def encolar(self, tipo, formato='json', filtros=None, id_usuario=None):
+        """
+        Encola un reporte, o retorna el trabajo idéntico vigente
+
+        Returns:
+            tuple: ``(job, reutilizado)`` con el job como en ``obtener``.
+
+        Raises:
+            ValueError: Tipo, formato o filtros inválidos.
+            ColaLlenaError: El proceso no admite más trabajos pendientes.
+        """
+        if tipo not in self._reportes:
+            raise ValueError(f"Reporte desconocido. Use: {', '.join(sorted(self._reportes))}")
+        formatos = self._reportes[tipo][2]
+        formato = (formato or 'json').lower()
+        if formato not in formatos:
+            raise ValueError(f"Formato no soportado para {tipo}. Use: {', '.join(formatos)}")
+        filtros = self._normalizar(filtros)
+        clave = self._hash(tipo, formato, filtros)
+        app = current_app._get_current_object()
+
+        existente = execute_query(f"""
+            SELECT {_COLUMNAS}
+            FROM reporte_jobs
+            WHERE Hash = %s
+              AND ((Estado IN ('pendiente', 'en_proceso') AND FechaCreacion >= NOW() - INTERVAL %s SECOND)
+                   OR (Estado = 'completado' AND FechaFin >= NOW() - INTERVAL %s SECOND))
+            ORDER BY IdJob DESC
+            LIMIT 1
+        """, (clave, app.config.get('REPORT_JOBS_TIMEOUT_SECONDS', 1800),
+              app.config.get('REPORT_JOBS_TTL_SECONDS', 3600)), fetch_one=True)
+        if existente and (existente['Estado'] != 'completado' or self.ruta_archivo(existente)):
+            with self._lock:
+                self.reutilizados += 1
+            return self._formatear(existente), True
+
+        executor = self._get_executor(app)
+        with self._lock:
+            if self._pendientes >= app.config.get('REPORT_JOBS_MAX_PENDING', 20):
+                self.rechazados += 1
+                raise ColaLlenaError('Hay demasiados reportes en cola, intente de nuevo en unos minutos')
+            self._pendientes += 1
+
+        try:
+            id_job = execute_query("""
+                INSERT INTO reporte_jobs (Tipo, Formato, Filtros, Hash, Estado, IdUsuario)
+                VALUES (%s, %s, %s, %s, 'pendiente', %s)
+            """, (tipo, formato, json.dumps(filtros, sort_keys=True), clave, id_usuario))
+            executor.submit(self._ejecutar, app, id_job, tipo, formato, filtros, clave)
+        except Exception:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+
+        with self._lock:
+            self.encolados += 1
+        return self.obtener(id_job), False
+
+    # ---------- ejecución ----------
+
+    def _ejecutar(self, app, id_job, tipo, formato, filtros, clave):
+        """Corre en un hilo del pool: abre su propio contexto de aplicación"""
+        inicio = time.perf_counter()
+        try:
+            with app.app_context():
+                try:
+                    execute_query(
+                        "UPDATE reporte_jobs SET Estado = 'en_proceso', FechaInicio = NOW() WHERE IdJob = %s",
+                        (id_job,)
+                    )
+                    archivo, tamano = self._generar(app, tipo, formato, filtros, clave)
+                    execute_query("""
+                        UPDATE reporte_jobs
+                        SET Estado = 'completado', Archivo = %s, Bytes = %s, FechaFin = NOW()
+                        WHERE IdJob = %s
+                    """, (archivo, tamano, id_job))
+                    with self._lock:
+                        self.completados += 1
+                    logger.info(f"Reporte {tipo} #{id_job} generado en {time.perf_counter() - inicio:.2f} s")
+                except Exception as e:
+                    with self._lock:
+                        self.errores += 1
+                    logger.error(f"Error generando el reporte {tipo} #{id_job}: {e}")
+                    execute_query(
+                        "UPDATE reporte_jobs SET Estado = 'error', Error = %s, FechaFin = NOW() WHERE IdJob = %s",
+                        (str(e)[:1000], id_job)
+                    )
+        except Exception as e:
+            logger.error(f"No se pudo registrar el estado del reporte #{id_job}: {e}")
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+
+    def _generar(self, app, tipo, formato, filtros, clave):
+        """Ejecuta la vista y escribe su respuesta en la carpeta de reportes"""
+        vista, ruta, _ = self._reportes[tipo]
+        carpeta = app.config['REPORT_JOBS_FOLDER']
+        os.makedirs(carpeta, exist_ok=True)
+        self._limpiar(carpeta, app.config.get('REPORT_JOBS_TTL_SECONDS', 3600))
+
+        archivo = f'{clave}.{formato}'
+        destino = os.path.join(carpeta, archivo)
+        temporal = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+        args = dict(filtros, format=formato) if formato != 'json' else filtros
+
+        with app.test_request_context(ruta, query_string=args):
+            response = app.make_response(vista())
+            try:
+                if response.status_code != 200:
+                    cuerpo = response.get_json(silent=True) or {}
+                    raise RuntimeError(cuerpo.get('message') or f'HTTP {response.status_code}')
+                with open(temporal, 'wb') as f:
+                    for trozo in response.iter_encoded():
+                        f.write(trozo)
+            except Exception:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+                raise
+            finally:
+                response.close()
+
+        # Reemplazo atómico: una descarga en curso del archivo anterior no se corta
+        os.replace(temporal, destino)
+        return archivo, os.path.getsize(destino)
+
+    @staticmethod
+    def _limpiar(carpeta, ttl):
+        """Borra los archivos que ya no puede reutilizar ni descargar ningún trabajo"""
+        limite = time.time() - ttl
+        for nombre in os.listdir(carpeta):
+            ruta = os.path.join(carpeta, nombre)
+            try:
+                if os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+    # ---------- consulta ----------
+
+    def _formatear(self, fila):
+        estado = fila['Estado']
+        error = fila['Error']
+        timeout = current_app.config.get('REPORT_JOBS_TIMEOUT_SECONDS', 1800)
+        if estado in ESTADOS_ACTIVOS and (fila['Edad'] or 0) > timeout:
+            # El proceso que lo tenía se reinició o el reporte no terminó a tiempo
+            estado, error = 'error', 'El reporte no terminó a tiempo'
+            execute_query(
+                "UPDATE reporte_jobs SET Estado = 'error', Error = %s, FechaFin = NOW() "
+                "WHERE IdJob = %s AND Estado IN ('pendiente', 'en_proceso')",
+                (error, fila['IdJob'])
+            )
+        return {
+            'id': fila['IdJob'],
+            'tipo': fila['Tipo'],
+            'formato': fila['Formato'],
+            'filtros': json.loads(fila['Filtros'] or '{}'),
+            'estado': estado,
+            'bytes': fila['Bytes'],
+            'error': error,
+            'id_usuario': fila['IdUsuario'],
+            'creado': fila['FechaCreacion'].isoformat() if fila['FechaCreacion'] else None,
+            'iniciado': fila['FechaInicio'].isoformat() if fila['FechaInicio'] else None,
+            'terminado': fila['FechaFin'].isoformat() if fila['FechaFin'] else None,
+            'archivo': fila['Archivo'],
+        }
+
+    def obtener(self, id_job):
+        """Estado de un trabajo, o None si no existe"""
+        fila = execute_query(f"SELECT {_COLUMNAS} FROM reporte_jobs WHERE IdJob = %s", (id_job,), fetch_one=True)
+        return self._formatear(fila) if fila else None
+
+    def ruta_archivo(self, job):
+        """Ruta del archivo de un trabajo completado, o None si ya no existe"""
+        archivo = job.get('archivo', job.get('Archivo'))
+        if not archivo:
+            return None
+        ruta = os.path.join(current_app.config['REPORT_JOBS_FOLDER'], archivo)
+        return ruta if os.path.isfile(ruta) else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'reportes': sorted(self._reportes),
+                'pendientes_proceso': self._pendientes if self._pid == os.getpid() else 0,
+                'encolados': self.encolados,
+                'reutilizados': self.reutilizados,
+                'completados': self.completados,
+                'errores': self.errores,
+                'rechazados': self.rechazados,
+            }
+
+
+reporte_jobs = ReporteJobs()
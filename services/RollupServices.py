@@ -0,0 +1,148 @@
+"""
+Agregados diarios de habitantes (rollups)
+Las tablas ``rollup_habitantes_dia`` y ``rollup_sacramentos_dia`` guardan
+cuántos habitantes activos hay por día de registro y por combinación de
+dimensiones, para que los KPIs sumen unas pocas filas en lugar de recorrer
+``habitantes`` y ``habitante_sacramento`` en cada petición.
+
+Las escrituras las mantienen al día con deltas:
+
+    with transaction():
+        antes = contribucion_rollup(id_habitante)   # bloquea la fila
+        ... UPDATE habitantes / habitante_sacramento ...
+        actualizar_rollups(id_habitante, antes)
+
+El grupo de edad se calcula al escribir, así que ``rebuild_rollups.py`` debe
+correr cada noche para mover a quienes cumplen años a su nuevo grupo.
+"""
+from database import execute_query, execute_many, transaction
+
+# Etiquetas de GrupoEdad en los KPIs (9 = sin fecha de nacimiento)
+GRUPOS_EDAD = {0: 'ninos', 1: 'jovenes', 2: 'adultos', 3: 'adultos_mayores'}
+
+DIA_SIN_FECHA = '1000-01-01'
+
+_DIMENSIONES = ('Dia', 'IdSector', 'IdSexo', 'IdEstadoCivil', 'GrupoEdad', 'ConSacramento')
+
+_SQL_DIMENSIONES = f"""
+    COALESCE(DATE(h.FechaRegistro), '{DIA_SIN_FECHA}') AS Dia,
+    COALESCE(h.IdSector, 0) AS IdSector,
+    COALESCE(h.IdSexo, 0) AS IdSexo,
+    COALESCE(h.IdEstadoCivil, 0) AS IdEstadoCivil,
+    CASE
+        WHEN h.FechaNacimiento IS NULL OR h.FechaNacimiento > CURDATE() THEN 9
+        WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) <= 12 THEN 0
+        WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) <= 29 THEN 1
+        WHEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) <= 59 THEN 2
+        ELSE 3
+    END AS GrupoEdad,
+    EXISTS(SELECT 1 FROM habitante_sacramento hs WHERE hs.IdHabitante = h.IdHabitante) AS ConSacramento
+"""
+
+_SQL_SUMAR_HABITANTES = f"""
+    INSERT INTO rollup_habitantes_dia ({', '.join(_DIMENSIONES)}, Total)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE Total = Total + VALUES(Total)
+"""
+
+_SQL_SUMAR_SACRAMENTOS = """
+    INSERT INTO rollup_sacramentos_dia (Dia, IdSector, IdSacramento, Total)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE Total = Total + VALUES(Total)
+"""
+
+
+def contribucion_rollup(id_habitante):
+    """
+    Lee lo que un habitante aporta hoy a los rollups y bloquea su fila
+    (``FOR UPDATE``) hasta el final de la transacción.
+
+    Args:
+        id_habitante (int): ID del habitante
+
+    Returns:
+        tuple | None: ``(dimensiones, ids de sacramentos)``, o None si el
+        habitante no existe o está inactivo (no aporta nada)
+    """
+    fila = execute_query(
+        f"SELECT {_SQL_DIMENSIONES} FROM habitantes h "
+        "WHERE h.IdHabitante = %s AND h.Activo = 1 FOR UPDATE",
+        (id_habitante,), fetch_one=True
+    )
+    if not fila:
+        return None
+    sacramentos = execute_query(
+        "SELECT DISTINCT IdSacramento FROM habitante_sacramento WHERE IdHabitante = %s ORDER BY IdSacramento",
+        (id_habitante,)
+    ) or []
+    dimensiones = tuple(str(fila['Dia']) if c == 'Dia' else int(fila[c]) for c in _DIMENSIONES)
+    return dimensiones, tuple(s['IdSacramento'] for s in sacramentos)
+
+
+def _sumar(contribucion, signo):
+    dimensiones, sacramentos = contribucion
+    execute_query(_SQL_SUMAR_HABITANTES, dimensiones + (signo,))
+    if sacramentos:
+        dia, id_sector = dimensiones[0], dimensiones[1]
+        execute_many(_SQL_SUMAR_SACRAMENTOS, [(dia, id_sector, s, signo) for s in sacramentos])
+
+
+def actualizar_rollups(id_habitante, antes=None):
+    """
+    Resta la contribución anterior del habitante y suma la actual.
+    Llamar dentro de la misma transacción que la escritura, después de ella.
+
+    Args:
+        id_habitante (int): ID del habitante escrito
+        antes (tuple | None): Resultado de ``contribucion_rollup`` antes de
+            escribir (None para un habitante nuevo)
+    """
+    despues = contribucion_rollup(id_habitante)
+    if antes == despues:
+        return
+    with transaction():
+        if antes:
+            _sumar(antes, -1)
+        if despues:
+            _sumar(despues, 1)
+
+
+def reconstruir_rollups():
+    """
+    Vuelve a calcular ambas tablas desde ``habitantes`` en una transacción
+    (los lectores ven los datos anteriores hasta el COMMIT).
+
+    Returns:
+        dict: Filas escritas en cada tabla y habitantes contados
+    """
+    with transaction():
+        execute_query("DELETE FROM rollup_habitantes_dia")
+        execute_query(f"""
+            INSERT INTO rollup_habitantes_dia ({', '.join(_DIMENSIONES)}, Total)
+            SELECT {', '.join(_DIMENSIONES)}, COUNT(*)
+            FROM (SELECT {_SQL_DIMENSIONES} FROM habitantes h WHERE h.Activo = 1) d
+            GROUP BY {', '.join(_DIMENSIONES)}
+        """)
+        execute_query("DELETE FROM rollup_sacramentos_dia")
+        execute_query(f"""
+            INSERT INTO rollup_sacramentos_dia (Dia, IdSector, IdSacramento, Total)
+            SELECT Dia, IdSector, IdSacramento, COUNT(DISTINCT IdHabitante)
+            FROM (
+                SELECT
+                    COALESCE(DATE(h.FechaRegistro), '{DIA_SIN_FECHA}') AS Dia,
+                    COALESCE(h.IdSector, 0) AS IdSector,
+                    hs.IdSacramento,
+                    h.IdHabitante
+                FROM habitantes h
+                JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
+                WHERE h.Activo = 1
+            ) d
+            GROUP BY Dia, IdSector, IdSacramento
+        """)
+        resumen = execute_query("""
+            SELECT
+                (SELECT COUNT(*) FROM rollup_habitantes_dia) AS filas_habitantes,
+                (SELECT COUNT(*) FROM rollup_sacramentos_dia) AS filas_sacramentos,
+                (SELECT COALESCE(SUM(Total), 0) FROM rollup_habitantes_dia) AS habitantes
+        """, fetch_one=True)
+    return resumen
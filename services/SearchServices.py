@@ -0,0 +1,273 @@
+"""
+Índice de búsqueda de habitantes por trigramas
+Mantiene en memoria (uno por worker) los habitantes activos para responder
+las búsquedas del autocompletado sin ejecutar ``LIKE '%q%'`` en MySQL.
+Las rutas que escriben en ``habitantes`` llaman a ``refrescar`` y el índice
+se reconstruye completo cada ``SEARCH_INDEX_REFRESH_SECONDS`` para recoger
+los cambios hechos por otros workers.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from flask import current_app
+
+from database import execute_query
+
+logger = logging.getLogger(__name__)
+
+_RE_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+_COLUMNAS = "IdHabitante, Nombre, Apellido, NumeroDocumento, Telefono"
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni signos: 'Muñoz-Peña' -> 'munoz pena'"""
+    texto = unicodedata.normalize('NFKD', str(texto or '')).lower()
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(_RE_NO_ALFANUMERICO.sub(' ', texto).split())
+
+
+def trigramas(texto, completo=True):
+    """
+    Trigramas de cada palabra, con dos espacios al inicio para que las
+    primeras letras sirvan de prefijo. Con ``completo=False`` (consultas) no
+    se agrega el espacio final, porque la última palabra puede estar a medias.
+    """
+    grupos = set()
+    for palabra in texto.split():
+        palabra = '  ' + palabra + (' ' if completo else '')
+        grupos.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return grupos
+
+
+class BackgroundIndex:
+    """
+    Base de los índices en memoria por worker
+
+    La carga completa corre en un hilo aparte y reemplaza las estructuras de
+    una vez; mientras no termina la primera, ``listo`` es False y las rutas
+    usan SQL. Las subclases implementan:
+
+    - ``_cargar()``: lee los datos (con contexto de aplicación)
+    - ``_instalar(datos)``: reemplaza las estructuras (con el lock tomado)
+    - ``_aplicar(clave, valor)``: aplica un cambio puntual (con el lock tomado)
+    - ``_vaciar()``: descarta las estructuras (con el lock tomado)
+    """
+
+    nombre = 'indice'
+    config_refresco = 'SEARCH_INDEX_REFRESH_SECONDS'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listo = False
+        self._cargando = False
+        self._cargado_en = 0.0
+        self._pid = None
+        self._cambios = None     # cambios recibidos mientras se reconstruye
+        self._evento_listo = threading.Event()
+
+    def _reconstruir(self, app):
+        try:
+            inicio = time.perf_counter()
+            with app.app_context():
+                datos = self._cargar()
+
+            with self._lock:
+                self._instalar(datos)
+                # Escrituras que llegaron durante la carga y pueden no estar en ella
+                for clave, valor in (self._cambios or {}).items():
+                    self._aplicar(clave, valor)
+                self._listo = True
+                self._cargado_en = time.monotonic()
+                self._evento_listo.set()
+            logger.info(f"Índice {self.nombre} construido en {time.perf_counter() - inicio:.2f} s")
+        except Exception as e:
+            logger.error(f"Error construyendo el índice {self.nombre}: {e}")
+        finally:
+            with self._lock:
+                self._cargando = False
+                self._cambios = None
+
+    def _asegurar_carga(self):
+        """Lanza la reconstrucción si el índice no existe en este proceso o venció"""
+        refresco = current_app.config.get(self.config_refresco, 300)
+        vencido = time.monotonic() - self._cargado_en > refresco
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso nuevo (fork de un worker): el índice heredado no se mantiene
+                self._pid = os.getpid()
+                self._vaciar()
+                self._listo = self._cargando = False
+                self._evento_listo.clear()
+            elif self._cargando or (self._listo and not vencido):
+                return
+            self._cargando = True
+            self._cambios = {}
+        hilo = threading.Thread(
+            target=self._reconstruir, args=(current_app._get_current_object(),),
+            name=f'indice-{self.nombre}', daemon=True
+        )
+        hilo.start()
+
+    def _esperar(self, segundos):
+        """Lanza la carga si hace falta y espera la primera hasta ``segundos``"""
+        self._asegurar_carga()
+        return self._evento_listo.wait(segundos)
+
+    def _en_uso(self):
+        with self._lock:
+            return self._listo or self._cargando
+
+    def _registrar_cambio(self, clave, valor):
+        """Aplica un cambio puntual y lo guarda si hay una carga en curso"""
+        with self._lock:
+            if self._cambios is not None:
+                self._cambios[clave] = valor
+            self._aplicar(clave, valor)
+
+    def _estado(self):
+        return {
+            'listo': self._listo,
+            'cargando': self._cargando,
+            'edad_segundos': round(time.monotonic() - self._cargado_en, 1) if self._listo else None,
+        }
+
+
+class HabitanteSearchIndex(BackgroundIndex):
+    """Índice invertido trigrama -> IdHabitante de los habitantes activos"""
+
+    nombre = 'habitantes'
+
+    def __init__(self):
+        super().__init__()
+        self._filas = {}         # IdHabitante -> fila
+        self._textos = {}        # IdHabitante -> (texto, documento, clave de orden) normalizados
+        self._trigramas = {}     # trigrama -> set(IdHabitante)
+
+    # ---------- mantenimiento ----------
+
+    def _agregar(self, indice, textos, filas, fila):
+        id_habitante = fila['IdHabitante']
+        texto = normalizar(f"{fila['Nombre']} {fila['Apellido']} {fila['NumeroDocumento']}")
+        documento = normalizar(fila['NumeroDocumento']).replace(' ', '')
+        orden = normalizar(f"{fila['Apellido']} {fila['Nombre']}")
+        filas[id_habitante] = fila
+        textos[id_habitante] = (texto, documento, orden)
+        for t in trigramas(texto):
+            indice.setdefault(t, set()).add(id_habitante)
+
+    def _quitar(self, id_habitante):
+        textos = self._textos.pop(id_habitante, None)
+        self._filas.pop(id_habitante, None)
+        if textos is None:
+            return
+        for t in trigramas(textos[0]):
+            ids = self._trigramas.get(t)
+            if ids is not None:
+                ids.discard(id_habitante)
+                if not ids:
+                    del self._trigramas[t]
+
+    def _cargar(self):
+        filas = execute_query(f"SELECT {_COLUMNAS} FROM habitantes WHERE Activo = 1") or []
+        nuevas, textos, indice = {}, {}, {}
+        for fila in filas:
+            self._agregar(indice, textos, nuevas, fila)
+        return nuevas, textos, indice
+
+    def _instalar(self, datos):
+        self._filas, self._textos, self._trigramas = datos
+
+    def _vaciar(self):
+        self._filas, self._textos, self._trigramas = {}, {}, {}
+
+    def _aplicar(self, id_habitante, fila):
+        self._quitar(id_habitante)
+        if fila:
+            self._agregar(self._trigramas, self._textos, self._filas, fila)
+
+    def refrescar(self, id_habitante):
+        """
+        Vuelve a leer un habitante y actualiza el índice (alta, cambio o baja).
+        Llamar después de confirmar la escritura.
+        """
+        if not self._en_uso():
+            return
+        fila = execute_query(
+            f"SELECT {_COLUMNAS}, Activo FROM habitantes WHERE IdHabitante = %s",
+            (id_habitante,), fetch_one=True
+        )
+        activo = fila if fila and fila.pop('Activo') else None
+        self._registrar_cambio(id_habitante, activo)
+
+    # ---------- consulta ----------
+
+    def buscar(self, q, limite=10):
+        """
+        Busca habitantes activos por nombre, apellido o documento.
+
+        Las coincidencias de todas las palabras de ``q`` van primero (con
+        prioridad para documento exacto y prefijos de palabra); después las
+        aproximadas, por similitud de trigramas (tolera errores de digitación).
+
+        Args:
+            q (str): Texto buscado
+            limite (int): Máximo de resultados
+
+        Returns:
+            list[dict] | None: Filas ordenadas por relevancia, o None si el
+            índice aún se está construyendo (usar SQL)
+        """
+        if not current_app.config.get('SEARCH_INDEX_ENABLED', True):
+            return None
+        self._asegurar_carga()
+
+        consulta = normalizar(q)
+        palabras = consulta.split()
+        with self._lock:
+            if not self._listo:
+                return None
+            if not palabras:
+                return []
+            grupos = trigramas(consulta, completo=False)
+            conteo = Counter()
+            for t in grupos:
+                conteo.update(self._trigramas.get(t, ()))
+
+            minimo = current_app.config.get('SEARCH_MIN_SIMILARITY', 0.7)
+            puntuados = []
+            for id_habitante, comunes in conteo.items():
+                texto, documento, _ = self._textos[id_habitante]
+                similitud = comunes / len(grupos)
+                contiene = all(p in texto for p in palabras)
+                if not contiene and similitud < minimo:
+                    continue
+                palabras_texto = texto.split()
+                prefijos = sum(any(w.startswith(p) for w in palabras_texto) for p in palabras)
+                puntaje = (
+                    similitud
+                    + (1.0 if contiene else 0.0)
+                    + 0.5 * prefijos / len(palabras)
+                    + (2.0 if consulta.replace(' ', '') == documento else 0.0)
+                )
+                puntuados.append((puntaje, id_habitante))
+
+            # Empates: por apellido y nombre, como ordenaban las consultas SQL
+            puntuados.sort(key=lambda x: (-x[0], self._textos[x[1]][2]))
+            return [dict(self._filas[i]) for _, i in puntuados[:limite]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._estado(),
+                'habitantes': len(self._filas),
+                'trigramas': len(self._trigramas),
+            }
+
+
+habitante_index = HabitanteSearchIndex()
@@ -0,0 +1,171 @@
+"""
+Perfil de habitantes por sector
+Calcula en dos consultas agrupadas (un solo viaje con ``batch_select``) los
+indicadores de todos los sectores activos: habitantes del período y del
+anterior, edad promedio, familias, impedimentos de salud, habitantes con
+sacramento y los sacramentos presentes en cada sector. Con el motor columnar
+disponible (``services.demografia``) ``ejecutar()`` calcula lo mismo en memoria
+y solo lee de MySQL los nombres de sectores y sacramentos.
+"""
+from datetime import timedelta
+
+from database import batch_select, QuerySpec
+from .DemografiaServices import demografia
+
+
+def _rango(desde, hasta):
+    """Condición semiabierta sobre FechaRegistro (fechas inclusivas, None = sin límite)"""
+    partes, params = [], []
+    if desde:
+        partes.append("h.FechaRegistro >= %s")
+        params.append(desde.isoformat())
+    if hasta:
+        partes.append("h.FechaRegistro < %s")
+        params.append((hasta + timedelta(days=1)).isoformat())
+    return (' AND '.join(partes) or '1 = 1'), params
+
+
+class PerfilSectores:
+    """
+    Indicadores por sector para un período (y opcionalmente el anterior)
+
+    Args:
+        desde, hasta (date): Período actual, inclusivo (None = sin límite).
+        desde_anterior, hasta_anterior (date): Período de comparación.
+
+    ``specs()`` retorna las consultas (para sumarlas a un ``run_parallel`` o
+    ``batch_select`` existente) y ``completar(resultados)`` arma los perfiles;
+    ``ejecutar()`` hace ambas cosas en un viaje (o usa el motor columnar). Cada perfil trae ``id``,
+    ``sector``, ``cantidad``, ``porcentaje``, ``cantidad_anterior``,
+    ``variacion``, ``edad_promedio``, ``familias``, ``con_impedimento``,
+    ``con_sacramento``, ``sin_sacramento``, ``sacramentos`` (id, nombre y
+    habitantes) y ``lista_sacramentos``, ordenados por cantidad.
+    """
+
+    def __init__(self, desde=None, hasta=None, desde_anterior=None, hasta_anterior=None):
+        self._periodos = (desde, hasta, desde_anterior, hasta_anterior)
+        comparar = bool(desde_anterior or hasta_anterior)
+        actual, params_actual = _rango(desde, hasta)
+
+        # El JOIN toma la unión de ambos períodos; cada columna filtra el suyo
+        if comparar:
+            anterior, params_anterior = _rango(desde_anterior, hasta_anterior)
+            union, params_union = _rango(
+                min(desde, desde_anterior) if desde and desde_anterior else None,
+                max(hasta, hasta_anterior) if hasta and hasta_anterior else None
+            )
+            col_anterior = f"COUNT(CASE WHEN h.IdHabitante IS NOT NULL AND {anterior} THEN 1 END)"
+        else:
+            params_anterior = []
+            union, params_union = actual, params_actual
+            col_anterior = "0"
+
+        en_actual = f"h.IdHabitante IS NOT NULL AND {actual}"
+        self._sql_sectores = f"""
+            SELECT
+                s.IdSector,
+                s.Descripcion AS sector,
+                COUNT(CASE WHEN {en_actual} THEN 1 END) AS cantidad,
+                {col_anterior} AS cantidad_anterior,
+                AVG(CASE WHEN {en_actual} THEN TIMESTAMPDIFF(YEAR, h.FechaNacimiento, CURDATE()) END) AS edad_promedio,
+                COUNT(DISTINCT CASE WHEN {en_actual} THEN h.IdGrupoFamiliar END) AS familias,
+                COUNT(CASE WHEN {en_actual} AND h.TieneImpedimentoSalud = 1 THEN 1 END) AS con_impedimento,
+                COUNT(CASE WHEN {en_actual} AND EXISTS (
+                    SELECT 1 FROM habitante_sacramento hs WHERE hs.IdHabitante = h.IdHabitante
+                ) THEN 1 END) AS con_sacramento
+            FROM sector s
+            LEFT JOIN habitantes h ON h.IdSector = s.IdSector AND h.Activo = 1 AND {union}
+            WHERE s.Activo = 1
+            GROUP BY s.IdSector, s.Descripcion
+        """
+        # Orden de los marcadores: cantidad, anterior, edad, familias, impedimento, sacramento, JOIN
+        self._params_sectores = tuple(
+            params_actual + params_anterior + params_actual * 4 + params_union
+        )
+
+        self._sql_sacramentos = f"""
+            SELECT
+                h.IdSector,
+                ts.IdSacramento,
+                ts.Descripcion AS sacramento,
+                COUNT(DISTINCT h.IdHabitante) AS total
+            FROM habitantes h
+            JOIN habitante_sacramento hs ON hs.IdHabitante = h.IdHabitante
+            JOIN tiposacramentos ts ON ts.IdSacramento = hs.IdSacramento
+            WHERE h.Activo = 1 AND {actual}
+            GROUP BY h.IdSector, ts.IdSacramento, ts.Descripcion
+            ORDER BY ts.Descripcion
+        """
+        self._params_sacramentos = tuple(params_actual)
+
+    def specs(self):
+        return {
+            'perfil_sectores': QuerySpec(self._sql_sectores, self._params_sectores),
+            'perfil_sacramentos': QuerySpec(self._sql_sacramentos, self._params_sacramentos),
+        }
+
+    def completar(self, resultados):
+        """Arma los perfiles a partir de los resultados de ``specs()``"""
+        sacramentos = {}
+        for fila in resultados['perfil_sacramentos'] or []:
+            sacramentos.setdefault(fila['IdSector'], []).append({
+                'id': fila['IdSacramento'],
+                'sacramento': fila['sacramento'],
+                'total': fila['total'],
+            })
+
+        filas = resultados['perfil_sectores'] or []
+        total = sum(f['cantidad'] for f in filas)
+        perfiles = []
+        for fila in filas:
+            cantidad, anterior = fila['cantidad'], fila['cantidad_anterior']
+            del_sector = sacramentos.get(fila['IdSector'], [])
+            perfiles.append({
+                'id': fila['IdSector'],
+                'sector': fila['sector'],
+                'cantidad': cantidad,
+                'porcentaje': round(cantidad / total * 100, 2) if total else 0,
+                'cantidad_anterior': anterior,
+                'variacion': round((cantidad - anterior) / anterior * 100, 2) if anterior else 0,
+                'edad_promedio': round(float(fila['edad_promedio']), 1) if fila['edad_promedio'] else 0,
+                'familias': fila['familias'],
+                'con_impedimento': fila['con_impedimento'],
+                'con_sacramento': fila['con_sacramento'],
+                'sin_sacramento': cantidad - fila['con_sacramento'],
+                'sacramentos': del_sector,
+                'lista_sacramentos': ', '.join(s['sacramento'] for s in del_sector) or 'Ninguno',
+            })
+        perfiles.sort(key=lambda p: (-p['cantidad'], p['sector'] or ''))
+        return perfiles
+
+    def _resultados_columnares(self):
+        """Las mismas filas de ``specs()``, calculadas con el motor columnar"""
+        catalogos = batch_select({
+            'sectores': "SELECT IdSector, Descripcion FROM sector WHERE Activo = 1",
+            'sacramentos': "SELECT IdSacramento, Descripcion FROM tiposacramentos ORDER BY Descripcion",
+        }, tags=['sector', 'tiposacramentos'], ttl=300)
+        por_sector = demografia.perfil_por_sector(*self._periodos)
+        vacio = {'cantidad': 0, 'cantidad_anterior': 0, 'edad_promedio': None, 'familias': 0,
+                 'con_impedimento': 0, 'con_sacramento': 0, 'sacramentos': {}}
+
+        filas_sectores, filas_sacramentos = [], []
+        for sector in catalogos['sectores'] or []:
+            perfil = por_sector.get(sector['IdSector'], vacio)
+            filas_sectores.append({
+                'IdSector': sector['IdSector'],
+                'sector': sector['Descripcion'],
+                **{k: v for k, v in perfil.items() if k != 'sacramentos'}
+            })
+            filas_sacramentos.extend({
+                'IdSector': sector['IdSector'],
+                'IdSacramento': s['IdSacramento'],
+                'sacramento': s['Descripcion'],
+                'total': perfil['sacramentos'][s['IdSacramento']],
+            } for s in catalogos['sacramentos'] or [] if s['IdSacramento'] in perfil['sacramentos'])
+        return {'perfil_sectores': filas_sectores, 'perfil_sacramentos': filas_sacramentos}
+
+    def ejecutar(self):
+        """Retorna los perfiles: del motor columnar si está cargado, si no en un viaje a MySQL"""
+        if demografia.disponible():
+            return self.completar(self._resultados_columnares())
+        return self.completar(batch_select(self.specs()))
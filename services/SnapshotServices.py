@@ -0,0 +1,152 @@
+"""
+Snapshots de dashboards con stale-while-revalidate
+Guarda (uno por worker) el último resultado calculado para cada juego de
+filtros. Mientras el snapshot tiene menos de ``<PREFIJO>_SOFT_TTL`` segundos
+se sirve tal cual; entre el TTL blando y ``<PREFIJO>_HARD_TTL`` se sirve igual
+y se recalcula en un hilo aparte (uno por clave a la vez); pasado el TTL duro
+el request espera el cálculo. Así un administrador que recarga la página no
+dispara una consulta por recarga y la latencia no depende de las consultas.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """
+    Último valor calculado por clave, con refresco en segundo plano
+
+    Args:
+        nombre (str): Nombre para los logs y las estadísticas.
+        prefijo_config (str): Prefijo de ``_ENABLED``, ``_SOFT_TTL``,
+            ``_HARD_TTL`` y ``_MAX_ENTRIES`` en la configuración.
+    """
+
+    def __init__(self, nombre, prefijo_config):
+        self.nombre = nombre
+        self.prefijo = prefijo_config
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()     # clave -> (valor, generado_en, creado_monotonic)
+        self._calculando = {}           # clave -> Lock del cálculo en línea
+        self._refrescando = set()       # claves con un refresco en segundo plano
+        self._pid = None
+        self._max_entradas = 100
+        self.frescos = 0
+        self.vencidos = 0
+        self.calculos = 0
+        self.refrescos = 0
+        self.errores = 0
+
+    def _config(self, sufijo, defecto):
+        return current_app.config.get(f'{self.prefijo}_{sufijo}', defecto)
+
+    def _guardar(self, clave, valor):
+        generado_en = datetime.now(timezone.utc)
+        with self._lock:
+            self._datos[clave] = (valor, generado_en, time.monotonic())
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self._max_entradas:
+                viejo = next(iter(self._datos))
+                del self._datos[viejo]
+                self._calculando.pop(viejo, None)
+        return generado_en
+
+    def _refrescar(self, app, clave, calcular):
+        try:
+            inicio = time.perf_counter()
+            with app.app_context():
+                valor = calcular()
+            self._guardar(clave, valor)
+            logger.info(f"Snapshot {self.nombre} {clave} refrescado en {time.perf_counter() - inicio:.2f} s")
+        except Exception as e:
+            # Se sigue sirviendo el anterior hasta que venza el TTL duro
+            with self._lock:
+                self.errores += 1
+            logger.error(f"Error refrescando el snapshot {self.nombre} {clave}: {e}")
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+
+    def obtener(self, clave, calcular):
+        """
+        Retorna el snapshot de ``clave``, calculándolo con ``calcular()`` si hace falta
+
+        ``calcular`` puede correr en otro hilo (solo con contexto de
+        aplicación), así que no debe leer ``request``.
+
+        Returns:
+            tuple: ``(valor, generado_en)`` con ``generado_en`` en UTC.
+        """
+        if not self._config('ENABLED', True):
+            return calcular(), datetime.now(timezone.utc)
+
+        self._max_entradas = self._config('MAX_ENTRIES', 100)
+        soft_ttl = self._config('SOFT_TTL', 60)
+        hard_ttl = max(self._config('HARD_TTL', 600), soft_ttl)
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso nuevo (fork de un worker): no hay hilos de refresco heredados
+                self._pid = os.getpid()
+                self._refrescando.clear()
+                self._calculando.clear()
+            entrada = self._datos.get(clave)
+            edad = time.monotonic() - entrada[2] if entrada else None
+            lanzar = False
+            if entrada and edad < hard_ttl:
+                self._datos.move_to_end(clave)
+                self.frescos += edad < soft_ttl
+                self.vencidos += edad >= soft_ttl
+                if edad >= soft_ttl and clave not in self._refrescando:
+                    self._refrescando.add(clave)
+                    self.refrescos += 1
+                    lanzar = True
+            else:
+                entrada = None
+                candado = self._calculando.setdefault(clave, threading.Lock())
+
+        if entrada:
+            if lanzar:
+                threading.Thread(
+                    target=self._refrescar, args=(current_app._get_current_object(), clave, calcular),
+                    name=f'snapshot-{self.nombre}', daemon=True
+                ).start()
+            return entrada[0], entrada[1]
+
+        # Sin snapshot vigente: un solo request calcula, los demás lo esperan
+        with candado:
+            with self._lock:
+                entrada = self._datos.get(clave)
+                if entrada and time.monotonic() - entrada[2] < hard_ttl:
+                    return entrada[0], entrada[1]
+                self.calculos += 1
+            valor = calcular()
+            return valor, self._guardar(clave, valor)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def stats(self):
+        with self._lock:
+            ahora = time.monotonic()
+            return {
+                'entradas': len(self._datos),
+                'refrescando': len(self._refrescando),
+                'servidos_frescos': self.frescos,
+                'servidos_vencidos': self.vencidos,
+                'calculos_en_linea': self.calculos,
+                'refrescos': self.refrescos,
+                'errores_refresco': self.errores,
+                'edad_maxima_segundos': round(max((ahora - e[2] for e in self._datos.values()), default=0), 1),
+            }
+
+
+dashboard_snapshots = SnapshotCache('dashboard', 'DASHBOARD_SNAPSHOT')
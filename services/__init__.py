@@ -2,5 +2,20 @@
 Inicialización del módulo de servicios
 """
 from .AuthServices import AuthService
+from .SearchServices import habitante_index, HabitanteSearchIndex
+from .AutocompleteServices import autocomplete_index, AutocompleteIndex
+from .RollupServices import contribucion_rollup, actualizar_rollups, reconstruir_rollups
+from .SectorServices import PerfilSectores
+from .BitmapServices import sacramento_index, SacramentoBitmapIndex, Bitmap
+from .SnapshotServices import dashboard_snapshots, SnapshotCache
+from .DemografiaServices import demografia, DemografiaColumnar, restar_anios
+from .ReporteJobServices import reporte_jobs, ReporteJobs, ColaLlenaError
 
-__all__ = ['AuthService']
+__all__ = [
+    'AuthService', 'habitante_index', 'HabitanteSearchIndex',
+    'autocomplete_index', 'AutocompleteIndex',
+    'contribucion_rollup', 'actualizar_rollups', 'reconstruir_rollups',
+    'PerfilSectores', 'sacramento_index', 'SacramentoBitmapIndex', 'Bitmap',
+    'dashboard_snapshots', 'SnapshotCache', 'demografia', 'DemografiaColumnar', 'restar_anios',
+    'reporte_jobs', 'ReporteJobs', 'ColaLlenaError'
+]
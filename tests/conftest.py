@@ -0,0 +1,126 @@
+"""
+Configuración común de las pruebas
+Las pruebas no necesitan MySQL: ``pymysql.connect`` se reemplaza por una
+conexión falsa que registra las sentencias, los COMMIT y los ROLLBACK.
+"""
+import os
+import sys
+
+import pymysql
+import pytest
+from flask import Flask
+from pymysql.constants import SERVER_STATUS
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db, clear_query_cache  # noqa: E402
+
+
+class CursorFalso:
+    """Cursor que devuelve ``conexion.filas`` y anota cada sentencia"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.lastrowid = 0
+        self.rowcount = 0
+        self.sentencias = 0
+        self._filas = []
+
+    def execute(self, query, params=None):
+        if self.conexion.falla_con and self.conexion.falla_con in query:
+            raise pymysql.err.OperationalError(1064, 'error simulado')
+        self.conexion.sentencias.append((query, params))
+        self.conexion.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        self.sentencias += 1
+        self._filas = [dict(f) for f in self.conexion.filas]
+        self.rowcount = len(self._filas)
+        self.lastrowid = len(self.conexion.sentencias)
+        return self.rowcount
+
+    def executemany(self, query, filas):
+        filas = list(filas)
+        if not self.conexion.insert_multifila:
+            for params in filas:
+                self.execute(query, params)
+            return
+        # Como PyMySQL: un solo INSERT de varias filas con IDs consecutivos
+        self.execute(query, filas)
+        self.rowcount = len(filas)
+        self.lastrowid = 100
+
+    def fetchone(self):
+        return self._filas[0] if self._filas else None
+
+    def fetchall(self):
+        return self._filas
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    """Conexión PyMySQL mínima: ping, commit, rollback y cierre"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.open = True
+        self.server_status = 0
+        self.sentencias = []
+        self.filas = [{'x': 1}]
+        self.falla_con = None
+        self.insert_multifila = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.pings = 0
+
+    def cursor(self, cursorclass=None):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.commits += 1
+        self.server_status = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.open:
+            raise pymysql.err.OperationalError(2006, 'MySQL server has gone away')
+
+    def close(self):
+        self.open = False
+
+    def connect(self):
+        self.open = True
+
+
+@pytest.fixture
+def conexiones(monkeypatch):
+    """Lista de las conexiones falsas abiertas durante la prueba"""
+    abiertas = []
+
+    def conectar(**kwargs):
+        conexion = ConexionFalsa(**kwargs)
+        abiertas.append(conexion)
+        return conexion
+
+    monkeypatch.setattr(pymysql, 'connect', conectar)
+    return abiertas
+
+
+@pytest.fixture
+def app(conexiones):
+    """Aplicación Flask mínima con el pool de conexiones sobre conexiones falsas"""
+    aplicacion = Flask(__name__)
+    aplicacion.config.update(
+        TESTING=True,
+        MYSQL_HOST='localhost', MYSQL_USER='pruebas', MYSQL_PASSWORD='', MYSQL_DB='pruebas', MYSQL_PORT=3306,
+        DB_POOL_MAX_SIZE=3, DB_POOL_TIMEOUT=0.2,
+        DB_N_PLUS_ONE_THRESHOLD=0,
+    )
+    init_db(aplicacion)
+    clear_query_cache()
+    yield aplicacion
+    clear_query_cache()
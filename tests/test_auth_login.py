@@ -0,0 +1,160 @@
+"""
+Pruebas del bloqueo progresivo y de las escrituras del login por documento
+"""
+import math
+import re
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import services.AuthServices as auth_mod
+from config import Config
+from services.AuthServices import AuthService
+
+# Hash barato: las pruebas no miden PBKDF2
+HASH = generate_password_hash('Clave123!', method='pbkdf2:sha256:1000')
+
+
+def _minutos_sql(params, intentos):
+    """
+    Evalúa el CASE de ``register_failed_login`` para ``intentos`` (ya
+    incrementado) con los parámetros que recibió la consulta
+    """
+    maximo_intentos, maximo_minutos, base, multiplicador, desde, _ = params
+    if intentos < maximo_intentos:
+        return None
+    return min(maximo_minutos, math.floor(base * multiplicador ** (intentos - desde)))
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    capturadas = []
+    monkeypatch.setattr(auth_mod, 'execute_query', lambda query, params=None, **kw: capturadas.append((query, params)))
+    return capturadas
+
+
+@pytest.mark.parametrize('base, multiplicador, maximo', [(60, 1.5, 480), (15, 2, 10000), (7, 1.3, 100)])
+def test_bloqueo_sql_coincide_con_calculate_lock_duration(monkeypatch, consultas, base, multiplicador, maximo):
+    monkeypatch.setattr(Config, 'BASE_LOCK_DURATION_MINUTES', base)
+    monkeypatch.setattr(Config, 'LOCK_MULTIPLIER', multiplicador)
+    monkeypatch.setattr(Config, 'MAX_LOCK_DURATION_MINUTES', maximo)
+
+    AuthService.register_failed_login(42)
+    query, params = consultas[-1]
+
+    # La fórmula evaluada abajo es la que está en la consulta
+    assert re.search(r'LEAST\(%s,\s*FLOOR\(%s \* POW\(%s, login_attempts - %s\)\)\) MINUTE', query)
+    assert params[-1] == 42
+
+    for intentos in range(1, Config.MAX_LOGIN_ATTEMPTS):
+        assert _minutos_sql(params, intentos) is None
+    for bloqueos in range(12):
+        intentos = Config.MAX_LOGIN_ATTEMPTS + bloqueos
+        assert _minutos_sql(params, intentos) == AuthService.calculate_lock_duration(bloqueos)
+
+
+def test_calculate_lock_duration_respeta_el_maximo():
+    duraciones = [AuthService.calculate_lock_duration(n) for n in range(20)]
+
+    assert duraciones == sorted(duraciones)
+    assert duraciones[0] == Config.BASE_LOCK_DURATION_MINUTES
+    assert duraciones[-1] == Config.MAX_LOCK_DURATION_MINUTES
+
+
+@pytest.fixture
+def login(monkeypatch):
+    """Reemplaza las consultas del login y anota las escrituras"""
+    estado = {'usuario': None, 'escrituras': []}
+    monkeypatch.setattr(auth_mod.UserModel, 'get_login_user', staticmethod(lambda tipo, numero: estado['usuario']))
+    monkeypatch.setattr(AuthService, 'update_login_security_state', staticmethod(
+        lambda id_usuario, intentos, hasta: estado['escrituras'].append(('reset', id_usuario, intentos, hasta))
+    ))
+    monkeypatch.setattr(AuthService, 'register_failed_login', staticmethod(
+        lambda id_usuario: estado['escrituras'].append(('fallido', id_usuario))
+    ))
+    monkeypatch.setattr(AuthService, '_create_login_response', staticmethod(
+        lambda usuario: {'success': True, 'id': usuario['IdUsuario']}
+    ))
+    return estado
+
+
+def _usuario(**campos):
+    usuario = {
+        'IdUsuario': 7, 'Contraseña': HASH, 'Nombre': 'Ana', 'Apellido': 'Pérez',
+        'login_attempts': 0, 'locked_until': None, 'lock_expired': 0,
+        'ActivoUsuario': 1, 'ActivoHabitante': 1,
+    }
+    usuario.update(campos)
+    return usuario
+
+
+def test_login_exitoso_sin_intentos_no_escribe(login):
+    login['usuario'] = _usuario()
+
+    assert AuthService.login_by_document('1', '123', 'Clave123!') == {'success': True, 'id': 7}
+    assert login['escrituras'] == []
+
+
+def test_login_exitoso_con_intentos_previos_los_reinicia(login):
+    login['usuario'] = _usuario(login_attempts=2)
+
+    assert AuthService.login_by_document('1', '123', 'Clave123!')['success'] is True
+    assert login['escrituras'] == [('reset', 7, 0, None)]
+
+
+def test_login_exitoso_tras_bloqueo_vencido_lo_limpia(login):
+    login['usuario'] = _usuario(login_attempts=3, locked_until='2020-01-01 00:00:00', lock_expired=1)
+
+    assert AuthService.login_by_document('1', '123', 'Clave123!')['success'] is True
+    assert login['escrituras'] == [('reset', 7, 0, None)]
+
+
+def test_usuario_bloqueado_no_verifica_ni_escribe(login, monkeypatch):
+    login['usuario'] = _usuario(login_attempts=3, locked_until='2999-01-01 00:00:00')
+    monkeypatch.setattr(auth_mod.Security, 'check_password_hash', staticmethod(
+        lambda *args: pytest.fail('no debe verificar la contraseña de un usuario bloqueado')
+    ))
+
+    resultado = AuthService.login_by_document('1', '123', 'Clave123!')
+
+    assert resultado['locked'] is True
+    assert login['escrituras'] == []
+
+
+def test_contrasena_incorrecta_cuenta_el_intento(login):
+    login['usuario'] = _usuario(login_attempts=0)
+
+    resultado = AuthService.login_by_document('1', '123', 'otra')
+
+    assert login['escrituras'] == [('fallido', 7)]
+    assert resultado['attempts'] == 1
+    assert resultado['attempts_remaining'] == Config.MAX_LOGIN_ATTEMPTS - 1
+
+
+def test_ultimo_intento_informa_el_bloqueo(login):
+    login['usuario'] = _usuario(login_attempts=Config.MAX_LOGIN_ATTEMPTS - 1)
+
+    resultado = AuthService.login_by_document('1', '123', 'otra')
+
+    assert resultado['locked'] is True
+    assert f'{AuthService.calculate_lock_duration(0)} minutos' in resultado['message']
+    assert login['escrituras'] == [('fallido', 7)]
+
+
+def test_fallo_tras_bloqueo_vencido_vuelve_a_contar_desde_uno(login):
+    login['usuario'] = _usuario(login_attempts=5, locked_until='2020-01-01 00:00:00', lock_expired=1)
+
+    resultado = AuthService.login_by_document('1', '123', 'otra')
+
+    assert resultado['attempts'] == 1
+    assert 'locked' not in resultado
+
+
+def test_usuario_inexistente_o_inactivo(login):
+    assert AuthService.login_by_document('1', '123', 'Clave123!')['success'] is False
+
+    login['usuario'] = _usuario(ActivoHabitante=0)
+    resultado = AuthService.login_by_document('1', '123', 'Clave123!')
+
+    assert resultado['success'] is False
+    assert 'inactivo' in resultado['message']
@@ -0,0 +1,146 @@
+"""
+Pruebas del índice de autocompletado, de su respaldo SQL y de su refresco
+desde las rutas de habitantes
+"""
+import inspect
+import re
+
+import pytest
+
+import routes.autocomplete as autocomplete_routes
+import routes.habitantes as habitantes_routes
+import services.AutocompleteServices as autocomplete_mod
+from database import get_db_connection
+from services.AutocompleteServices import AutocompleteIndex
+
+GRUPOS = [
+    {'IdGrupoFamiliar': 1, 'NombreGrupo': 'Familia Pérez', 'Descripcion': 'Sector norte', 'Activo': 1,
+     'IdJefeFamilia': 10, 'JefeFamilia': 'Ana Pérez', 'Miembros': 4},
+    {'IdGrupoFamiliar': 2, 'NombreGrupo': 'Familia Peralta', 'Descripcion': None, 'Activo': 1,
+     'IdJefeFamilia': None, 'JefeFamilia': ' ', 'Miembros': 9},
+]
+PADRES = [
+    {'IdPadre': 5, 'Nombre': 'José', 'Apellido': 'Pardo', 'Activo': 1, 'Citas': 3},
+]
+
+
+@pytest.fixture
+def indice(app, monkeypatch):
+    def consultar(query, params=None, fetch_one=False, **kwargs):
+        filas = GRUPOS if 'FROM grupofamiliar' in query else PADRES
+        if fetch_one:
+            return next((dict(f) for f in filas if f['IdGrupoFamiliar'] == params[0]), None)
+        return [dict(f) for f in filas]
+
+    monkeypatch.setattr(autocomplete_mod, 'execute_query', consultar)
+    indice = AutocompleteIndex()
+    with app.app_context():
+        assert indice._esperar(5)
+        yield indice
+
+
+def test_sugerir_por_palabra_y_por_peso(indice):
+    resultados = indice.sugerir('pe', ('grupo',))
+
+    assert [r['id'] for r in resultados] == [2, 1]
+    assert [r['peso'] for r in resultados] == [9, 4]
+    assert resultados[0]['texto'] == 'Familia Peralta'
+
+
+def test_jefe_solo_si_el_grupo_tiene_jefe(indice):
+    assert [r['texto'] for r in indice.sugerir('ana', ('jefe',))] == ['Ana Pérez']
+    assert indice.sugerir('', ('jefe',)) == []
+
+
+def _columnas_select(query):
+    """Nombres (o alias) de las columnas del SELECT exterior"""
+    lista = query[query.index('SELECT') + len('SELECT'):]
+    partes, profundidad, inicio = [], 0, 0
+    for i, caracter in enumerate(lista):
+        if caracter == '(':
+            profundidad += 1
+        elif caracter == ')':
+            profundidad -= 1
+        elif profundidad == 0 and caracter == ',':
+            partes.append(lista[inicio:i])
+            inicio = i + 1
+        elif profundidad == 0 and re.match(r'\sFROM\s', lista[i:i + 6]):
+            partes.append(lista[inicio:i])
+            break
+    nombres = []
+    for parte in partes:
+        alias = re.search(r'\bAS\s+(\w+)$', parte.strip(), re.I)
+        nombres.append(alias.group(1) if alias else parte.strip().split('.')[-1])
+    return nombres
+
+
+@pytest.mark.parametrize('tipo', ['grupo', 'jefe', 'padre'])
+def test_respaldo_sql_devuelve_los_mismos_campos_que_el_indice(indice, monkeypatch, tipo):
+    def consultar(query, params=None, **kwargs):
+        # Una fila con exactamente las columnas que pide el SELECT
+        return [{nombre: 1 if nombre != 'texto' else 'x' for nombre in _columnas_select(query)}]
+
+    monkeypatch.setattr(autocomplete_routes, 'execute_query', consultar)
+    consulta = {'grupo': 'fam', 'jefe': 'ana', 'padre': 'jose'}[tipo]
+
+    desde_indice = indice.sugerir(consulta, (tipo,))
+    desde_sql = autocomplete_routes._sugerir_sql(consulta, (tipo,), 10)
+
+    assert desde_indice and desde_sql
+    assert set(desde_sql[0]) == set(desde_indice[0])
+
+
+def test_respaldo_sql_ordena_por_peso_entre_tipos(monkeypatch):
+    respuestas = {
+        "'grupo'": [{'tipo': 'grupo', 'texto': 'Familia Pardo', 'Miembros': 2}],
+        "'jefe'": [{'tipo': 'jefe', 'texto': 'Pablo Pardo', 'Miembros': 7}],
+        'FROM padre': [{'tipo': 'padre', 'texto': 'José Pardo', 'peso': 3}],
+    }
+    monkeypatch.setattr(autocomplete_routes, 'execute_query', lambda query, params=None, **kw: [
+        dict(f) for clave, filas in respuestas.items() if clave in query for f in filas
+    ])
+
+    resultados = autocomplete_routes._sugerir_sql('par', ('grupo', 'jefe', 'padre'), 2)
+
+    assert [(r['tipo'], r['peso']) for r in resultados] == [('jefe', 7), ('padre', 3)]
+
+
+@pytest.fixture
+def refrescos(monkeypatch):
+    """Grupos refrescados en el autocompletado por las rutas de habitantes"""
+    grupos = []
+
+    class Recolector:
+        def refrescar_grupo(self, id_grupo):
+            grupos.append(id_grupo)
+
+    class Nulo:
+        def refrescar(self, *args):
+            pass
+
+    monkeypatch.setattr(habitantes_routes, 'autocomplete_index', Recolector())
+    for nombre in ('habitante_index', 'sacramento_index', 'demografia'):
+        monkeypatch.setattr(habitantes_routes, nombre, Nulo())
+    monkeypatch.setattr(habitantes_routes, 'contribucion_rollup', lambda id_habitante: None)
+    monkeypatch.setattr(habitantes_routes, 'actualizar_rollups', lambda id_habitante, antes=None: None)
+    return grupos
+
+
+def test_cambio_de_grupo_refresca_el_anterior_y_el_nuevo(app, refrescos):
+    vista = inspect.unwrap(habitantes_routes.actualizar_habitante)
+    with app.test_request_context('/', method='PUT', json={'Nombre': 'Ana', 'IdGrupoFamiliar': '7'}):
+        get_db_connection().filas = [{'IdGrupoFamiliar': 3}]
+        _, estado = vista(1)
+
+    assert estado == 200
+    assert sorted(refrescos) == [3, 7]
+
+
+def test_desactivar_refresca_su_grupo(app, refrescos):
+    vista = inspect.unwrap(habitantes_routes.desactivar_habitante)
+    with app.test_request_context('/', method='PATCH'):
+        get_db_connection().filas = [{'IdGrupoFamiliar': 3}]
+        _, estado = vista(1)
+
+    assert estado == 200
+    assert refrescos == [3]
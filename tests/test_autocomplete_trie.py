@@ -0,0 +1,92 @@
+"""
+Pruebas del trie comprimido del autocompletado
+"""
+from services.AutocompleteServices import PrefixTrie
+
+
+def _trie(pesos, k=3):
+    """Trie cuyas claves se ordenan por peso descendente y luego por nombre"""
+    return PrefixTrie(lambda clave: (-pesos[clave], clave), k)
+
+
+def test_busca_por_prefijo_ordenado_por_peso():
+    pesos = {'perez': 5, 'peralta': 9, 'pena': 1, 'gomez': 7}
+    trie = _trie(pesos)
+    for clave in pesos:
+        trie.insertar(clave, clave)
+
+    assert trie.buscar('pe') == ['peralta', 'perez', 'pena']
+    assert trie.buscar('per') == ['peralta', 'perez']
+    assert trie.buscar('g') == ['gomez']
+    assert trie.buscar('x') == []
+    assert trie.buscar('perezz') == []
+
+
+def test_respeta_k_y_prefijo_vacio():
+    pesos = {f'n{i}': i for i in range(10)}
+    trie = _trie(pesos, k=3)
+    for clave in pesos:
+        trie.insertar(clave, clave)
+
+    assert trie.buscar('') == ['n9', 'n8', 'n7']
+    assert trie.buscar('n') == ['n9', 'n8', 'n7']
+
+
+def test_prefijo_dentro_de_una_arista():
+    pesos = {'familia perez': 1}
+    trie = _trie(pesos)
+    trie.insertar('familia perez', 'familia perez')
+
+    assert trie.buscar('fam') == ['familia perez']
+    assert trie.buscar('familia p') == ['familia perez']
+    assert trie.buscar('familia x') == []
+
+
+def test_varias_claves_con_el_mismo_texto():
+    pesos = {1: 2, 2: 8}
+    trie = _trie(pesos)
+    trie.insertar('lopez', 1)
+    trie.insertar('lopez', 2)
+
+    assert trie.buscar('lo') == [2, 1]
+    trie.quitar('lopez', 2)
+    assert trie.buscar('lo') == [1]
+
+
+def test_quitar_invalida_la_cache_y_une_aristas():
+    pesos = {'perez': 5, 'peralta': 9}
+    trie = _trie(pesos)
+    trie.insertar('perez', 'perez')
+    trie.insertar('peralta', 'peralta')
+    assert trie.buscar('pe') == ['peralta', 'perez']
+
+    trie.quitar('peralta', 'peralta')
+
+    assert trie.buscar('pe') == ['perez']
+    assert trie.buscar('peral') == []
+    # Sin el hermano, la arista partida vuelve a ser una sola
+    assert list(trie.raiz.hijos.values())[0][0] == 'perez'
+
+
+def test_quitar_texto_inexistente_no_falla():
+    pesos = {'perez': 1}
+    trie = _trie(pesos)
+    trie.insertar('perez', 'perez')
+    trie.quitar('gomez', 'gomez')
+    trie.quitar('pe', 'perez')
+
+    assert trie.buscar('p') == ['perez']
+
+
+def test_reinsertar_actualiza_el_orden():
+    pesos = {'a1': 1, 'a2': 2}
+    trie = _trie(pesos)
+    trie.insertar('ana', 'a1')
+    trie.insertar('andres', 'a2')
+    assert trie.buscar('an') == ['a2', 'a1']
+
+    trie.quitar('ana', 'a1')
+    pesos['a1'] = 10
+    trie.insertar('ana', 'a1')
+
+    assert trie.buscar('an') == ['a1', 'a2']
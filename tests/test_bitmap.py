@@ -0,0 +1,83 @@
+"""
+Pruebas de los bitmaps del índice de sacramentos, comparados con ``set``
+"""
+import random
+
+import pytest
+
+from services.BitmapServices import Bitmap
+
+# IDs repartidos en varios bloques de 65536, incluidos los bordes de bloque
+BORDES = [0, 1, 65535, 65536, 65537, 131071, 131072, 10 ** 6]
+
+
+@pytest.fixture
+def conjuntos():
+    azar = random.Random(7)
+    a = set(azar.sample(range(300000), 4000)) | set(BORDES[::2])
+    b = set(azar.sample(range(300000), 4000)) | set(BORDES[1::2])
+    return a, b
+
+
+def test_desde_y_agregar_son_equivalentes(conjuntos):
+    a, _ = conjuntos
+    uno_a_uno = Bitmap()
+    for i in a:
+        uno_a_uno.agregar(i)
+
+    assert list(Bitmap.desde(a)) == sorted(a)
+    assert list(uno_a_uno) == sorted(a)
+
+
+def test_operaciones_de_conjuntos(conjuntos):
+    a, b = conjuntos
+    ba, bb = Bitmap.desde(a), Bitmap.desde(b)
+
+    assert list(ba & bb) == sorted(a & b)
+    assert list(ba | bb) == sorted(a | b)
+    assert list(ba - bb) == sorted(a - b)
+    assert list(bb - ba) == sorted(b - a)
+    assert len(ba & bb) == len(a & b)
+    assert len(ba | bb) == len(a | b)
+
+
+def test_operaciones_no_modifican_los_operandos(conjuntos):
+    a, b = conjuntos
+    ba, bb = Bitmap.desde(a), Bitmap.desde(b)
+    _ = ba & bb, ba | bb, ba - bb
+
+    assert list(ba) == sorted(a)
+    assert list(bb) == sorted(b)
+
+
+def test_pertenencia_y_quitar():
+    bitmap = Bitmap.desde(BORDES)
+    for i in BORDES:
+        assert i in bitmap
+    assert 2 not in bitmap
+
+    bitmap.quitar(65536)
+    bitmap.quitar(65536)
+    bitmap.quitar(999)
+
+    assert 65536 not in bitmap
+    assert len(bitmap) == len(BORDES) - 1
+
+
+def test_bloques_vacios_se_eliminan():
+    bitmap = Bitmap.desde([70000])
+    bitmap.quitar(70000)
+    diferencia = Bitmap.desde([1, 70000]) - Bitmap.desde([70000])
+
+    assert len(bitmap) == 0 and list(bitmap) == []
+    assert bitmap._bloques == {}
+    assert diferencia._bloques.keys() == {0}
+
+
+def test_bitmap_vacio():
+    vacio = Bitmap()
+    otro = Bitmap.desde([5])
+
+    assert len(vacio & otro) == 0
+    assert list(vacio | otro) == [5]
+    assert list(otro - vacio) == [5]
@@ -0,0 +1,31 @@
+"""
+Pruebas de execute_many() y bulk_insert()
+"""
+from database import bulk_insert, execute_many, get_db_connection
+
+
+def test_execute_many_devuelve_ids_de_un_insert_multifila(app):
+    with app.app_context():
+        get_db_connection().insert_multifila = True
+        assert execute_many('INSERT INTO t (a) VALUES (%s)', [(1,), (2,), (3,)]) == range(100, 103)
+
+
+def test_execute_many_sin_ids_si_se_enviaron_varias_sentencias(app):
+    # Fila por fila, como PyMySQL al partir el INSERT o sin el patrón VALUES
+    with app.app_context():
+        assert execute_many('INSERT INTO t (a) VALUES (%s)', [(1,), (2,)]) == range(0)
+        assert execute_many('INSERT INTO t (a) VALUES (%s)', []) == range(0)
+
+
+def test_bulk_insert_parte_en_bloques_y_confirma_una_vez(app):
+    with app.app_context():
+        conexion = get_db_connection()
+        conexion.insert_multifila = True
+        filas = [(i, 'x') for i in range(5)]
+
+        rangos = bulk_insert('habitante_sacramento', ['IdHabitante', 'Nota'], filas, chunk_size=2)
+
+        assert rangos == [range(100, 102), range(100, 102), range(100, 101)]
+        assert [len(p) for _, p in conexion.sentencias] == [2, 2, 1]
+        assert conexion.sentencias[0][0] == 'INSERT INTO `habitante_sacramento` (`IdHabitante`, `Nota`) VALUES (%s, %s)'
+        assert conexion.commits == 1
@@ -0,0 +1,83 @@
+"""
+Pruebas del pool de conexiones
+"""
+import pytest
+
+from database import ConnectionPool, PoolTimeoutError, execute_query
+
+
+def _pool(**kwargs):
+    opciones = dict(min_size=1, max_size=2, timeout=0.05)
+    opciones.update(kwargs)
+    return ConnectionPool({}, **opciones)
+
+
+def test_pool_reutiliza_la_conexion_liberada(conexiones):
+    pool = _pool()
+    primera = pool.acquire()
+    pool.release(primera)
+    segunda = pool.acquire()
+
+    assert segunda is primera
+    assert len(conexiones) == 1
+    assert pool.metrics()['checkouts'] == 2
+
+
+def test_pool_lleno_lanza_timeout(conexiones):
+    pool = _pool(max_size=2)
+    pool.acquire()
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.metrics()['timeouts'] == 1
+    assert pool.metrics()['in_use'] == 2
+
+
+def test_pool_libera_cupo_al_devolver(conexiones):
+    pool = _pool(max_size=1)
+    conexion = pool.acquire()
+    pool.release(conexion)
+
+    assert pool.acquire() is conexion
+    assert pool.metrics()['in_use'] == 1
+
+
+def test_release_revierte_transaccion_abierta(conexiones):
+    pool = _pool()
+    conexion = pool.acquire()
+    conexion.cursor().execute('UPDATE t SET a = 1')
+    pool.release(conexion)
+
+    assert conexion.rollbacks == 1
+    assert pool.metrics()['idle'] == 1
+
+
+def test_release_con_discard_cierra_la_conexion(conexiones):
+    pool = _pool()
+    conexion = pool.acquire()
+    pool.release(conexion, discard=True)
+
+    assert not conexion.open
+    assert pool.metrics()['idle'] == 0
+    assert pool.metrics()['discarded'] == 1
+    assert pool.acquire() is not conexion
+
+
+def test_conexion_caida_se_reconecta_al_entregarla(conexiones):
+    pool = _pool()
+    conexion = pool.acquire()
+    pool.release(conexion)
+    conexion.open = False
+
+    assert pool.acquire() is conexion
+    assert conexion.open
+
+
+def test_conexion_vuelve_al_pool_al_cerrar_el_contexto(app, conexiones):
+    for _ in range(3):
+        with app.app_context():
+            execute_query('SELECT 1')
+
+    assert len(conexiones) == 1
+    assert app.extensions['db_pool'].metrics()['in_use'] == 0
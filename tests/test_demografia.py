@@ -0,0 +1,256 @@
+"""
+Pruebas del motor columnar de demografía contra la semántica de las consultas SQL
+
+Cada agregado del motor se compara con el mismo cálculo hecho fila por fila
+como lo haría MySQL (``TIMESTAMPDIFF(YEAR, ...)``, ``COUNT(DISTINCT ...)``,
+``FechaRegistro >= desde AND FechaRegistro < hasta + 1 día``).
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import services.DemografiaServices as demografia_mod  # noqa: E402
+from services.DemografiaServices import DemografiaColumnar  # noqa: E402
+
+HOY = date(2024, 2, 29)
+
+
+def _timestampdiff_anios(nacimiento, hoy):
+    """Años cumplidos como ``TIMESTAMPDIFF(YEAR, nacimiento, hoy)``"""
+    anios = hoy.year - nacimiento.year
+    if (hoy.month, hoy.day) < (nacimiento.month, nacimiento.day):
+        anios -= 1
+    return anios
+
+
+class TablaHabitantes:
+    """Filas de ``habitantes`` y ``habitante_sacramento`` detrás de execute_query"""
+
+    def __init__(self, n, semilla=11):
+        azar = random.Random(semilla)
+        self.filas, self.sacramentos = {}, {}
+        for i in range(1, n + 1):
+            self.filas[i] = self._fila(azar, i)
+            self.sacramentos[i] = set(azar.sample(range(1, 6), azar.choice([0, 0, 1, 2])))
+
+    @staticmethod
+    def _fila(azar, i):
+        nacimiento = None if azar.random() < 0.1 else date(1930, 1, 1) + timedelta(days=azar.randint(0, 34000))
+        registro = datetime(2023, 1, 1, 8) + timedelta(days=azar.randint(0, 420), hours=azar.randint(0, 15))
+        return {
+            'IdHabitante': i,
+            'FechaNacimiento': nacimiento,
+            'FechaRegistro': registro,
+            'IdSector': azar.choice([None, 1, 2, 3, 7]),
+            'IdSexo': azar.choice([1, 2]),
+            'IdEstadoCivil': azar.choice([None, 1, 2, 3]),
+            'IdReligion': azar.choice([1, 2]),
+            'IdGrupoFamiliar': azar.choice([None, *range(1, 40)]),
+            'TieneImpedimentoSalud': azar.choice([0, 0, 0, 1]),
+            'Hijos': azar.choice([None, 0, 1, 2, 3]),
+            'Activo': int(azar.random() > 0.15),
+        }
+
+    def execute_query(self, query, params=None, fetch_one=False, **kwargs):
+        if 'FROM habitante_sacramento' in query:
+            if params:
+                return [{'IdSacramento': s} for s in self.sacramentos.get(params[0], ())]
+            return [{'IdHabitante': h, 'IdSacramento': s} for h, sacs in self.sacramentos.items() for s in sacs]
+        if fetch_one:
+            fila = self.filas.get(params[0])
+            return dict(fila) if fila else None
+        return [dict(self.filas[i]) for i in sorted(self.filas)]
+
+    # ---------- referencia con la semántica SQL ----------
+
+    def activos(self, desde=None, hasta=None, sector=None, sacramento=None, con_sacramento=None,
+                edad_min=None, edad_max=None, hoy=HOY):
+        for fila in self.filas.values():
+            if not fila['Activo']:
+                continue
+            if desde and not fila['FechaRegistro'] >= datetime.combine(desde, datetime.min.time()):
+                continue
+            if hasta and not fila['FechaRegistro'] < datetime.combine(hasta + timedelta(days=1), datetime.min.time()):
+                continue
+            if sector and fila['IdSector'] != sector:
+                continue
+            sacs = self.sacramentos[fila['IdHabitante']]
+            if sacramento and sacramento not in sacs:
+                continue
+            if con_sacramento is not None and bool(sacs) != con_sacramento:
+                continue
+            edad = self.edad(fila, hoy)
+            if edad_min is not None and (edad is None or edad < edad_min):
+                continue
+            if edad_max is not None and (edad is None or edad > edad_max):
+                continue
+            yield fila
+
+    @staticmethod
+    def edad(fila, hoy=HOY):
+        return _timestampdiff_anios(fila['FechaNacimiento'], hoy) if fila['FechaNacimiento'] else None
+
+    def resumen(self, **filtros):
+        filas = list(self.activos(**filtros))
+        edades = [self.edad(f) for f in filas if f['FechaNacimiento']]
+        con_sacramento = sum(bool(self.sacramentos[f['IdHabitante']]) for f in filas)
+        return {
+            'total': len(filas),
+            'con_sacramento': con_sacramento,
+            'sin_sacramento': len(filas) - con_sacramento,
+            'con_impedimento': sum(f['TieneImpedimentoSalud'] == 1 for f in filas),
+            'familias': len({f['IdGrupoFamiliar'] for f in filas if f['IdGrupoFamiliar']}),
+            'hijos': sum(f['Hijos'] or 0 for f in filas),
+            'edad_promedio': sum(edades) / len(edades) if edades else None,
+            'edad_minima': min(edades) if edades else None,
+            'edad_maxima': max(edades) if edades else None,
+        }
+
+
+@pytest.fixture
+def tabla(monkeypatch):
+    tabla = TablaHabitantes(600)
+    monkeypatch.setattr(demografia_mod, 'execute_query', tabla.execute_query)
+    return tabla
+
+
+@pytest.fixture
+def motor(app, tabla):
+    app.config['DEMOGRAFIA_WAIT_SECONDS'] = 5
+    motor = DemografiaColumnar()
+    with app.app_context():
+        assert motor.disponible()
+        yield motor
+
+
+def _comparar(motor, tabla, **filtros):
+    obtenido = motor.resumen(hoy=HOY, **filtros)
+    esperado = tabla.resumen(**filtros)
+    assert obtenido.pop('edad_promedio') == pytest.approx(esperado.pop('edad_promedio'))
+    assert obtenido == esperado
+
+
+@pytest.mark.parametrize('filtros', [
+    {},
+    {'desde': date(2023, 6, 1), 'hasta': date(2023, 12, 31)},
+    {'hasta': date(2023, 3, 15)},
+    {'sector': 2},
+    {'sacramento': 3},
+    {'con_sacramento': False},
+    {'edad_min': 18, 'edad_max': 29},
+    {'edad_min': 24},
+    {'sector': 7, 'con_sacramento': True, 'desde': date(2023, 9, 1)},
+])
+def test_resumen_coincide_con_sql(motor, tabla, filtros):
+    _comparar(motor, tabla, **filtros)
+
+
+@pytest.mark.parametrize('hoy, esperadas', [
+    (date(2024, 2, 29), [24, 34, 33]),
+    (date(2023, 2, 28), [22, 33, 32]),
+    (date(2023, 3, 1), [23, 33, 33]),
+])
+def test_edad_exacta_en_cumpleanos_y_29_de_febrero(app, monkeypatch, hoy, esperadas):
+    tabla = TablaHabitantes(3)
+    nacimientos = (date(2000, 2, 29), date(1990, 2, 28), date(1990, 3, 1))
+    for id_habitante, nacimiento in enumerate(nacimientos, start=1):
+        tabla.filas[id_habitante].update(FechaNacimiento=nacimiento, Activo=1)
+    monkeypatch.setattr(demografia_mod, 'execute_query', tabla.execute_query)
+    motor = DemografiaColumnar()
+
+    assert [tabla.edad(tabla.filas[i], hoy) for i in (1, 2, 3)] == esperadas
+    with app.app_context():
+        assert motor._esperar(5)
+        for edad in set(esperadas):
+            assert motor.resumen(hoy=hoy, edad_min=edad, edad_max=edad)['total'] == esperadas.count(edad)
+
+
+def test_conteos_agrupados_coinciden_con_group_by(motor, tabla):
+    esperado = {}
+    for fila in tabla.activos():
+        esperado[fila['IdSector'] or 0] = esperado.get(fila['IdSector'] or 0, 0) + 1
+
+    assert motor.contar_por('sector', hoy=HOY) == esperado
+
+
+def test_rangos_de_edad(motor, tabla):
+    limites = [13, 30, 60]
+    rangos, sin_fecha = motor.por_rango_edad(limites, hoy=HOY)
+
+    filas = list(tabla.activos())
+    assert sin_fecha == sum(f['FechaNacimiento'] is None for f in filas)
+    cortes = [None, *limites, None]
+    for i, rango in enumerate(rangos):
+        en_rango = [
+            e for e in (tabla.edad(f) for f in filas if f['FechaNacimiento'])
+            if (cortes[i] is None or e >= cortes[i]) and (cortes[i + 1] is None or e < cortes[i + 1])
+        ]
+        assert rango['cantidad'] == len(en_rango)
+
+
+def test_perfil_por_sector_coincide_con_perfil_sectores(motor, tabla):
+    desde, hasta = date(2023, 7, 1), date(2023, 12, 31)
+    desde_ant, hasta_ant = date(2023, 1, 1), date(2023, 6, 30)
+    perfil = motor.perfil_por_sector(desde, hasta, desde_ant, hasta_ant, hoy=HOY)
+
+    for sector in (0, 1, 2, 3, 7):
+        actuales = [f for f in tabla.activos(desde=desde, hasta=hasta) if (f['IdSector'] or 0) == sector]
+        anteriores = [f for f in tabla.activos(desde=desde_ant, hasta=hasta_ant) if (f['IdSector'] or 0) == sector]
+        edades = [tabla.edad(f) for f in actuales if f['FechaNacimiento']]
+        obtenido = perfil[sector]
+
+        assert obtenido['cantidad'] == len(actuales)
+        assert obtenido['cantidad_anterior'] == len(anteriores)
+        assert obtenido['familias'] == len({f['IdGrupoFamiliar'] for f in actuales if f['IdGrupoFamiliar']})
+        assert obtenido['con_impedimento'] == sum(f['TieneImpedimentoSalud'] == 1 for f in actuales)
+        assert obtenido['edad_promedio'] == pytest.approx(sum(edades) / len(edades) if edades else None)
+        for s in range(1, 6):
+            total = sum(s in tabla.sacramentos[f['IdHabitante']] for f in actuales)
+            assert obtenido['sacramentos'].get(s, 0) == total
+
+
+def test_refrescar_mantiene_el_motor_igual_a_sql(motor, tabla):
+    azar = random.Random(5)
+    for id_habitante in azar.sample(range(1, 601), 40):
+        tabla.filas[id_habitante] = TablaHabitantes._fila(azar, id_habitante)
+        tabla.sacramentos[id_habitante] = {azar.randint(1, 8)}
+        motor.refrescar(id_habitante)
+    # Altas con IDs nuevos (al final y en un hueco) y un sacramento nuevo
+    for id_habitante in (700, 650):
+        tabla.filas[id_habitante] = dict(TablaHabitantes._fila(azar, id_habitante), Activo=1)
+        tabla.sacramentos[id_habitante] = {9}
+        motor.refrescar(id_habitante)
+
+    _comparar(motor, tabla)
+    _comparar(motor, tabla, sacramento=9)
+    _comparar(motor, tabla, sacramento=8, sector=2)
+
+
+def test_verificar_contra_los_agregados_sql(motor, tabla, monkeypatch):
+    hoy = date.today()
+    filas = list(tabla.activos(hoy=hoy))
+    agregados = {
+        'total': len(filas),
+        'suma_edades': sum(tabla.edad(f, hoy) for f in filas if f['FechaNacimiento']),
+        'con_fecha': sum(f['FechaNacimiento'] is not None for f in filas),
+        'con_impedimento': sum(f['TieneImpedimentoSalud'] == 1 for f in filas),
+        'hijos': sum(f['Hijos'] or 0 for f in filas),
+        'familias': len({f['IdGrupoFamiliar'] for f in filas if f['IdGrupoFamiliar']}),
+        'con_sacramento': sum(bool(tabla.sacramentos[f['IdHabitante']]) for f in filas),
+    }
+    por_sector = {}
+    for f in filas:
+        por_sector[f['IdSector']] = por_sector.get(f['IdSector'], 0) + 1
+
+    monkeypatch.setattr(demografia_mod, 'execute_query', lambda query, params=None, fetch_one=False, **kw: (
+        dict(agregados) if fetch_one else [{'IdSector': s, 'total': n} for s, n in por_sector.items()]
+    ))
+    resultado = motor.verificar()
+
+    assert resultado['coincide'], resultado['diferencias']
+
+    agregados['total'] += 1
+    assert motor.verificar()['diferencias'] == {'total': [len(filas), len(filas) + 1]}
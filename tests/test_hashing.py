@@ -0,0 +1,129 @@
+"""
+Pruebas del pool de hash de contraseñas: cola acotada y 503 con Retry-After
+"""
+import importlib
+import inspect
+import threading
+import time
+
+import pytest
+from werkzeug.security import check_password_hash
+
+import routes.AuthRoutes as auth_routes
+import routes.usuarios as usuarios_routes
+import services.AuthServices as auth_services
+from utils.hashing import HashingBusyError, PasswordHasher, RETRY_AFTER_SEGUNDOS
+
+# ``utils.Security`` como atributo del paquete es la clase; aquí se necesita el módulo
+security_mod = importlib.import_module('utils.Security')
+
+
+@pytest.fixture
+def hasher(app):
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_TIMEOUT=10)
+    hasher = PasswordHasher()
+    with app.app_context():
+        yield hasher
+    if hasher._executor:
+        hasher._executor.shutdown(wait=True)
+
+
+def test_hash_y_verificacion_en_el_pool(hasher):
+    hash_ = hasher.hash('Clave123!')
+
+    assert hash_.startswith('pbkdf2:sha256')
+    assert check_password_hash(hash_, 'Clave123!')
+    assert hasher.verify(hash_, 'Clave123!') is True
+    assert hasher.verify(hash_, 'otra') is False
+    assert hasher.stats()['ejecutados'] == 3
+    assert hasher.stats()['activo']
+
+
+def test_sin_workers_o_sin_contexto_se_ejecuta_en_el_hilo(app):
+    hasher = PasswordHasher()
+    hash_ = hasher.hash('Clave123!')
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    with app.app_context():
+        assert hasher.verify(hash_, 'Clave123!')
+
+    assert hasher._executor is None
+    assert hasher.stats()['ejecutados'] == 0
+
+
+def test_cola_llena_rechaza_de_inmediato(app, hasher):
+    ocupado = threading.Thread(target=lambda: _en_contexto(app, hasher._ejecutar, time.sleep, 0.5))
+    ocupado.start()
+    _esperar(lambda: hasher._cupos is not None and hasher._cupos._value == 0)
+
+    inicio = time.perf_counter()
+    with pytest.raises(HashingBusyError):
+        hasher.hash('Clave123!')
+
+    assert time.perf_counter() - inicio < 0.1
+    assert hasher.stats()['rechazados'] == 1
+    ocupado.join(5)
+    # Terminado el anterior, el cupo vuelve a estar libre
+    assert hasher.verify(hasher.hash('Clave123!'), 'Clave123!')
+
+
+def test_espera_maxima_responde_ocupado_y_libera_el_cupo_al_terminar(app, hasher):
+    app.config['PASSWORD_HASH_TIMEOUT'] = 0.05
+
+    with pytest.raises(HashingBusyError):
+        hasher._ejecutar(time.sleep, 0.3)
+
+    _esperar(lambda: hasher._cupos._value == 1)
+    assert hasher.stats()['rechazados'] == 1
+
+
+def _en_contexto(app, funcion, *args):
+    with app.app_context():
+        funcion(*args)
+
+
+def _esperar(condicion, segundos=5):
+    limite = time.monotonic() + segundos
+    while not condicion() and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert condicion()
+
+
+# ---------- rutas ----------
+
+@pytest.fixture
+def ocupado(monkeypatch):
+    """El pool siempre lleno"""
+    class Lleno:
+        def hash(self, *args):
+            raise HashingBusyError('Servidor ocupado, intente de nuevo en unos segundos')
+
+        verify = hash
+
+    monkeypatch.setattr(security_mod, 'password_hasher', Lleno())
+
+
+def _esperar_503(respuesta):
+    cuerpo, estado, cabeceras = respuesta
+    assert estado == 503
+    assert cabeceras['Retry-After'] == str(RETRY_AFTER_SEGUNDOS)
+    assert cuerpo.get_json()['success'] is False
+
+
+def test_login_responde_503(app, ocupado, monkeypatch):
+    monkeypatch.setattr(auth_services.UserModel, 'get_login_user', staticmethod(lambda tipo, numero: {
+        'IdUsuario': 7, 'Contraseña': 'pbkdf2:sha256:1000$x$y', 'login_attempts': 0, 'locked_until': None,
+        'lock_expired': 0, 'ActivoUsuario': 1, 'ActivoHabitante': 1,
+    }))
+    monkeypatch.setattr(auth_services.AuthService, 'register_failed_login', staticmethod(
+        lambda id_usuario: pytest.fail('un rechazo por carga no cuenta como intento fallido')
+    ))
+    datos = {'document_type': '1', 'document_number': '123', 'password': 'Clave123!'}
+    with app.test_request_context('/', method='POST', json=datos):
+        _esperar_503(auth_routes.login())
+
+
+def test_cambiar_contrasena_responde_503(app, ocupado, monkeypatch):
+    monkeypatch.setattr(usuarios_routes, 'execute_query', lambda *args, **kwargs: pytest.fail('no debe escribir'))
+    vista = inspect.unwrap(usuarios_routes.cambiar_contraseña)
+    with app.test_request_context('/', method='PATCH', json={'password': 'Clave123!'}):
+        _esperar_503(vista(7))
@@ -0,0 +1,38 @@
+"""
+Pruebas del detector de N+1 por request
+"""
+import pytest
+
+from database import NPlusOneError, allow_repeated_queries, execute_query, get_db_connection
+
+
+def test_n_mas_uno_se_detecta_antes_de_escribir(app):
+    app.config.update(DB_N_PLUS_ONE_THRESHOLD=2, DB_N_PLUS_ONE_RAISE=True)
+    with app.test_request_context('/'):
+        conexion = get_db_connection()
+
+        with pytest.raises(NPlusOneError):
+            for i in range(3):
+                execute_query('UPDATE t SET a = 1 WHERE id = %s', (i,))
+
+        assert len(conexion.sentencias) == 2
+        assert conexion.commits == 2
+
+
+def test_n_mas_uno_permitido_dentro_de_allow_repeated_queries(app):
+    app.config.update(DB_N_PLUS_ONE_THRESHOLD=2, DB_N_PLUS_ONE_RAISE=True)
+    with app.test_request_context('/'):
+        with allow_repeated_queries():
+            for i in range(5):
+                execute_query('SELECT a FROM t WHERE id = %s', (i,))
+
+        assert len(get_db_connection().sentencias) == 5
+
+
+def test_n_mas_uno_solo_registra_sin_raise(app):
+    app.config.update(DB_N_PLUS_ONE_THRESHOLD=2, DB_N_PLUS_ONE_RAISE=False)
+    with app.test_request_context('/'):
+        for i in range(4):
+            execute_query('SELECT a FROM t WHERE id = %s', (i,))
+
+        assert len(get_db_connection().sentencias) == 4
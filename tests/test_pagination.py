@@ -0,0 +1,180 @@
+"""
+Pruebas de la paginación por clave (cursores y consulta de cada página)
+"""
+import base64
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from database import get_db_connection
+from routes.citas import listar_citas
+from routes.movimientos import listar_movimientos
+from routes.tareas import listar_asignaciones
+from utils.pagination import (
+    PaginationError, _codificar_cursor, _condicion_keyset, _decodificar_cursor, paginar
+)
+
+ORDEN = [
+    ("COALESCE(m.FechaMovimiento, '0001-01-01')", '_FechaOrden', 'DESC'),
+    ('m.IdMovimiento', 'IdMovimiento', 'DESC'),
+]
+
+
+def test_cursor_ida_y_vuelta():
+    fila = {'_FechaOrden': date(2024, 3, 1), 'IdMovimiento': 41, 'Valor': Decimal('10.5')}
+    cursor = _codificar_cursor(fila, ORDEN)
+
+    assert '=' not in cursor
+    assert _decodificar_cursor(cursor, ORDEN) == ['2024-03-01', 41]
+
+
+def test_cursor_serializa_horas_y_decimales_como_texto():
+    orden = [('ac.Hora', '_HoraOrden', 'DESC'), ('x.Monto', 'Monto', 'ASC'), ('x.Id', 'Id', 'ASC')]
+    fila = {'_HoraOrden': timedelta(hours=9, minutes=5), 'Monto': Decimal('2.50'), 'Id': 3}
+
+    assert _decodificar_cursor(_codificar_cursor(fila, orden), orden) == ['9:05:00', '2.50', 3]
+
+
+def test_cursor_de_otro_listado_se_rechaza():
+    cursor = _codificar_cursor({'_FechaOrden': '2024-03-01', 'IdMovimiento': 41}, ORDEN)
+    otro_orden = [('h.IdHabitante', 'IdHabitante', 'DESC'), ('h.Nombre', 'Nombre', 'ASC')]
+
+    with pytest.raises(PaginationError):
+        _decodificar_cursor(cursor, otro_orden)
+
+
+@pytest.mark.parametrize('cursor', [
+    'no-es-base64!!',
+    base64.urlsafe_b64encode(b'[1, 2]').decode(),
+    base64.urlsafe_b64encode(b'{"o": 1}').decode(),
+])
+def test_cursor_malformado_se_rechaza(cursor):
+    with pytest.raises(PaginationError):
+        _decodificar_cursor(cursor, ORDEN)
+
+
+def test_cursor_con_valor_nulo_se_rechaza():
+    valido = json.loads(base64.urlsafe_b64decode(
+        _codificar_cursor({'_FechaOrden': '2024-03-01', 'IdMovimiento': 41}, ORDEN) + '=='
+    ))
+    valido['k'][0] = None
+    cursor = base64.urlsafe_b64encode(json.dumps(valido).encode()).decode()
+
+    with pytest.raises(PaginationError):
+        _decodificar_cursor(cursor, ORDEN)
+
+
+def test_condicion_keyset_respeta_la_direccion():
+    orden = [('a', 'a', 'DESC'), ('b', 'b', 'ASC'), ('c', 'c', 'ASC')]
+    condicion, params = _condicion_keyset(orden, [1, 2, 3])
+
+    assert condicion == '((a < %s) OR (a = %s AND b > %s) OR (a = %s AND b = %s AND c > %s))'
+    assert params == [1, 1, 2, 1, 2, 3]
+
+
+def _filas(n):
+    return [{'IdPadre': i, '_NombreOrden': f'n{i}'} for i in range(1, n + 1)]
+
+
+def _paginar():
+    return paginar(
+        'IdPadre', 'FROM padre', ['Activo = 1'], [],
+        orden=[("COALESCE(Nombre, '')", '_NombreOrden', 'ASC'), ('IdPadre', 'IdPadre', 'ASC')],
+        completo_por_defecto=True
+    )
+
+
+def test_paginar_pide_una_fila_de_mas_y_quita_claves_ocultas(app):
+    app.config['PAGINATION_DEFAULT_PAGE_SIZE'] = 2
+    with app.test_request_context('/?page_size=2'):
+        get_db_connection().filas = _filas(3)
+        filas, paginacion = _paginar()
+        query, params = get_db_connection().sentencias[-1]
+
+    assert 'LIMIT %s' in query
+    assert params == (3,)
+    assert filas == [{'IdPadre': 1}, {'IdPadre': 2}]
+    assert paginacion['has_more'] is True
+    assert _decodificar_cursor(paginacion['next_cursor'], [
+        ("COALESCE(Nombre, '')", '_NombreOrden', 'ASC'), ('IdPadre', 'IdPadre', 'ASC')
+    ]) == ['n2', 2]
+
+
+def test_paginar_con_cursor_agrega_la_condicion(app):
+    orden = [("COALESCE(Nombre, '')", '_NombreOrden', 'ASC'), ('IdPadre', 'IdPadre', 'ASC')]
+    cursor = _codificar_cursor({'_NombreOrden': 'n2', 'IdPadre': 2}, orden)
+    with app.test_request_context(f'/?cursor={cursor}'):
+        get_db_connection().filas = _filas(1)
+        _, paginacion = _paginar()
+        query, params = get_db_connection().sentencias[-1]
+
+    assert "COALESCE(Nombre, '') > %s" in query
+    assert params == ('n2', 'n2', 2, 51)
+    assert paginacion['has_more'] is False
+    assert paginacion['next_cursor'] is None
+
+
+def test_catalogo_sin_parametros_devuelve_la_lista_completa(app):
+    with app.test_request_context('/'):
+        get_db_connection().filas = _filas(120)
+        filas, paginacion = _paginar()
+        query, _ = get_db_connection().sentencias[-1]
+
+    assert 'LIMIT' not in query
+    assert len(filas) == 120
+    assert paginacion == {'page_size': None, 'next_cursor': None, 'has_more': False}
+
+
+@pytest.mark.parametrize('args', ['page_size=0', 'page_size=x', 'cursor=zzz'])
+def test_parametros_invalidos(app, args):
+    with app.test_request_context(f'/?{args}'):
+        with pytest.raises(PaginationError):
+            _paginar()
+
+
+def test_page_size_se_limita_al_maximo(app):
+    app.config['PAGINATION_MAX_PAGE_SIZE'] = 10
+    with app.test_request_context('/?page_size=500'):
+        _, paginacion = _paginar()
+        _, params = get_db_connection().sentencias[-1]
+
+    assert paginacion['page_size'] == 10
+    assert params == (11,)
+
+
+# Listados cuya fecha admite NULL: (vista sin jwt_required, lista en el JSON, fila, clave oculta)
+LISTADOS_CON_FECHA_NULA = [
+    (listar_movimientos.__wrapped__, lambda r: r['movimientos'],
+     {'IdMovimiento': 5, 'FechaMovimiento': None, '_FechaOrden': '0001-01-01'},
+     "COALESCE(m.FechaMovimiento, '0001-01-01')"),
+    (listar_citas.__wrapped__, lambda r: r['citas'],
+     {'IdAsignacionCita': 5, 'Fecha': None, '_FechaOrden': '0001-01-01', '_HoraOrden': '00:00:00'},
+     "COALESCE(ac.Fecha, '0001-01-01')"),
+    (listar_asignaciones.__wrapped__, lambda r: r['data']['asignaciones'],
+     {'IdAsignacionTarea': 5, 'FechaAsignacion': None, '_FechaOrden': '0001-01-01'},
+     "COALESCE(at.FechaAsignacion, '0001-01-01')"),
+]
+
+
+@pytest.mark.parametrize('vista, lista, fila, expresion', LISTADOS_CON_FECHA_NULA)
+def test_fila_con_fecha_nula_continua_en_la_pagina_siguiente(app, vista, lista, fila, expresion):
+    with app.test_request_context('/?page_size=1'):
+        get_db_connection().filas = [fila, fila]
+        respuesta, estado = vista()
+        cuerpo = respuesta.get_json()
+
+    assert estado == 200
+    assert all(not k.startswith('_') for k in lista(cuerpo)[0])
+    cursor = (cuerpo.get('paginacion') or cuerpo['data']['paginacion'])['next_cursor']
+    assert cursor
+
+    with app.test_request_context(f'/?page_size=1&cursor={cursor}'):
+        get_db_connection().filas = []
+        respuesta, estado = vista()
+        query, params = get_db_connection().sentencias[-1]
+
+    assert estado == 200
+    assert f'({expresion} < %s)' in query
+    assert params[0] == '0001-01-01'
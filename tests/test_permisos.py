@@ -0,0 +1,269 @@
+"""
+Pruebas de la caché de permisos efectivos, de require_rol con permisos y
+de los permisos en el token (``perms`` y ``perm_version``)
+"""
+import pytest
+from flask import jsonify
+
+import utils.auth_utils as auth_mod
+from database.cache import invalidate_tags
+from utils.auth_utils import PermisoResolver, require_rol
+
+
+class BaseFalsa:
+    """Usuarios, roles y permisos detrás de execute_query"""
+
+    def __init__(self):
+        self.roles = {1: 'Admin', 2: 'Usuario', 3: 'Usuario'}
+        self.directos = {2: {'crear_tarea'}}
+        self.por_rol = {'Admin': {'crear_tarea', 'eliminar_habitante'}, 'Usuario': {'ver_reportes'}}
+        self.ids = {'crear_tarea': 3, 'eliminar_habitante': 9, 'ver_reportes': 12}
+        self.version = 1     # None: sin la tabla permisos_version
+        self.consultas = []
+
+    def execute_query(self, query, params=None, fetch_one=False, **kwargs):
+        if 'FROM usuario_permisos' in query:
+            self.consultas.append(('permisos', params[0]))
+            id_usuario = int(params[0])
+            nombres = self.directos.get(id_usuario, set()) | self.por_rol.get(self.roles.get(id_usuario), set())
+            return [{'nombre': n} for n in sorted(nombres)]
+        if 'AS rol' in query:
+            self.consultas.append(('rol', params[0]))
+            rol = self.roles.get(int(params[0]))
+            return {'rol': rol} if rol else None
+        if 'permisos_version' in query:
+            if self.version is None:
+                raise RuntimeError("Table 'permisos_version' doesn't exist")
+            if query.startswith('UPDATE'):
+                self.version += 1
+                return 1
+            return {'Version': self.version}
+        if 'FROM permisos' in query:
+            return [{'id_permiso': i, 'nombre': n} for n, i in self.ids.items()]
+        raise AssertionError(f'consulta inesperada: {query}')
+
+
+class RelojFalso:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def base(monkeypatch):
+    base = BaseFalsa()
+    monkeypatch.setattr(auth_mod, 'execute_query', base.execute_query)
+    return base
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = RelojFalso()
+    monkeypatch.setattr(auth_mod, 'time', reloj)
+    return reloj
+
+
+@pytest.fixture
+def resolver(app, base, reloj, monkeypatch):
+    resolver = PermisoResolver()
+    monkeypatch.setattr(auth_mod, 'resolver_permisos', resolver)
+    with app.app_context():
+        yield resolver
+
+
+def test_una_consulta_por_usuario_mientras_dure_la_cache(resolver, base):
+    for _ in range(5):
+        assert resolver.permisos(2) == {'crear_tarea', 'ver_reportes'}
+    assert resolver.permisos('2') == {'crear_tarea', 'ver_reportes'}
+
+    assert base.consultas == [('permisos', 2)]
+    assert resolver.stats()['hits'] == 5
+
+
+def test_invalidar_un_usuario_o_todos(resolver, base):
+    resolver.permisos(1)
+    resolver.permisos(2)
+
+    base.por_rol['Admin'] = {'crear_tarea'}
+    resolver.invalidar(1)
+    assert resolver.permisos(1) == {'crear_tarea'}
+    resolver.permisos(2)
+    assert base.consultas.count(('permisos', 2)) == 1
+
+    resolver.invalidar()
+    resolver.permisos(2)
+    assert base.consultas.count(('permisos', 2)) == 2
+
+
+@pytest.mark.parametrize('tabla', ['usuario_permisos', 'tipo_usuario_permisos', 'tipousuario', 'permisos'])
+def test_escritura_en_las_tablas_de_permisos_recarga(resolver, base, tabla):
+    resolver.permisos(2)
+    base.directos[2] = set()
+
+    invalidate_tags([tabla])
+
+    assert resolver.permisos(2) == {'ver_reportes'}
+    assert len(base.consultas) == 2
+
+
+def test_escritura_en_otra_tabla_no_recarga(resolver, base):
+    resolver.permisos(2)
+    invalidate_tags(['habitantes'])
+    resolver.permisos(2)
+
+    assert len(base.consultas) == 1
+
+
+def test_ttl(app, resolver, base, reloj):
+    app.config['PERMISOS_CACHE_TTL'] = 60
+    resolver.permisos(2)
+    reloj.ahora += 59
+    resolver.permisos(2)
+    reloj.ahora += 2
+    resolver.permisos(2)
+
+    assert len(base.consultas) == 2
+
+
+def test_limite_de_usuarios_descarta_el_menos_usado(app, resolver, base):
+    app.config['PERMISOS_CACHE_MAX_USERS'] = 2
+    resolver.permisos(1)
+    resolver.permisos(2)
+    resolver.permisos(1)
+    resolver.permisos(3)     # sale el 2
+
+    resolver.permisos(1)
+    resolver.permisos(2)
+
+    assert base.consultas == [('permisos', 1), ('permisos', 2), ('permisos', 3), ('permisos', 2)]
+    assert resolver.stats()['usuarios'] == 2
+
+
+@pytest.fixture
+def sesion(resolver, monkeypatch):
+    """Identidad y claims del token del request (sin ``perm_version``)"""
+    sesion = {'identidad': None, 'claims': {}}
+    monkeypatch.setattr(auth_mod, 'get_jwt', lambda: sesion['claims'])
+    monkeypatch.setattr(auth_mod, 'get_jwt_identity', lambda: sesion['identidad'])
+    monkeypatch.setattr(resolver, 'version_global', lambda fresca=False: None)
+    return sesion
+
+
+@require_rol('admin', 'crear_tarea')
+def _crear_tarea():
+    return jsonify({'success': True}), 201
+
+
+@pytest.mark.parametrize('identidad, rol, estado', [
+    ('1', 'Admin', 201),      # por rol
+    ('2', 'Usuario', 201),    # por permiso directo
+    ('3', 'Usuario', 403),    # ni rol ni permiso
+])
+def test_require_rol_acepta_roles_o_permisos(app, sesion, identidad, rol, estado):
+    sesion.update(identidad=identidad, claims={'rol': rol})
+    with app.test_request_context('/'):
+        assert _crear_tarea()[1] == estado
+
+
+def test_require_rol_niega_si_no_se_pueden_leer_los_permisos(app, sesion, monkeypatch):
+    def caida(*args, **kwargs):
+        raise RuntimeError('MySQL caído')
+
+    monkeypatch.setattr(auth_mod, 'execute_query', caida)
+    sesion.update(identidad='2', claims={'rol': 'Usuario'})
+    with app.test_request_context('/'):
+        assert _crear_tarea()[1] == 403
+
+
+# ---------- permisos en el token ----------
+
+@pytest.fixture
+def token(resolver, monkeypatch):
+    """Claims del token emitido al iniciar sesión, como en ``_create_login_response``"""
+    sesion = {'identidad': None, 'claims': {}}
+    monkeypatch.setattr(auth_mod, 'get_jwt', lambda: sesion['claims'])
+    monkeypatch.setattr(auth_mod, 'get_jwt_identity', lambda: sesion['identidad'])
+
+    def emitir(id_usuario, rol):
+        sesion.update(identidad=str(id_usuario), claims={'rol': rol, **resolver.claims_token(id_usuario)})
+        return sesion['claims']
+    return emitir
+
+
+def test_bits_del_token(resolver, base, token):
+    claims = token(2, 'Usuario')
+    base.consultas.clear()
+
+    assert claims['perm_version'] == 1
+    assert resolver.en_token(claims, ('crear_tarea',)) is True
+    assert resolver.en_token(claims, ('ver_reportes', 'eliminar_habitante')) is True
+    assert resolver.en_token(claims, ('eliminar_habitante',)) is False
+    assert resolver.en_token(claims, ('permiso_inexistente',)) is False
+    assert base.consultas == []
+
+
+def test_token_vigente_decide_sin_la_base_de_datos(app, base, token):
+    token(2, 'Usuario')
+    base.consultas.clear()
+    with app.test_request_context('/'):
+        assert _crear_tarea()[1] == 201
+
+    assert base.consultas == []
+
+
+def test_token_anterior_a_un_cambio_no_se_usa(resolver, base, token):
+    claims = token(2, 'Usuario')
+    base.directos[2] = set()
+    resolver.publicar_cambio()
+
+    assert base.version == 2
+    assert not resolver.token_vigente(claims)
+    assert resolver.en_token(claims, ('crear_tarea',)) is None
+    assert not auth_mod.tiene_permiso('crear_tarea')
+
+
+def test_otro_nodo_ve_el_cambio_al_releer_la_version(app, resolver, base, token, reloj):
+    app.config['PERMISOS_VERSION_TTL'] = 30
+    claims = token(2, 'Usuario')
+    base.version += 1     # publicado por otro nodo
+
+    assert resolver.token_vigente(claims)
+    reloj.ahora += 31
+    assert not resolver.token_vigente(claims)
+
+
+def test_admin_degradado_recibe_403_con_su_token_viejo(app, resolver, base, token):
+    token(1, 'Admin')
+    with app.test_request_context('/'):
+        assert _crear_tarea()[1] == 201
+
+    base.roles[1] = 'Usuario'
+    resolver.publicar_cambio()
+    with app.test_request_context('/'):
+        assert _crear_tarea()[1] == 403
+    assert ('rol', '1') in base.consultas
+
+
+def test_token_nuevo_despues_del_cambio_vuelve_a_bastar(app, resolver, base, token):
+    token(1, 'Admin')
+    base.roles[1] = 'Usuario'
+    resolver.publicar_cambio()
+
+    claims = token(1, 'Usuario')
+    base.consultas.clear()
+
+    assert claims['perm_version'] == 2
+    assert resolver.token_vigente(claims)
+    assert resolver.en_token(claims, ('crear_tarea',)) is False
+
+
+def test_sin_tabla_de_versiones_el_token_no_trae_permisos(resolver, base, token):
+    base.version = None
+    claims = token(2, 'Usuario')
+
+    assert 'perms' not in claims
+    assert resolver.token_vigente(claims)
+    assert resolver.en_token(claims, ('crear_tarea',)) is None
+    assert auth_mod.tiene_permiso('crear_tarea')
@@ -0,0 +1,106 @@
+"""
+Pruebas de la caché de consultas (LRU + TTL + invalidación por tabla)
+"""
+import pytest
+
+from database import execute_query, get_db_connection, tables_written, table_generation, transaction
+from database import cache as cache_mod
+from database.cache import QueryCache
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj monotónico controlado por la prueba"""
+    ahora = [1000.0]
+    monkeypatch.setattr(cache_mod.time, 'monotonic', lambda: ahora[0])
+    return ahora
+
+
+def test_lru_descarta_la_menos_usada():
+    cache = QueryCache(max_entries=2)
+    cache.set('a', 1, ['t'], ttl=60)
+    cache.set('b', 2, ['t'], ttl=60)
+    cache.get('a')
+    cache.set('c', 3, ['t'], ttl=60)
+
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+    assert cache.get('c') == (True, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entrada_vence_con_el_ttl(reloj):
+    cache = QueryCache()
+    cache.set('a', 1, ['t'], ttl=10)
+    reloj[0] += 9.9
+    assert cache.get('a') == (True, 1)
+    reloj[0] += 0.2
+    assert cache.get('a') == (False, None)
+
+
+def test_invalidar_un_tag_solo_quita_sus_entradas():
+    cache = QueryCache()
+    cache.set('a', 1, ['habitantes'], ttl=60)
+    cache.set('b', 2, ['sector'], ttl=60)
+    cache.set('c', 3, ['habitantes', 'sector'], ttl=60)
+
+    assert cache.invalidate(['HABITANTES']) == 2
+    assert cache.get('a')[0] is False
+    assert cache.get('b') == (True, 2)
+    assert cache.get('c')[0] is False
+
+
+def test_no_guarda_si_hubo_escritura_durante_la_carga():
+    cache = QueryCache()
+    generacion = cache.generation(['t'])
+    cache.invalidate(['t'])
+    cache.set('a', 1, ['t'], ttl=60, generacion=generacion)
+
+    assert cache.get('a') == (False, None)
+
+
+def test_devuelve_copias_independientes():
+    cache = QueryCache()
+    cache.set('a', [{'x': 1}], ['t'], ttl=60)
+    _, valor = cache.get('a')
+    valor[0]['x'] = 99
+
+    assert cache.get('a') == (True, [{'x': 1}])
+
+
+@pytest.mark.parametrize('sql, tablas', [
+    ('INSERT INTO habitantes (a) VALUES (1)', {'habitantes'}),
+    ('insert ignore into `db`.`Sector` (a) values (1)', {'sector'}),
+    ('UPDATE usuario u JOIN habitantes h ON h.Id = u.Id SET u.a = 1', {'usuario', 'habitantes'}),
+    ('DELETE FROM habitante_sacramento WHERE IdHabitante = 1', {'habitante_sacramento'}),
+    ('SELECT * FROM habitantes', set()),
+])
+def test_tables_written(sql, tablas):
+    assert tables_written(sql) == tablas
+
+
+def test_execute_query_con_tags_usa_la_cache_hasta_que_se_escribe(app):
+    with app.app_context():
+        conexion = get_db_connection()
+        consulta = 'SELECT COUNT(*) AS n FROM sector'
+
+        assert execute_query(consulta, tags=['sector']) == [{'x': 1}]
+        assert execute_query(consulta, tags=['sector']) == [{'x': 1}]
+        assert len(conexion.sentencias) == 1
+
+        generacion = table_generation(['sector'])
+        execute_query('UPDATE sector SET Descripcion = %s WHERE IdSector = %s', ('Norte', 1))
+        assert table_generation(['sector']) != generacion
+
+        execute_query(consulta, tags=['sector'])
+        assert len(conexion.sentencias) == 3
+
+
+def test_no_cachea_lecturas_dentro_de_una_transaccion(app):
+    with app.app_context():
+        conexion = get_db_connection()
+        with transaction():
+            execute_query('SELECT 1 FROM sector', tags=['sector'])
+        execute_query('SELECT 1 FROM sector', tags=['sector'])
+
+        assert len(conexion.sentencias) == 2
@@ -0,0 +1,186 @@
+"""
+Pruebas de la cola de reportes: reutilización de trabajos idénticos y cola llena
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from flask import jsonify, request
+
+import services.ReporteJobServices as jobs_mod
+from services.ReporteJobServices import ColaLlenaError, ReporteJobs
+
+
+class TablaJobs:
+    """``reporte_jobs`` en memoria detrás de execute_query"""
+
+    def __init__(self):
+        self.filas = {}
+        self.inserts = 0
+        self.lock = threading.Lock()
+
+    def execute_query(self, query, params=None, fetch_one=False, **kwargs):
+        with self.lock:
+            if query.lstrip().startswith('INSERT'):
+                tipo, formato, filtros, clave, id_usuario = params
+                self.inserts += 1
+                id_job = len(self.filas) + 1
+                self.filas[id_job] = {
+                    'IdJob': id_job, 'Tipo': tipo, 'Formato': formato, 'Filtros': filtros, 'Hash': clave,
+                    'Estado': 'pendiente', 'Archivo': None, 'Bytes': None, 'Error': None,
+                    'IdUsuario': id_usuario, 'FechaCreacion': datetime.now(), 'FechaInicio': None,
+                    'FechaFin': None, 'Edad': 0,
+                }
+                return id_job
+            if query.lstrip().startswith('UPDATE'):
+                fila = self.filas[params[-1]]
+                if "Estado = 'en_proceso'" in query:
+                    fila['Estado'] = 'en_proceso'
+                elif "Estado = 'completado'" in query:
+                    fila.update(Estado='completado', Archivo=params[0], Bytes=params[1])
+                elif fila['Estado'] != 'completado':
+                    fila.update(Estado='error', Error=params[0])
+                return 1
+            if 'WHERE Hash = %s' in query:
+                vigentes = [
+                    f for f in self.filas.values()
+                    if f['Hash'] == params[0] and f['Estado'] in ('pendiente', 'en_proceso', 'completado')
+                ]
+                return dict(vigentes[-1]) if vigentes else None
+            fila = self.filas.get(params[0])
+            return dict(fila) if fila else None
+
+
+@pytest.fixture
+def tabla(monkeypatch):
+    tabla = TablaJobs()
+    monkeypatch.setattr(jobs_mod, 'execute_query', tabla.execute_query)
+    return tabla
+
+
+@pytest.fixture
+def jobs(app, tabla, tmp_path):
+    app.config.update(REPORT_JOBS_FOLDER=str(tmp_path), REPORT_JOBS_WORKERS=2, REPORT_JOBS_MAX_PENDING=2)
+    jobs = ReporteJobs()
+
+    def resumen():
+        return jsonify({'success': True, 'filtros': request.args.to_dict()})
+
+    jobs.registrar('resumen', resumen, '/api/estadisticas/resumen/', formatos=('json', 'csv'))
+    with app.app_context():
+        yield jobs
+    if jobs._executor:
+        jobs._executor.shutdown(wait=True)
+
+
+def _esperar_cola(jobs, segundos=5):
+    limite = time.monotonic() + segundos
+    while jobs.stats()['pendientes_proceso'] and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert jobs.stats()['pendientes_proceso'] == 0
+
+
+def test_pedido_identico_reutiliza_el_trabajo(jobs, tabla):
+    job, reutilizado = jobs.encolar('resumen', filtros={'sector': 3, 'activo': True, 'desde': ''})
+    _esperar_cola(jobs)
+    # Mismos filtros con otro orden, otros tipos y vacíos: mismo hash
+    otro, reutilizado_otro = jobs.encolar('resumen', 'JSON', {'activo': 'true', 'sector': '3', 'hasta': None})
+
+    assert not reutilizado and reutilizado_otro
+    assert otro['id'] == job['id']
+    assert otro['estado'] == 'completado'
+    assert tabla.inserts == 1
+    assert jobs.stats()['reutilizados'] == 1
+
+
+def test_el_trabajo_genera_el_archivo_con_los_filtros(jobs):
+    job, _ = jobs.encolar('resumen', filtros={'sector': 3})
+    _esperar_cola(jobs)
+
+    job = jobs.obtener(job['id'])
+    assert job['estado'] == 'completado'
+    with open(jobs.ruta_archivo(job), encoding='utf-8') as f:
+        assert '"sector":"3"' in f.read().replace(' ', '')
+
+
+def test_formato_o_filtros_distintos_no_reutilizan(jobs, tabla):
+    jobs.encolar('resumen', filtros={'sector': 3})
+    jobs.encolar('resumen', filtros={'sector': 4})
+    jobs.encolar('resumen', 'csv', {'sector': 3})
+    _esperar_cola(jobs)
+
+    assert tabla.inserts == 3
+
+
+def test_archivo_borrado_encola_de_nuevo(jobs, tabla):
+    job, _ = jobs.encolar('resumen')
+    _esperar_cola(jobs)
+    os.remove(jobs.ruta_archivo(jobs.obtener(job['id'])))
+
+    nuevo, reutilizado = jobs.encolar('resumen')
+
+    assert not reutilizado
+    assert nuevo['id'] != job['id']
+
+
+def test_cola_llena_rechaza_sin_insertar(jobs, tabla):
+    liberar = threading.Event()
+
+    def lento():
+        liberar.wait(5)
+        return jsonify({'success': True})
+
+    jobs.registrar('lento', lento, '/api/estadisticas/lento/')
+    jobs.encolar('lento', filtros={'n': 1})
+    jobs.encolar('lento', filtros={'n': 2})
+    try:
+        with pytest.raises(ColaLlenaError):
+            jobs.encolar('lento', filtros={'n': 3})
+        # Un pedido idéntico a uno en cola no ocupa lugar: se reutiliza
+        assert jobs.encolar('lento', filtros={'n': 1})[1]
+    finally:
+        liberar.set()
+    _esperar_cola(jobs)
+
+    assert tabla.inserts == 2
+    assert jobs.stats()['rechazados'] == 1
+    assert jobs.encolar('lento', filtros={'n': 3})[1] is False
+
+
+def test_error_de_la_vista_queda_en_el_trabajo(jobs):
+    def falla():
+        return jsonify({'success': False, 'message': 'Sector inválido'}), 400
+
+    jobs.registrar('falla', falla, '/api/estadisticas/falla/')
+    job, _ = jobs.encolar('falla')
+    _esperar_cola(jobs)
+
+    job = jobs.obtener(job['id'])
+    assert job['estado'] == 'error'
+    assert job['error'] == 'Sector inválido'
+    assert jobs.stats()['errores'] == 1
+
+
+def test_trabajo_activo_vencido_se_marca_como_error(app, jobs, tabla):
+    app.config['REPORT_JOBS_TIMEOUT_SECONDS'] = 60
+    tabla.execute_query("INSERT", ('resumen', 'json', '{}', 'abc', None))
+    tabla.filas[1]['Edad'] = 61
+
+    job = jobs.obtener(1)
+
+    assert job['estado'] == 'error'
+    assert tabla.filas[1]['Estado'] == 'error'
+
+
+@pytest.mark.parametrize('tipo, formato, filtros', [
+    ('otro', 'json', None),
+    ('resumen', 'pdf', None),
+    ('resumen', 'json', ['sector']),
+    ('resumen', 'json', {'sector': [1, 2]}),
+])
+def test_pedidos_invalidos(jobs, tabla, tipo, formato, filtros):
+    with pytest.raises(ValueError):
+        jobs.encolar(tipo, formato, filtros)
+    assert tabla.inserts == 0
@@ -0,0 +1,137 @@
+"""
+Pruebas de los deltas de los agregados diarios de habitantes
+"""
+import random
+from collections import Counter
+
+import pytest
+
+import services.RollupServices as rollup_mod
+from database import get_db_connection
+from services.RollupServices import _DIMENSIONES, actualizar_rollups, contribucion_rollup
+
+
+class TablasFalsas:
+    """``habitantes`` y ambos rollups en memoria, detrás de execute_query/execute_many"""
+
+    def __init__(self):
+        self.habitantes = {}   # id -> {'dims': tuple, 'sacramentos': tuple, 'activo': bool}
+        self.rollup_habitantes = Counter()
+        self.rollup_sacramentos = Counter()
+        self.escrituras = 0
+
+    def execute_query(self, query, params=None, fetch_one=False, **kwargs):
+        if 'FOR UPDATE' in query:
+            h = self.habitantes.get(params[0])
+            return dict(zip(_DIMENSIONES, h['dims'])) if h and h['activo'] else None
+        if 'FROM habitante_sacramento' in query:
+            h = self.habitantes.get(params[0])
+            return [{'IdSacramento': s} for s in sorted(set(h['sacramentos']))] if h else []
+        if 'INSERT INTO rollup_habitantes_dia' in query:
+            self.escrituras += 1
+            self.rollup_habitantes[params[:-1]] += params[-1]
+            return 1
+        raise AssertionError(f'consulta inesperada: {query}')
+
+    def execute_many(self, query, filas):
+        assert 'INSERT INTO rollup_sacramentos_dia' in query
+        self.escrituras += 1
+        for dia, sector, sacramento, signo in filas:
+            self.rollup_sacramentos[(dia, sector, sacramento)] += signo
+        return range(0)
+
+    def esperado(self):
+        """Los rollups recalculados desde cero, como ``reconstruir_rollups``"""
+        habitantes, sacramentos = Counter(), Counter()
+        for h in self.habitantes.values():
+            if h['activo']:
+                habitantes[h['dims']] += 1
+                for s in set(h['sacramentos']):
+                    sacramentos[(h['dims'][0], h['dims'][1], s)] += 1
+        return habitantes, sacramentos
+
+    def actuales(self):
+        return (+self.rollup_habitantes, +self.rollup_sacramentos)
+
+
+@pytest.fixture
+def tablas(app, monkeypatch):
+    tablas = TablasFalsas()
+    monkeypatch.setattr(rollup_mod, 'execute_query', tablas.execute_query)
+    monkeypatch.setattr(rollup_mod, 'execute_many', tablas.execute_many)
+    with app.app_context():
+        yield tablas
+
+
+def _dims(dia='2024-05-01', sector=1, sexo=1, estado_civil=1, edad=2, con_sacramento=0):
+    return (dia, sector, sexo, estado_civil, edad, con_sacramento)
+
+
+def _escribir(tablas, id_habitante, **cambios):
+    """Una escritura con el patrón de las rutas: contribución antes, cambio y delta"""
+    antes = contribucion_rollup(id_habitante)
+    h = tablas.habitantes.setdefault(id_habitante, {'dims': _dims(), 'sacramentos': (), 'activo': True})
+    h.update(cambios)
+    actualizar_rollups(id_habitante, antes)
+
+
+def test_alta_suma_uno(tablas):
+    _escribir(tablas, 1, dims=_dims(con_sacramento=1), sacramentos=(3, 4))
+
+    assert tablas.actuales() == tablas.esperado()
+    assert tablas.rollup_habitantes[_dims(con_sacramento=1)] == 1
+    assert tablas.rollup_sacramentos[('2024-05-01', 1, 4)] == 1
+
+
+def test_cambio_de_dimension_mueve_la_fila(tablas):
+    _escribir(tablas, 1, sacramentos=(3,))
+    _escribir(tablas, 1, dims=_dims(sector=2), sacramentos=(3,))
+
+    assert tablas.rollup_habitantes[_dims(sector=1)] == 0
+    assert tablas.rollup_habitantes[_dims(sector=2)] == 1
+    assert tablas.rollup_sacramentos[('2024-05-01', 1, 3)] == 0
+    assert tablas.rollup_sacramentos[('2024-05-01', 2, 3)] == 1
+
+
+def test_sin_cambios_no_escribe(tablas):
+    _escribir(tablas, 1, sacramentos=(3,))
+    escrituras = tablas.escrituras
+    _escribir(tablas, 1)
+
+    assert tablas.escrituras == escrituras
+
+
+def test_baja_resta_uno(tablas):
+    _escribir(tablas, 1, sacramentos=(3,))
+    _escribir(tablas, 2)
+    _escribir(tablas, 1, activo=False)
+
+    assert tablas.actuales() == tablas.esperado()
+    assert tablas.rollup_habitantes[_dims()] == 1
+    assert tablas.rollup_sacramentos[('2024-05-01', 1, 3)] == 0
+
+
+def test_deltas_coinciden_con_la_reconstruccion(tablas):
+    azar = random.Random(3)
+    for _ in range(300):
+        id_habitante = azar.randint(1, 25)
+        sacramentos = tuple(azar.sample(range(1, 6), azar.randint(0, 3)))
+        _escribir(
+            tablas, id_habitante,
+            dims=_dims(
+                dia=azar.choice(['2024-05-01', '2024-05-02', rollup_mod.DIA_SIN_FECHA]),
+                sector=azar.randint(0, 3), edad=azar.choice([0, 1, 2, 3, 9]),
+                con_sacramento=int(bool(sacramentos))
+            ),
+            sacramentos=sacramentos,
+            activo=azar.random() > 0.2,
+        )
+
+    assert tablas.actuales() == tablas.esperado()
+
+
+def test_deltas_van_en_una_transaccion(tablas):
+    _escribir(tablas, 1, sacramentos=(3,))
+    _escribir(tablas, 1, dims=_dims(sector=2), sacramentos=(3,))
+
+    assert get_db_connection().commits == 2
@@ -0,0 +1,107 @@
+"""
+Pruebas del índice de búsqueda de habitantes por trigramas
+"""
+import pytest
+
+import services.SearchServices as search_mod
+from services.SearchServices import HabitanteSearchIndex, normalizar, trigramas
+
+HABITANTES = [
+    (1, 'Ana', 'Pérez', '1010'),
+    (2, 'Andrés', 'Peralta', '2020'),
+    (3, 'Luis', 'Gómez', '3030'),
+    (4, 'Ana María', 'Muñoz-Peña', '4040'),
+    (5, 'Carlos', 'Pérez', '5050'),
+]
+
+
+@pytest.fixture
+def tabla(monkeypatch):
+    """Tabla habitantes en memoria detrás del ``execute_query`` del índice"""
+    filas = {
+        i: {'IdHabitante': i, 'Nombre': n, 'Apellido': a, 'NumeroDocumento': d, 'Telefono': None, 'Activo': 1}
+        for i, n, a, d in HABITANTES
+    }
+
+    def consultar(query, params=None, fetch_one=False, **kwargs):
+        if fetch_one:
+            fila = filas.get(params[0])
+            return dict(fila) if fila else None
+        return [{k: v for k, v in f.items() if k != 'Activo'} for f in filas.values() if f['Activo']]
+
+    monkeypatch.setattr(search_mod, 'execute_query', consultar)
+    return filas
+
+
+@pytest.fixture
+def indice(app, tabla):
+    indice = HabitanteSearchIndex()
+    with app.app_context():
+        assert indice._esperar(5)
+        yield indice
+
+
+def _ids(resultados):
+    return [r['IdHabitante'] for r in resultados]
+
+
+def test_normalizar_y_trigramas():
+    assert normalizar('  Muñoz-Peña, ANA ') == 'munoz pena ana'
+    assert trigramas('ana') == {'  a', ' an', 'ana', 'na '}
+    assert trigramas('ana', completo=False) == {'  a', ' an', 'ana'}
+
+
+def test_documento_exacto_va_primero(indice):
+    assert _ids(indice.buscar('2020'))[0] == 2
+
+
+def test_todas_las_palabras_deben_coincidir(indice):
+    # "Ana María Muñoz-Peña" tiene "ana" pero no "perez"
+    assert _ids(indice.buscar('ana perez')) == [1]
+    # "Andrés" solo comparte 2 de 3 trigramas con "ana": queda fuera
+    assert _ids(indice.buscar('ana')) == [4, 1]
+
+
+def test_prefijo_de_palabra_y_empates_por_apellido(indice):
+    # "Pérez" y "Peralta" empiezan por "per": empates por apellido y nombre
+    assert _ids(indice.buscar('per')) == [2, 1, 5]
+
+
+def test_tolera_errores_de_digitacion(indice):
+    # "perex" comparte 4 de 5 trigramas con "perez" y solo 3 con "peralta"
+    assert _ids(indice.buscar('perex')) == [1, 5]
+    assert indice.buscar('xyzxyz') == []
+
+
+def test_tildes_y_signos_no_importan(indice):
+    assert _ids(indice.buscar('MUNOZ pena')) == [4]
+
+
+def test_limite(indice):
+    assert len(indice.buscar('a', limite=2)) == 2
+
+
+def test_refrescar_aplica_cambios_y_bajas(indice, tabla):
+    tabla[3]['Apellido'] = 'Gutiérrez'
+    indice.refrescar(3)
+    tabla[5]['Activo'] = 0
+    indice.refrescar(5)
+    tabla[6] = {'IdHabitante': 6, 'Nombre': 'Sofía', 'Apellido': 'Pérez', 'NumeroDocumento': '6060',
+                'Telefono': None, 'Activo': 1}
+    indice.refrescar(6)
+
+    assert indice.buscar('gomez') == []
+    assert _ids(indice.buscar('gutierrez')) == [3]
+    assert _ids(indice.buscar('perez')) == [1, 6]
+    assert 'Activo' not in indice.buscar('sofia')[0]
+    assert indice.stats()['habitantes'] == 5
+
+
+def test_sin_indice_las_rutas_usan_sql(app, tabla):
+    indice = HabitanteSearchIndex()
+    app.config['SEARCH_INDEX_ENABLED'] = False
+    with app.app_context():
+        assert indice.buscar('ana') is None
+        # Sin cargar, refrescar no hace nada
+        indice.refrescar(1)
+        assert indice.stats()['habitantes'] == 0
@@ -0,0 +1,95 @@
+"""
+Pruebas del perfil por sector: orden de los parámetros y armado de perfiles
+"""
+import re
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from services.SectorServices import PerfilSectores
+
+
+def _interpolar(spec):
+    """SQL con cada ``%s`` reemplazado por su parámetro, en orden"""
+    params = iter(spec.params)
+    sql = re.sub(r'%s', lambda _: repr(next(params)), spec.sql)
+    assert next(params, None) is None, 'sobran parámetros'
+    return ' '.join(sql.split())
+
+
+def _columna(sql, alias):
+    """Expresión de la columna ``alias`` del SELECT"""
+    return re.search(r'((?:COUNT|AVG)\((?:(?!\) AS ).)*\)) AS ' + alias + r'\b', sql).group(1)
+
+
+ACTUAL = "h.FechaRegistro >= '2024-03-01' AND h.FechaRegistro < '2024-04-01'"
+ANTERIOR = "h.FechaRegistro >= '2024-02-01' AND h.FechaRegistro < '2024-03-01'"
+
+
+def test_cada_columna_filtra_su_periodo():
+    perfil = PerfilSectores(date(2024, 3, 1), date(2024, 3, 31), date(2024, 2, 1), date(2024, 2, 29))
+    sql = _interpolar(perfil.specs()['perfil_sectores'])
+
+    for alias in ('cantidad', 'edad_promedio', 'familias', 'con_impedimento', 'con_sacramento'):
+        assert ACTUAL in _columna(sql, alias), alias
+        assert ANTERIOR not in _columna(sql, alias), alias
+    assert ANTERIOR in _columna(sql, 'cantidad_anterior')
+    # El JOIN toma la unión de ambos períodos
+    assert "AND h.FechaRegistro >= '2024-02-01' AND h.FechaRegistro < '2024-04-01' WHERE s.Activo = 1" in sql
+
+
+def test_sin_periodo_anterior():
+    perfil = PerfilSectores(date(2024, 3, 1), date(2024, 3, 31))
+    sql = _interpolar(perfil.specs()['perfil_sectores'])
+
+    assert '0 AS cantidad_anterior' in sql
+    assert f"AND {ACTUAL} WHERE s.Activo = 1" in sql
+
+
+def test_periodos_abiertos():
+    perfil = PerfilSectores(desde=date(2024, 3, 1), desde_anterior=date(2023, 3, 1), hasta_anterior=date(2023, 3, 31))
+    sql = _interpolar(perfil.specs()['perfil_sectores'])
+
+    assert "h.FechaRegistro >= '2024-03-01' THEN 1 END) AS cantidad" in sql
+    assert "h.FechaRegistro >= '2023-03-01' AND h.FechaRegistro < '2023-04-01'" in _columna(sql, 'cantidad_anterior')
+    # Sin fin en el período actual la unión tampoco tiene fin
+    assert "AND h.FechaRegistro >= '2023-03-01' WHERE s.Activo = 1" in sql
+
+
+@pytest.mark.parametrize('periodos', [(), (date(2024, 3, 1), date(2024, 3, 31))])
+def test_consulta_de_sacramentos_usa_el_periodo_actual(periodos):
+    spec = PerfilSectores(*periodos).specs()['perfil_sacramentos']
+    sql = _interpolar(spec)
+
+    assert (ACTUAL if periodos else '1 = 1') in sql
+
+
+def test_completar_arma_y_ordena_los_perfiles():
+    resultados = {
+        'perfil_sectores': [
+            {'IdSector': 1, 'sector': 'Norte', 'cantidad': 10, 'cantidad_anterior': 8,
+             'edad_promedio': Decimal('33.46'), 'familias': 4, 'con_impedimento': 1, 'con_sacramento': 6},
+            {'IdSector': 2, 'sector': 'Sur', 'cantidad': 30, 'cantidad_anterior': 0,
+             'edad_promedio': None, 'familias': 9, 'con_impedimento': 0, 'con_sacramento': 30},
+            {'IdSector': 3, 'sector': 'Centro', 'cantidad': 0, 'cantidad_anterior': 2,
+             'edad_promedio': None, 'familias': 0, 'con_impedimento': 0, 'con_sacramento': 0},
+        ],
+        'perfil_sacramentos': [
+            {'IdSector': 1, 'IdSacramento': 1, 'sacramento': 'Bautismo', 'total': 6},
+            {'IdSector': 1, 'IdSacramento': 2, 'sacramento': 'Confirmación', 'total': 2},
+        ],
+    }
+
+    perfiles = PerfilSectores().completar(resultados)
+
+    assert [p['sector'] for p in perfiles] == ['Sur', 'Norte', 'Centro']
+    norte = perfiles[1]
+    assert norte['porcentaje'] == 25.0
+    assert norte['variacion'] == 25.0
+    assert norte['edad_promedio'] == 33.5
+    assert norte['sin_sacramento'] == 4
+    assert norte['lista_sacramentos'] == 'Bautismo, Confirmación'
+    assert perfiles[0]['variacion'] == 0
+    assert perfiles[0]['lista_sacramentos'] == 'Ninguno'
+    assert perfiles[2]['variacion'] == -100.0
@@ -0,0 +1,157 @@
+"""
+Pruebas de los snapshots con stale-while-revalidate (TTL blando y duro)
+"""
+import threading
+import time
+
+import pytest
+
+import services.SnapshotServices as snapshot_mod
+from services.SnapshotServices import SnapshotCache
+
+
+class RelojFalso:
+    """Reemplaza ``time`` en el módulo: ``monotonic`` avanza solo con ``avanzar``"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = RelojFalso()
+    monkeypatch.setattr(snapshot_mod, 'time', reloj)
+    return reloj
+
+
+@pytest.fixture
+def snapshots(app, reloj):
+    app.config.update(PRUEBA_SOFT_TTL=60, PRUEBA_HARD_TTL=600, PRUEBA_MAX_ENTRIES=2)
+    with app.app_context():
+        yield SnapshotCache('prueba', 'PRUEBA')
+
+
+def _contador():
+    """``calcular`` que retorna 1, 2, 3... en cada llamada"""
+    llamadas = []
+
+    def calcular():
+        llamadas.append(None)
+        return len(llamadas)
+    return calcular
+
+
+def _esperar_refrescos(cache, segundos=5):
+    limite = time.monotonic() + segundos
+    while cache.stats()['refrescando'] and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert not cache.stats()['refrescando']
+
+
+def test_dentro_del_ttl_blando_no_recalcula(snapshots, reloj):
+    calcular = _contador()
+    valor, generado = snapshots.obtener('k', calcular)
+    reloj.avanzar(59)
+
+    assert snapshots.obtener('k', calcular) == (valor, generado)
+    assert valor == 1
+    assert snapshots.stats()['calculos_en_linea'] == 1
+    assert snapshots.stats()['servidos_frescos'] == 1
+
+
+def test_entre_ttl_blando_y_duro_sirve_el_anterior_y_refresca_una_vez(snapshots, reloj):
+    snapshots.obtener('k', _contador())
+    reloj.avanzar(61)
+
+    liberar = threading.Event()
+
+    def lento():
+        liberar.wait(5)
+        return 'nuevo'
+
+    assert snapshots.obtener('k', lento)[0] == 1
+    assert snapshots.obtener('k', lento)[0] == 1
+    assert snapshots.stats()['refrescos'] == 1
+
+    liberar.set()
+    _esperar_refrescos(snapshots)
+
+    assert snapshots.obtener('k', lento)[0] == 'nuevo'
+    assert snapshots.stats()['servidos_vencidos'] == 2
+
+
+def test_error_al_refrescar_sigue_sirviendo_el_anterior(snapshots, reloj):
+    snapshots.obtener('k', _contador())
+    reloj.avanzar(61)
+
+    def falla():
+        raise RuntimeError('MySQL caído')
+
+    assert snapshots.obtener('k', falla)[0] == 1
+    _esperar_refrescos(snapshots)
+
+    assert snapshots.stats()['errores_refresco'] == 1
+    assert snapshots.obtener('k', falla)[0] == 1
+
+
+def test_pasado_el_ttl_duro_el_request_espera_el_calculo(snapshots, reloj):
+    calcular = _contador()
+    snapshots.obtener('k', calcular)
+    reloj.avanzar(600)
+
+    assert snapshots.obtener('k', calcular)[0] == 2
+    assert snapshots.stats()['calculos_en_linea'] == 2
+    assert snapshots.stats()['refrescos'] == 0
+
+
+def test_sin_snapshot_un_solo_request_calcula(app, snapshots):
+    resultados, llamadas = [], []
+    barrera = threading.Barrier(5)
+
+    def calcular():
+        llamadas.append(None)
+        time.sleep(0.05)
+        return 'valor'
+
+    def pedir():
+        with app.app_context():
+            barrera.wait()
+            resultados.append(snapshots.obtener('k', calcular)[0])
+
+    hilos = [threading.Thread(target=pedir) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+
+    assert resultados == ['valor'] * 5
+    assert len(llamadas) == 1
+
+
+def test_claves_independientes_y_limite_de_entradas(snapshots):
+    calcular = _contador()
+    for clave in ('a', 'b', 'c'):
+        snapshots.obtener(clave, calcular)
+
+    assert snapshots.stats()['entradas'] == 2
+    # 'a' fue la menos usada y salió: se vuelve a calcular
+    assert snapshots.obtener('a', calcular)[0] == 4
+    assert snapshots.obtener('c', calcular)[0] == 3
+
+
+def test_deshabilitado_siempre_calcula(app, snapshots):
+    app.config['PRUEBA_ENABLED'] = False
+    calcular = _contador()
+
+    assert snapshots.obtener('k', calcular)[0] == 1
+    assert snapshots.obtener('k', calcular)[0] == 2
+    assert snapshots.stats()['entradas'] == 0
@@ -0,0 +1,66 @@
+"""
+Pruebas de la exportación en streaming a CSV y XLSX
+"""
+import csv
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+from flask import Flask
+
+from utils.streaming import stream_export
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+COLUMNAS = ['Nombre', 'Nota', 'Saldo', 'Fecha']
+FILAS = [
+    {'Nombre': '=HYPERLINK("http://x")', 'Nota': '+57 300', 'Saldo': -5, 'Fecha': date(2024, 1, 2)},
+    {'Nombre': 'Ana <Pérez> & "hijos"', 'Nota': '@SUMA(A1)', 'Saldo': Decimal('1.50'), 'Fecha': None},
+    {'Nombre': '-x', 'Nota': 'normal', 'Saldo': 0, 'Fecha': None},
+]
+
+
+@pytest.fixture
+def contexto():
+    with Flask(__name__).test_request_context('/'):
+        yield
+
+
+def _exportar(formato):
+    respuesta = stream_export(formato, iter(FILAS), 'reporte', columnas=COLUMNAS)
+    partes = [p if isinstance(p, bytes) else p.encode('utf-8') for p in respuesta.response]
+    return respuesta, b''.join(partes)
+
+
+def test_csv_neutraliza_formulas(contexto):
+    respuesta, cuerpo = _exportar('csv')
+    filas = list(csv.reader(io.StringIO(cuerpo.decode('utf-8-sig'))))
+
+    assert 'reporte.csv' in respuesta.headers['Content-Disposition']
+    assert filas[0] == COLUMNAS
+    assert filas[1] == ['\'=HYPERLINK("http://x")', "'+57 300", '-5', '2024-01-02']
+    assert filas[2] == ['Ana <Pérez> & "hijos"', "'@SUMA(A1)", '1.50', '']
+    assert filas[3] == ["'-x", 'normal', '0', '']
+
+
+def test_xlsx_es_valido_y_marca_formulas_como_texto(contexto):
+    _, cuerpo = _exportar('xlsx')
+    libro = zipfile.ZipFile(io.BytesIO(cuerpo))
+    hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+    filas = hoja.findall('.//x:sheetData/x:row', NS)
+
+    assert len(filas) == len(FILAS) + 1
+    celdas = filas[1].findall('x:c', NS)
+    assert celdas[0].get('t') == 'inlineStr'
+    assert celdas[0].get('s') == '2'
+    assert celdas[0].find('.//x:t', NS).text == '=HYPERLINK("http://x")'
+    # Los números negativos no son fórmulas
+    assert celdas[2].find('x:v', NS).text == '-5'
+    assert celdas[2].get('s') is None
+    assert filas[2].findall('x:c', NS)[0].get('s') is None
+
+    estilos = ElementTree.fromstring(libro.read('xl/styles.xml'))
+    xfs = estilos.findall('.//x:cellXfs/x:xf', NS)
+    assert xfs[2].get('quotePrefix') == '1'
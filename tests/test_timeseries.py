@@ -0,0 +1,96 @@
+"""
+Pruebas de los períodos del calendario y del armado de series de tiempo
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from utils.timeseries import SerieTemporal, inicio_periodo, sumar_periodos
+
+
+@pytest.mark.parametrize('granularidad, esperado', [
+    ('dia', date(2024, 8, 15)),
+    ('semana', date(2024, 8, 12)),
+    ('mes', date(2024, 8, 1)),
+    ('trimestre', date(2024, 7, 1)),
+    ('anio', date(2024, 1, 1)),
+])
+def test_inicio_periodo(granularidad, esperado):
+    assert inicio_periodo(date(2024, 8, 15), granularidad) == esperado
+    assert inicio_periodo(datetime(2024, 8, 15, 23, 59), granularidad) == esperado
+
+
+@pytest.mark.parametrize('inicio, granularidad, n, esperado', [
+    (date(2024, 11, 1), 'mes', 3, date(2025, 2, 1)),
+    (date(2024, 1, 1), 'mes', -1, date(2023, 12, 1)),
+    (date(2024, 10, 1), 'trimestre', 1, date(2025, 1, 1)),
+    (date(2024, 1, 1), 'trimestre', -5, date(2022, 10, 1)),
+    (date(2024, 1, 1), 'anio', -2, date(2022, 1, 1)),
+    (date(2024, 12, 30), 'semana', 1, date(2025, 1, 6)),
+    (date(2024, 2, 28), 'dia', 2, date(2024, 3, 1)),
+])
+def test_sumar_periodos(inicio, granularidad, n, esperado):
+    assert sumar_periodos(inicio, granularidad, n) == esperado
+
+
+def test_cantidad_fija_el_rango_y_los_parametros():
+    serie = SerieTemporal('FROM habitantes h', 'h.FechaRegistro', 'mes', cantidad=3, fin=date(2024, 2, 10))
+
+    assert serie.primero == date(2023, 12, 1)
+    assert serie.ultimo == date(2024, 2, 1)
+    assert serie.spec.params == ('2023-12-01', '2024-03-01')
+
+
+def test_crecimiento_pide_un_periodo_mas_atras():
+    serie = SerieTemporal('FROM t', 'Fecha', 'trimestre', cantidad=2, fin=date(2024, 5, 1), crecimiento='total')
+
+    assert serie.spec.params == ('2023-10-01', '2024-07-01')
+
+
+def test_completar_rellena_con_ceros_y_calcula_crecimiento():
+    serie = SerieTemporal(
+        'FROM t', 'Fecha', 'mes', cantidad=4, fin=date(2024, 3, 31),
+        valores={'total': 'COUNT(*)', 'monto': 'SUM(Valor)'}, crecimiento='total'
+    )
+    filas = [
+        {'_periodo': '2023-11-01', 'total': 5, 'monto': Decimal('1.5')},
+        {'_periodo': '2023-12-01', 'total': 10, 'monto': Decimal('2.5')},
+        {'_periodo': '2024-02-01', 'total': 4, 'monto': None},
+    ]
+
+    resultado = serie.completar(filas)
+
+    assert [p['periodo'] for p in resultado] == ['2023-12', '2024-01', '2024-02', '2024-03']
+    assert [p['total'] for p in resultado] == [10, 0, 4, 0]
+    assert [p['monto'] for p in resultado] == [2.5, 0, 0, 0]
+    assert [p['crecimiento'] for p in resultado] == [100.0, -100.0, 0, -100.0]
+    assert resultado[0]['total_anterior'] == 5
+    assert resultado[1]['fecha_inicio'] == '2024-01-01'
+    assert resultado[1]['fecha_fin'] == '2024-01-31'
+
+
+def test_completar_sin_rango_usa_los_datos():
+    serie = SerieTemporal('FROM t', 'Fecha', 'trimestre')
+    resultado = serie.completar([
+        {'_periodo': '2023-07-01', 'total': 1},
+        {'_periodo': '2024-01-01', 'total': 2},
+    ])
+
+    assert [p['periodo'] for p in resultado] == ['2023-T3', '2023-T4', '2024-T1']
+    assert serie.completar([]) == []
+
+
+def test_etiquetas_de_semana_iso():
+    serie = SerieTemporal('FROM t', 'Fecha', 'semana', inicio=date(2024, 12, 25), fin=date(2025, 1, 8))
+    resultado = serie.completar([])
+
+    assert [p['periodo'] for p in resultado] == ['2024-S52', '2025-S01', '2025-S02']
+    assert resultado[1]['fecha_inicio'] == '2024-12-30'
+    assert resultado[1]['fecha_fin'] == '2025-01-05'
+
+
+@pytest.mark.parametrize('kwargs', [{'granularidad': 'hora'}, {'granularidad': 'mes', 'cantidad': 0}])
+def test_parametros_invalidos(kwargs):
+    with pytest.raises(ValueError):
+        SerieTemporal('FROM t', 'Fecha', **kwargs)
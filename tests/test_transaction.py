@@ -0,0 +1,60 @@
+"""
+Pruebas de transaction(): un solo COMMIT por unidad de trabajo
+"""
+import pytest
+
+from database import execute_query, get_db_connection, transaction
+
+
+def test_transaction_confirma_una_sola_vez(app):
+    with app.app_context():
+        with transaction() as conexion:
+            execute_query('INSERT INTO t (a) VALUES (%s)', (1,))
+            execute_query('UPDATE t SET a = %s', (2,))
+            assert conexion.commits == 0
+
+        assert conexion.commits == 1
+        assert conexion.rollbacks == 0
+
+
+def test_transaction_revierte_si_hay_error(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            with transaction() as conexion:
+                execute_query('INSERT INTO t (a) VALUES (%s)', (1,))
+                raise ValueError('falla')
+
+        assert conexion.commits == 0
+        assert conexion.rollbacks == 1
+
+
+def test_transaction_anidada_se_une_a_la_exterior(app):
+    with app.app_context():
+        with transaction() as exterior:
+            with transaction() as interior:
+                execute_query('INSERT INTO t (a) VALUES (%s)', (1,))
+            assert interior is exterior
+            assert exterior.commits == 0
+
+        assert exterior.commits == 1
+
+
+def test_error_en_consulta_dentro_de_transaction_revierte_todo(app):
+    with app.app_context():
+        conexion = get_db_connection()
+        conexion.falla_con = 'habitante_sacramento'
+
+        with pytest.raises(Exception):
+            with transaction():
+                execute_query('INSERT INTO habitantes (a) VALUES (%s)', (1,))
+                execute_query('INSERT INTO habitante_sacramento (a) VALUES (%s)', (1,))
+
+        assert conexion.commits == 0
+        assert conexion.rollbacks == 1
+
+
+def test_escritura_fuera_de_transaction_confirma_de_inmediato(app):
+    with app.app_context():
+        assert execute_query('UPDATE t SET a = %s WHERE id = %s', (1, 2)) == 1
+        conexion = get_db_connection()
+        assert conexion.commits == 1
@@ -4,7 +4,7 @@ Utilidades de seguridad para el manejo de contraseñas y tokens
 import hashlib
 import secrets
 import re
-from werkzeug.security import generate_password_hash, check_password_hash
+from .hashing import password_hasher
 
 class Security:
     """Clase para manejo de seguridad"""
@@ -12,15 +12,18 @@ class Security:
     @staticmethod
     def generate_password_hash(password):
         """
-        Genera un hash seguro de la contraseña
+        Genera un hash seguro de la contraseña (en el pool de procesos)
         
         Args:
             password (str): Contraseña en texto plano
             
         Returns:
             str: Hash de la contraseña
+
+        Raises:
+            HashingBusyError: Si el pool de hash está lleno
         """
-        return generate_password_hash(password, method='pbkdf2:sha256')
+        return password_hasher.hash(password)
     
     @staticmethod
     def check_password_hash(password_hash, password):
@@ -33,8 +36,11 @@ class Security:
             
         Returns:
             bool: True si coincide, False en caso contrario
+
+        Raises:
+            HashingBusyError: Si el pool de hash está lleno
         """
-        return check_password_hash(password_hash, password)
+        return password_hasher.verify(password_hash, password)
     
     @staticmethod
     def validate_password(password):
@@ -2,5 +2,9 @@
 Inicialización del módulo de utilidades
 """
 from .auth_utils import *
+from .hashing import *
 from .Security import *
 from .validacion_datos import *
+from .streaming import *
+from .pagination import *
+from .timeseries import *
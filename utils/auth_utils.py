@@ -5,10 +5,17 @@ Proporciona funciones reutilizables para validar roles y permisos
 de usuarios autenticados mediante JWT.
 """
 
-from flask import jsonify
+import base64
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, current_app
 from flask_jwt_extended import get_jwt, get_jwt_identity
 from functools import wraps
 from database.db_mysql import execute_query
+from database.cache import table_generation
 
 # ================================================================
 # VALIDACIÓN DE ROLES
@@ -17,6 +24,9 @@ def tiene_rol_permitido(roles_permitidos):
     """
     Verifica si el usuario actual tiene alguno de los roles permitidos.
 
+    El rol sale del token mientras su ``perm_version`` sea la vigente; si
+    hubo un cambio de roles después de emitirlo, se lee de la base de datos.
+
     Args:
         roles_permitidos (list[str]): Lista de roles válidos (por ejemplo: ['admin', 'líder']).
 
@@ -25,48 +35,298 @@ def tiene_rol_permitido(roles_permitidos):
     """
     claims = get_jwt()
     rol = claims.get('rol') or claims.get('role') or claims.get('tipo_usuario')
+    try:
+        if not resolver_permisos.token_vigente(claims):
+            rol = resolver_permisos.rol(get_jwt_identity())
+    except Exception as e:
+        logging.error(f"No se pudo resolver el rol del usuario: {e}")
+        return False
     rol = (rol or '').lower()
     return rol in [r.lower() for r in roles_permitidos]
 
 
 # ================================================================
-# VALIDACIÓN DE PERMISOS ESPECÍFICOS (para el futuro)
+# PERMISOS EFECTIVOS EN CACHÉ
 # ================================================================
-def tiene_permiso(nombre_permiso):
+# Tablas de asignación de permisos: toda escritura que pase por
+# execute_query cambia su generación e invalida los permisos cargados
+_TABLAS_PERMISOS = ('permisos', 'usuario_permisos', 'tipo_usuario_permisos', 'tipousuario')
+
+
+class PermisoResolver:
+    """
+    Permisos efectivos (directos y por tipo de usuario) de cada usuario
+
+    Se cargan en una sola consulta y quedan en memoria del proceso por
+    ``PERMISOS_CACHE_TTL`` segundos. Cada entrada guarda la versión con la
+    que se cargó (un contador propio más la generación de las tablas de
+    permisos); si la versión cambió, se vuelve a cargar. Con varios workers
+    el TTL acota cuánto tarda otro worker en ver un cambio.
+
+    Los tokens de acceso llevan además los permisos como bits (``perms``,
+    bit = ``permisos.id_permiso``) y la versión global de permisos con la
+    que se emitieron (``perm_version``). Mientras esa versión sea la
+    vigente, ``tiene_permiso`` decide solo con el token y ``require_rol``
+    confía en su claim ``rol``; si no, ambos leen la base de datos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._permisos = OrderedDict()  # id_usuario -> (version, expira_en, frozenset)
+        self._roles = OrderedDict()     # id_usuario -> (version, expira_en, rol)
+        self._version = 0
+        self._version_global = None     # (version, expira_en) de permisos_version
+        self._ids = None                # (generacion, expira_en, {nombre: id_permiso})
+        self.hits = 0
+        self.cargas = 0
+        self.desde_token = 0
+
+    def version(self):
+        return (self._version, table_generation(_TABLAS_PERMISOS))
+
+    def invalidar(self, id_usuario=None):
+        """
+        Descarta los permisos de un usuario (p. ej. al cambiar su rol) o,
+        sin argumentos, los de todos
+        """
+        with self._lock:
+            if id_usuario is None:
+                self._version += 1
+                self._permisos.clear()
+                self._roles.clear()
+            else:
+                self._permisos.pop(str(id_usuario), None)
+                self._roles.pop(str(id_usuario), None)
+
+    def _leer(self, cache, clave, version):
+        """Valor en caché si sigue vigente (misma versión y sin vencer), o None"""
+        with self._lock:
+            entrada = cache.get(clave)
+            if entrada and entrada[0] == version and entrada[1] > time.monotonic():
+                cache.move_to_end(clave)
+                self.hits += 1
+                return entrada
+        return None
+
+    def _guardar(self, cache, clave, version, valor):
+        config = current_app.config
+        with self._lock:
+            self.cargas += 1
+            # Se guarda con la versión leída antes de la consulta: si hubo una
+            # escritura mientras tanto, la próxima verificación vuelve a cargar
+            cache[clave] = (version, time.monotonic() + config.get('PERMISOS_CACHE_TTL', 300), valor)
+            cache.move_to_end(clave)
+            while len(cache) > config.get('PERMISOS_CACHE_MAX_USERS', 1000):
+                cache.popitem(last=False)
+
+    def permisos(self, id_usuario):
+        """
+        Nombres de los permisos efectivos del usuario
+
+        Returns:
+            frozenset[str]: Permisos directos y los de su tipo de usuario
+        """
+        clave = str(id_usuario)
+        version = self.version()
+        entrada = self._leer(self._permisos, clave, version)
+        if entrada:
+            return entrada[2]
+
+        filas = execute_query("""
+            SELECT p.nombre
+            FROM usuario_permisos up
+            JOIN permisos p ON p.id_permiso = up.id_permiso
+            WHERE up.id_usuario = %s
+            UNION
+            SELECT p.nombre
+            FROM usuario u
+            JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
+            JOIN tipo_usuario_permisos tup ON tu.IdTipoUsuario = tup.IdTipoUsuario
+            JOIN permisos p ON p.id_permiso = tup.id_permiso
+            WHERE u.IdUsuario = %s
+        """, (id_usuario, id_usuario)) or []
+        permisos = frozenset(f['nombre'] for f in filas)
+        self._guardar(self._permisos, clave, version, permisos)
+        return permisos
+
+    def rol(self, id_usuario):
+        """
+        Rol (``tipousuario.Perfil``) actual del usuario, con la misma caché
+        que ``permisos``
+
+        Returns:
+            str | None: None si el usuario no existe o está inactivo
+        """
+        clave = str(id_usuario)
+        version = self.version()
+        entrada = self._leer(self._roles, clave, version)
+        if entrada:
+            return entrada[2]
+
+        fila = execute_query("""
+            SELECT tu.Perfil AS rol
+            FROM usuario u
+            JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
+            WHERE u.IdUsuario = %s AND u.Activo = 1
+        """, (id_usuario,), fetch_one=True)
+        rol = fila['rol'] if fila else None
+        self._guardar(self._roles, clave, version, rol)
+        return rol
+
+    # ---------- permisos en el token ----------
+
+    def version_global(self, fresca=False):
+        """
+        Versión global de roles y permisos (tabla ``permisos_version``)
+
+        Se relee como mucho cada ``PERMISOS_VERSION_TTL`` segundos, salvo con
+        ``fresca=True``. Retorna None si no se puede leer (sin la migración
+        0004 los permisos siempre se resuelven con la base de datos).
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            if not fresca and self._version_global and self._version_global[1] > ahora:
+                return self._version_global[0]
+        try:
+            fila = execute_query("SELECT Version FROM permisos_version WHERE Id = 1", fetch_one=True)
+            version = fila['Version'] if fila else None
+        except Exception as e:
+            logging.error(f"No se pudo leer la versión de permisos: {e}")
+            version = None
+        with self._lock:
+            self._version_global = (version, ahora + current_app.config.get('PERMISOS_VERSION_TTL', 30))
+        return version
+
+    def publicar_cambio(self):
+        """
+        Registra un cambio de roles o permisos: los tokens emitidos antes
+        dejan de bastar en todos los nodos (en este, de inmediato; en los
+        demás, al releer la versión)
+        """
+        try:
+            execute_query("UPDATE permisos_version SET Version = Version + 1 WHERE Id = 1")
+        except Exception as e:
+            logging.error(f"No se pudo incrementar la versión de permisos: {e}")
+        with self._lock:
+            self._version_global = None
+        self.invalidar()
+
+    def ids_permisos(self):
+        """``{nombre: id_permiso}``, que es la posición de cada permiso en los bits"""
+        generacion = table_generation(('permisos',))
+        with self._lock:
+            if self._ids and self._ids[0] == generacion and self._ids[1] > time.monotonic():
+                return self._ids[2]
+        filas = execute_query("SELECT id_permiso, nombre FROM permisos") or []
+        ids = {f['nombre']: f['id_permiso'] for f in filas}
+        with self._lock:
+            self._ids = (generacion, time.monotonic() + current_app.config.get('PERMISOS_CACHE_TTL', 300), ids)
+        return ids
+
+    def claims_token(self, id_usuario):
+        """
+        Claims ``perms`` y ``perm_version`` para el token de acceso
+
+        La versión se lee antes que los permisos: si cambian en medio, el
+        token nace con una versión vieja y no se confía en él.
+
+        Returns:
+            dict: Vacío si no existe ``permisos_version``
+        """
+        version = self.version_global(fresca=True)
+        if version is None:
+            return {}
+        self.invalidar(id_usuario)
+        ids = self.ids_permisos()
+        bits = 0
+        for nombre in self.permisos(id_usuario):
+            if nombre in ids:
+                bits |= 1 << ids[nombre]
+        return {'perms': _codificar_bits(bits), 'perm_version': version}
+
+    def token_vigente(self, claims):
+        """
+        False si el token se emitió antes del último cambio de roles o
+        permisos (``perm_version`` menor que la vigente). Sin la tabla
+        ``permisos_version`` no hay versión con qué comparar y se confía en él.
+        """
+        version = self.version_global()
+        return version is None or (claims.get('perm_version') or 0) >= version
+
+    def en_token(self, claims, nombres):
+        """
+        True/False si los claims del token alcanzan para decidir (tiene
+        alguno de ``nombres``), o None si el token no trae permisos o su
+        versión ya no es la vigente
+        """
+        perms = claims.get('perms')
+        if perms is None:
+            return None
+        version = self.version_global()
+        if version is None or (claims.get('perm_version') or 0) < version:
+            return None
+        bits = _decodificar_bits(perms)
+        ids = self.ids_permisos()
+        with self._lock:
+            self.desde_token += 1
+        return any(nombre in ids and (bits >> ids[nombre]) & 1 for nombre in nombres)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'usuarios': len(self._permisos),
+                'hits': self.hits,
+                'cargas': self.cargas,
+                'desde_token': self.desde_token,
+                'version': self._version,
+                'version_global': self._version_global[0] if self._version_global else None,
+            }
+
+
+def _codificar_bits(bits):
+    """Entero de bits -> base64url sin relleno (bytes little-endian)"""
+    datos = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return base64.urlsafe_b64encode(datos).rstrip(b'=').decode('ascii')
+
+
+def _decodificar_bits(texto):
+    datos = base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
+    return int.from_bytes(datos, 'little')
+
+
+resolver_permisos = PermisoResolver()
+
+
+def tiene_permiso(*nombres_permiso):
     """
-    Verifica si el usuario actual tiene un permiso específico asignado,
-    ya sea por tipo de usuario (rol) o directamente.
+    Verifica si el usuario actual tiene alguno de los permisos indicados,
+    ya sea por tipo de usuario (rol) o directamente. Si el token trae los
+    permisos con la versión vigente, no consulta la base de datos.
 
     Args:
-        nombre_permiso (str): Nombre interno del permiso (ej: 'eliminar_habitante').
+        nombres_permiso (str): Nombres internos de permisos (ej: 'eliminar_habitante').
 
     Returns:
-        bool: True si el usuario tiene el permiso, False si no.
+        bool: True si el usuario tiene alguno de los permisos, False si no.
     """
+    desde_token = resolver_permisos.en_token(get_jwt(), nombres_permiso)
+    if desde_token is not None:
+        return desde_token
+
     user_id = get_jwt_identity()
+    if user_id is None:
+        return False
+    permisos = resolver_permisos.permisos(user_id)
+    return any(nombre in permisos for nombre in nombres_permiso)
 
-    # 1️⃣ Buscar permiso directo del usuario (si existe la tabla usuario_permisos)
-    query_user_perm = """
-        SELECT 1
-        FROM usuario_permisos up
-        JOIN permisos p ON p.id_permiso = up.id_permiso
-        WHERE up.id_usuario = %s AND p.nombre = %s
-    """
-    direct = execute_query(query_user_perm, (user_id, nombre_permiso), fetch_one=True)
-    if direct:
-        return True
-
-    # 2️⃣ Si no tiene permiso directo, buscarlo según su tipo de usuario
-    query_tipo_perm = """
-        SELECT 1
-        FROM usuario u
-        JOIN tipousuario tu ON u.IdTipoUsuario = tu.IdTipoUsuario
-        JOIN tipo_usuario_permisos tup ON tu.IdTipoUsuario = tup.IdTipoUsuario
-        JOIN permisos p ON p.id_permiso = tup.id_permiso
-        WHERE u.IdUsuario = %s AND p.nombre = %s
-    """
-    by_type = execute_query(query_tipo_perm, (user_id, nombre_permiso), fetch_one=True)
-    return bool(by_type)
+
+def _tiene_permiso_seguro(nombres):
+    """``tiene_permiso`` que niega el acceso si no se pueden leer los permisos"""
+    try:
+        return tiene_permiso(*nombres)
+    except Exception as e:
+        logging.error(f"No se pudieron resolver los permisos del usuario: {e}")
+        return False
 
 
 # ================================================================
@@ -75,15 +335,17 @@ def tiene_permiso(nombre_permiso):
 def require_rol(*roles):
     """
     Decorador para exigir ciertos roles antes de ejecutar una vista.
+    También acepta nombres de permisos: basta con tener uno de los roles
+    o uno de los permisos (los permisos se resuelven en memoria).
     Ejemplo:
-        @require_rol('admin', 'líder')
+        @require_rol('admin', 'líder', 'crear_tarea')
         def crear_tarea():
             ...
     """
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            if not tiene_rol_permitido(list(roles)):
+            if not tiene_rol_permitido(list(roles)) and not _tiene_permiso_seguro(roles):
                 return jsonify({
                     'success': False,
                     'message': 'No tiene permisos para acceder a esta función'
@@ -0,0 +1,114 @@
+"""
+Hash y verificación de contraseñas en un pool de procesos
+---------------------------------------------------------
+PBKDF2 son cientos de milisegundos de CPU con el GIL tomado: hecho en el
+hilo del request frena a todos los demás hilos del worker. Aquí se ejecuta
+en procesos aparte (``PASSWORD_HASH_WORKERS``) y el request solo espera el
+resultado. La cola está acotada (``PASSWORD_HASH_MAX_PENDING`` por proceso):
+si está llena se lanza ``HashingBusyError`` de inmediato y la ruta responde
+503, en lugar de acumular trabajo durante un ataque de fuerza bruta.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+__all__ = ['PasswordHasher', 'HashingBusyError', 'password_hasher', 'RETRY_AFTER_SEGUNDOS']
+
+# Segundos sugeridos al cliente en Retry-After cuando el pool está lleno
+RETRY_AFTER_SEGUNDOS = 5
+
+
+class HashingBusyError(Exception):
+    """El proceso ya tiene ``PASSWORD_HASH_MAX_PENDING`` contraseñas en cola"""
+
+
+class PasswordHasher:
+    """Pool de procesos (uno por worker) para generar y verificar hashes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._cupos = None
+        self.ejecutados = 0
+        self.rechazados = 0
+
+    def _pool(self):
+        """Executor y semáforo de cupos de este proceso (None si está desactivado)"""
+        config = current_app.config
+        workers = config.get('PASSWORD_HASH_WORKERS', 2)
+        if workers <= 0:
+            return None, None
+        with self._lock:
+            if self._pid != os.getpid() or self._executor is None:
+                # Proceso nuevo (fork de un worker): el pool del padre no sirve aquí
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+                self._cupos = threading.BoundedSemaphore(max(1, config.get('PASSWORD_HASH_MAX_PENDING', 8)))
+            return self._executor, self._cupos
+
+    def _descartar(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ejecutar(self, funcion, *args):
+        if not has_app_context():
+            return funcion(*args)
+        executor, cupos = self._pool()
+        if executor is None:
+            return funcion(*args)
+
+        if not cupos.acquire(blocking=False):
+            with self._lock:
+                self.rechazados += 1
+            raise HashingBusyError('Servidor ocupado, intente de nuevo en unos segundos')
+
+        try:
+            futuro = executor.submit(funcion, *args)
+        except (BrokenProcessPool, RuntimeError):
+            cupos.release()
+            self._descartar(executor)
+            raise
+        # El cupo se libera cuando el proceso termina, aunque el request ya no espere
+        futuro.add_done_callback(lambda _: cupos.release())
+
+        try:
+            resultado = futuro.result(timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT', 10))
+        except FutureTimeoutError:
+            with self._lock:
+                self.rechazados += 1
+            raise HashingBusyError('Servidor ocupado, intente de nuevo en unos segundos')
+        except BrokenProcessPool:
+            logging.error("El pool de hash de contraseñas se cayó; se crea uno nuevo")
+            self._descartar(executor)
+            raise
+        with self._lock:
+            self.ejecutados += 1
+        return resultado
+
+    def hash(self, password):
+        """Hash ``pbkdf2:sha256`` de la contraseña"""
+        return self._ejecutar(generate_password_hash, password, 'pbkdf2:sha256')
+
+    def verify(self, password_hash, password):
+        """True si la contraseña coincide con el hash"""
+        return self._ejecutar(check_password_hash, password_hash, password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'activo': self._executor is not None and self._pid == os.getpid(),
+                'ejecutados': self.ejecutados,
+                'rechazados': self.rechazados,
+            }
+
+
+password_hasher = PasswordHasher()
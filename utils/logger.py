@@ -50,6 +50,16 @@ def setup_logger(app):
     root_logger.addHandler(console_handler)
     root_logger.setLevel(logging.INFO)
     
+    # Logger de consultas lentas (database/instrumentation.py)
+    slow_file_handler = RotatingFileHandler(
+        os.path.join(log_dir, 'slow_queries.log'),
+        maxBytes=10240000,  # 10MB
+        backupCount=5
+    )
+    slow_file_handler.setFormatter(formatter)
+    slow_file_handler.setLevel(logging.WARNING)
+    logging.getLogger('slow_query').addHandler(slow_file_handler)
+
     # Log inicial
     app.logger.info('=== Sistema de Gestión Eclesial Iniciado ===')
     app.logger.info('Sistema de logging configurado correctamente')
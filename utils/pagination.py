@@ -0,0 +1,170 @@
+"""
+Paginación por clave (keyset / seek)
+------------------------------------
+En lugar de ``OFFSET`` cada página continúa desde los valores de orden de
+la última fila recibida, de modo que el costo de una página no depende de
+cuántas filas haya antes de ella.
+"""
+
+import base64
+import binascii
+import json
+import zlib
+
+from flask import current_app, request
+
+from database import execute_query
+
+__all__ = ['PaginationError', 'paginar']
+
+
+class PaginationError(ValueError):
+    """Parámetros de paginación inválidos (``page_size`` o ``cursor``)"""
+
+
+def _firma(orden):
+    """Identifica el orden de un listado para rechazar cursores de otro endpoint"""
+    return zlib.crc32(repr([(c, d.upper()) for c, _, d in orden]).encode()) & 0xffff
+
+
+def _valor_cursor(valor):
+    # Fechas, horas (timedelta) y Decimal se comparan en MySQL como texto
+    if valor is None or isinstance(valor, (int, str)):
+        return valor
+    return str(valor)
+
+
+def _codificar_cursor(fila, orden):
+    datos = {'o': _firma(orden), 'k': [_valor_cursor(fila[clave]) for _, clave, _ in orden]}
+    texto = json.dumps(datos, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(texto).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, orden):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        datos = json.loads(texto)
+        valores = datos['k']
+        valido = datos['o'] == _firma(orden) and isinstance(valores, list) and len(valores) == len(orden)
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        valido = False
+    if not valido or any(v is None for v in valores):
+        raise PaginationError('Cursor de paginación inválido')
+    return valores
+
+
+def _condicion_keyset(orden, valores):
+    """
+    Arma ``(a, b, c) < (x, y, z)`` respetando la dirección de cada columna:
+    ``a < x OR (a = x AND b < y) OR (a = x AND b = y AND c < z)``
+    """
+    ramas, params = [], []
+    for i, (columna, _, direccion) in enumerate(orden):
+        operador = '<' if direccion.upper() == 'DESC' else '>'
+        partes = [f'{c} = %s' for c, _, _ in orden[:i]] + [f'{columna} {operador} %s']
+        ramas.append('(' + ' AND '.join(partes) + ')')
+        params.extend(valores[:i + 1])
+    return '(' + ' OR '.join(ramas) + ')', params
+
+
+def _leer_page_size():
+    defecto = current_app.config.get('PAGINATION_DEFAULT_PAGE_SIZE', 50)
+    maximo = current_app.config.get('PAGINATION_MAX_PAGE_SIZE', 200)
+    valor = request.args.get('page_size')
+    if valor in (None, ''):
+        return min(defecto, maximo)
+    try:
+        page_size = int(valor)
+    except ValueError:
+        raise PaginationError('page_size debe ser un número entero')
+    if page_size < 1:
+        raise PaginationError('page_size debe ser mayor que 0')
+    return min(page_size, maximo)
+
+
+def paginar(columnas, desde, condiciones, params, orden, group_by=None, tags=None,
+            completo_por_defecto=False):
+    """
+    Ejecuta una página de un listado con paginación por clave.
+
+    Lee del request ``page_size``, ``cursor`` y ``total=1`` (agrega el total
+    aproximado, guardado en la caché de consultas).
+
+    Args:
+        columnas (str): Lista del SELECT (sin la palabra SELECT).
+        desde (str): Cláusula FROM con sus JOIN.
+        condiciones (list[str]): Filtros del WHERE, unidos con AND.
+        params (list): Parámetros de ``condiciones``.
+        orden (list[tuple]): ``(columna SQL, clave en la fila, 'ASC'|'DESC')``.
+            Las columnas deben ser NOT NULL (o ir envueltas en ``COALESCE``,
+            con la misma expresión en ``columnas``) y la última debe ser única
+            (normalmente la llave primaria) para que el orden sea total.
+            Las claves que empiezan con ``_`` se quitan de las filas.
+        group_by (str): Columna del GROUP BY, si el listado agrupa.
+        tags (list[str]): Tablas de las que depende el total (caché).
+        completo_por_defecto (bool): Para catálogos que el frontend carga
+            enteros (listas desplegables): sin ``page_size`` ni ``cursor``
+            se devuelve el listado completo en lugar de la primera página.
+
+    Returns:
+        tuple: ``(filas, paginacion)`` donde ``paginacion`` tiene
+        ``page_size`` (None si no se paginó), ``next_cursor`` (None en la
+        última página), ``has_more`` y, si se pidió, ``total_aproximado``.
+
+    Raises:
+        PaginationError: Si ``page_size`` o ``cursor`` no son válidos.
+    """
+    cursor = request.args.get('cursor')
+    if completo_por_defecto and request.args.get('page_size') in (None, '') and not cursor:
+        page_size = None
+    else:
+        page_size = _leer_page_size()
+    condiciones, params = list(condiciones), list(params)
+
+    filtros_total, params_total = list(condiciones), list(params)
+    if cursor:
+        condicion, valores = _condicion_keyset(orden, _decodificar_cursor(cursor, orden))
+        condiciones.append(condicion)
+        params.extend(valores)
+
+    where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+    agrupar = f'GROUP BY {group_by}' if group_by else ''
+    ordenar = ', '.join(f'{c} {d.upper()}' for c, _, d in orden)
+
+    query = f"""
+        SELECT {columnas}
+        {desde}
+        {where}
+        {agrupar}
+        ORDER BY {ordenar}
+    """
+    if page_size is None:
+        filas = execute_query(query, tuple(params) or None) or []
+        has_more = False
+    else:
+        # Se pide una fila de más para saber si hay otra página
+        filas = execute_query(query + " LIMIT %s", tuple(params) + (page_size + 1,)) or []
+        has_more = len(filas) > page_size
+        filas = filas[:page_size]
+    paginacion = {
+        'page_size': page_size,
+        'next_cursor': _codificar_cursor(filas[-1], orden) if has_more else None,
+        'has_more': has_more,
+    }
+
+    ocultas = [clave for _, clave, _ in orden if clave.startswith('_')]
+    for fila in filas:
+        for clave in ocultas:
+            fila.pop(clave, None)
+
+    if request.args.get('total') in ('1', 'true'):
+        where_total = ('WHERE ' + ' AND '.join(filtros_total)) if filtros_total else ''
+        contar = f'COUNT(DISTINCT {group_by})' if group_by else 'COUNT(*)'
+        fila = execute_query(
+            f"SELECT {contar} AS total {desde} {where_total}",
+            tuple(params_total) or None, fetch_one=True,
+            tags=tags, ttl=current_app.config.get('PAGINATION_TOTAL_TTL', 60)
+        )
+        paginacion['total_aproximado'] = fila['total'] if fila else 0
+
+    return filas, paginacion
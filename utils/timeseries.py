@@ -0,0 +1,176 @@
+"""
+Series de tiempo para gráficos de tendencia
+-------------------------------------------
+Una serie se resuelve con un único ``GROUP BY`` por período; los períodos
+sin filas se completan con ceros en Python y el crecimiento respecto al
+período anterior también se calcula aquí. Los períodos siguen el
+calendario: semanas ISO (lunes a domingo), meses, trimestres y años
+completos.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from database import execute_query, QuerySpec
+
+__all__ = ['GRANULARIDADES', 'SerieTemporal', 'inicio_periodo', 'sumar_periodos']
+
+GRANULARIDADES = ('dia', 'semana', 'mes', 'trimestre', 'anio')
+
+# Expresión SQL con la fecha de inicio del período ('YYYY-MM-DD')
+_SQL_PERIODO = {
+    'dia': "DATE_FORMAT({c}, '%%Y-%%m-%%d')",
+    'semana': "DATE_FORMAT(DATE_SUB(DATE({c}), INTERVAL WEEKDAY({c}) DAY), '%%Y-%%m-%%d')",
+    'mes': "DATE_FORMAT({c}, '%%Y-%%m-01')",
+    'trimestre': "CONCAT(YEAR({c}), '-', LPAD((QUARTER({c}) - 1) * 3 + 1, 2, '0'), '-01')",
+    'anio': "CONCAT(YEAR({c}), '-01-01')",
+}
+
+_MESES_POR_PERIODO = {'mes': 1, 'trimestre': 3, 'anio': 12}
+
+
+def inicio_periodo(fecha, granularidad):
+    """Primer día del período que contiene ``fecha``"""
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    if granularidad == 'dia':
+        return fecha
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    meses = _MESES_POR_PERIODO[granularidad]
+    return date(fecha.year, (fecha.month - 1) // meses * meses + 1, 1)
+
+
+def sumar_periodos(inicio, granularidad, n):
+    """Inicio del período que está ``n`` períodos después (o antes, si es negativo)"""
+    if granularidad == 'dia':
+        return inicio + timedelta(days=n)
+    if granularidad == 'semana':
+        return inicio + timedelta(weeks=n)
+    indice = inicio.year * 12 + inicio.month - 1 + n * _MESES_POR_PERIODO[granularidad]
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _etiqueta(inicio, granularidad):
+    if granularidad == 'dia':
+        return inicio.isoformat()
+    if granularidad == 'semana':
+        anio, semana, _ = inicio.isocalendar()
+        return f"{anio}-S{semana:02d}"
+    if granularidad == 'mes':
+        return f"{inicio.year}-{inicio.month:02d}"
+    if granularidad == 'trimestre':
+        return f"{inicio.year}-T{(inicio.month - 1) // 3 + 1}"
+    return str(inicio.year)
+
+
+def _numero(valor):
+    if valor is None:
+        return 0
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+class SerieTemporal:
+    """
+    Serie de tiempo de una tabla, agrupada por períodos del calendario
+
+    Args:
+        desde (str): Cláusula FROM con sus JOIN.
+        columna (str): Columna de fecha (DATE o DATETIME) que ubica cada fila.
+        granularidad (str): Uno de ``GRANULARIDADES``.
+        condiciones (list[str]): Filtros del WHERE, unidos con AND.
+        params (list): Parámetros de ``condiciones``.
+        valores (dict): ``clave -> expresión agregada``; por defecto
+            ``{'total': 'COUNT(*)'}``.
+        cantidad (int): Últimos N períodos, terminando en el que contiene
+            ``fin`` (hoy si no se indica).
+        inicio, fin (date): Sin ``cantidad``, los períodos que cubren ese
+            rango. Sin ninguno de los tres, desde el primer hasta el último
+            período con datos.
+        crecimiento (str): Clave de ``valores`` para la que se agregan
+            ``<clave>_anterior`` y ``crecimiento`` (% vs. el período anterior).
+        clave_periodo (str): Nombre del campo con la etiqueta del período.
+
+    ``spec`` es la consulta (para ``batch_select``/``run_parallel``) y
+    ``completar(filas)`` arma la serie; ``ejecutar()`` hace ambas cosas.
+    Cada elemento trae la etiqueta, ``fecha_inicio``, ``fecha_fin`` y los
+    valores (0 en los períodos sin filas).
+    """
+
+    def __init__(self, desde, columna, granularidad, condiciones=(), params=(), valores=None,
+                 cantidad=None, inicio=None, fin=None, crecimiento=None, clave_periodo='periodo'):
+        if granularidad not in GRANULARIDADES:
+            raise ValueError(f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}")
+        if cantidad is not None and cantidad < 1:
+            raise ValueError('cantidad debe ser mayor que 0')
+
+        self.granularidad = granularidad
+        self.valores = valores or {'total': 'COUNT(*)'}
+        self.crecimiento = crecimiento
+        self.clave_periodo = clave_periodo
+
+        # Primer y último período de la serie (None = según los datos)
+        self.primero = self.ultimo = None
+        if cantidad is not None:
+            self.ultimo = inicio_periodo(fin or date.today(), granularidad)
+            self.primero = sumar_periodos(self.ultimo, granularidad, -(cantidad - 1))
+        else:
+            if inicio:
+                self.primero = inicio_periodo(inicio, granularidad)
+            if fin:
+                self.ultimo = inicio_periodo(fin, granularidad)
+
+        condiciones, params = list(condiciones), list(params)
+        if self.primero:
+            # Un período más atrás para el crecimiento del primero
+            desde_fecha = sumar_periodos(self.primero, granularidad, -1) if crecimiento else self.primero
+            condiciones.append(f"{columna} >= %s")
+            params.append(desde_fecha.isoformat())
+        if self.ultimo:
+            condiciones.append(f"{columna} < %s")
+            params.append(sumar_periodos(self.ultimo, granularidad, 1).isoformat())
+
+        where = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+        columnas = ', '.join(f"{expr} AS {clave}" for clave, expr in self.valores.items())
+        sql = f"""
+            SELECT {_SQL_PERIODO[granularidad].format(c=columna)} AS _periodo, {columnas}
+            {desde}
+            {where}
+            GROUP BY _periodo
+        """
+        self.spec = QuerySpec(sql, tuple(params))
+
+    def completar(self, filas):
+        """Arma la serie ordenada a partir de las filas de ``spec``"""
+        por_periodo = {date.fromisoformat(f['_periodo']): f for f in filas or [] if f['_periodo']}
+        primero = self.primero or min(por_periodo, default=None)
+        ultimo = self.ultimo or max(por_periodo, default=None)
+        if primero is None or ultimo is None:
+            return []
+
+        vacia = dict.fromkeys(self.valores, 0)
+        serie = []
+        periodo = primero
+        anterior = por_periodo.get(sumar_periodos(primero, self.granularidad, -1), vacia)
+        while periodo <= ultimo:
+            siguiente = sumar_periodos(periodo, self.granularidad, 1)
+            fila = por_periodo.get(periodo, vacia)
+            item = {
+                self.clave_periodo: _etiqueta(periodo, self.granularidad),
+                'fecha_inicio': periodo.isoformat(),
+                'fecha_fin': (siguiente - timedelta(days=1)).isoformat(),
+            }
+            item.update((clave, _numero(fila[clave])) for clave in self.valores)
+            if self.crecimiento:
+                actual, previo = _numero(fila[self.crecimiento]), _numero(anterior[self.crecimiento])
+                item[f'{self.crecimiento}_anterior'] = previo
+                item['crecimiento'] = round((actual - previo) / previo * 100, 2) if previo else 0
+            serie.append(item)
+            anterior, periodo = fila, siguiente
+        return serie
+
+    def ejecutar(self):
+        """Ejecuta la consulta y retorna la serie completa"""
+        return self.completar(execute_query(self.spec.sql, self.spec.params))
@@ -140,26 +140,27 @@ class ValidacionDatos:
             return {'valido': True, 'mensaje': 'Tabla sin esquema de validación'}
         
         campos_unicos = ValidacionDatos.ESQUEMAS_VALIDACION[tabla]['campos_unicos']
+        valores = {
+            campo: data.get(campo) for campo in campos_unicos
+            if data.get(campo) is not None and data.get(campo) != ''
+        }
         campos_repetidos = []
-        
-        for campo in campos_unicos:
-            valor = data.get(campo)
-            if valor is None or valor == '':
-                continue
-                
-            # Construir query para verificar duplicados
-            query = f"SELECT 1 FROM {tabla} WHERE {campo} = %s AND Activo = 1"
-            params = [valor]
-            
+
+        if valores:
+            # Una sola consulta marca qué campos únicos ya están en uso
+            columnas = ', '.join(f"MAX({campo} = %s) AS {campo}" for campo in valores)
+            condiciones = ' OR '.join(f"{campo} = %s" for campo in valores)
+            query = f"SELECT {columnas} FROM {tabla} WHERE ({condiciones}) AND Activo = 1"
+            params = list(valores.values()) * 2
+
             # Si es una actualización, excluir el registro actual
             if registro_id is not None:
                 query += " AND IdHabitante != %s"
                 params.append(registro_id)
-            
-            existente = execute_query(query, tuple(params), fetch_one=True)
-            if existente:
-                campos_repetidos.append(campo)
-        
+
+            existente = execute_query(query, tuple(params), fetch_one=True) or {}
+            campos_repetidos = [campo for campo in valores if existente.get(campo)]
+
         if campos_repetidos:
             return {
                 'valido': False,